@@ -56,4 +56,7 @@ urlpatterns = [
     
     #Scheduller endpoints
     path('scheduller/', include('apps.scheduller.urls')),
+
+    # Export endpoints
+    path('exports/', include('apps.exports.urls')),
 ]
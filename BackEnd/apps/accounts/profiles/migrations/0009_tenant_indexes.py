@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-16 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0008_alter_profile_country'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['companie', '-created_at'], name='profile_tenant_idx'),
+        ),
+    ]
@@ -1,6 +1,6 @@
 from django.db import models
 from django.conf import settings
-from basemodels.models import BaseAddressWithBaseModel
+from basemodels.models import BaseAddressWithBaseModel, tenant_indexes
 from django.utils.translation import gettext
 from core.constants.choices import COUNTRY_CHOICES, STATE_CHOICES, PROFILE_POSITION_CHOICES, PROFILE_DEPARTMENT_CHOICES
 from typing import Optional
@@ -89,6 +89,7 @@ class Profile(BaseAddressWithBaseModel):
         verbose_name = 'Profile'
         verbose_name_plural = 'Profiles'
         ordering = ['user__first_name', 'user__last_name']
+        indexes = tenant_indexes('profile')
         permissions = [
             ("view_own_profile", "Can view own profile only"),
             ("change_own_profile", "Can edit own profile only"),
@@ -66,8 +66,7 @@ class ProfileNotificationHandler(BaseNotificationHandler):
         if context is None:
             context = self._get_profile_context(profile)
             
-        recipients = self.get_recipients_by_type(*RECIPIENT_TYPES['DEFAULT'])
-        recipient_ids = [str(user.id) for user in recipients]
+        recipient_ids = self.get_recipient_ids(*RECIPIENT_TYPES['DEFAULT'], companie=profile.companie_id)
         
         self.send_to_recipients(
             recipient_ids=recipient_ids,
@@ -89,8 +88,7 @@ class ProfileNotificationHandler(BaseNotificationHandler):
         if context is None:
             context = self._get_profile_context(profile)
             
-        recipients = self.get_recipients_by_type(*RECIPIENT_TYPES['DEFAULT'])
-        recipient_ids = [str(user.id) for user in recipients]
+        recipient_ids = self.get_recipient_ids(*RECIPIENT_TYPES['DEFAULT'], companie=profile.companie_id)
         
         self.send_to_recipients(
             recipient_ids=recipient_ids,
@@ -125,8 +123,7 @@ class ProfileNotificationHandler(BaseNotificationHandler):
         if context is None:
             context = self._get_profile_context(profile)
             
-        recipients = self.get_recipients_by_type(*RECIPIENT_TYPES['DEFAULT'])
-        recipient_ids = [str(user.id) for user in recipients]
+        recipient_ids = self.get_recipient_ids(*RECIPIENT_TYPES['DEFAULT'], companie=profile.companie_id)
         
         self.send_to_recipients(
             recipient_ids=recipient_ids,
@@ -148,8 +145,7 @@ class ProfileNotificationHandler(BaseNotificationHandler):
         if context is None:
             context = self._get_profile_context(profile)
             
-        recipients = self.get_recipients_by_type(*RECIPIENT_TYPES['DEFAULT'])
-        recipient_ids = [str(user.id) for user in recipients]
+        recipient_ids = self.get_recipient_ids(*RECIPIENT_TYPES['DEFAULT'], companie=profile.companie_id)
         
         self.send_to_recipients(
             recipient_ids=recipient_ids,
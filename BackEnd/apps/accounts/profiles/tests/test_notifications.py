@@ -88,7 +88,7 @@ class ProfileNotificationTest(TestCase):
         
         self.profile = self.employee.profile
         
-    @patch('apps.notifications.base.send_notification')
+    @patch('apps.notifications.base.enqueue_notifications')
     def test_profile_created_notification(self, mock_send):
         """Test profile created notification"""
         self.notification_handler.notify_profile_created(self.profile)
@@ -97,7 +97,7 @@ class ProfileNotificationTest(TestCase):
         self.assertEqual(args['notification_type'], 'info')
         self.assertEqual(args['title'], 'New Profile Created')
         
-    @patch('apps.notifications.base.send_notification')
+    @patch('apps.notifications.base.enqueue_notifications')
     def test_profile_updated_notification(self, mock_send):
         """Test profile updated notification"""
         self.notification_handler.notify_profile_updated(self.profile)
@@ -106,7 +106,7 @@ class ProfileNotificationTest(TestCase):
         self.assertEqual(args['notification_type'], 'info')
         self.assertEqual(args['title'], 'Profile Updated')
         
-    @patch('apps.notifications.base.send_notification')
+    @patch('apps.notifications.base.enqueue_notifications')
     def test_profile_deleted_notification(self, mock_send):
         """Test profile deleted notification"""
         self.notification_handler.notify_profile_deleted(self.profile)
@@ -115,7 +115,7 @@ class ProfileNotificationTest(TestCase):
         self.assertEqual(args['notification_type'], 'warning')
         self.assertEqual(args['title'], 'Profile Deleted')
         
-    @patch('apps.notifications.base.send_notification')
+    @patch('apps.notifications.base.enqueue_notifications')
     def test_avatar_updated_notification(self, mock_send):
         """Test avatar updated notification"""
         self.notification_handler.notify_avatar_updated(self.profile)
@@ -124,7 +124,7 @@ class ProfileNotificationTest(TestCase):
         self.assertEqual(args['notification_type'], 'info')
         self.assertEqual(args['title'], 'Profile Avatar Updated')
         
-    @patch('apps.notifications.base.send_notification')
+    @patch('apps.notifications.base.enqueue_notifications')
     def test_bulk_notifications(self, mock_send):
         """Test sending multiple notifications"""
         self.notification_handler.notify_profile_created(self.profile)
@@ -132,7 +132,7 @@ class ProfileNotificationTest(TestCase):
         self.notification_handler.notify_avatar_updated(self.profile)
         self.assertEqual(mock_send.call_count, 3)
         
-    @patch('apps.notifications.base.send_notification')
+    @patch('apps.notifications.base.enqueue_notifications')
     def test_notification_with_error(self, mock_send):
         """Test notification with error handling"""
         mock_send.side_effect = Exception('Test error')
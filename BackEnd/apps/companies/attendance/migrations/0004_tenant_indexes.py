@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-16 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_attendanceregister_acess_code'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendanceregister',
+            index=models.Index(fields=['companie', '-created_at'], name='attendance_register_tenant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timetracking',
+            index=models.Index(fields=['companie', '-created_at'], name='time_tracking_tenant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timetracking',
+            index=models.Index(fields=['employee', 'clock_in'], name='time_tracking_employee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='daystracking',
+            index=models.Index(fields=['companie', '-created_at'], name='days_tracking_tenant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payroll',
+            index=models.Index(fields=['companie', '-created_at'], name='payroll_tenant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payrollhistory',
+            index=models.Index(fields=['companie', '-created_at'], name='payroll_history_tenant_idx'),
+        ),
+    ]
@@ -1,6 +1,6 @@
 from django.db import models
 from apps.companies.employeers.models import Employeer
-from basemodels.models import BaseModel
+from basemodels.models import BaseModel, FieldTrackerMixin, tenant_indexes
 from core.constants.choices import PAYROLL_STATUS_CHOICES
 from django.utils import timezone
 from django.core.exceptions import ValidationError   
@@ -14,6 +14,7 @@ class AttendanceRegister(BaseModel):
         verbose_name = 'Attendance Register'
         verbose_name_plural = 'Attendance Registers'
         ordering = ['-created_at']
+        indexes = tenant_indexes('attendance_register')
         
     def clean(self):
         if self.acess_code is not None and len(str(self.acess_code)) != 6:
@@ -23,7 +24,7 @@ class AttendanceRegister(BaseModel):
     def __str__(self):
         return f"{self.employee.name}"
 
-class TimeTracking(BaseModel):
+class TimeTracking(FieldTrackerMixin, BaseModel):
     register = models.ForeignKey(AttendanceRegister, on_delete=models.CASCADE, related_name='attendance_time_tracking', null=True, blank=True)
     employee = models.ForeignKey(Employeer, on_delete=models.CASCADE, null=True, editable=False, related_name='attendance_time_tracking_employeer')
     clock_in = models.DateTimeField(default=timezone.now)
@@ -33,6 +34,12 @@ class TimeTracking(BaseModel):
         verbose_name = 'Time Tracking'
         verbose_name_plural = 'Time Trackings'
         ordering = ['-created_at']
+        indexes = tenant_indexes('time_tracking') + [
+            models.Index(fields=['employee', 'clock_in'], name='time_tracking_employee_idx'),
+        ]
+    
+    # The payroll signals apply the difference with the previous clock times
+    tracked_fields = ('clock_in', 'clock_out')
     
     @property
     def duration(self):
@@ -56,7 +63,7 @@ class TimeTracking(BaseModel):
             self.employee = self.register.employee
         super().save(*args, **kwargs)
     
-class DaysTracking(BaseModel):
+class DaysTracking(FieldTrackerMixin, BaseModel):
     register = models.ForeignKey(AttendanceRegister, on_delete=models.CASCADE, related_name='attendance_days_tracking', null=True, blank=True)
     employee = models.ForeignKey(Employeer, on_delete=models.CASCADE, null=True, editable=False, related_name='attendance_days_tracking_employeer')
     date = models.DateField(blank=True, null=True)
@@ -67,6 +74,10 @@ class DaysTracking(BaseModel):
         verbose_name = 'Days Tracking'
         verbose_name_plural = 'Days Trackings'
         ordering = ['-created_at']
+        indexes = tenant_indexes('days_tracking')
+    
+    # The payroll signals apply the difference with the previous day and clock times
+    tracked_fields = ('date', 'clock_in', 'clock_out')
     
     @property
     def days_worked(self):
@@ -105,6 +116,7 @@ class Payroll(BaseModel):
         verbose_name = 'Payroll'
         verbose_name_plural = 'Payrolls'
         ordering = ['-created_at']
+        indexes = tenant_indexes('payroll')
     
     @property
     def formatted_hours(self):
@@ -130,4 +142,5 @@ class PayrollHistory(BaseModel):
         verbose_name = 'Payroll History'
         verbose_name_plural = 'Payroll Histories'
         ordering = ['-created_at']
+        indexes = tenant_indexes('payroll_history')
     
\ No newline at end of file
@@ -273,4 +273,27 @@ class PayrollPaymentResponseSerializer(serializers.Serializer):
     payment_details = serializers.DictField(
         help_text="Details of the processed payment",
         child=serializers.JSONField()
-    )
\ No newline at end of file
+    )
+class PayrollBatchPaymentInputSerializer(PayrollPaymentInputSerializer):
+    """Serializer to validate the input of a batch payroll payment"""
+    payroll_ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        allow_empty=False,
+        max_length=2000,
+        help_text="IDs of the payrolls to pay"
+    )
+
+class PayrollBatchPaymentResponseSerializer(serializers.Serializer):
+    """Serializer to standardize the response of the batch payroll payment operation"""
+    total = serializers.IntegerField(help_text="Number of payrolls in the batch")
+    successful = serializers.IntegerField(help_text="Number of payrolls paid")
+    failed = serializers.IntegerField(help_text="Number of payrolls refused")
+    details = serializers.ListField(
+        help_text="Result of each payroll, in the order of the request",
+        child=serializers.DictField(child=serializers.CharField())
+    )
+    payment_method = serializers.CharField()
+    payment_reference = serializers.CharField(allow_null=True)
+    payment_date = serializers.DateField()
+    processed_by = serializers.CharField()
+    processed_at = serializers.DateTimeField()
@@ -0,0 +1,290 @@
+import datetime
+import logging
+from collections import namedtuple
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+from ..models import TimeTracking, DaysTracking, Payroll
+
+logger = logging.getLogger(__name__)
+
+CENTS = Decimal('0.01')
+
+# What one closed tracking entry adds to its payroll: the days it covers,
+# its hours and, for hourly workers, its amount
+Contribution = namedtuple('Contribution', ['dates', 'hours', 'amount'])
+
+
+def _to_datetime(value):
+    if isinstance(value, str):
+        return datetime.datetime.fromisoformat(value)
+    return value
+
+
+def _to_date(value):
+    if isinstance(value, str):
+        return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+    return value
+
+
+def _to_time(value):
+    if isinstance(value, str):
+        if 'T' in value:  # ISO format
+            return datetime.datetime.fromisoformat(value).time()
+        return datetime.time.fromisoformat(value)
+    return value
+
+
+def _hours_between(start, end):
+    return Decimal(str((end - start).total_seconds() / 3600))
+
+
+def _days_spanned(start, end):
+    """Every calendar day from ``start`` to ``end``, both included"""
+    days = set()
+    current = start
+    while current <= end:
+        days.add(current)
+        current += datetime.timedelta(days=1)
+    return days
+
+
+class PayrollAccumulator:
+    """
+    Keeps the totals of the pending payrolls up to date from the tracking
+    entries, one entry at a time.
+
+    Saving an entry applies the difference between what the entry contributed
+    before the save and what it contributes now, as ``F()`` updates of the
+    payroll, so a clock-out costs the same at the end of a period as at its
+    start. Each entry's hours and amount are rounded to cents before they are
+    added, which keeps the running totals equal to a recompute; ``recompute``
+    and ``reconcile`` rebuild the totals from the entries to fix any drift.
+    """
+
+    @staticmethod
+    def employee_rate(employee):
+        return Decimal(str(employee.rate or 0))
+
+    @classmethod
+    def hourly_contribution(cls, clock_in, clock_out, rate):
+        """Contribution of a time tracking entry, None while it is open"""
+        if not clock_in or not clock_out:
+            return None
+        clock_in, clock_out = _to_datetime(clock_in), _to_datetime(clock_out)
+        hours = _hours_between(clock_in, clock_out)
+        return Contribution(
+            dates=_days_spanned(clock_in.date(), clock_out.date()),
+            hours=hours.quantize(CENTS),
+            amount=(hours * rate).quantize(CENTS),
+        )
+
+    @staticmethod
+    def daily_contribution(date, clock_in, clock_out):
+        """Contribution of a days tracking entry, None while it is open"""
+        if not date or not clock_in or not clock_out:
+            return None
+        date = _to_date(date)
+        hours = _hours_between(
+            datetime.datetime.combine(date, _to_time(clock_in)),
+            datetime.datetime.combine(date, _to_time(clock_out))
+        )
+        return Contribution(dates={date}, hours=hours.quantize(CENTS), amount=None)
+
+    @staticmethod
+    def _covered_hourly(entry, dates, period_start):
+        """The days among ``dates`` covered by the other closed time entries of the employee"""
+        others = TimeTracking.objects.filter(
+            employee_id=entry.employee_id,
+            clock_out__isnull=False,
+            clock_in__date__gte=period_start,
+            clock_in__date__lte=max(dates),
+            clock_out__date__gte=min(dates),
+        ).exclude(pk=entry.pk).values_list('clock_in', 'clock_out')
+        covered = set()
+        for clock_in, clock_out in others:
+            covered |= _days_spanned(clock_in.date(), clock_out.date()) & dates
+        return covered
+
+    @staticmethod
+    def _covered_daily(entry, dates, period_start):
+        """The days among ``dates`` covered by the other closed days entries of the employee"""
+        return set(
+            DaysTracking.objects.filter(
+                employee_id=entry.employee_id,
+                clock_in__isnull=False,
+                clock_out__isnull=False,
+                date__in=dates,
+                date__gte=period_start,
+            ).exclude(pk=entry.pk).values_list('date', flat=True)
+        )
+
+    @classmethod
+    def apply(cls, entry, old, new, hourly):
+        """
+        Apply the change of an entry's contribution to the pending payroll of
+        its employee, creating the payroll for the first closed entry.
+
+        Args:
+            entry: The TimeTracking or DaysTracking saved or deleted
+            old: Contribution before the change, None if the entry was open or new
+            new: Contribution after the change, None if the entry is open or deleted
+            hourly: Whether the entry is a time tracking of an hourly worker
+
+        Returns:
+            Payroll: The payroll updated or created, None if nothing changed
+        """
+        if old == new:
+            return None
+
+        employee = entry.employee
+        rate = cls.employee_rate(employee)
+        payroll = Payroll.objects.filter(employee=employee, status='Pending').first()
+
+        if payroll is None:
+            if new is None:
+                return None
+            payroll = Payroll.objects.create(
+                employee=employee,
+                register=entry.register,
+                period_start=min(new.dates),
+                period_end=max(new.dates),
+                days_worked=len(new.dates),
+                hours_worked=new.hours,
+                amount=new.amount if hourly else rate * len(new.dates),
+                status='Pending',
+            )
+            logger.info(f"[PAYROLL ACCUMULATOR] Payroll {payroll.id} created for {employee.name} from {payroll.period_start}")
+            return payroll
+
+        period_start = min(payroll.period_start, min(new.dates)) if new else payroll.period_start
+        # An entry from before the period was paid with an earlier payroll
+        if old is not None and min(old.dates) < payroll.period_start:
+            old = None
+        if old == new:
+            return None
+
+        old_dates = old.dates if old else set()
+        new_dates = new.dates if new else set()
+        changed = old_dates ^ new_dates
+        if changed:
+            covered = (cls._covered_hourly if hourly else cls._covered_daily)(entry, changed, period_start)
+            days_delta = len(new_dates - old_dates - covered) - len(old_dates - new_dates - covered)
+        else:
+            days_delta = 0
+
+        hours_delta = (new.hours if new else 0) - (old.hours if old else 0)
+        if hourly:
+            amount_delta = (new.amount if new else 0) - (old.amount if old else 0)
+        else:
+            amount_delta = rate * days_delta
+
+        changes = {
+            'days_worked': Coalesce(F('days_worked'), 0) + days_delta,
+            'hours_worked': Coalesce(F('hours_worked'), Value(Decimal('0.00'))) + hours_delta,
+            'amount': F('amount') + amount_delta,
+            'updated_at': timezone.now(),
+        }
+        if new:
+            changes['period_start'] = Least(F('period_start'), Value(min(new.dates)))
+            changes['period_end'] = Greatest(F('period_end'), Value(max(new.dates)))
+        Payroll.objects.filter(pk=payroll.pk).update(**changes)
+
+        logger.info(
+            f"[PAYROLL ACCUMULATOR] Payroll {payroll.id} of {employee.name} updated by "
+            f"{days_delta} days, {hours_delta} hours, {amount_delta} amount"
+        )
+        return payroll
+
+    @classmethod
+    def totals(cls, payroll):
+        """
+        Compute the totals of a payroll from the closed entries of its period.
+
+        Returns:
+            dict: days_worked, hours_worked and amount
+        """
+        employee = payroll.employee
+        rate = cls.employee_rate(employee)
+        days, hours, amount = set(), Decimal('0.00'), Decimal('0.00')
+
+        if employee.payment_type == 'Day':
+            entries = DaysTracking.objects.filter(
+                employee=employee,
+                date__gte=payroll.period_start,
+                date__lte=payroll.period_end,
+                clock_in__isnull=False,
+                clock_out__isnull=False,
+            ).values_list('date', 'clock_in', 'clock_out')
+            for entry in entries.iterator():
+                contribution = cls.daily_contribution(*entry)
+                days |= contribution.dates
+                hours += contribution.hours
+            amount = rate * len(days)
+        else:
+            entries = TimeTracking.objects.filter(
+                employee=employee,
+                clock_in__date__gte=payroll.period_start,
+                clock_in__date__lte=payroll.period_end,
+                clock_out__isnull=False,
+            ).values_list('clock_in', 'clock_out')
+            for entry in entries.iterator():
+                contribution = cls.hourly_contribution(*entry, rate)
+                days |= contribution.dates
+                hours += contribution.hours
+                amount += contribution.amount
+
+        return {'days_worked': len(days), 'hours_worked': hours, 'amount': amount.quantize(CENTS)}
+
+    @classmethod
+    def recompute(cls, payroll):
+        """
+        Rebuild the totals of a payroll from its entries.
+
+        Returns:
+            bool: Whether the stored totals had drifted
+        """
+        totals = cls.totals(payroll)
+        drifted = any(
+            (getattr(payroll, field) or 0) != value for field, value in totals.items()
+        )
+        if drifted:
+            logger.warning(
+                f"[PAYROLL ACCUMULATOR] Payroll {payroll.id} drifted: stored "
+                f"{payroll.days_worked} days, {payroll.hours_worked} hours, {payroll.amount} amount, "
+                f"entries {totals['days_worked']} days, {totals['hours_worked']} hours, {totals['amount']} amount"
+            )
+            for field, value in totals.items():
+                setattr(payroll, field, value)
+            payroll.updated_at = timezone.now()
+        return drifted
+
+    @classmethod
+    def reconcile(cls, payroll_ids=None, batch_size=200):
+        """
+        Recompute the pending payrolls, or only ``payroll_ids``, fixing any drift.
+
+        Payrolls are processed in batches, each one locked while its totals are
+        recomputed so concurrent clock-outs can not interleave with the correction.
+
+        Returns:
+            int: Number of payrolls corrected
+        """
+        all_ids = Payroll.objects.filter(status='Pending').order_by('pk').values_list('pk', flat=True)
+        if payroll_ids is not None:
+            all_ids = all_ids.filter(pk__in=payroll_ids)
+        all_ids = list(all_ids)
+
+        corrected = 0
+        for start in range(0, len(all_ids), batch_size):
+            batch = all_ids[start:start + batch_size]
+            with transaction.atomic():
+                payrolls = Payroll.objects.select_for_update().select_related('employee').filter(pk__in=batch)
+                drifted = [payroll for payroll in payrolls if cls.recompute(payroll)]
+                Payroll.objects.bulk_update(drifted, ['days_worked', 'hours_worked', 'amount', 'updated_at'])
+            corrected += len(drifted)
+
+        logger.info(f"[PAYROLL ACCUMULATOR] Reconciled {len(all_ids)} pending payrolls, corrected {corrected}")
+        return corrected
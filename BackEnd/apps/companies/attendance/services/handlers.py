@@ -3,7 +3,9 @@ import logging
 from ..models import AttendanceRegister, TimeTracking, DaysTracking, Payroll, PayrollHistory
 from apps.companies.employeers.models import Employeer
 from django.utils import timezone
+from core.actor import get_employeer
 import datetime
+import uuid
 from django.core.exceptions import ValidationError
 from .validators import AttendanceBusinessValidator
 
@@ -443,6 +445,9 @@ class PayrollService:
     Service class for handling payroll payment processing operations.
     """
     
+    # Rows per statement of the batch payment writes
+    BATCH_SIZE = 500
+    
     def __init__(self):
         self.validator = AttendanceBusinessValidator()
     
@@ -556,13 +561,19 @@ class PayrollService:
     def batch_process_payments(self, payroll_ids, payment_data, user):
         """Process payments for multiple payrolls in batch
         
+        The payrolls are locked with a single ``select_for_update`` and paid with
+        set-based writes: one ``bulk_update`` of their status, then one
+        ``bulk_create`` each for the payment histories and for the register and
+        zeroed payroll that start the next period of every employee paid. The
+        number of queries does not grow with the number of payrolls.
+        
         Args:
             payroll_ids: List of payroll IDs to process
             payment_data (dict): Common payment details
             user: User processing the payment
             
         Returns:
-            dict: Summary of batch processing results
+            dict: Summary of batch processing results, with one detail per payroll
             
         Raises:
             ValidationError: If validation fails
@@ -570,6 +581,10 @@ class PayrollService:
         try:
             # Validate batch data
             self.validator.validate_payment_data(payment_data)
+            payment_date = payment_data.get('payment_date') or timezone.now().date()
+            if isinstance(payment_date, str):
+                payment_date = datetime.date.fromisoformat(payment_date)
+            processor = get_employeer(user)
             
             results = {
                 'total': len(payroll_ids),
@@ -578,23 +593,113 @@ class PayrollService:
                 'details': []
             }
             
-            # Process each payroll
+            # Lock every payroll of the batch at once, in a stable order
+            keys = {}
             for payroll_id in payroll_ids:
                 try:
-                    result = self.process_payment(payroll_id, payment_data, user)
-                    results['successful'] += 1
-                    results['details'].append({
-                        'payroll_id': payroll_id,
-                        'status': 'success',
-                        'payment_id': str(result['payment_history'].id)
-                    })
-                except Exception as e:
+                    keys[payroll_id] = uuid.UUID(str(payroll_id))
+                except ValueError:
+                    keys[payroll_id] = None
+            payrolls = {
+                payroll.pk: payroll
+                for payroll in Payroll.objects.select_for_update(of=('self',))
+                .select_related('employee', 'register')
+                .filter(pk__in=[key for key in keys.values() if key])
+                .order_by('pk')
+            }
+            
+            payable, details, seen = [], [], set()
+            for payroll_id in payroll_ids:
+                payroll = payrolls.get(keys[payroll_id])
+                try:
+                    if payroll is None:
+                        raise ValidationError(f"Payroll not found: {payroll_id}")
+                    if payroll.pk in seen:
+                        raise ValidationError(f"Payroll {payroll.pk} appears more than once in the batch")
+                    if payroll.employee.companie_id != processor.companie_id:
+                        raise ValidationError("Cannot access employee from a different company")
+                    self.validator.validate_payroll_can_be_paid(payroll)
+                except ValidationError as e:
+                    details.append({'payroll_id': str(payroll_id), 'status': 'failed', 'error': ' '.join(e.messages)})
+                    continue
+                seen.add(payroll.pk)
+                payable.append(payroll)
+                details.append({'payroll_id': str(payroll_id), 'status': 'success', 'payroll': payroll})
+            
+            now = timezone.now()
+            today = now.date()
+            audit = {'created_by': processor, 'updated_by': processor}
+            
+            # Mark the payrolls paid; bulk_update sends no signal, the histories are written below
+            for payroll in payable:
+                payroll.status = 'Paid'
+                payroll.updated_by = processor
+                payroll.updated_at = now
+            Payroll.objects.bulk_update(payable, ['status', 'updated_by', 'updated_at'], batch_size=self.BATCH_SIZE)
+            
+            histories = PayrollHistory.objects.bulk_create([
+                PayrollHistory(
+                    employee=payroll.employee,
+                    register=payroll.register,
+                    payroll=payroll,
+                    amount_paid=payroll.amount,
+                    payment_date=payroll.period_end,
+                    companie_id=payroll.employee.companie_id,
+                    **audit
+                )
+                for payroll in payable
+            ], batch_size=self.BATCH_SIZE)
+            history_by_payroll = {history.payroll_id: history for history in histories}
+            
+            # COMPLETE RESET: one new register and zeroed payroll per employee paid
+            paid_employees = {}
+            for payroll in payable:
+                paid_employees.setdefault(payroll.employee_id, payroll)
+            new_registers = {
+                employee_id: AttendanceRegister(
+                    employee_id=employee_id,
+                    companie_id=payroll.register.companie_id if payroll.register else payroll.employee.companie_id,
+                    **audit
+                )
+                for employee_id, payroll in paid_employees.items()
+            }
+            AttendanceRegister.objects.bulk_create(new_registers.values(), batch_size=self.BATCH_SIZE)
+            new_payrolls = {
+                employee_id: Payroll(
+                    employee_id=employee_id,
+                    register=register,
+                    period_start=today,
+                    period_end=today,
+                    days_worked=0,
+                    hours_worked=0,
+                    amount=0,
+                    status='Pending',
+                    companie_id=register.companie_id,
+                    **audit
+                )
+                for employee_id, register in new_registers.items()
+            }
+            Payroll.objects.bulk_create(new_payrolls.values(), batch_size=self.BATCH_SIZE)
+            
+            for detail in details:
+                payroll = detail.pop('payroll', None)
+                if payroll is None:
                     results['failed'] += 1
-                    results['details'].append({
-                        'payroll_id': payroll_id,
-                        'status': 'failed',
-                        'error': str(e)
-                    })
+                    continue
+                results['successful'] += 1
+                detail.update({
+                    'payment_id': str(history_by_payroll[payroll.pk].id),
+                    'employee_id': str(payroll.employee_id),
+                    'employee_name': payroll.employee.name,
+                    'amount': str(payroll.amount),
+                    'new_payroll_id': str(new_payrolls[payroll.employee_id].id),
+                })
+            results['details'] = details
+            results['payment_method'] = payment_data.get('payment_method')
+            results['payment_reference'] = payment_data.get('payment_reference')
+            results['payment_date'] = payment_date.isoformat()
+            results['processed_by'] = processor.name
+            results['processed_at'] = now.isoformat()
             
             logger.info(f"[PAYROLL SERVICE] - Batch payment processed: {results['successful']} successful, {results['failed']} failed")
             
@@ -602,4 +707,4 @@ class PayrollService:
             
         except Exception as e:
             logger.error(f"[PAYROLL SERVICE] - Error in batch payment processing: {str(e)}", exc_info=True)
-            raise ValidationError(f"Error in batch payment processing: {str(e)}")
\ No newline at end of file
+            raise ValidationError(f"Error in batch payment processing: {str(e)}")
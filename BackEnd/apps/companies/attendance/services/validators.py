@@ -269,7 +269,7 @@ class AttendanceBusinessValidator:
         if 'payment_date' in payment_data:
             try:
                 if isinstance(payment_data['payment_date'], str):
-                    datetime.strptime(payment_data['payment_date'], '%Y-%m-%d').date()
+                    datetime.datetime.strptime(payment_data['payment_date'], '%Y-%m-%d').date()
             except ValueError:
                 raise ValidationError("Invalid payment date format. Use YYYY-MM-DD")
 
@@ -0,0 +1,26 @@
+from celery import shared_task
+from core.actor import actor_context
+from .services.accumulator import PayrollAccumulator
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(
+    name='reconcile_pending_payrolls',
+    autoretry_for=(Exception,),
+    max_retries=3,
+    retry_backoff=True
+)
+@actor_context
+def reconcile_pending_payrolls(payroll_ids=None):
+    """
+    Recompute the pending payrolls from their tracking entries, fixing any drift
+    of the totals maintained by the clock-out signals.
+    """
+    try:
+        corrected = PayrollAccumulator.reconcile(payroll_ids)
+        return f"Corrected {corrected} payrolls"
+    except Exception as e:
+        logger.error(f"Error in reconcile_pending_payrolls task: {str(e)}")
+        raise
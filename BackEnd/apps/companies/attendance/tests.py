@@ -1,3 +1,257 @@
+import datetime
+import uuid
+from decimal import Decimal
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from apps.accounts.models import User
+from apps.companies.models import Companie
+from apps.companies.employeers.models import Employeer
+from .models import AttendanceRegister, TimeTracking, DaysTracking, Payroll, PayrollHistory
+from .services.accumulator import PayrollAccumulator
+from .services.handlers import PayrollService
 
-# Create your tests here.
+
+class PayrollAccumulatorTests(TestCase):
+    """Tests for the payroll totals maintained from each tracking entry"""
+
+    def setUp(self):
+        self.company = Companie.objects.create(name='Payroll Company', type='Headquarters')
+        self.start = datetime.datetime(2026, 3, 2, 8, 0)
+
+    def create_employee(self, email, payment_type, rate):
+        user = User.objects.create_user(
+            password='emp123',
+            email=email,
+            first_name='Payroll',
+            last_name='Employee',
+            user_type='Employee'
+        )
+        employee = Employeer.objects.get(user=user)
+        employee.companie = self.company
+        employee.payment_type = payment_type
+        employee.rate = Decimal(rate)
+        employee.save()
+        return employee, AttendanceRegister.objects.create(employee=employee, companie=self.company)
+
+    def clock(self, register, day, start_hour, hours):
+        clock_in = self.start + datetime.timedelta(days=day, hours=start_hour - 8)
+        entry = TimeTracking.objects.create(register=register, clock_in=clock_in)
+        entry.clock_out = clock_in + datetime.timedelta(hours=hours)
+        entry.save(update_fields=['clock_out'])
+        return entry
+
+    def assertMatchesRecompute(self, payroll):
+        payroll.refresh_from_db()
+        self.assertEqual(
+            PayrollAccumulator.totals(payroll),
+            {'days_worked': payroll.days_worked, 'hours_worked': payroll.hours_worked, 'amount': payroll.amount}
+        )
+
+    def test_hourly_totals_are_accumulated_per_clock_out(self):
+        employee, register = self.create_employee('hourly@test.com', 'Hour', '12.50')
+        self.clock(register, 0, 8, 4)
+        self.clock(register, 0, 13, 3.5)
+        # A night shift covering two days
+        self.clock(register, 1, 22, 6)
+
+        payroll = Payroll.objects.get(employee=employee, status='Pending')
+        self.assertEqual(payroll.days_worked, 3)
+        self.assertEqual(payroll.hours_worked, Decimal('13.50'))
+        self.assertEqual(payroll.amount, Decimal('168.75'))
+        self.assertEqual((payroll.period_start, payroll.period_end), (datetime.date(2026, 3, 2), datetime.date(2026, 3, 4)))
+        self.assertMatchesRecompute(payroll)
+
+    def test_clock_out_cost_does_not_grow_with_the_period(self):
+        _, register = self.create_employee('flat@test.com', 'Hour', '10.00')
+
+        def clock_out_queries(day):
+            entry = TimeTracking.objects.create(register=register, clock_in=self.start + datetime.timedelta(days=day))
+            entry.clock_out = entry.clock_in + datetime.timedelta(hours=8)
+            with CaptureQueriesContext(connection) as queries:
+                entry.save(update_fields=['clock_out'])
+            return len(queries)
+
+        clock_out_queries(0)
+        early = clock_out_queries(1)
+        for day in range(2, 25):
+            clock_out_queries(day)
+        late = clock_out_queries(25)
+
+        self.assertEqual(early, late)
+        payroll = Payroll.objects.get(status='Pending', employee=register.employee)
+        self.assertEqual(payroll.days_worked, 26)
+        self.assertMatchesRecompute(payroll)
+
+    def test_edits_and_deletes_apply_their_difference(self):
+        employee, register = self.create_employee('edits@test.com', 'Hour', '20.00')
+        first = self.clock(register, 0, 8, 4)
+        second = self.clock(register, 0, 13, 4)
+        third = self.clock(register, 1, 8, 2)
+
+        first.clock_out = first.clock_in + datetime.timedelta(hours=5)
+        first.save()
+        # The day is still covered by the first entry
+        second.delete()
+        third.delete()
+
+        payroll = Payroll.objects.get(employee=employee, status='Pending')
+        self.assertEqual((payroll.days_worked, payroll.hours_worked, payroll.amount), (1, Decimal('5.00'), Decimal('100.00')))
+        self.assertMatchesRecompute(payroll)
+
+    def test_daily_totals_count_distinct_days(self):
+        employee, register = self.create_employee('daily@test.com', 'Day', '80.00')
+        for day in range(3):
+            entry = DaysTracking.objects.create(
+                register=register, date=self.start.date() + datetime.timedelta(days=day), clock_in=datetime.time(8)
+            )
+            entry.clock_out = datetime.time(16, 30)
+            entry.save(update_fields=['clock_out'])
+        entry.date = self.start.date() + datetime.timedelta(days=5)
+        entry.save()
+
+        payroll = Payroll.objects.get(employee=employee, status='Pending')
+        self.assertEqual((payroll.days_worked, payroll.hours_worked, payroll.amount), (3, Decimal('25.50'), Decimal('240.00')))
+        self.assertEqual(payroll.period_end, self.start.date() + datetime.timedelta(days=5))
+        self.assertMatchesRecompute(payroll)
+
+    def test_reconcile_fixes_drifted_payrolls(self):
+        employee, register = self.create_employee('drift@test.com', 'Hour', '10.00')
+        self.clock(register, 0, 8, 8)
+        self.clock(register, 1, 8, 8)
+        payroll = Payroll.objects.get(employee=employee, status='Pending')
+        Payroll.objects.filter(pk=payroll.pk).update(days_worked=7, amount=Decimal('1.00'))
+
+        self.assertEqual(PayrollAccumulator.reconcile(), 1)
+        payroll.refresh_from_db()
+        self.assertEqual((payroll.days_worked, payroll.hours_worked, payroll.amount), (2, Decimal('16.00'), Decimal('160.00')))
+        self.assertEqual(PayrollAccumulator.reconcile(), 0)
+
+
+class PayrollBatchPaymentTests(APITestCase):
+    """Tests for the set-based batch payroll payments"""
+
+    def setUp(self):
+        self.company = Companie.objects.create(name='Batch Company', type='Headquarters')
+        self.other_company = Companie.objects.create(name='Other Batch Company', type='Headquarters')
+        self.manager_user = User.objects.create_user(
+            password='manager123',
+            email='batch_manager@test.com',
+            first_name='Batch',
+            last_name='Manager',
+            user_type='Manager'
+        )
+        manager = Employeer.objects.get(user=self.manager_user)
+        manager.companie = self.company
+        manager.save()
+        self.payment_data = {'payment_method': 'cash', 'payment_date': datetime.date(2026, 3, 31)}
+
+    def create_payrolls(self, count, companie=None):
+        companie = companie or self.company
+        employees = Employeer.objects.bulk_create([
+            Employeer(name=f'Batch Employee {index}', companie=companie, payment_type='Hour', rate=Decimal('15.00'))
+            for index in range(count)
+        ])
+        registers = AttendanceRegister.objects.bulk_create([
+            AttendanceRegister(employee=employee, companie=companie) for employee in employees
+        ])
+        return Payroll.objects.bulk_create([
+            Payroll(
+                employee=employee,
+                register=register,
+                period_start=datetime.date(2026, 3, 1),
+                period_end=datetime.date(2026, 3, 31),
+                days_worked=20,
+                hours_worked=Decimal('160.00'),
+                amount=Decimal('2400.00'),
+                companie=companie
+            )
+            for employee, register in zip(employees, registers)
+        ])
+
+    def pay(self, payrolls):
+        return PayrollService().batch_process_payments(
+            [str(payroll.pk) for payroll in payrolls], self.payment_data, self.manager_user
+        )
+
+    def test_batch_pays_and_reports_every_payroll(self):
+        payrolls = self.create_payrolls(3)
+        foreign = self.create_payrolls(1, self.other_company)[0]
+        empty = self.create_payrolls(1)[0]
+        Payroll.objects.filter(pk=empty.pk).update(amount=0)
+        missing = uuid.uuid4()
+
+        results = PayrollService().batch_process_payments(
+            [str(payrolls[0].pk), str(missing), str(foreign.pk), str(payrolls[1].pk),
+             str(empty.pk), str(payrolls[2].pk), str(payrolls[0].pk)],
+            self.payment_data,
+            self.manager_user
+        )
+
+        self.assertEqual((results['total'], results['successful'], results['failed']), (7, 3, 4))
+        self.assertEqual(
+            [detail['status'] for detail in results['details']],
+            ['success', 'failed', 'failed', 'success', 'failed', 'success', 'failed']
+        )
+        self.assertIn('not found', results['details'][1]['error'])
+        self.assertIn('different company', results['details'][2]['error'])
+        self.assertIn('more than once', results['details'][6]['error'])
+
+        for payroll, detail in zip(payrolls, [results['details'][i] for i in (0, 3, 5)]):
+            payroll.refresh_from_db()
+            self.assertEqual(payroll.status, 'Paid')
+            history = PayrollHistory.objects.get(payroll=payroll)
+            self.assertEqual(str(history.id), detail['payment_id'])
+            self.assertEqual(history.amount_paid, Decimal('2400.00'))
+            new_payroll = Payroll.objects.get(pk=detail['new_payroll_id'])
+            self.assertEqual((new_payroll.status, new_payroll.amount), ('Pending', 0))
+            self.assertNotEqual(new_payroll.register_id, payroll.register_id)
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.status, 'Pending')
+        self.assertFalse(PayrollHistory.objects.filter(payroll__in=[foreign, empty]).exists())
+
+    def test_batch_queries_do_not_grow_with_payrolls(self):
+        """Benchmark: paying 60 payrolls costs the same queries as paying 5"""
+        small = self.create_payrolls(5)
+        large = self.create_payrolls(60)
+        with CaptureQueriesContext(connection) as small_queries:
+            self.pay(small)
+        with CaptureQueriesContext(connection) as large_queries:
+            self.pay(large)
+
+        self.assertEqual(len(small_queries), len(large_queries))
+        self.assertLessEqual(len(large_queries), 10)
+
+    def test_month_end_run_of_500_payrolls(self):
+        """Benchmark: a 500 employee payroll run stays within the batch query budget"""
+        payrolls = self.create_payrolls(500)
+        with CaptureQueriesContext(connection) as queries:
+            results = self.pay(payrolls)
+
+        self.assertEqual(results['successful'], 500)
+        self.assertEqual(Payroll.objects.filter(pk__in=[p.pk for p in payrolls], status='Paid').count(), 500)
+        self.assertEqual(PayrollHistory.objects.filter(payroll__in=payrolls).count(), 500)
+        # The bulk writes are split by the backend's parameter limit, the reads stay fixed
+        reads = [query for query in queries if not query['sql'].startswith(('INSERT', 'UPDATE'))]
+        self.assertLessEqual(len(reads), 10)
+        self.assertLessEqual(len(queries), 40)
+
+    def test_batch_payment_endpoint(self):
+        payrolls = self.create_payrolls(2)
+        self.client.force_authenticate(self.manager_user)
+        url = reverse('payroll_batch_payment')
+
+        response = self.client.post(url, {
+            'payroll_ids': [str(payroll.pk) for payroll in payrolls],
+            'payment_method': 'bank_transfer',
+            'payment_reference': 'TRX-1',
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['successful'], 2)
+        self.assertEqual(response.data['payment_reference'], 'TRX-1')
+
+        response = self.client.post(url, {'payroll_ids': [], 'payment_method': 'cash'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
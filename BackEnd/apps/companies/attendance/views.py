@@ -4,7 +4,9 @@ from .serializers import (
     AttendanceClockInRequestSerializer, 
     AttendanceClockInOutResponseSerializer,
     PayrollPaymentInputSerializer,
-    PayrollPaymentResponseSerializer
+    PayrollPaymentResponseSerializer,
+    PayrollBatchPaymentInputSerializer,
+    PayrollBatchPaymentResponseSerializer
 )
 from django.db import transaction
 from rest_framework.generics import (
@@ -18,6 +20,7 @@ from rest_framework import status
 from .services.handlers import AttendanceService, PayrollService
 from .services.validators import AttendanceBusinessValidator
 from rest_framework.exceptions import ValidationError
+from django.core.exceptions import ValidationError as DjangoValidationError
 import logging
 from drf_spectacular.utils import (
     extend_schema, extend_schema_view,
@@ -564,4 +567,52 @@ class PayrollPaymentView(GenericAPIView, AttendanceBase):
             return Response(
                 {'detail': 'Internal server error'},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            )
+
+
+@extend_schema_view(
+    post=extend_schema(
+        tags=["Companies - Attendance"],
+        summary="Process a batch of payroll payments",
+        description="""
+        Pay many pending payrolls at once. Payrolls that can not be paid are
+        reported as failed in the details, the others are paid.
+        """,
+        request=PayrollBatchPaymentInputSerializer,
+        responses={
+            200: PayrollBatchPaymentResponseSerializer,
+            400: {
+                "description": "Bad Request",
+                "type": "object",
+                "properties": {
+                    "detail": {
+                        "type": "string",
+                        "example": "Invalid payment method"
+                    }
+                }
+            }
+        }
+    )
+)
+class PayrollBatchPaymentView(GenericAPIView, AttendanceBase):
+    permission_classes = [IsAuthenticated]
+    serializer_class = PayrollBatchPaymentInputSerializer
+    
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        payment_data = dict(serializer.validated_data)
+        payroll_ids = payment_data.pop('payroll_ids')
+        
+        try:
+            results = PayrollService().batch_process_payments(payroll_ids, payment_data, request.user)
+        except DjangoValidationError as e:
+            logger.warning(f"[ATTENDANCE VIEWS] - Validation error processing batch payment: {str(e)}")
+            return Response(
+                {'detail': ' '.join(e.messages)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        logger.info(f"[ATTENDANCE VIEWS] - Batch payroll payment processed: "
+                    f"{results['successful']} successful, {results['failed']} failed")
+        return Response(results, status=status.HTTP_200_OK)
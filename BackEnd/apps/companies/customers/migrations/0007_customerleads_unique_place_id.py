@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-16 17:03
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def clear_blank_and_duplicate_place_ids(apps, schema_editor):
+    """Blank place ids become null, duplicates keep the place id on their oldest lead only"""
+    CustomerLeads = apps.get_model('customers', 'CustomerLeads')
+    CustomerLeads.objects.filter(place_id='').update(place_id=None)
+    duplicates = (
+        CustomerLeads.objects.exclude(place_id=None)
+        .values('companie_id', 'place_id')
+        .annotate(total=Count('id'))
+        .filter(total__gt=1)
+    )
+    for duplicate in duplicates:
+        leads = CustomerLeads.objects.filter(
+            companie_id=duplicate['companie_id'], place_id=duplicate['place_id']
+        ).order_by('created_at', 'id')
+        CustomerLeads.objects.filter(pk__in=list(leads.values_list('pk', flat=True)[1:])).update(place_id=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0004_alter_companie_country'),
+        ('customers', '0006_alter_customer_country_and_more'),
+        ('employeers', '0004_alter_employeer_country_alter_employeer_payment_type'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customerleads',
+            name='place_id',
+            field=models.CharField(blank=True, help_text='Google place id, null when the search gave none', max_length=255, null=True),
+        ),
+        migrations.RunPython(clear_blank_and_duplicate_place_ids, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='customerleads',
+            constraint=models.UniqueConstraint(fields=('companie', 'place_id'), name='unique_customer_lead_place_per_companie'),
+        ),
+    ]
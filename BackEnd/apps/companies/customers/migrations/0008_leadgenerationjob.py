@@ -0,0 +1,46 @@
+# Generated by Django 5.2 on 2026-10-16 17:40
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0004_alter_companie_country'),
+        ('customers', '0007_customerleads_unique_place_id'),
+        ('employeers', '0004_alter_employeer_country_alter_employeer_payment_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadGenerationJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, null=True)),
+                ('query', models.CharField(help_text='Search term', max_length=255)),
+                ('location', models.CharField(blank=True, default='', help_text='Location to search from', max_length=255)),
+                ('limit', models.PositiveIntegerField(blank=True, help_text='Maximum number of results stored', null=True)),
+                ('include_all_pages', models.BooleanField(default=False, help_text='Whether every page of the search is fetched')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', help_text='The status of the job', max_length=20)),
+                ('pages_total', models.PositiveIntegerField(default=0, help_text='Number of pages of the search')),
+                ('pages_fetched', models.PositiveIntegerField(default=0, help_text='Number of pages fetched')),
+                ('total_results', models.PositiveIntegerField(default=0, help_text='Number of results stored')),
+                ('new_leads', models.PositiveIntegerField(default=0, help_text='Number of leads created')),
+                ('existing_leads', models.PositiveIntegerField(default=0, help_text='Number of leads already known')),
+                ('error', models.TextField(blank=True, default='', help_text='The error of a failed job')),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('companie', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_companie', to='companies.companie')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created_by', to='employeers.employeer')),
+                ('updated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated_by', to='employeers.employeer')),
+            ],
+            options={
+                'verbose_name': 'Lead Generation Job',
+                'verbose_name_plural': 'Lead Generation Jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
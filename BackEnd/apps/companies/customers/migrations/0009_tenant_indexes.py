@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-16 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0008_leadgenerationjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['companie', '-created_at'], name='customer_tenant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customerprojectaddress',
+            index=models.Index(fields=['companie', '-created_at'], name='project_address_tenant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customerbillingaddress',
+            index=models.Index(fields=['companie', '-created_at'], name='billing_address_tenant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customerleads',
+            index=models.Index(fields=['companie', '-created_at'], name='customer_lead_tenant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leadgenerationjob',
+            index=models.Index(fields=['companie', '-created_at'], name='lead_job_tenant_idx'),
+        ),
+    ]
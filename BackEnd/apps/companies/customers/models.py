@@ -2,8 +2,8 @@ from django.db import models
 from apps.companies.employeers.models import Employeer
 from apps.companies.models import Companie
 from uuid import uuid4
-from core.constants.choices import LEAD_STATUS_CHOICES
-from basemodels.models import BaseAddressWithBaseModel, BaseModel
+from core.constants.choices import LEAD_STATUS_CHOICES, LEAD_GENERATION_STATUS_CHOICES
+from basemodels.models import BaseAddressWithBaseModel, BaseModel, tenant_indexes
 import logging
 
 logger = logging.getLogger(__name__)
@@ -66,6 +66,7 @@ class Customer(BaseAddressWithBaseModel):
         verbose_name = 'Customer'
         verbose_name_plural = 'Customers'
         ordering = ['-created_at']
+        indexes = tenant_indexes('customer')
     
     def full_name(self) -> str:
         """
@@ -154,6 +155,7 @@ class CustomerProjectAddress(BaseAddressWithBaseModel):
         verbose_name = 'Customer Project Address'
         verbose_name_plural = 'Customer Project Addresses'
         ordering = ['-created_at']
+        indexes = tenant_indexes('project_address')
         
     def __str__(self):
         """
@@ -236,6 +238,7 @@ class CustomerBillingAddress(BaseAddressWithBaseModel):
         verbose_name = 'Customer Billing Address'
         verbose_name_plural = 'Customer Billing Addresses'
         ordering = ['-created_at']
+        indexes = tenant_indexes('billing_address')
         
     def __str__(self):
         """
@@ -320,7 +323,7 @@ class CustomerLeads(BaseModel):
     rating = models.CharField(max_length=50, blank=True, null=True)
     reviews = models.CharField(max_length=50, blank=True, null=True)
     category = models.CharField(max_length=100, blank=True, null=True)
-    place_id = models.CharField(max_length=255, blank=True, null=True)
+    place_id = models.CharField(max_length=255, blank=True, null=True, help_text='Google place id, null when the search gave none')
     notes = models.CharField(max_length=500, blank=True, null=True)
     status = models.CharField(max_length=50, choices=LEAD_STATUS_CHOICES, default="new")
     
@@ -328,9 +331,77 @@ class CustomerLeads(BaseModel):
         verbose_name = "Customer Lead"
         verbose_name_plural = "Customer Leads"
         ordering = ['-created_at']
-        indexes = [
+        indexes = tenant_indexes('customer_lead') + [
             models.Index(fields=['-created_at'])
         ]
+        constraints = [
+            # Conflict target of the lead upserts, leads without a place id never conflict
+            models.UniqueConstraint(fields=['companie', 'place_id'], name='unique_customer_lead_place_per_companie'),
+        ]
+    
+    def __str__(self):
+        return f"[{self.status}] {self.name}"
+    
+    def save(self, *args, **kwargs):
+        # A blank place id would collide with the other blank ones of the company
+        if not self.place_id:
+            self.place_id = None
+        super().save(*args, **kwargs)
+
+
+class LeadGenerationJob(BaseModel):
+    """
+    Background lead generation from a Google Local search.
+    
+    The search pages are fetched concurrently by a Celery worker and each page
+    is stored as leads as soon as it arrives, so the request that starts the
+    job returns at once. The requester follows the progress over the
+    notification WebSocket or by polling the job.
+    
+    Fields:
+        query: str: Search term
+        location: str: Location to search from
+        limit: int: Maximum number of results stored, all of them when empty
+        include_all_pages: bool: Whether every page of the search is fetched
+        status: str: pending, running, completed or failed
+        pages_total: int: Number of pages of the search, known after the first one
+        pages_fetched: int: Number of pages fetched
+        total_results: int: Number of results stored
+        new_leads: int: Number of leads created
+        existing_leads: int: Number of leads already known
+        error: str: The error of a failed job
+        started_at: datetime: When the job started
+        finished_at: datetime: When the job completed
+        
+    Inheritance:
+        BaseModel{
+            id: UUIDField
+            companie: ForeignKey to Companie
+            created_at: DateTimeField
+            updated_at: DateTimeField
+            created_by: ForeignKey to Employeer
+            updated_by: ForeignKey to Employeer
+        }
+    """
+    query = models.CharField(max_length=255, help_text='Search term')
+    location = models.CharField(max_length=255, blank=True, default='', help_text='Location to search from')
+    limit = models.PositiveIntegerField(null=True, blank=True, help_text='Maximum number of results stored')
+    include_all_pages = models.BooleanField(default=False, help_text='Whether every page of the search is fetched')
+    status = models.CharField(max_length=20, choices=LEAD_GENERATION_STATUS_CHOICES, default='pending', help_text='The status of the job')
+    pages_total = models.PositiveIntegerField(default=0, help_text='Number of pages of the search')
+    pages_fetched = models.PositiveIntegerField(default=0, help_text='Number of pages fetched')
+    total_results = models.PositiveIntegerField(default=0, help_text='Number of results stored')
+    new_leads = models.PositiveIntegerField(default=0, help_text='Number of leads created')
+    existing_leads = models.PositiveIntegerField(default=0, help_text='Number of leads already known')
+    error = models.TextField(blank=True, default='', help_text='The error of a failed job')
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = "Lead Generation Job"
+        verbose_name_plural = "Lead Generation Jobs"
+        ordering = ['-created_at']
+        indexes = tenant_indexes('lead_job')
     
     def __str__(self):
-        return f"[{self.status}] {self.name}"
\ No newline at end of file
+        return f"[{self.status}] {self.query} {self.location}".strip()
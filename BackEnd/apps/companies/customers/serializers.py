@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from apps.companies.customers.models import Customer, CustomerBillingAddress, CustomerProjectAddress, CustomerLeads
+from apps.companies.customers.models import Customer, CustomerBillingAddress, CustomerProjectAddress, CustomerLeads, LeadGenerationJob
 from rest_framework.exceptions import ValidationError
 
 class CustomerBillingAddressSerializer(serializers.ModelSerializer):
@@ -414,4 +414,18 @@ class CustomerLeadsSerializer(serializers.ModelSerializer):
             
         # Additional validations can be added here
         
-        return data
\ No newline at end of file
+        return data
+
+
+class LeadGenerationJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer of the lead generation jobs, with the progress of the search.
+    """
+    class Meta:
+        model = LeadGenerationJob
+        fields = [
+            'id', 'query', 'location', 'limit', 'include_all_pages', 'status',
+            'pages_fetched', 'pages_total', 'total_results', 'new_leads', 'existing_leads',
+            'error', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
@@ -2,10 +2,14 @@ import logging
 from typing import Optional, List, Union
 from django.utils.translation import gettext as _
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
-from .models import Customer, CustomerProjectAddress, CustomerBillingAddress, CustomerLeads
+from asgiref.sync import async_to_sync, sync_to_async
+from .models import Customer, CustomerProjectAddress, CustomerBillingAddress, CustomerLeads, LeadGenerationJob
 from .utils.google_scraper_serpapi import GoogleLocalSearchService
 from django.db import transaction
 from django.db.models import Q
+from django.utils import timezone
+from core.actor import get_employeer
+from apps.notifications.utils import dispatch_notifications, send_progress
 
 logger = logging.getLogger(__name__)
 
@@ -167,6 +171,16 @@ class CustomerLeadBusinessValidator:
 class CustomerLeadService:
     """Service for managing customer leads"""
     
+    # Lead fields filled from a search result
+    LEAD_FIELDS = ('name', 'address', 'phone', 'website', 'hours', 'rating', 'reviews', 'category', 'place_id')
+    INFO_PLACEHOLDERS = {"", None, "INFO NOT INCLUDED", "NO RATING FOUND", 
+                         "NO REVIEWS FOUND", "NO PHONE FOUND", "NO WEBSITE FOUND"}
+    # Search result fields refreshed when a lead is inserted by a concurrent search,
+    # the others may have been edited since
+    REFRESHED_FIELDS = ('rating', 'reviews')
+    # Rows per statement of the lead bulk writes
+    BULK_BATCH_SIZE = 500
+    
     def __init__(self):
         self.validator = CustomerLeadBusinessValidator()
         self.scraper = GoogleLocalSearchService()
@@ -306,6 +320,13 @@ class CustomerLeadService:
     def generate_leads_from_search(self, query, location, user, limit=None, include_all_pages=False):
         """Generate leads from Google Local search results
         
+        The results are matched with the company's leads in two queries, by
+        place id then by name and address. New leads are written with one
+        ``INSERT ... ON CONFLICT`` upsert on (companie, place_id), so a lead
+        inserted by a concurrent search only gets its rating and reviews
+        refreshed instead of being duplicated, and the blanks filled in
+        existing leads with one ``bulk_update``.
+        
         Args:
             query (str): Search term provided by user
             location (str, optional): Location to search from
@@ -339,123 +360,96 @@ class CustomerLeadService:
                 "message": "No new leads were generated."
             }
         
-        # Process the business data to create leads
-        created_leads = []
-        existing_leads = []
-        
-        with transaction.atomic():
-            
-            #Preparation for mass verification
-            place_ids = [b.get('place_id') for b in business_data if b.get('place_id')]
-            name_addresses = [(b.get('name'), b.get('address')) for b in business_data 
-                              if b.get('name') and b.get('address')]
-        
-            #Efficient lead search
-            existing_by_place_id = {
-                lead.place_id: lead for lead in 
-                CustomerLeads.objects.filter(
-                    place_id__in=place_ids,
-                    companie=user.employeer.companie
-                )
-            }
+        return self.save_search_results(business_data, user, query=query, location=location)
+    
+    @classmethod
+    def _lead_values(cls, business):
+        """The lead fields of a search result, with placeholders and structured values blanked"""
+        values = {}
+        for field in cls.LEAD_FIELDS:
+            value = business.get(field)
+            if isinstance(value, (dict, list)) or value in cls.INFO_PLACEHOLDERS:
+                values[field] = None if field == 'place_id' else ""
+            else:
+                values[field] = str(value)[:CustomerLeads._meta.get_field(field).max_length]
+        return values
+    
+    @transaction.atomic
+    def save_search_results(self, business_data, user, query=None, location=None):
+        """Create or complete the company's leads from search results
         
-            # Search by name+address for those without place_id
-            name_address_filter = Q()
-            for name, address in name_addresses:
-                name_address_filter |= Q(name=name, address=address)
-        
-            existing_by_name_address = {}
-            if name_address_filter:
-                for lead in CustomerLeads.objects.filter(
-                    name_address_filter,
-                    companie=user.employeer.companie
-                ):
-                    existing_by_name_address[(lead.name, lead.address)] = lead
-        
-            #Constants for comparisons - convert to set for more efficient comparisons
-            info_placeholders = set(["", None, "INFO NOT INCLUDED", "NO RATING FOUND", 
-                            "NO REVIEWS FOUND", "NO PHONE FOUND", "NO WEBSITE FOUND"])
+        Args:
+            business_data (list): Businesses returned by the search
+            user: User generating the leads
+            query (str, optional): Search term, for logging
+            location (str, optional): Search location, for logging
             
-            #Preparing bulk create and update lists
-            leads_to_create = []
-            leads_to_update = []
+        Returns:
+            dict: Summary of results including created and existing leads
+        """
+        companie_id = get_employeer(user).companie_id
+        results = [self._lead_values(business) for business in business_data]
+        
+        # Efficient lead search: by place id, then by name+address for the rest
+        place_ids = {values['place_id'] for values in results if values['place_id']}
+        existing_by_place_id = {
+            lead.place_id: lead for lead in
+            CustomerLeads.objects.filter(place_id__in=place_ids, companie_id=companie_id)
+        } if place_ids else {}
+        
+        name_address_filter = Q()
+        for values in results:
+            if values['place_id'] not in existing_by_place_id and values['name'] and values['address']:
+                name_address_filter |= Q(name=values['name'], address=values['address'])
+        existing_by_name_address = {}
+        if name_address_filter:
+            for lead in CustomerLeads.objects.filter(name_address_filter, companie_id=companie_id):
+                existing_by_name_address.setdefault((lead.name, lead.address), lead)
+        
+        created_leads, existing_leads = [], {}
+        leads_to_update, updated_fields = {}, set()
+        seen = set()
+        
+        for values in results:
+            # The same business can come back on several pages
+            key = values['place_id'] or (values['name'], values['address'])
+            if key in seen:
+                continue
+            seen.add(key)
             
-            for business in business_data:
-                # Check if lead already exists by place_id or name+address
-                existing_lead = None
-                if business.get('place_id') and business['place_id'] in existing_by_place_id:
-                    existing_lead = existing_by_place_id[business['place_id']]                    
-                elif business.get('name') and business.get('address'):
-                    key = (business['name'], business['address'])
-                    existing_lead = existing_by_name_address.get(key)
-                
-                if not existing_lead and business.get('name') and business.get('address'):
-                    existing_lead = CustomerLeads.objects.filter(
-                        name=business['name'],
-                        address=business['address'],
-                        companie=user.employeer.companie
-                    ).first()
-                
-                if existing_lead:
-                    #Update existing lead with any new information
-                    updated = False
-                    for field, value in business.items():
-                        if not isinstance(value, dict) and value not in info_placeholders:
-                            if not isinstance(getattr(existing_lead, field, None), dict) and getattr(existing_lead, field, None) in info_placeholders:
-                                setattr(existing_lead, field, value)
-                                updated = True
-                    
-                    if updated:
-                        leads_to_update.append(existing_lead)
-                    existing_leads.append(existing_lead)
-                else:
-                    # Create new lead - don't set audit fields as they're handled by BaseModel
-                    lead_data = {
-                        'name': business['name'],
-                        'address': business['address'] if business['address'] not in info_placeholders else "",
-                        'phone': business['phone'] if business['phone'] not in info_placeholders else "",
-                        'website': business['website'] if business['website'] not in info_placeholders else "",
-                        'hours': business['hours'] if business['hours'] not in info_placeholders else "",
-                        'rating': business['rating'] if business['rating'] not in info_placeholders else "",
-                        'reviews': business['reviews'] if business['reviews'] not in info_placeholders else "",
-                        'category': business['category'] if business['category'] not in info_placeholders else "",
-                        'place_id': business['place_id'] if business['place_id'] not in info_placeholders else "",
-                        'status': "New",
-                    }
-                    
-                    # Add to bulk_create list instead of creating individually
-                    new_lead = CustomerLeads(**lead_data)
-                    leads_to_create.append(new_lead)
+            existing_lead = existing_by_place_id.get(values['place_id']) if values['place_id'] else None
+            if existing_lead is None and values['name'] and values['address']:
+                existing_lead = existing_by_name_address.get((values['name'], values['address']))
             
-            # Bulk create for new leads
-            if leads_to_create:
-                # It is not possible to use bulk_create directly due to the custom save() method of BaseModel
-                # that needs to process audit fields. We create smaller batches for efficiency
-                batch_size = 100
-                for i in range(0, len(leads_to_create), batch_size):
-                    batch = leads_to_create[i:i + batch_size]
-                    for lead in batch:
-                        lead.save(user=user)  # Save with user for audit fields
-                    created_leads.extend(batch)
-                
-                logger.info(
-                    f"[CUSTOMER LEAD SERVICE] - Created {len(created_leads)} leads in bulk operation",
-                    extra={'batch_count': len(created_leads) // batch_size + (1 if len(created_leads) % batch_size > 0 else 0)}
-                )
+            if existing_lead is None:
+                created_leads.append(CustomerLeads(companie_id=companie_id, status='new', **values))
+                continue
             
-            # Bulk update for existing leads
-            if leads_to_update:
-                # Same limit for bulk_update due to the custom save() method
-                batch_size = 100
-                for i in range(0, len(leads_to_update), batch_size):
-                    batch = leads_to_update[i:i + batch_size]
-                    for lead in batch:
-                        lead.save(user=user)  # Save with user for audit fields
-                
-                logger.info(
-                    f"[CUSTOMER LEAD SERVICE] - Updated {len(leads_to_update)} leads in bulk operation",
-                    extra={'batch_count': len(leads_to_update) // batch_size + (1 if len(leads_to_update) % batch_size > 0 else 0)}
-                )
+            # Update existing lead with any new information
+            for field, value in values.items():
+                if value and getattr(existing_lead, field) in self.INFO_PLACEHOLDERS:
+                    setattr(existing_lead, field, value)
+                    updated_fields.add(field)
+                    leads_to_update[existing_lead.pk] = existing_lead
+            existing_leads[existing_lead.pk] = existing_lead
+        
+        if created_leads:
+            CustomerLeads.objects.bulk_create_audited(
+                created_leads,
+                user=user,
+                batch_size=self.BULK_BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['companie', 'place_id'],
+                update_fields=list(self.REFRESHED_FIELDS),
+            )
+            created_leads = self._read_back_upserted(created_leads, companie_id, existing_leads)
+            logger.info(f"[CUSTOMER LEAD SERVICE] - Created {len(created_leads)} leads in bulk operation")
+        
+        if leads_to_update:
+            CustomerLeads.objects.bulk_update_audited(
+                leads_to_update.values(), sorted(updated_fields), user=user, batch_size=self.BULK_BATCH_SIZE
+            )
+            logger.info(f"[CUSTOMER LEAD SERVICE] - Updated {len(leads_to_update)} leads in bulk operation")
         
         logger.info(
             f"[CUSTOMER LEAD SERVICE] - Leads generated successfully: {len(created_leads)} new, {len(existing_leads)} existing",
@@ -477,6 +471,173 @@ class CustomerLeadService:
             "total_results": len(business_data),
             "new_leads": len(created_leads),
             "existing_leads": len(existing_leads),
-            "leads": created_leads + existing_leads,
+            "leads": created_leads + list(existing_leads.values()),
             "message": message
-        }
\ No newline at end of file
+        }
+    
+    @staticmethod
+    def _read_back_upserted(leads, companie_id, existing_leads):
+        """Replace the upserted leads by the stored rows
+        
+        A lead inserted by a concurrent search is updated instead, the
+        instance sent keeps an id that was never written. Such leads move to
+        ``existing_leads``.
+        
+        Returns:
+            list: The leads actually inserted
+        """
+        place_ids = [lead.place_id for lead in leads if lead.place_id]
+        if not place_ids:
+            return leads
+        stored = {
+            lead.place_id: lead for lead in
+            CustomerLeads.objects.filter(companie_id=companie_id, place_id__in=place_ids)
+        }
+        created = []
+        for lead in leads:
+            stored_lead = stored.get(lead.place_id) if lead.place_id else None
+            if stored_lead is None:
+                created.append(lead)
+            elif stored_lead.pk == lead.pk:
+                created.append(stored_lead)
+            else:
+                existing_leads[stored_lead.pk] = stored_lead
+        return created
+    
+    def create_generation_job(self, query, location, user, limit=None, include_all_pages=False):
+        """Validate a search and record it as a pending lead generation job
+        
+        Args:
+            query (str): Search term provided by user
+            location (str, optional): Location to search from
+            user: User generating the leads
+            limit (int, optional): Maximum number of results stored
+            include_all_pages (bool): Whether to retrieve results from all pages
+            
+        Returns:
+            LeadGenerationJob: The pending job
+            
+        Raises:
+            ValidationError: If validation fails
+        """
+        self.validator.validate_search_query(query, location)
+        job = LeadGenerationJob(
+            query=query,
+            location=location or '',
+            limit=limit,
+            include_all_pages=include_all_pages,
+        )
+        job.save(user=user)
+        logger.info(
+            f"[CUSTOMER LEAD SERVICE] - Lead generation job created for '{query}' in '{location}'",
+            extra={'job_id': str(job.id), 'user_id': user.id}
+        )
+        return job
+    
+    def run_generation_job(self, job_id):
+        """Fetch the pages of a job's search and store each one as leads as it arrives
+        
+        The pages are fetched concurrently on an event loop of the worker, while
+        each page is stored on the worker's thread and connection. After every
+        page the job's counters are saved and the progress is pushed to the
+        requester's notification WebSocket.
+        
+        Args:
+            job_id: Id of the job
+            
+        Returns:
+            LeadGenerationJob: The completed job, None if it was not pending
+        """
+        now = timezone.now()
+        if not LeadGenerationJob.objects.filter(pk=job_id, status='pending').update(
+            status='running', started_at=now, updated_at=now
+        ):
+            logger.info(f"[CUSTOMER LEAD SERVICE] - Lead generation job {job_id} is not pending, skipped")
+            return None
+        
+        job = LeadGenerationJob.objects.select_related('created_by__user').get(pk=job_id)
+        user = job.created_by.user
+        send_progress(user.id, 'lead_generation', job.id, job.status)
+        try:
+            async_to_sync(self._collect_pages)(job, user)
+        except Exception as e:
+            logger.error(f"[CUSTOMER LEAD SERVICE] - Lead generation job {job.id} failed: {str(e)}")
+            LeadGenerationJob.objects.filter(pk=job.pk).update(status='failed', error=str(e), updated_at=timezone.now())
+            send_progress(user.id, 'lead_generation', job.id, 'failed', {'error': str(e)})
+            raise
+        
+        job.status = 'completed'
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'finished_at', 'updated_at'])
+        
+        progress = self._job_progress(job)
+        send_progress(user.id, 'lead_generation', job.id, job.status, progress)
+        message = (
+            f"Successfully generated {job.new_leads} new leads." if job.new_leads
+            else "No new leads were generated."
+        )
+        dispatch_notifications(
+            [user.id],
+            title=f"Leads for '{job.query}'",
+            message=message,
+            app_name='Customers',
+            notification_type='success',
+            data={'job_id': str(job.id), **progress}
+        )
+        logger.info(
+            f"[CUSTOMER LEAD SERVICE] - Lead generation job {job.id} completed: {job.new_leads} new, {job.existing_leads} existing",
+            extra={'pages': job.pages_fetched, 'total_results': job.total_results}
+        )
+        return job
+    
+    async def _collect_pages(self, job, user):
+        seen = set()
+        pages = self.scraper.iter_local_business_pages(
+            job.query, job.location, include_all_pages=job.include_all_pages
+        )
+        try:
+            async for fetched, total, business_data in pages:
+                if await sync_to_async(self._store_page)(job, user, fetched, total, business_data, seen):
+                    break
+        finally:
+            # Cancels the pages still being fetched
+            await pages.aclose()
+    
+    def _store_page(self, job, user, fetched, total, business_data, seen):
+        """Store the new results of a page and save the job's progress
+        
+        Returns:
+            bool: Whether the job's limit is reached, no more pages are needed
+        """
+        page = []
+        for business in business_data:
+            if job.limit is not None and job.total_results + len(page) >= job.limit:
+                break
+            # The same business can come back on several pages
+            values = self._lead_values(business)
+            key = values['place_id'] or (values['name'], values['address'])
+            if key not in seen:
+                seen.add(key)
+                page.append(business)
+        
+        if page:
+            result = self.save_search_results(page, user, query=job.query, location=job.location)
+            job.total_results += result['total_results']
+            job.new_leads += result['new_leads']
+            job.existing_leads += result['existing_leads']
+        job.pages_fetched, job.pages_total = fetched, total
+        job.save(update_fields=[
+            'pages_fetched', 'pages_total', 'total_results', 'new_leads', 'existing_leads', 'updated_at'
+        ])
+        send_progress(user.id, 'lead_generation', job.id, job.status, self._job_progress(job))
+        return job.limit is not None and job.total_results >= job.limit
+    
+    @staticmethod
+    def _job_progress(job):
+        return {
+            'pages_fetched': job.pages_fetched,
+            'pages_total': job.pages_total,
+            'total_results': job.total_results,
+            'new_leads': job.new_leads,
+            'existing_leads': job.existing_leads,
+        }
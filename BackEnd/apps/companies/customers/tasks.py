@@ -0,0 +1,17 @@
+from celery import shared_task
+from core.actor import actor_context
+from .services import CustomerLeadService
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name='run_lead_generation_job', ignore_result=True)
+@actor_context
+def run_lead_generation_job(job_id):
+    """
+    Run a lead generation job, storing the search results page by page.
+    """
+    job = CustomerLeadService().run_generation_job(job_id)
+    if job is not None:
+        logger.info(f"[CUSTOMER LEADS TASK] Lead generation job {job_id} stored {job.total_results} results")
@@ -1,3 +1,399 @@
-from django.test import TestCase
+import asyncio
+import math
+import threading
+import time
+from unittest.mock import patch
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from apps.accounts.models import User
+from apps.companies.models import Companie
+from apps.companies.employeers.models import Employeer
+from core.actor import actor_scope
+from core.cache import cached_search, search_cache_key
+from .models import CustomerLeads, LeadGenerationJob
+from .services import CustomerLeadService
+from .tasks import run_lead_generation_job
+from .utils.google_scraper_serpapi import GoogleLocalSearchService
 
-# Create your tests here.
+
+def search_result(index, **overrides):
+    business = {
+        "name": f"Lead Business {index}",
+        "address": f"{index} Main St",
+        "phone": "INFO NOT INCLUDED",
+        "website": f"https://business{index}.example.com",
+        "rating": 4.5,
+        "reviews": 120,
+        "category": "Contractor",
+        "hours": {"monday": "8-5"},
+        "coordinates": {"latitude": 1, "longitude": 2},
+        "place_id": f"place-{index}",
+    }
+    business.update(overrides)
+    return business
+
+
+class LeadIngestionTests(TestCase):
+    """Tests for the bulk ingestion of search results as leads"""
+
+    def setUp(self):
+        self.company = Companie.objects.create(name='Leads Company', type='Headquarters')
+        user = User.objects.create_user(
+            password='manager123',
+            email='leads_manager@test.com',
+            first_name='Leads',
+            last_name='Manager',
+            user_type='Manager'
+        )
+        Employeer.objects.filter(user=user).update(companie=self.company)
+        self.user = User.objects.get(pk=user.pk)
+        self.employeer = Employeer.objects.get(user=self.user)
+        self.service = CustomerLeadService()
+
+    def generate(self, results):
+        # The actor scope a request opens
+        with actor_scope(user=self.user):
+            with patch.object(GoogleLocalSearchService, 'search_local_businesses_sync', return_value=results):
+                return self.service.generate_leads_from_search('contractors', 'Miami', self.user, include_all_pages=True)
+
+    def assertFewQueries(self, queries, created):
+        """A handful of reads and writes, plus one INSERT per bulk batch the backend allows"""
+        inserts = [query for query in queries.captured_queries if query['sql'].startswith('INSERT')]
+        batch_size = min(
+            CustomerLeadService.BULK_BATCH_SIZE,
+            connection.ops.bulk_batch_size(CustomerLeads._meta.concrete_fields, [None] * created) or created
+        )
+        self.assertLessEqual(len(inserts), math.ceil(created / batch_size))
+        self.assertLessEqual(len(queries) - len(inserts), 7)
+
+    def test_all_pages_search_is_written_in_a_few_queries(self):
+        results = [search_result(index) for index in range(500)]
+        # No place id, matched by name and address
+        results.append(search_result(500, place_id="INFO NOT INCLUDED"))
+        # The same business on two pages
+        results.append(search_result(3))
+
+        with CaptureQueriesContext(connection) as queries:
+            summary = self.generate(results)
+
+        self.assertFewQueries(queries, 501)
+        self.assertEqual((summary['total_results'], summary['new_leads'], summary['existing_leads']), (502, 501, 0))
+        leads = CustomerLeads.objects.filter(companie=self.company)
+        self.assertEqual(leads.count(), 501)
+        lead = leads.get(place_id='place-7')
+        self.assertEqual((lead.status, lead.rating, lead.phone, lead.hours), ('new', '4.5', '', ''))
+        self.assertEqual((lead.created_by_id, lead.updated_by_id), (self.employeer.pk, self.employeer.pk))
+        self.assertIsNone(leads.get(name='Lead Business 500').place_id)
+
+    def test_known_leads_are_completed_not_duplicated(self):
+        self.generate([search_result(index) for index in range(20)] + [search_result(20, place_id=None)])
+
+        with CaptureQueriesContext(connection) as queries:
+            summary = self.generate(
+                [search_result(index, phone=f"555-000{index}") for index in range(20)]
+                + [search_result(20, place_id="place-20")]
+                + [search_result(21)]
+            )
+
+        self.assertFewQueries(queries, 1)
+        self.assertEqual((summary['new_leads'], summary['existing_leads']), (1, 21))
+        self.assertEqual(CustomerLeads.objects.filter(companie=self.company).count(), 22)
+        self.assertEqual(CustomerLeads.objects.get(place_id='place-4').phone, '555-0004')
+        self.assertTrue(CustomerLeads.objects.filter(name='Lead Business 20', place_id='place-20').exists())
+
+    def test_conflicting_place_ids_are_upserted(self):
+        lead = CustomerLeads.objects.create(name='Old Name', place_id='place-1', companie=self.company, status='contacted')
+
+        CustomerLeads.objects.bulk_create_audited(
+            [CustomerLeads(name='New Name', place_id='place-1', status='new'),
+             CustomerLeads(name='Other', place_id='place-2', status='new')],
+            user=self.user,
+            update_conflicts=True,
+            unique_fields=['companie', 'place_id'],
+            update_fields=['name'],
+        )
+
+        self.assertEqual(CustomerLeads.objects.filter(companie=self.company).count(), 2)
+        lead.refresh_from_db()
+        self.assertEqual((lead.name, lead.status, lead.updated_by_id), ('New Name', 'contacted', self.employeer.pk))
+
+    def test_lead_inserted_by_a_concurrent_search_is_read_back(self):
+        original_bulk_create = CustomerLeads.objects.bulk_create_audited
+        concurrent = {}
+
+        def concurrent_search(*args, **kwargs):
+            # Another search stored the business, and it was edited, since the leads were read
+            concurrent['lead'] = CustomerLeads.objects.create(
+                name='Edited Name', place_id='place-1', rating='3.0', companie=self.company, status='contacted'
+            )
+            return original_bulk_create(*args, **kwargs)
+
+        with patch.object(CustomerLeads.objects, 'bulk_create_audited', side_effect=concurrent_search):
+            summary = self.generate([search_result(1), search_result(2)])
+
+        self.assertEqual((summary['new_leads'], summary['existing_leads']), (1, 1))
+        stored_ids = set(CustomerLeads.objects.filter(companie=self.company).values_list('pk', flat=True))
+        self.assertEqual({lead.pk for lead in summary['leads']}, stored_ids)
+        lead = CustomerLeads.objects.get(pk=concurrent['lead'].pk)
+        self.assertEqual((lead.name, lead.status, lead.rating), ('Edited Name', 'contacted', '4.5'))
+
+    def test_blank_place_ids_do_not_collide(self):
+        for name in ('First', 'Second'):
+            CustomerLeads.objects.create(name=name, place_id='', companie=self.company)
+        self.assertEqual(CustomerLeads.objects.filter(companie=self.company, place_id=None).count(), 2)
+
+
+class LeadGenerationJobTests(APITestCase):
+    """Tests for the background lead generation jobs"""
+
+    def setUp(self):
+        self.company = Companie.objects.create(name='Lead Jobs Company', type='Headquarters')
+        user = User.objects.create_user(
+            password='manager123',
+            email='lead_jobs_manager@test.com',
+            first_name='Lead',
+            last_name='Jobs',
+            user_type='Manager'
+        )
+        Employeer.objects.filter(user=user).update(companie=self.company)
+        self.user = User.objects.get(pk=user.pk)
+
+    def test_generate_leads_returns_a_pending_job(self):
+        self.client.force_authenticate(self.user)
+        with patch.object(run_lead_generation_job, 'delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse('customers:generate_customer_leads') + '?query=roofers&location=Miami&include_all_pages=true'
+                )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job = LeadGenerationJob.objects.get(pk=response.data['id'])
+        self.assertEqual((job.status, job.query, job.include_all_pages, job.companie_id), ('pending', 'roofers', True, self.company.pk))
+        delay.assert_called_once_with(str(job.id), actor_id=str(self.user.id))
+
+        response = self.client.get(reverse('customers:retrieve_lead_generation_job', args=[job.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'pending')
+
+    def test_generate_leads_requires_a_query(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(reverse('customers:generate_customer_leads'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(LeadGenerationJob.objects.exists())
+
+    def test_job_stores_each_page_as_it_arrives(self):
+        with actor_scope(user=self.user):
+            job = CustomerLeadService().create_generation_job('roofers', 'Miami', self.user, limit=25, include_all_pages=True)
+
+        stored_before_page = []
+
+        async def pages(service, query, location=None, include_all_pages=False):
+            for fetched, page in enumerate([range(0, 10), range(5, 15), range(15, 40)], start=1):
+                stored_before_page.append(await CustomerLeads.objects.filter(companie=self.company).acount())
+                yield fetched, 3, [search_result(index) for index in page]
+
+        with patch.object(GoogleLocalSearchService, 'iter_local_business_pages', pages), \
+             patch('apps.companies.customers.services.send_progress') as send_progress, \
+             patch('apps.companies.customers.services.dispatch_notifications') as dispatch:
+            run_lead_generation_job(str(job.id), actor_id=str(self.user.id))
+
+        job.refresh_from_db()
+        self.assertEqual(stored_before_page, [0, 10, 15])
+        self.assertEqual(
+            (job.status, job.pages_fetched, job.pages_total, job.total_results, job.new_leads, job.existing_leads),
+            ('completed', 3, 3, 25, 25, 0)
+        )
+        self.assertEqual(CustomerLeads.objects.filter(companie=self.company).count(), 25)
+        self.assertEqual(
+            [call.args[3] for call in send_progress.call_args_list],
+            ['running', 'running', 'running', 'running', 'completed']
+        )
+        self.assertEqual(send_progress.call_args_list[2].args[4]['pages_fetched'], 2)
+        dispatch.assert_called_once()
+
+        # A job runs once
+        self.assertIsNone(CustomerLeadService().run_generation_job(job.id))
+
+    def test_job_stops_fetching_pages_at_its_limit(self):
+        with actor_scope(user=self.user):
+            job = CustomerLeadService().create_generation_job('roofers', 'Miami', self.user, limit=5, include_all_pages=True)
+
+        consumed, closed = [], []
+
+        async def pages(service, query, location=None, include_all_pages=False):
+            try:
+                for fetched in range(1, 4):
+                    consumed.append(fetched)
+                    yield fetched, 3, [search_result(index) for index in range(fetched * 10, fetched * 10 + 10)]
+            finally:
+                closed.append(fetched)
+
+        with patch.object(GoogleLocalSearchService, 'iter_local_business_pages', pages), \
+             patch('apps.companies.customers.services.send_progress'), \
+             patch('apps.companies.customers.services.dispatch_notifications'):
+            run_lead_generation_job(str(job.id), actor_id=str(self.user.id))
+
+        job.refresh_from_db()
+        self.assertEqual((consumed, closed), ([1], [1]))
+        self.assertEqual((job.status, job.pages_fetched, job.total_results), ('completed', 1, 5))
+
+    def test_failed_job_records_the_error(self):
+        with actor_scope(user=self.user):
+            job = CustomerLeadService().create_generation_job('roofers', '', self.user)
+
+        async def pages(service, query, location=None, include_all_pages=False):
+            yield 1, 2, [search_result(1)]
+            raise RuntimeError('SerpAPI unavailable')
+
+        with patch.object(GoogleLocalSearchService, 'iter_local_business_pages', pages), \
+             patch('apps.companies.customers.services.send_progress'):
+            with self.assertRaises(RuntimeError):
+                run_lead_generation_job(str(job.id), actor_id=str(self.user.id))
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error, job.total_results), ('failed', 'SerpAPI unavailable', 1))
+
+
+class ExternalSearchCacheTests(TestCase):
+    """Tests for the per-page, single-flight cache of the external searches"""
+
+    params = {'engine': 'google_local', 'q': 'Drywall Contractors', 'location': 'Miami, FL', 'api_key': 'secret'}
+
+    def setUp(self):
+        cache.clear()
+
+    def test_equivalent_requests_share_an_entry(self):
+        same = {'engine': 'google_local', 'q': '  drywall   CONTRACTORS ', 'location': 'miami, fl', 'start': '0', 'api_key': 'other'}
+        self.assertEqual(search_cache_key(self.params), search_cache_key(same))
+        self.assertNotEqual(search_cache_key(self.params), search_cache_key({**self.params, 'start': 20}))
+        self.assertNotEqual(search_cache_key(self.params), search_cache_key({**self.params, 'engine': 'home_depot'}))
+
+    def test_concurrent_searches_share_one_call(self):
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'local_results': [len(calls)]}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cached_search(self.params, fetch)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{'local_results': [1]}] * 5)
+        self.assertEqual(cached_search(self.params, fetch), {'local_results': [1]})
+        self.assertEqual(len(calls), 1)
+
+    def test_failed_calls_are_not_cached(self):
+        self.assertIsNone(cached_search(self.params, lambda: None))
+        self.assertEqual(cached_search(self.params, lambda: {'local_results': []}), {'local_results': []})
+
+    def test_error_payloads_are_not_cached(self):
+        error = {'error': 'Your account has run out of searches.'}
+        self.assertEqual(cached_search(self.params, lambda: error), error)
+        self.assertIsNone(cache.get(search_cache_key(self.params)))
+        self.assertEqual(cached_search(self.params, lambda: {'local_results': []}), {'local_results': []})
+
+    @override_settings(SEARCH_CACHE={'LOCK_TIMEOUT': 1, 'WAIT_TIMEOUT': 0.5})
+    def test_waiting_for_a_stuck_fetch_falls_back_to_fetching(self):
+        release = threading.Event()
+        started = threading.Event()
+
+        def stuck_fetch():
+            started.set()
+            release.wait(10)
+            return {'local_results': ['stuck']}
+
+        leader = threading.Thread(target=cached_search, args=(self.params, stuck_fetch))
+        leader.start()
+        try:
+            started.wait(5)
+            self.assertEqual(cached_search(self.params, lambda: {'local_results': ['direct']}), {'local_results': ['direct']})
+        finally:
+            release.set()
+            leader.join()
+
+    @override_settings(SEARCH_CACHE={'FRESH_TTL': 0, 'STALE_TTL': 60})
+    def test_stale_entries_are_served_while_refreshed(self):
+        responses = iter([{'version': 1}, {'version': 2}])
+        fetch = lambda: next(responses)
+
+        self.assertEqual(cached_search(self.params, fetch), {'version': 1})
+        self.assertEqual(cached_search(self.params, fetch), {'version': 1})
+
+        deadline = time.monotonic() + 5
+        while cache.get(search_cache_key(self.params))['data'] != {'version': 2} and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.assertEqual(cache.get(search_cache_key(self.params))['data'], {'version': 2})
+
+    def test_google_pages_are_fetched_once_per_loop(self):
+        service = GoogleLocalSearchService()
+        calls = []
+
+        async def fetch_page(client, params, page_num_logging):
+            calls.append(page_num_logging)
+            await asyncio.sleep(0.1)
+            return {'local_results': [{'title': 'Cached Business', 'place_id': 'place-1'}]}
+
+        async def search():
+            return await asyncio.gather(*(service._get_page(self.params, page) for page in range(3)))
+
+        with patch.object(service, '_fetch_page', fetch_page):
+            pages = asyncio.run(search())
+            pages += asyncio.run(search())
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(page == pages[0] for page in pages))
+
+    def test_closing_the_page_iterator_cancels_the_pages_in_flight(self):
+        service = GoogleLocalSearchService()
+        service.api_key = 'secret'
+        cancelled, completed = [], []
+        first_page = {
+            'local_results': [{'title': 'First Business', 'place_id': 'place-1'}],
+            'serpapi_pagination': {'other_pages': {
+                '2': 'https://serpapi.com/search.json?start=20',
+                '3': 'https://serpapi.com/search.json?start=40',
+            }},
+        }
+
+        async def fetch_page(client, params, page_num_logging):
+            if page_num_logging == 1:
+                return first_page
+            if page_num_logging == '2':
+                return {'local_results': [{'title': 'Second Business', 'place_id': 'place-2'}]}
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(page_num_logging)
+                raise
+            completed.append(page_num_logging)
+
+        async def first_two_pages():
+            pages = service.iter_local_business_pages('roofers', 'Miami', include_all_pages=True)
+            received = [await anext(pages), await anext(pages)]
+            await started.wait()
+            await pages.aclose()
+            await asyncio.sleep(0.1)
+            # Cancelled by the iterator, not by the loop shutting down
+            return received, list(cancelled)
+
+        with patch.object(service, '_fetch_page', fetch_page):
+            started = asyncio.Event()
+            received, cancelled_on_close = asyncio.run(first_two_pages())
+
+        self.assertEqual([page[0] for page in received], [1, 2])
+        self.assertEqual((cancelled_on_close, completed), (['3'], []))
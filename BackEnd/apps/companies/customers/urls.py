@@ -13,5 +13,6 @@ urlpatterns = [
     
     # Leads
     path('generate-leads/', views.GenerateLeadsView.as_view(), name='generate_customer_leads'),
+    path('lead-jobs/<uuid:pk>/', views.LeadGenerationJobView.as_view(), name='retrieve_lead_generation_job'),
     path('list-leads/', views.ListLeadsView.as_view(), name='list_customer_leads'),
 ]
\ No newline at end of file
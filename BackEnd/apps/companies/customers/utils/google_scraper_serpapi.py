@@ -3,11 +3,10 @@ import os
 import httpx  # Changed from requests to httpx for async
 import json
 import sys
-from typing import Dict, List, Optional, Any, Union
+from typing import AsyncIterator, Dict, List, Optional, Any, Union
 import django
 import asyncio  # Added for asyncio operations
-from django.core.cache import cache
-import hashlib
+import weakref
 import tenacity
 
 logger = logging.getLogger(__name__)
@@ -19,6 +18,8 @@ sys.path.append(backend_path)
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 django.setup()
 
+from core.cache import acached_search
+
 class GoogleLocalSearchService:
     """
     Service for interacting with Google Local data via SerpAPI.
@@ -28,17 +29,13 @@ class GoogleLocalSearchService:
     extract detailed business information that can be used to enhance
     customer records.
     """
+    # Clients shared by the searches of the process, one per event loop
+    _http_clients = weakref.WeakKeyDictionary()
     
     def __init__(self):
         """Initialize the service with API key from settings"""
         self.api_key = self._get_api_key()
         self.base_url = self._get_base_url()
-        self._http_client = None
-        
-    def _get_cache_key(self, query, location, limit, include_all_pages):
-        """Generate a unique cache key for search params"""
-        key_parts = f"{query}:{location}:{limit}:{include_all_pages}"
-        return f"google_search:{hashlib.sha256(key_parts.encode()).hexdigest()}"
         
     def _get_api_key(self) -> str:
         """
@@ -88,14 +85,50 @@ class GoogleLocalSearchService:
         return base_url
     
     def _get_http_client(self):
-        """Get or create a shared HTTP client"""
-        if self.__class__._http_client is None:
+        """
+        Get or create the HTTP client shared on the running event loop.
+        
+        Pooled connections belong to the event loop that opened them, so each
+        loop (e.g. each Celery task) gets its own client.
+        """
+        loop = asyncio.get_running_loop()
+        client = self._http_clients.get(loop)
+        if client is None:
             timeout = httpx.Timeout(30.0, connect=10.0)
             limits = httpx.Limits(max_connections=10, max_keepalive_connections=5)
-            self.__class__._http_client = httpx.AsyncClient(timeout=timeout, limits=limits)
-        return self.__class__._http_client
+            client = self._http_clients[loop] = httpx.AsyncClient(timeout=timeout, limits=limits)
+        return client
     
+    def _base_params(self, query: str, location: Optional[str] = None) -> Dict[str, Any]:
+        """Parameters of the first page of a search"""
+        base_params = {
+            "api_key": self.api_key,
+            "engine": "google_local",
+            "q": query,
+            "google_domain": "google.com",
+            "hl": "en",
+            "gl": "us"
+        }
+        if location:
+            base_params["location"] = location
+        return base_params
     
+    def _other_pages_params(self, base_params: Dict[str, Any], initial_data: Dict[str, Any]) -> List[tuple]:
+        """(page number, parameters) of the other pages listed by the first page of a search"""
+        other_pages_info = initial_data.get('serpapi_pagination', {}).get('other_pages', {})
+        pages = []
+        for page_num_str, page_url in sorted(other_pages_info.items(), key=lambda x: int(x[0])):
+            if 'start=' not in page_url:
+                continue
+            try:
+                start_param_val = int(page_url.split('start=')[1].split('&')[0])
+            except (IndexError, ValueError) as e:
+                logger.warning(f"[GOOGLE LOCAL SERVICE ASYNC] - Could not parse 'start' param from URL {page_url}: {e}")
+                continue # Skip this page if URL is malformed
+            page_params = base_params.copy()
+            page_params['start'] = start_param_val
+            pages.append((page_num_str, page_params))
+        return pages
     
     @tenacity.retry(
         stop=tenacity.stop_after_attempt(3),
@@ -122,6 +155,12 @@ class GoogleLocalSearchService:
             logger.error(f"[GOOGLE LOCAL SERVICE ASYNC] - Error fetching page {page_num_logging}: {str(e)}")
         return None
 
+    async def _get_page(self, params: Dict[str, Any], page_num_logging: Union[int, str]) -> Optional[Dict[str, Any]]:
+        """Get a page from the search cache, fetching it once however many searches ask for it"""
+        return await acached_search(
+            params, lambda: self._fetch_page(self._get_http_client(), params, page_num_logging)
+        )
+
     async def search_local_businesses(self, query: str, location: Optional[str] = None, 
                                       limit: int = None, include_all_pages: bool = False) -> List[Dict[str, Any]]:
         """
@@ -140,66 +179,90 @@ class GoogleLocalSearchService:
             logger.error("[GOOGLE LOCAL SERVICE ASYNC] - Cannot search without API key")
             return []
             
-        base_params = {
-            "api_key": self.api_key,
-            "engine": "google_local",
-            "q": query,
-            "google_domain": "google.com",
-            "hl": "en",
-            "gl": "us"
-        }
-        
-        if location:
-            base_params["location"] = location
-            
+        base_params = self._base_params(query, location)
         all_results_processed = []
         
-        async with httpx.AsyncClient() as client:
-            # First request to get initial results and pagination info
-            initial_data = await self._fetch_page(client, base_params, page_num_logging=1)
-            
-            if not initial_data:
-                return []
+        # First request to get initial results and pagination info
+        initial_data = await self._get_page(base_params, page_num_logging=1)
+        
+        if not initial_data:
+            return []
 
-            results_page_1 = self._process_local_results(initial_data) # Limit applied later if not include_all_pages
-            all_results_processed.extend(results_page_1)
-            
-            # If pagination is requested and available, fetch all other pages concurrently
-            if include_all_pages and 'serpapi_pagination' in initial_data and 'other_pages' in initial_data['serpapi_pagination']:
-                other_pages_info = initial_data['serpapi_pagination']['other_pages']
-                tasks = []
-                
-                for page_num_str, page_url in sorted(other_pages_info.items(), key=lambda x: int(x[0])):
-                    start_param_val = None
-                    if 'start=' in page_url:
-                        try:
-                            start_value_str = page_url.split('start=')[1].split('&')[0]
-                            start_param_val = int(start_value_str)
-                        except (IndexError, ValueError) as e:
-                            logger.warning(f"[GOOGLE LOCAL SERVICE ASYNC] - Could not parse 'start' param from URL {page_url}: {e}")
-                            continue # Skip this page if URL is malformed
-                    
-                    if start_param_val is not None:
-                        page_params = base_params.copy()
-                        page_params['start'] = start_param_val
-                        tasks.append(self._fetch_page(client, page_params, page_num_logging=page_num_str))
-                
-                if tasks:
-                    logger.info(f"[GOOGLE LOCAL SERVICE ASYNC] - Fetching {len(tasks)} additional pages concurrently.")
-                    pages_data_list = await asyncio.gather(*tasks)
-                    for page_data in pages_data_list:
-                        if page_data:
-                            processed_page_results = self._process_local_results(page_data)
-                            all_results_processed.extend(processed_page_results)
+        results_page_1 = self._process_local_results(initial_data) # Limit applied later if not include_all_pages
+        all_results_processed.extend(results_page_1)
+        
+        # If pagination is requested and available, fetch all other pages concurrently
+        if include_all_pages:
+            tasks = [
+                self._get_page(page_params, page_num_logging=page_num_str)
+                for page_num_str, page_params in self._other_pages_params(base_params, initial_data)
+            ]
             
-            # Apply limit to the total collected results if not fetching all pages and limit is set
-            if not include_all_pages and limit is not None and len(all_results_processed) > limit:
-                 return all_results_processed[:limit]
-            elif limit is not None and len(all_results_processed) > limit: # if include_all_pages but still want a total limit
-                 logger.info(f"[GOOGLE LOCAL SERVICE ASYNC] - Limiting total results from {len(all_results_processed)} to {limit}")
-                 return all_results_processed[:limit]
+            if tasks:
+                logger.info(f"[GOOGLE LOCAL SERVICE ASYNC] - Fetching {len(tasks)} additional pages concurrently.")
+                pages_data_list = await asyncio.gather(*tasks)
+                for page_data in pages_data_list:
+                    if page_data:
+                        processed_page_results = self._process_local_results(page_data)
+                        all_results_processed.extend(processed_page_results)
+        
+        # Apply limit to the total collected results if not fetching all pages and limit is set
+        if not include_all_pages and limit is not None and len(all_results_processed) > limit:
+             return all_results_processed[:limit]
+        elif limit is not None and len(all_results_processed) > limit: # if include_all_pages but still want a total limit
+             logger.info(f"[GOOGLE LOCAL SERVICE ASYNC] - Limiting total results from {len(all_results_processed)} to {limit}")
+             return all_results_processed[:limit]
+
+        return all_results_processed
 
-            return all_results_processed
+    async def iter_local_business_pages(self, query: str, location: Optional[str] = None,
+                                        include_all_pages: bool = False) -> AsyncIterator[tuple]:
+        """
+        Search for local businesses, yielding the results page by page as they arrive.
+        
+        The first page is fetched alone for the pagination info, then the other
+        pages concurrently over the shared HTTP client; each is yielded as soon
+        as it is received, whatever its position in the search. Closing the
+        iterator cancels the pages not received yet.
+        
+        Args:
+            query (str): Search term provided by user
+            location (str, optional): Location to search from
+            include_all_pages (bool): Whether to retrieve results from all available pages
+            
+        Yields:
+            tuple: (pages fetched, total pages, processed results of the page).
+                A page that could not be fetched yields no results.
+        """
+        if not self.api_key:
+            logger.error("[GOOGLE LOCAL SERVICE ASYNC] - Cannot search without API key")
+            return
+        
+        base_params = self._base_params(query, location)
+        initial_data = await self._get_page(base_params, page_num_logging=1)
+        if not initial_data:
+            return
+        
+        other_pages = self._other_pages_params(base_params, initial_data) if include_all_pages else []
+        total_pages = 1 + len(other_pages)
+        yield 1, total_pages, self._process_local_results(initial_data)
+        
+        tasks = [
+            asyncio.ensure_future(self._get_page(page_params, page_num_logging=page_num_str))
+            for page_num_str, page_params in other_pages
+        ]
+        try:
+            for fetched, task in enumerate(asyncio.as_completed(tasks), start=2):
+                page_data = await task
+                yield fetched, total_pages, self._process_local_results(page_data) if page_data else []
+        finally:
+            # A caller that stops iterating does not pay for the pages still in flight
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                logger.info(f"[GOOGLE LOCAL SERVICE ASYNC] - Cancelled {len(pending)} pages still in flight")
+                await asyncio.gather(*pending, return_exceptions=True)
 
     def search_local_businesses_sync(self, query: str, location: Optional[str] = None, 
                                      limit: int = None, include_all_pages: bool = False) -> List[Dict[str, Any]]:
@@ -218,14 +281,6 @@ class GoogleLocalSearchService:
         Returns:
             List[Dict]: Processed results with business information
         """
-        # Verify cache first
-        cache_key = self._get_cache_key(query, location, limit, include_all_pages)
-        cached_results = cache.get(cache_key)
-        
-        if cached_results:
-            logger.info(f"[GOOGLE LOCAL SERVICE] - Returning cached results for '{query}' in '{location}'")
-            return cached_results
-        
         try:
             logger.info(f"[GOOGLE LOCAL SERVICE] - Starting synchronous search for '{query}' in '{location}'")
             loop = asyncio.new_event_loop()
@@ -240,12 +295,6 @@ class GoogleLocalSearchService:
             )
             loop.close()
             logger.info(f"[GOOGLE LOCAL SERVICE] - Completed synchronous search with {len(results)} results")
-            
-            # Save results in cache
-            if results:
-                logger.info(f"[GOOGLE LOCAL SERVICE] - Saving results in cache for '{query}' in '{location}'")
-                cache.set(cache_key, results, timeout=3600) # 1 Hour
-            
             return results
         except Exception as e:
             logger.error(f"[GOOGLE LOCAL SERVICE] - Error in synchronous search: {str(e)}")
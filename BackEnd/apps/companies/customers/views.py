@@ -12,11 +12,15 @@ from drf_spectacular.utils import (
     OpenApiParameter, OpenApiTypes
 )
 from apps.companies.customers.services import CustomerService, CustomerLeadService
-from apps.companies.customers.models import Customer, CustomerLeads
+from apps.companies.customers.models import Customer, CustomerLeads, LeadGenerationJob
 from apps.companies.customers.serializers import (
     CustomerSerializer,
-    CustomerLeadsSerializer
+    CustomerLeadsSerializer,
+    LeadGenerationJobSerializer
 )
+from apps.companies.customers.tasks import run_lead_generation_job
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
 import logging
 
 logger = logging.getLogger(__name__)
@@ -707,11 +711,15 @@ class BaseLeadsView:
         operation_id="generate_customer_leads",
         summary="Generate customer leads from Google Local Search",
         description="""
-        Generates leads by searching for businesses through Google Local Search API.
+        Starts a lead generation job searching for businesses through Google Local Search API.
         
-        This endpoint queries Google Local Search via SerpAPI to find businesses matching
-        the specified search criteria. Results are automatically converted to CustomerLeads
-        records in the system, with duplicate detection to prevent creating duplicate leads.
+        The search runs in the background: this endpoint returns the pending job at once.
+        A worker queries Google Local Search via SerpAPI, fetching the pages concurrently,
+        and converts each page to CustomerLeads records as it arrives, with duplicate
+        detection to prevent creating duplicate leads.
+        
+        The progress of every page is pushed to the requester's notification WebSocket as
+        `job_progress` frames, and the job can be polled at `lead-jobs/{id}/`.
         
         The search supports filtering by location and can retrieve either a single page of
         results or all available pages (which may take longer but provides more comprehensive results).
@@ -735,44 +743,19 @@ class BaseLeadsView:
                 name='limit',
                 type=OpenApiTypes.INT,
                 location=OpenApiParameter.QUERY,
-                description='Maximum number of results to return per page',
+                description='Maximum number of results stored',
                 required=False
             ),
             OpenApiParameter(
                 name='include_all_pages',
                 type=OpenApiTypes.BOOL,
                 location=OpenApiParameter.QUERY,
-                description='Whether to retrieve results from all pages (may increase response time)',
+                description='Whether to retrieve results from all pages',
                 required=False
             )
         ],
         responses={
-            200: {
-                'description': 'Leads generated successfully',
-                'type': 'object',
-                'properties': {
-                    'total_results': {
-                        'type': 'integer',
-                        'description': 'Total number of business results found'
-                    },
-                    'new_leads': {
-                        'type': 'integer',
-                        'description': 'Number of new leads created'
-                    },
-                    'existing_leads': {
-                        'type': 'integer',
-                        'description': 'Number of existing leads updated'
-                    },
-                    'message': {
-                        'type': 'string',
-                        'description': 'Summary message about the operation',
-                        'examples': [
-                            'Successfully generated 5 new leads.',
-                            'No new leads were generated.'
-                        ]
-                    }
-                }
-            },
+            202: LeadGenerationJobSerializer,
             400: {
                 'description': 'Bad request',
                 'type': 'object',
@@ -806,14 +789,15 @@ class GenerateLeadsView(BaseLeadsView, CreateAPIView):
     """
     View for generating leads from Google Local search results.
     
-    This view processes customer search queries to fetch detailed business information
-    from Google Local using SerpAPI. It then populates the customer records with this data.
+    This view records customer search queries as lead generation jobs. A Celery worker
+    fetches the detailed business information from Google Local using SerpAPI and
+    populates the customer leads with this data, page by page.
     
     Attributes:
         permission_classes (list): List of permission classes requiring authentication
         
     Methods:
-        post(self, request, *args, **kwargs): Handles the generation of leads by processing search queries
+        post(self, request, *args, **kwargs): Starts a lead generation job for a search query
         
     Note:
         The view requires authentication and proper configuration of SerpAPI credentials.
@@ -823,17 +807,17 @@ class GenerateLeadsView(BaseLeadsView, CreateAPIView):
             permission_classes: List of permission classes requiring authentication
         }
     """
-    serializer_class = None # Not used in this view
+    serializer_class = LeadGenerationJobSerializer
     
     def post(self, request, *args, **kwargs):
         """
-        Generate leads from Google Local search results.
+        Start a lead generation job from Google Local search results.
         
         Args:
             request: HTTP request object containing search parameters
             
         Returns:
-            Response: JSON response with summary of generated leads
+            Response: The pending job, with its id
             
         Raises:
             ValidationError: If required parameters are missing or invalid
@@ -843,7 +827,7 @@ class GenerateLeadsView(BaseLeadsView, CreateAPIView):
             query = request.query_params.get('query')
             location = request.query_params.get('location', '')
             limit = request.query_params.get('limit')
-            include_all_pages = request.query_params.get('include_all_pages', False)
+            include_all_pages = request.query_params.get('include_all_pages', 'false').lower() in ('true', '1')
             
             # Validate required parameters
             if not query:
@@ -855,37 +839,31 @@ class GenerateLeadsView(BaseLeadsView, CreateAPIView):
                     {"error": "Search query is required"}, 
                     status=status.HTTP_400_BAD_REQUEST
                 )
+            if limit is not None and (not limit.isdigit() or int(limit) == 0):
+                return Response(
+                    {"error": "Limit must be a positive integer"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             
-            # Initialize lead service
-            lead_service = CustomerLeadService()
-            
-            # Generate leads using the service
-            result = lead_service.generate_leads_from_search(
-                query=query,
-                location=location,
-                user=request.user,
-                limit=limit,
-                include_all_pages=include_all_pages
-            )
+            # Record the job, the worker picks it up once committed
+            with transaction.atomic():
+                job = CustomerLeadService().create_generation_job(
+                    query=query,
+                    location=location,
+                    user=request.user,
+                    limit=int(limit) if limit is not None else None,
+                    include_all_pages=include_all_pages
+                )
+                job_id, actor_id = str(job.id), str(request.user.id)
+                transaction.on_commit(lambda: run_lead_generation_job.delay(job_id, actor_id=actor_id))
             
-            # Log success
             logger.info(
-                f"[CUSTOMER LEADS VIEW] - Generated leads successfully: {result['new_leads']} new, {result['existing_leads']} existing",
-                extra={
-                    'requester_id': request.user.id,
-                    'total_results': result['total_results']
-                }
+                f"[CUSTOMER LEADS VIEW] - Lead generation job {job_id} started",
+                extra={'requester_id': request.user.id}
             )
+            return Response(LeadGenerationJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
             
-            # Return result summary (excluding actual lead objects for performance)
-            return Response({
-                "total_results": result['total_results'],
-                "new_leads": result['new_leads'],
-                "existing_leads": result['existing_leads'],
-                "message": result['message']
-            })
-            
-        except ValidationError as e:
+        except (ValidationError, DjangoValidationError) as e:
             logger.error(
                 f"[CUSTOMER LEADS VIEW] - Validation error generating leads: {str(e)}",
                 extra={'requester_id': request.user.id},
@@ -905,6 +883,29 @@ class GenerateLeadsView(BaseLeadsView, CreateAPIView):
                 {"error": "An unexpected error occurred while generating leads"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+
+@extend_schema_view(
+    get=extend_schema(
+        tags=["Customers - Leads"],
+        operation_id="retrieve_lead_generation_job",
+        summary="Retrieve a lead generation job",
+        description="Status and progress of a lead generation job of the user's companie.",
+        responses={
+            200: LeadGenerationJobSerializer
+        }
+    )
+)
+class LeadGenerationJobView(BaseLeadsView, RetrieveAPIView):
+    """
+    View for following a lead generation job.
+    """
+    serializer_class = LeadGenerationJobSerializer
+    
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return LeadGenerationJob.objects.none()
+        return LeadGenerationJob.objects.filter(companie=self.request.user.employeer.companie)
             
             
 @extend_schema_view(
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-16 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employeers', '0004_alter_employeer_country_alter_employeer_payment_type'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employeer',
+            index=models.Index(fields=['companie', '-created_at'], name='employeer_tenant_idx'),
+        ),
+    ]
@@ -1,6 +1,6 @@
 from django.db import models
 from django.conf import settings
-from basemodels.models import BaseAddressWithBaseModel
+from basemodels.models import BaseAddressWithBaseModel, tenant_indexes
 from core.constants.choices import PAYROLL_CHOICES, PAYMENT_CHOICES
 
 class Employeer(BaseAddressWithBaseModel):
@@ -62,6 +62,7 @@ class Employeer(BaseAddressWithBaseModel):
         verbose_name = 'Employee'
         verbose_name_plural = 'Employees'
         ordering = ['name']
+        indexes = tenant_indexes('employeer')
     
     def __str__(self):
         return self.name
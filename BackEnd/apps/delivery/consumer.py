@@ -1,7 +1,12 @@
 from channels.generic.websocket import AsyncWebsocketConsumer
 import json
 from asgiref.sync import async_to_sync, sync_to_async
+from django.core.exceptions import ValidationError
+from django.utils.translation import gettext as _
 from .models import Delivery
+from .services.handlers import DeliveryHandler
+from .services.tracking import DeliveryTrackingService
+from core.actor import get_employeer
 from django.db.models import Q
 import logging
 
@@ -14,10 +19,14 @@ class DeliveryConsumer(AsyncWebsocketConsumer):
     Handles:
     - Real-time location updates
     - Status changes notifications
+    - Location and status frames sent by the assigned driver
     - User authentication and permission checks
     - Group subscription management
     """
     
+    # Frames the assigned driver may send instead of calling the REST API
+    DRIVER_FRAMES = ('location', 'status')
+    
     async def connect(self):
         """
         Handles WebSocket connection initialization.
@@ -31,9 +40,9 @@ class DeliveryConsumer(AsyncWebsocketConsumer):
 
         # Verify user permissions before connecting
         user = self.scope['user']
-        can_access = await self.can_access_delivery(user, self.delivery_id)
+        self.access_role = await self.get_access_role(user, self.delivery_id)
         
-        if not can_access:
+        if not self.access_role:
             logger.warning(f"[DELIVERY CONSUMER] - Access denied for user {user.username} to delivery {self.delivery_id}")
             await self.close()
             return
@@ -68,6 +77,10 @@ class DeliveryConsumer(AsyncWebsocketConsumer):
         Currently handles:
         - Client connection notifications
         - Ping messages (responding with pong)
+        - Location frames of the assigned driver, answered with ``location_ack``
+        - Status frames of the assigned driver, answered with ``status_ack``
+        
+        A rejected frame is answered with an ``error`` message.
         
         Args:
             text_data: JSON string containing the message data
@@ -86,10 +99,82 @@ class DeliveryConsumer(AsyncWebsocketConsumer):
                     'type': 'pong',
                     'timestamp': data.get('timestamp')
                 }))
+                
+            elif message_type in self.DRIVER_FRAMES:
+                if self.access_role != 'driver':
+                    await self.send_error(message_type, _("Only the driver of this delivery can send updates"))
+                    return
+                try:
+                    reply = await self.apply_driver_frame(message_type, data)
+                except ValidationError as e:
+                    await self.send_error(message_type, ' '.join(e.messages))
+                    return
+                await self.send(text_data=json.dumps(reply))
         
         except Exception as e:
             logger.error(f"[DELIVERY CONSUMER] - Error processing message: {str(e)}")
     
+    async def send_error(self, message_type, detail):
+        """Answers a rejected frame"""
+        await self.send(text_data=json.dumps({
+            'type': 'error',
+            'request': message_type,
+            'detail': detail
+        }))
+    
+    @sync_to_async
+    def apply_driver_frame(self, message_type, data):
+        """
+        Applies a location or status frame of the assigned driver.
+        
+        Frames go through the same path as the REST endpoints: plain location
+        pings are buffered by DeliveryTrackingService, pings creating a
+        checkpoint and status changes go through DeliveryHandler.
+        
+        Args:
+            message_type: 'location' or 'status'
+            data: Decoded frame
+            
+        Returns:
+            dict: Acknowledgement to send back
+            
+        Raises:
+            ValidationError: If the frame is invalid or the driver is no longer assigned
+        """
+        user = self.scope['user']
+        employeer = get_employeer(user)
+        
+        # The driver may have been reassigned since the socket opened
+        delivery = Delivery.objects.filter(id=self.delivery_id, driver=employeer).first()
+        if delivery is None:
+            raise ValidationError(_("You are no longer the driver of this delivery"))
+        
+        if message_type == 'location':
+            if data.get('create_checkpoint'):
+                delivery = DeliveryHandler.update_delivery_location(delivery, data, employeer)
+                recorded_at = delivery.updated_at.isoformat()
+            else:
+                recorded_at = DeliveryTrackingService.ingest(delivery, data)['recorded_at']
+            return {
+                'type': 'location_ack',
+                'delivery_id': str(delivery.id),
+                'recorded_at': recorded_at
+            }
+        
+        if 'status' not in data:
+            raise ValidationError(_("The status is required"))
+        delivery = DeliveryHandler.change_delivery_status(
+            delivery, data['status'], employeer,
+            notes=data.get('notes'),
+            actor_id=str(user.id)
+        )
+        logger.info(f"[DELIVERY CONSUMER] - Status of delivery {delivery.id} changed to {delivery.status} by {user.username}")
+        return {
+            'type': 'status_ack',
+            'delivery_id': str(delivery.id),
+            'status': delivery.status
+        }
+    
     # Message handler methods
     
     async def location_update(self, event):
@@ -129,7 +214,7 @@ class DeliveryConsumer(AsyncWebsocketConsumer):
         }))
     
     @sync_to_async
-    def can_access_delivery(self, user, delivery_id):
+    def get_access_role(self, user, delivery_id):
         """
         Checks if a user has permission to access delivery data via WebSocket.
         
@@ -143,10 +228,10 @@ class DeliveryConsumer(AsyncWebsocketConsumer):
             delivery_id: ID of the delivery being accessed
             
         Returns:
-            bool: True if user has permission, False otherwise
+            str: 'driver', 'customer' or 'manager', None if the user has no access
         """
         if not user.is_authenticated:
-            return False
+            return None
             
         try:
             # Try to get delivery object
@@ -154,23 +239,21 @@ class DeliveryConsumer(AsyncWebsocketConsumer):
             
             # Check if user is delivery driver
             if hasattr(user, 'employeer') and user.user_type == 'Driver' and delivery.driver_id == user.employeer.id:
-                return True
+                return 'driver'
                 
             # Check if user is the customer
             if hasattr(user, 'customer') and delivery.customer_id == user.customer.id:
-                return True
+                return 'customer'
                 
             # Check if user is manager at the company
             if user.user_type == 'Manager' and hasattr(user, 'employeer'):
                 if user.employeer.companie == delivery.companie:
-                    return True
+                    return 'manager'
             
-            return False
+            return None
             
         except Delivery.DoesNotExist:
-            return False
+            return None
         except Exception as e:
             logger.error(f"[DELIVERY CONSUMER] - Error checking permissions: {str(e)}")
-            return False
-        
-        
\ No newline at end of file
+            return None
@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-16 16:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery', '0002_alter_delivery_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeliveryTrackPoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recorded_at', models.DateTimeField(help_text='When the ping was received')),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('delivery', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='track_points', to='delivery.delivery')),
+            ],
+            options={
+                'verbose_name': 'Delivery Track Point',
+                'verbose_name_plural': 'Delivery Track Points',
+                'ordering': ['delivery', 'recorded_at'],
+                'indexes': [models.Index(fields=['delivery', 'recorded_at'], name='track_delivery_time_idx')],
+            },
+        ),
+    ]
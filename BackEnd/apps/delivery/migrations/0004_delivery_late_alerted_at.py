@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-16 16:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery', '0003_delivery_track_point'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='delivery',
+            name='late_alerted_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='When the managers were last alerted that the delivery is late', null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-16 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery', '0004_delivery_late_alerted_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='delivery',
+            index=models.Index(fields=['companie', '-created_at'], name='delivery_tenant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='delivery',
+            index=models.Index(fields=['companie', 'status', '-created_at'], name='delivery_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deliverycheckpoint',
+            index=models.Index(fields=['companie', '-created_at'], name='checkpoint_tenant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deliverycheckpoint',
+            index=models.Index(fields=['delivery', 'timestamp'], name='checkpoint_delivery_idx'),
+        ),
+    ]
@@ -1,6 +1,6 @@
 from django.db import models
 from core.constants.choices import DELIVERY_STATUS_CHOICES
-from basemodels.models import BaseModel
+from basemodels.models import BaseModel, tenant_indexes
 from apps.companies.customers.models import Customer
 from apps.companies.employeers.models import Employeer
 from apps.vehicle.models import Vehicle
@@ -17,11 +17,13 @@ class Delivery(BaseModel):
     current_location = models.JSONField(null=True, blank=True, help_text='Latitude/Longitude')
     estimated_arrival = models.DateTimeField(null=True, blank=True)
     actual_arrival = models.DateTimeField(null=True, blank=True) 
+    late_alerted_at = models.DateTimeField(null=True, blank=True, editable=False, help_text='When the managers were last alerted that the delivery is late')
     
     class Meta:
         verbose_name = 'Delivery'
         verbose_name_plural = 'Deliveries'
         ordering = ['-created_at']
+        indexes = tenant_indexes('delivery', 'status')
         permissions = [
             # Delivery Custom Permissions for drivers and Customers
             ('view_own_delivery', 'Can view own delivery'),
@@ -44,4 +46,39 @@ class DeliveryCheckpoint(BaseModel):
         verbose_name = 'Delivery Checkpoint'
         verbose_name_plural = 'Delivery Checkpoints'
         ordering = ['-created_at']
+        indexes = tenant_indexes('checkpoint') + [
+            models.Index(fields=['delivery', 'timestamp'], name='checkpoint_delivery_idx'),
+        ]
         
+
+
+class DeliveryTrackPoint(models.Model):
+    """
+    Breadcrumb of the route of a delivery, written in batches by the
+    DeliveryTrackingService from the GPS pings buffered in Redis.
+    
+    The table grows with every tracked minute of every delivery, so rows only
+    hold what a track needs: the audit columns of BaseModel are left out and
+    the tenant is the delivery's.
+    
+    Fields:
+        delivery: ForeignKey to Delivery
+        recorded_at: datetime: When the ping was received
+        latitude: float
+        longitude: float
+    """
+    delivery = models.ForeignKey(Delivery, on_delete=models.CASCADE, related_name='track_points')
+    recorded_at = models.DateTimeField(help_text='When the ping was received')
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    
+    class Meta:
+        verbose_name = 'Delivery Track Point'
+        verbose_name_plural = 'Delivery Track Points'
+        ordering = ['delivery', 'recorded_at']
+        indexes = [
+            models.Index(fields=['delivery', 'recorded_at'], name='track_delivery_time_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{self.delivery_id} @ {self.recorded_at}: {self.latitude}, {self.longitude}'
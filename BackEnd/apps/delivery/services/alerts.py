@@ -0,0 +1,164 @@
+import json
+import logging
+from collections import defaultdict
+from django.db.models import F, Q
+from django.utils import timezone
+from django_redis import get_redis_connection
+from apps.companies.models import Companie
+from apps.notifications.services.recipients import RecipientIndex
+from core.email_handlers import DeliveryEmailHandler
+from ..models import Delivery
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryAlertService:
+    """
+    Per-company digests of late deliveries and status changes for the managers.
+
+    Status changes are queued in Redis as they happen; ``send_digests`` drains
+    them together with one query over the late deliveries, renders one digest
+    per company and sends one message per manager over a single SMTP
+    connection. A late delivery is alerted once: ``late_alerted_at`` keeps it
+    out of the next digests until its ETA moves past the alert.
+    """
+
+    PREFIX = 'delivery_alerts'
+    COMPANIES_KEY = f'{PREFIX}:companies'
+    # Statuses of deliveries still on their way
+    ACTIVE_STATUSES = ('pending', 'pickup_in_progress', 'in_transit')
+
+    @staticmethod
+    def _redis():
+        return get_redis_connection('default')
+
+    @classmethod
+    def _changes_key(cls, companie_id):
+        return f'{cls.PREFIX}:status_changes:{companie_id}'
+
+    @classmethod
+    def queue_status_change(cls, delivery, old_status, new_status):
+        """Queue a status change for the next digest of the delivery's company"""
+        if delivery.companie_id is None:
+            return
+        change = {
+            'delivery_id': str(delivery.id),
+            'customer_name': str(delivery.customer),
+            'driver_name': str(delivery.driver),
+            'old_status': old_status,
+            'new_status': new_status,
+            'changed_at': timezone.now().strftime("%d/%m/%Y %H:%M:%S"),
+        }
+        pipe = cls._redis().pipeline(transaction=True)
+        pipe.rpush(cls._changes_key(delivery.companie_id), json.dumps(change))
+        pipe.sadd(cls.COMPANIES_KEY, str(delivery.companie_id))
+        pipe.execute()
+
+    @classmethod
+    def _take_status_changes(cls, redis):
+        """Atomically take the queued status changes of every company"""
+        companie_ids = sorted(member.decode() for member in redis.smembers(cls.COMPANIES_KEY))
+        if not companie_ids:
+            return {}
+        pipe = redis.pipeline(transaction=True)
+        for companie_id in companie_ids:
+            pipe.srem(cls.COMPANIES_KEY, companie_id)
+            pipe.lrange(cls._changes_key(companie_id), 0, -1)
+            pipe.delete(cls._changes_key(companie_id))
+        results = pipe.execute()
+        return {
+            companie_id: results[index * 3 + 1]
+            for index, companie_id in enumerate(companie_ids)
+            if results[index * 3 + 1]
+        }
+
+    @classmethod
+    def _requeue_status_changes(cls, redis, changes):
+        """Put status changes back in front of their queues after a failed send"""
+        pipe = redis.pipeline(transaction=True)
+        for companie_id, raw_changes in changes.items():
+            pipe.lpush(cls._changes_key(companie_id), *reversed(raw_changes))
+            pipe.sadd(cls.COMPANIES_KEY, companie_id)
+        pipe.execute()
+
+    @classmethod
+    def late_deliveries(cls, now):
+        """Late deliveries whose managers were not alerted since their current ETA"""
+        return Delivery.objects.filter(
+            status__in=cls.ACTIVE_STATUSES,
+            estimated_arrival__lt=now,
+            actual_arrival__isnull=True,
+            companie__isnull=False
+        ).filter(
+            Q(late_alerted_at__isnull=True) | Q(late_alerted_at__lt=F('estimated_arrival'))
+        ).select_related('customer', 'driver', 'vehicle').order_by('companie_id', 'estimated_arrival')
+
+    @classmethod
+    def send_digests(cls, now=None):
+        """
+        Send the digests of every company with late deliveries or status changes.
+
+        Returns:
+            dict: Number of digests (companies), messages, late deliveries and status changes sent
+        """
+        now = now or timezone.now()
+        redis = cls._redis()
+
+        digests = defaultdict(lambda: {'late_deliveries': [], 'status_changes': [], 'delivery_ids': []})
+        for delivery in cls.late_deliveries(now):
+            digest = digests[str(delivery.companie_id)]
+            digest['delivery_ids'].append(delivery.pk)
+            digest['late_deliveries'].append({
+                'delivery_id': str(delivery.id),
+                'customer_name': str(delivery.customer),
+                'driver_name': str(delivery.driver),
+                'vehicle_info': str(delivery.vehicle),
+                'status': delivery.status,
+                'estimated_arrival': delivery.estimated_arrival,
+                'delay_hours': round((now - delivery.estimated_arrival).total_seconds() / 3600, 1),
+            })
+
+        changes = cls._take_status_changes(redis)
+        for companie_id, raw_changes in changes.items():
+            digests[companie_id]['status_changes'] = [json.loads(raw) for raw in raw_changes]
+
+        if not digests:
+            return {'digests': 0, 'messages': 0, 'late_deliveries': 0, 'status_changes': 0}
+
+        try:
+            names = {
+                str(pk): name
+                for pk, name in Companie.objects.filter(pk__in=list(digests)).values_list('pk', 'name')
+            }
+            handler = DeliveryEmailHandler()
+            messages, alerted_ids, sent_digests, sent_changes = [], [], 0, 0
+            for companie_id, digest in digests.items():
+                manager_emails = sorted(set(RecipientIndex.recipient_emails(companie_id, 'Manager')))
+                if not manager_emails:
+                    # Nobody to alert: late deliveries stay pending, status changes are dropped
+                    continue
+                context = {
+                    'companie_name': names.get(companie_id, ''),
+                    'late_deliveries': digest['late_deliveries'],
+                    'status_changes': digest['status_changes'],
+                    'generated_at': now,
+                }
+                messages.extend(handler.build_manager_digest(context, manager_emails))
+                alerted_ids.extend(digest['delivery_ids'])
+                sent_digests += 1
+                sent_changes += len(digest['status_changes'])
+
+            sent = handler.send_messages(messages)
+        except Exception as e:
+            logger.error(f"[DELIVERY ALERTS] Error sending digests, requeueing the status changes: {str(e)}")
+            cls._requeue_status_changes(redis, changes)
+            raise
+
+        if alerted_ids:
+            Delivery.objects.filter(pk__in=alerted_ids).update(late_alerted_at=now)
+
+        logger.info(
+            f"[DELIVERY ALERTS] {sent} digests sent to the managers of {sent_digests} companies "
+            f"({len(alerted_ids)} late deliveries, {sent_changes} status changes)"
+        )
+        return {'digests': sent_digests, 'messages': sent, 'late_deliveries': len(alerted_ids), 'status_changes': sent_changes}
@@ -7,6 +7,8 @@ from apps.companies.employeers.models import Employeer
 from apps.vehicle.models import Vehicle
 from apps.inventory.load_order.models import LoadOrder
 from .validators import DeliveryValidator
+from .tracking import DeliveryTrackingService
+from ..tasks.handlers import notify_delivery_status_change, generate_delivery_report
 from django.utils import timezone
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
@@ -125,42 +127,7 @@ class DeliveryHandler:
                 
             # Update status (if provided)
             if 'status' in data:
-                old_status = delivery.status
-                new_status = data['status']
-                
-                delivery.status = new_status
-                
-                # If status is 'delivered', record actual arrival time
-                if new_status == 'delivered' and not delivery.actual_arrival:
-                    delivery.actual_arrival = timezone.now()
-                    
-                # Create checkpoint for status change
-                location = delivery.current_location or {'latitude': 0, 'longitude': 0}
-                notes = data.get('notes', f"Status changed from {old_status} to {new_status}")
-                
-                checkpoint = DeliveryCheckpoint.objects.create(
-                    delivery=delivery,
-                    location=location,
-                    status=new_status,
-                    notes=notes,
-                    created_by=updated_by,
-                    updated_by=updated_by
-                )
-                
-                # Notify via WebSocket
-                try:
-                    channel_layer = get_channel_layer()
-                    async_to_sync(channel_layer.group_send)(
-                        f'delivery_{delivery.id}',
-                        {
-                            'type': 'status_update',
-                            'status': new_status,
-                            'delivery_id': str(delivery.id),
-                            'timestamp': checkpoint.timestamp.isoformat()
-                        }
-                    )
-                except Exception as e:
-                    logger.error(f"[DELIVERY HANDLER] Error sending status update via WebSocket: {str(e)}")
+                DeliveryHandler._apply_status(delivery, data['status'], data.get('notes'), updated_by)
             
             # Update location (if provided)
             if 'current_location' in data:
@@ -188,6 +155,99 @@ class DeliveryHandler:
             logger.error(f"[DELIVERY HANDLER] Error updating delivery: {str(e)}")
             raise ValidationError(_("Error updating delivery"))
     
+    @staticmethod
+    def _apply_status(delivery: Delivery, new_status: str, notes, updated_by) -> DeliveryCheckpoint:
+        """
+        Sets the status of a delivery, recording a checkpoint and notifying the
+        WebSocket clients. The delivery is saved by the caller.
+        """
+        old_status = delivery.status
+        delivery.status = new_status
+        
+        # If status is 'delivered', record actual arrival time
+        if new_status == 'delivered' and not delivery.actual_arrival:
+            delivery.actual_arrival = timezone.now()
+            
+        # Create checkpoint for status change
+        location = delivery.current_location or {'latitude': 0, 'longitude': 0}
+        
+        checkpoint = DeliveryCheckpoint.objects.create(
+            delivery=delivery,
+            location=location,
+            status=new_status,
+            notes=notes or f"Status changed from {old_status} to {new_status}",
+            created_by=updated_by,
+            updated_by=updated_by
+        )
+        
+        # Notify via WebSocket
+        try:
+            channel_layer = get_channel_layer()
+            async_to_sync(channel_layer.group_send)(
+                f'delivery_{delivery.id}',
+                {
+                    'type': 'status_update',
+                    'status': new_status,
+                    'delivery_id': str(delivery.id),
+                    'timestamp': checkpoint.timestamp.isoformat()
+                }
+            )
+        except Exception as e:
+            logger.error(f"[DELIVERY HANDLER] Error sending status update via WebSocket: {str(e)}")
+        
+        return checkpoint
+    
+    @staticmethod
+    @transaction.atomic
+    def change_delivery_status(delivery: Delivery, new_status: str, updated_by, notes=None, actor_id=None) -> Delivery:
+        """
+        Moves a delivery to a new status and schedules the status notifications.
+        
+        Args:
+            delivery: Existing Delivery instance to update
+            new_status: Status to move the delivery to
+            updated_by: Employeer performing the update
+            notes: Optional notes of the checkpoint recorded for the change
+            actor_id: Id of the acting user, passed to the notification tasks
+            
+        Returns:
+            Updated Delivery instance
+            
+        Raises:
+            ValidationError: If the status transition is invalid
+        """
+        try:
+            old_status = delivery.status
+            DeliveryValidator.validate_status_change(delivery, new_status)
+            
+            DeliveryHandler._apply_status(
+                delivery, new_status,
+                notes or f"Status altered from {old_status} to {new_status}",
+                updated_by
+            )
+            delivery.updated_by = updated_by
+            delivery.save()
+            
+            # Notify and report once the change is committed
+            delivery_id = str(delivery.id)
+            
+            def schedule_tasks():
+                notify_delivery_status_change.delay(delivery_id, old_status, new_status, actor_id=actor_id)
+                if new_status == 'delivered':
+                    generate_delivery_report.delay(delivery_id, actor_id=actor_id)
+            
+            transaction.on_commit(schedule_tasks)
+            
+            logger.info(f"[DELIVERY HANDLER] Status of delivery {delivery.id} changed from {old_status} to {new_status}")
+            return delivery
+            
+        except ValidationError as e:
+            logger.error(f"[DELIVERY HANDLER] Validation error when changing delivery status: {str(e)}")
+            raise
+        except Exception as e:
+            logger.error(f"[DELIVERY HANDLER] Error changing delivery status: {str(e)}")
+            raise ValidationError(_("Error updating delivery status"))
+    
     @staticmethod
     @transaction.atomic
     def update_delivery_location(delivery: Delivery, data: dict, updated_by) -> Delivery:
@@ -237,22 +297,12 @@ class DeliveryHandler:
                     updated_by=updated_by
                 )
                 
-            # Notify via WebSocket
+            # Notify via WebSocket and add the location to the buffered track,
+            # a later flush of older pings must not overwrite it
             try:
-                channel_layer = get_channel_layer()
-                async_to_sync(channel_layer.group_send)(
-                    f'delivery_{delivery.id}',
-                    {
-                        'type': 'location_update',
-                        'latitude': latitude,
-                        'longitude': longitude,
-                        'delivery_id': str(delivery.id),
-                        'status': delivery.status,
-                        'estimated_arrival': delivery.estimated_arrival.isoformat() if delivery.estimated_arrival else None
-                    }
-                )
+                DeliveryTrackingService.record(delivery, data)
             except Exception as e:
-                logger.error(f"[DELIVERY HANDLER] Error sending location update via WebSocket: {str(e)}")
+                logger.error(f"[DELIVERY HANDLER] Error buffering location of delivery {delivery.id}: {str(e)}")
                 
             logger.info(f"[DELIVERY HANDLER] Location of delivery {delivery.id} successfully updated")
             return delivery
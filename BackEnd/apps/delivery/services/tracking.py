@@ -0,0 +1,286 @@
+import json
+import logging
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django_redis import get_redis_connection
+from ..models import Delivery, DeliveryTrackPoint
+from .validators import DeliveryValidator
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryTrackingService:
+    """
+    Ingestion path of the delivery GPS pings.
+
+    A ping is validated, sent to the ``delivery_{id}`` WebSocket subscribers
+    and appended to a Redis buffer, without touching the database. The
+    ``flush_delivery_locations`` task then writes the buffered pings in
+    batches: one UPDATE of ``current_location`` per delivery and one
+    ``bulk_create`` of the downsampled track points of every delivery, so
+    database writes per delivery are bounded by the flush and track intervals
+    whatever the devices' reporting rate.
+    """
+
+    PREFIX = 'delivery_tracking'
+    DIRTY_KEY = f'{PREFIX}:dirty'
+    # Overlapping flushes could write an older location last
+    FLUSH_LOCK_KEY = f'{PREFIX}:flush_lock'
+    FLUSH_LOCK_TIMEOUT = 60
+    # The last track point of a delivery is forgotten once it stops reporting
+    LAST_POINT_TIMEOUT = 24 * 3600
+    # Flushes a delivery's pings may fail before they are dropped
+    MAX_FLUSH_ATTEMPTS = 3
+
+    @staticmethod
+    def _redis():
+        return get_redis_connection('default')
+
+    @classmethod
+    def _pings_key(cls, delivery_id):
+        return f'{cls.PREFIX}:pings:{delivery_id}'
+
+    @classmethod
+    def _last_point_key(cls, delivery_id):
+        return f'{cls.PREFIX}:last_point:{delivery_id}'
+
+    @classmethod
+    def _attempts_key(cls, delivery_id):
+        return f'{cls.PREFIX}:attempts:{delivery_id}'
+
+    @staticmethod
+    def broadcast(delivery_id, ping):
+        """Send a ping to the WebSocket subscribers of the delivery"""
+        try:
+            channel_layer = get_channel_layer()
+            async_to_sync(channel_layer.group_send)(
+                f'delivery_{delivery_id}',
+                {
+                    'type': 'location_update',
+                    'latitude': ping['latitude'],
+                    'longitude': ping['longitude'],
+                    'delivery_id': str(delivery_id),
+                    'status': ping['status'],
+                    'estimated_arrival': ping['estimated_arrival']
+                }
+            )
+        except Exception as e:
+            logger.error(f"[DELIVERY TRACKING] Error sending location update via WebSocket: {str(e)}")
+
+    @classmethod
+    def record(cls, delivery, data):
+        """
+        Buffer and broadcast a location already validated for the delivery.
+
+        Args:
+            delivery: Delivery the location belongs to
+            data: Dictionary with latitude, longitude and an optional estimated_arrival
+
+        Returns:
+            dict: The buffered ping
+        """
+        estimated_arrival = delivery.estimated_arrival
+        if data.get('estimated_arrival'):
+            estimated_arrival = DeliveryValidator.validate_estimated_arrival(data['estimated_arrival'])
+        if estimated_arrival is not None:
+            estimated_arrival = estimated_arrival.isoformat()
+        ping = {
+            'latitude': float(data['latitude']),
+            'longitude': float(data['longitude']),
+            'recorded_at': timezone.now().isoformat(),
+            'status': delivery.status,
+            'estimated_arrival': estimated_arrival,
+        }
+
+        key = cls._pings_key(delivery.pk)
+        pipe = cls._redis().pipeline(transaction=True)
+        pipe.rpush(key, json.dumps(ping))
+        # Bound the buffer of a delivery if the flush falls behind
+        pipe.ltrim(key, -settings.DELIVERY_TRACKING['MAX_BUFFERED_PINGS'], -1)
+        pipe.sadd(cls.DIRTY_KEY, str(delivery.pk))
+        pipe.execute()
+
+        cls.broadcast(delivery.pk, ping)
+        return ping
+
+    @classmethod
+    def ingest(cls, delivery, data):
+        """
+        Validate a GPS ping, broadcast it and buffer it for the next flush.
+
+        Raises:
+            ValidationError: If the coordinates or the estimated arrival are invalid,
+                or the delivery is finished
+        """
+        DeliveryValidator.validate_location_update(delivery, data)
+        return cls.record(delivery, data)
+
+    @classmethod
+    def _take_buffered(cls, redis):
+        """Atomically take the buffered pings of every delivery that reported since the last flush"""
+        delivery_ids = sorted(member.decode() for member in redis.smembers(cls.DIRTY_KEY))
+        if not delivery_ids:
+            return {}
+        pipe = redis.pipeline(transaction=True)
+        for delivery_id in delivery_ids:
+            pipe.srem(cls.DIRTY_KEY, delivery_id)
+            pipe.lrange(cls._pings_key(delivery_id), 0, -1)
+            pipe.delete(cls._pings_key(delivery_id))
+        results = pipe.execute()
+        return {
+            delivery_id: results[index * 3 + 1]
+            for index, delivery_id in enumerate(delivery_ids)
+            if results[index * 3 + 1]
+        }
+
+    @classmethod
+    def _requeue(cls, redis, buffered):
+        """Put pings back in front of their buffers after a failed flush"""
+        pipe = redis.pipeline(transaction=True)
+        for delivery_id, raw_pings in buffered.items():
+            pipe.lpush(cls._pings_key(delivery_id), *reversed(raw_pings))
+            pipe.sadd(cls.DIRTY_KEY, delivery_id)
+        pipe.execute()
+
+    @classmethod
+    def _requeue_failed(cls, redis, failed):
+        """Requeue the pings of the deliveries whose write failed, dropping them after MAX_FLUSH_ATTEMPTS"""
+        pipe = redis.pipeline(transaction=False)
+        for delivery_id in failed:
+            pipe.incr(cls._attempts_key(delivery_id))
+            pipe.expire(cls._attempts_key(delivery_id), cls.LAST_POINT_TIMEOUT)
+        attempts = pipe.execute()[::2]
+
+        retried = {}
+        for (delivery_id, raw_pings), attempt in zip(failed.items(), attempts):
+            if attempt < cls.MAX_FLUSH_ATTEMPTS:
+                retried[delivery_id] = raw_pings
+                continue
+            logger.error(
+                f"[DELIVERY TRACKING] Dropping {len(raw_pings)} pings of delivery {delivery_id} "
+                f"after {attempt} failed flushes"
+            )
+            redis.delete(cls._attempts_key(delivery_id))
+        if retried:
+            cls._requeue(redis, retried)
+
+    @staticmethod
+    def _parse_pings(delivery_id, raw_pings):
+        """Decode the buffered pings of a delivery, dropping the malformed ones"""
+        pings = []
+        for raw in raw_pings:
+            try:
+                ping = json.loads(raw)
+                ping['recorded_at'] = parse_datetime(ping['recorded_at'])
+                if ping.get('estimated_arrival'):
+                    ping['estimated_arrival'] = parse_datetime(ping['estimated_arrival'])
+                ping['latitude'], ping['longitude'] = float(ping['latitude']), float(ping['longitude'])
+            except (ValueError, TypeError, KeyError) as e:
+                logger.warning(f"[DELIVERY TRACKING] Dropping malformed ping of delivery {delivery_id}: {str(e)}")
+                continue
+            if ping['recorded_at'] is None:
+                logger.warning(f"[DELIVERY TRACKING] Dropping ping of delivery {delivery_id} without a valid time")
+                continue
+            pings.append(ping)
+        return pings
+
+    @classmethod
+    def flush(cls):
+        """
+        Write the buffered pings to the database.
+
+        Only one flush runs at a time. Each delivery is written in its own
+        savepoint, the pings of a delivery whose write fails go back to the
+        buffer without holding back the others, and are dropped once they
+        failed MAX_FLUSH_ATTEMPTS flushes.
+
+        Returns:
+            dict: Number of deliveries updated and track points created
+        """
+        if not cache.add(cls.FLUSH_LOCK_KEY, 1, cls.FLUSH_LOCK_TIMEOUT):
+            logger.info("[DELIVERY TRACKING] Another flush is running, skipping")
+            return {'deliveries': 0, 'track_points': 0}
+        try:
+            return cls._flush()
+        finally:
+            cache.delete(cls.FLUSH_LOCK_KEY)
+
+    @classmethod
+    def _flush(cls):
+        redis = cls._redis()
+        buffered = cls._take_buffered(redis)
+        if not buffered:
+            return {'deliveries': 0, 'track_points': 0}
+
+        track_interval = settings.DELIVERY_TRACKING['TRACK_INTERVAL']
+        delivery_ids = list(buffered)
+        last_points = dict(zip(delivery_ids, redis.mget([cls._last_point_key(pk) for pk in delivery_ids])))
+
+        updated, points, new_last_points = 0, [], {}
+        written, failed = [], {}
+        try:
+            with transaction.atomic():
+                now = timezone.now()
+                for delivery_id, raw_pings in buffered.items():
+                    pings = cls._parse_pings(delivery_id, raw_pings)
+                    if not pings:
+                        continue
+                    latest = pings[-1]
+                    fields = {
+                        'current_location': {'latitude': latest['latitude'], 'longitude': latest['longitude']},
+                        'updated_at': now,
+                    }
+                    if latest.get('estimated_arrival'):
+                        fields['estimated_arrival'] = latest['estimated_arrival']
+                    try:
+                        with transaction.atomic():
+                            if not Delivery.objects.filter(pk=delivery_id).update(**fields):
+                                # Deleted since it reported
+                                continue
+                    except Exception as e:
+                        logger.error(f"[DELIVERY TRACKING] Error flushing delivery {delivery_id}, requeueing its pings: {str(e)}")
+                        failed[delivery_id] = raw_pings
+                        continue
+                    updated += 1
+                    written.append(delivery_id)
+
+                    # Downsample to one track point per interval
+                    last = last_points.get(delivery_id)
+                    last = float(last) if last is not None else None
+                    for ping in pings:
+                        moment = ping['recorded_at'].timestamp()
+                        if last is not None and moment - last < track_interval:
+                            continue
+                        points.append(DeliveryTrackPoint(
+                            delivery_id=delivery_id,
+                            recorded_at=ping['recorded_at'],
+                            latitude=ping['latitude'],
+                            longitude=ping['longitude']
+                        ))
+                        last = moment
+                    if last is not None:
+                        new_last_points[delivery_id] = last
+
+                DeliveryTrackPoint.objects.bulk_create(points, batch_size=1000)
+        except Exception as e:
+            logger.error(f"[DELIVERY TRACKING] Error flushing locations, requeueing {len(buffered)} deliveries: {str(e)}")
+            cls._requeue(redis, buffered)
+            raise
+
+        if failed:
+            cls._requeue_failed(redis, failed)
+
+        pipe = redis.pipeline(transaction=False)
+        for delivery_id, last in new_last_points.items():
+            pipe.set(cls._last_point_key(delivery_id), last, ex=cls.LAST_POINT_TIMEOUT)
+        if written:
+            pipe.delete(*(cls._attempts_key(delivery_id) for delivery_id in written))
+        pipe.execute()
+
+        logger.info(f"[DELIVERY TRACKING] Flushed {updated} delivery locations and {len(points)} track points")
+        return {'deliveries': updated, 'track_points': len(points)}
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext as _
 from ..models import Delivery
@@ -6,6 +7,8 @@ from apps.companies.employeers.models import Employeer
 from apps.vehicle.models import Vehicle
 from apps.inventory.load_order.models import LoadOrder
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
@@ -189,11 +192,12 @@ class DeliveryValidator:
         Checks:
         - Required coordinate fields are present
         - Coordinates are valid numbers within range
+        - Estimated arrival, when provided, is a valid datetime
         - Delivery is not in a final state
         
         Args:
             delivery: Delivery instance to update
-            data: Dictionary containing location data (latitude, longitude)
+            data: Dictionary containing location data (latitude, longitude, estimated_arrival)
             
         Raises:
             ValidationError: If any validation check fails
@@ -216,6 +220,10 @@ class DeliveryValidator:
             except ValueError:
                 raise ValidationError(_("Coordinates must be numeric values"))
             
+            # Validate the ETA, buffered pings carry it to the next flush
+            if data.get('estimated_arrival'):
+                DeliveryValidator.validate_estimated_arrival(data['estimated_arrival'])
+            
             # Check if delivery can receive location updates
             if delivery.status in ['delivered', 'returned', 'failed', 'cancelled']:
                 raise ValidationError(_("Cannot update location of a completed delivery"))
@@ -225,3 +233,34 @@ class DeliveryValidator:
         except Exception as e:
             logger.error(f"[DELIVERY VALIDATOR] Error validating location update: {str(e)}")
             raise ValidationError(_("Error validating location update"))
+    
+    @staticmethod
+    def validate_estimated_arrival(value) -> datetime:
+        """
+        Validates an estimated arrival sent with a location update.
+        
+        Args:
+            value: datetime or ISO 8601 string
+            
+        Returns:
+            The estimated arrival, aware only when USE_TZ is set
+            
+        Raises:
+            ValidationError: If the value is not a valid datetime
+        """
+        if isinstance(value, datetime):
+            estimated_arrival = value
+        else:
+            try:
+                estimated_arrival = parse_datetime(str(value))
+            except ValueError:
+                # Well formatted but out of range, e.g. month 13
+                estimated_arrival = None
+        if estimated_arrival is None:
+            raise ValidationError(_("Estimated arrival must be a valid ISO 8601 datetime"))
+        
+        if settings.USE_TZ and timezone.is_naive(estimated_arrival):
+            estimated_arrival = timezone.make_aware(estimated_arrival)
+        elif not settings.USE_TZ and timezone.is_aware(estimated_arrival):
+            estimated_arrival = timezone.make_naive(estimated_arrival)
+        return estimated_arrival
@@ -0,0 +1,2 @@
+# Imported so the worker's autodiscovery registers the tasks
+from .handlers import *  # noqa: F401,F403
@@ -1,4 +1,5 @@
 from celery import shared_task
+from core.actor import actor_context
 from django.utils.translation import gettext as _
 from django.core.mail import send_mail
 from django.conf import settings
@@ -8,25 +9,30 @@ from apps.delivery.models import Delivery, DeliveryCheckpoint
 import logging
 import csv
 import os
-from io import StringIO
 import json
 
 logger = logging.getLogger(__name__)
 
 @shared_task
+@actor_context
 def notify_delivery_status_change(delivery_id, old_status, new_status):
     """
     Envia notificações quando o status de uma entrega muda.
     """
+    from apps.delivery.services.alerts import DeliveryAlertService
+
     try:
-        delivery = Delivery.objects.get(id=delivery_id)
+        delivery = Delivery.objects.select_related('customer', 'driver', 'vehicle').get(id=delivery_id)
+        
+        # Os gerentes recebem a mudança no próximo resumo da empresa
+        DeliveryAlertService.queue_status_change(delivery, old_status, new_status)
         
         # Dados básicos para a notificação
         context = {
             'delivery_id': delivery.id,
-            'customer_name': delivery.customer.name,
-            'driver_name': delivery.driver.name,
-            'vehicle_info': f"{delivery.vehicle.model} ({delivery.vehicle.license_plate})",
+            'customer_name': str(delivery.customer),
+            'driver_name': str(delivery.driver),
+            'vehicle_info': str(delivery.vehicle),
             'old_status': old_status,
             'new_status': new_status,
             'timestamp': timezone.now().strftime("%d/%m/%Y %H:%M:%S"),
@@ -50,96 +56,22 @@ def notify_delivery_status_change(delivery_id, old_status, new_status):
             
             logger.info(f"[DELIVERY TASK] Notificação de status enviada para o cliente {delivery.customer.full_name}")
         
-        # Notificação para a empresa (gerentes)
-        manager_emails = delivery.companie.get_manager_emails()
-        if manager_emails:
-            subject = _("Atualização de Status de Entrega - Interno")
-            html_message = render_to_string('delivery/email/status_update_internal.html', context)
-            plain_message = render_to_string('delivery/email/status_update_internal.txt', context)
-            
-            send_mail(
-                subject,
-                plain_message,
-                settings.DEFAULT_FROM_EMAIL,
-                manager_emails,
-                html_message=html_message,
-                fail_silently=False
-            )
-            
-            logger.info(f"[DELIVERY TASK] Notificação de status enviada para gerentes da empresa")
-        
         return True
     except Exception as e:
         logger.error(f"[DELIVERY TASK] Erro ao enviar notificação de status: {str(e)}")
         return False
 
 @shared_task
+@actor_context
 def generate_delivery_report(delivery_id):
     """
     Gera um relatório detalhado de uma entrega, incluindo todos os checkpoints.
     """
     try:
-        delivery = Delivery.objects.get(id=delivery_id)
-        checkpoints = DeliveryCheckpoint.objects.filter(delivery=delivery).order_by('timestamp')
-        
-        # Criar CSV em memória
-        output = StringIO()
-        writer = csv.writer(output)
-        
-        # Cabeçalho
-        writer.writerow([
-            'ID da Entrega', 
-            'Cliente', 
-            'Motorista',
-            'Veículo',
-            'Status Atual',
-            'Data de Criação',
-            'Última Atualização',
-            'ETA',
-            'Chegada Real'
-        ])
-        
-        # Dados principais da entrega
-        writer.writerow([
-            str(delivery.id),
-            delivery.customer.name,
-            delivery.driver.name,
-            f"{delivery.vehicle.model} ({delivery.vehicle.license_plate})",
-            delivery.status,
-            delivery.created_at.strftime("%d/%m/%Y %H:%M:%S"),
-            delivery.updated_at.strftime("%d/%m/%Y %H:%M:%S"),
-            delivery.estimated_arrival.strftime("%d/%m/%Y %H:%M:%S") if delivery.estimated_arrival else "N/A",
-            delivery.actual_arrival.strftime("%d/%m/%Y %H:%M:%S") if delivery.actual_arrival else "N/A"
-        ])
-        
-        # Linha em branco
-        writer.writerow([])
-        
-        # Cabeçalho dos checkpoints
-        writer.writerow([
-            'Checkpoint ID',
-            'Timestamp',
-            'Status',
-            'Latitude',
-            'Longitude',
-            'Notas'
-        ])
-        
-        # Dados dos checkpoints
-        for checkpoint in checkpoints:
-            location = checkpoint.location or {}
-            writer.writerow([
-                str(checkpoint.id),
-                checkpoint.timestamp.strftime("%d/%m/%Y %H:%M:%S"),
-                checkpoint.status,
-                location.get('latitude', 'N/A'),
-                location.get('longitude', 'N/A'),
-                checkpoint.notes or 'N/A'
-            ])
-        
-        # Obter conteúdo do CSV
-        csv_content = output.getvalue()
-        output.close()
+        delivery = Delivery.objects.select_related('customer', 'driver', 'vehicle').get(id=delivery_id)
+        checkpoints = DeliveryCheckpoint.objects.filter(delivery=delivery).order_by('timestamp').values_list(
+            'id', 'timestamp', 'status', 'location', 'notes'
+        )
         
         # Salvar relatório (aqui você pode enviar por email, salvar em storage, etc)
         # Exemplo: salvar em um diretório temporário
@@ -149,8 +81,60 @@ def generate_delivery_report(delivery_id):
         report_filename = f"delivery_report_{delivery.id}_{timezone.now().strftime('%Y%m%d%H%M%S')}.csv"
         report_path = os.path.join(report_dir, report_filename)
         
-        with open(report_path, 'w') as f:
-            f.write(csv_content)
+        # As linhas são gravadas direto no arquivo, sem montar o CSV em memória
+        with open(report_path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            
+            # Cabeçalho
+            writer.writerow([
+                'ID da Entrega', 
+                'Cliente', 
+                'Motorista',
+                'Veículo',
+                'Status Atual',
+                'Data de Criação',
+                'Última Atualização',
+                'ETA',
+                'Chegada Real'
+            ])
+            
+            # Dados principais da entrega
+            writer.writerow([
+                str(delivery.id),
+                str(delivery.customer),
+                str(delivery.driver),
+                str(delivery.vehicle),
+                delivery.status,
+                delivery.created_at.strftime("%d/%m/%Y %H:%M:%S"),
+                delivery.updated_at.strftime("%d/%m/%Y %H:%M:%S"),
+                delivery.estimated_arrival.strftime("%d/%m/%Y %H:%M:%S") if delivery.estimated_arrival else "N/A",
+                delivery.actual_arrival.strftime("%d/%m/%Y %H:%M:%S") if delivery.actual_arrival else "N/A"
+            ])
+            
+            # Linha em branco
+            writer.writerow([])
+            
+            # Cabeçalho dos checkpoints
+            writer.writerow([
+                'Checkpoint ID',
+                'Timestamp',
+                'Status',
+                'Latitude',
+                'Longitude',
+                'Notas'
+            ])
+            
+            # Dados dos checkpoints
+            for checkpoint_id, timestamp, status, location, notes in checkpoints.iterator(chunk_size=2000):
+                location = location or {}
+                writer.writerow([
+                    str(checkpoint_id),
+                    timestamp.strftime("%d/%m/%Y %H:%M:%S"),
+                    status,
+                    location.get('latitude', 'N/A'),
+                    location.get('longitude', 'N/A'),
+                    notes or 'N/A'
+                ])
             
         logger.info(f"[DELIVERY TASK] Relatório gerado com sucesso para entrega {delivery.id}: {report_path}")
         
@@ -162,6 +146,7 @@ def generate_delivery_report(delivery_id):
         return None
         
 @shared_task
+@actor_context
 def clean_old_delivery_reports(days=30):
     """
     Remove relatórios de entrega mais antigos que o número especificado de dias.
@@ -193,55 +178,36 @@ def clean_old_delivery_reports(days=30):
         logger.error(f"[DELIVERY TASK] Erro ao limpar relatórios antigos: {str(e)}")
         return -1
 
-@shared_task
+@shared_task(name='check_late_deliveries')
+@actor_context
 def check_late_deliveries():
     """
-    Verifica entregas que estão atrasadas (passou o ETA e ainda não foram entregues).
+    Envia aos gerentes o resumo das entregas atrasadas e das mudanças de status.
+    
+    Uma mensagem por gerente, agrupada por empresa, enviada numa única conexão
+    SMTP; cada entrega atrasada é alertada uma única vez.
     """
+    from apps.delivery.services.alerts import DeliveryAlertService
+
     try:
-        now = timezone.now()
-        late_deliveries = Delivery.objects.filter(
-            status__in=['in_transit', 'pending'],
-            estimated_arrival__lt=now,
-            actual_arrival__isnull=True
-        )
-        
-        for delivery in late_deliveries:
-            # Calcular o atraso em horas
-            delay = (now - delivery.estimated_arrival).total_seconds() / 3600
-            
-            # Criar contexto para o email
-            context = {
-                'delivery_id': delivery.id,
-                'customer_name': delivery.customer.name,
-                'driver_name': delivery.driver.name,
-                'vehicle_info': f"{delivery.vehicle.model} ({delivery.vehicle.license_plate})",
-                'status': delivery.status,
-                'estimated_arrival': delivery.estimated_arrival.strftime("%d/%m/%Y %H:%M:%S"),
-                'delay_hours': round(delay, 1),
-                'current_time': now.strftime("%d/%m/%Y %H:%M:%S")
-            }
-            
-            # Notificar gerentes da empresa
-            manager_emails = delivery.companie.get_manager_emails()
-            if manager_emails:
-                subject = _("ALERTA: Entrega Atrasada")
-                html_message = render_to_string('delivery/email/late_delivery_alert.html', context)
-                plain_message = render_to_string('delivery/email/late_delivery_alert.txt', context)
-                
-                send_mail(
-                    subject,
-                    plain_message,
-                    settings.DEFAULT_FROM_EMAIL,
-                    manager_emails,
-                    html_message=html_message,
-                    fail_silently=False
-                )
-                
-                logger.info(f"[DELIVERY TASK] Alerta de atraso enviado para entrega {delivery.id} (atraso de {round(delay, 1)} horas)")
-        
-        return len(late_deliveries)
+        result = DeliveryAlertService.send_digests()
+        return result['late_deliveries']
     
     except Exception as e:
         logger.error(f"[DELIVERY TASK] Erro ao verificar entregas atrasadas: {str(e)}")
-        return -1 
\ No newline at end of file
+        return -1
+
+@shared_task(name='flush_delivery_locations', ignore_result=True)
+@actor_context
+def flush_delivery_locations():
+    """
+    Grava no banco as localizações de entregas acumuladas no Redis.
+    """
+    from apps.delivery.services.tracking import DeliveryTrackingService
+
+    try:
+        return DeliveryTrackingService.flush()
+    except Exception as e:
+        # As localizações voltam para o buffer e são gravadas no próximo ciclo
+        logger.error(f"[DELIVERY TASK] Erro ao gravar localizações: {str(e)}")
+        return None
@@ -0,0 +1,136 @@
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from channels.testing import WebsocketCommunicator
+from asgiref.sync import sync_to_async
+
+from apps.delivery.consumer import DeliveryConsumer
+from apps.delivery.models import Delivery, DeliveryCheckpoint
+from apps.delivery.services.tracking import DeliveryTrackingService
+from apps.companies.customers.models import Customer
+from apps.companies.employeers.models import Employeer
+from apps.vehicle.models import Vehicle
+from apps.companies.models import Companie
+from core.actor import actor_scope
+
+User = get_user_model()
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class DeliveryConsumerTest(TestCase):
+    """Testes para os frames enviados pelo motorista via WebSocket"""
+
+    def setUp(self):
+        self.companie = Companie.objects.create(name="Empresa Teste", type="Headquarters")
+
+        self.manager_user = User.objects.create_user(
+            email="manager@test.com",
+            password="password123",
+            user_type="Manager"
+        )
+        self.manager = Employeer.objects.filter(user=self.manager_user).first() or Employeer.objects.create(
+            user=self.manager_user,
+            companie=self.companie
+        )
+
+        self.driver_user = User.objects.create_user(
+            email="driver@test.com",
+            password="password123",
+            user_type="Driver"
+        )
+        self.driver = Employeer.objects.filter(user=self.driver_user).first() or Employeer.objects.create(
+            user=self.driver_user,
+            companie=self.companie
+        )
+
+        self.customer = Customer.objects.create(
+            first_name="Cliente",
+            last_name="Teste",
+            companie=self.companie,
+            created_by=self.manager,
+            updated_by=self.manager
+        )
+        self.vehicle = Vehicle.objects.create(
+            plate_number="ABC1234",
+            nickname="Truck1",
+            vehicle_type="truck",
+            maker="toyota",
+            color="white",
+            vin="1HGCM82633A123456",
+            is_active=True,
+            companie=self.companie,
+            created_by=self.manager,
+            updated_by=self.manager
+        )
+        self.delivery = Delivery.objects.create(
+            customer=self.customer,
+            driver=self.driver,
+            vehicle=self.vehicle,
+            status='pickup_in_progress',
+            companie=self.companie,
+            created_by=self.manager,
+            updated_by=self.manager
+        )
+
+    async def _connect(self, user):
+        communicator = WebsocketCommunicator(DeliveryConsumer.as_asgi(), f'/ws/delivery/{self.delivery.id}/')
+        communicator.scope['user'] = user
+        communicator.scope['url_route'] = {'kwargs': {'delivery_id': str(self.delivery.id)}}
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator
+
+    async def _receive(self, communicator, message_type):
+        """Return the next message of a type, skipping the group broadcasts"""
+        while True:
+            message = await communicator.receive_json_from(timeout=5)
+            if message['type'] == message_type:
+                return message
+
+    async def test_driver_location_frame_is_buffered(self):
+        """Testa que o motorista envia a localização pelo socket"""
+        with actor_scope(user=self.driver_user):
+            communicator = await self._connect(self.driver_user)
+            await communicator.send_json_to({'type': 'location', 'latitude': 35.0, 'longitude': 45.0})
+            ack = await self._receive(communicator, 'location_ack')
+            broadcast = await self._receive(communicator, 'location_update')
+            await communicator.disconnect()
+
+        self.assertEqual(ack['delivery_id'], str(self.delivery.id))
+        self.assertEqual(broadcast['latitude'], 35.0)
+
+        await sync_to_async(DeliveryTrackingService.flush)()
+        delivery = await Delivery.objects.aget(id=self.delivery.id)
+        self.assertEqual(delivery.current_location, {'latitude': 35.0, 'longitude': 45.0})
+
+    async def test_driver_status_frame_changes_status(self):
+        """Testa que o motorista altera o status pelo socket"""
+        with actor_scope(user=self.driver_user):
+            communicator = await self._connect(self.driver_user)
+            await communicator.send_json_to({'type': 'status', 'status': 'delivered'})
+            error = await self._receive(communicator, 'error')
+            await communicator.send_json_to({'type': 'status', 'status': 'in_transit', 'notes': 'Saindo'})
+            ack = await self._receive(communicator, 'status_ack')
+            await communicator.disconnect()
+
+        self.assertEqual(error['request'], 'status')
+        self.assertEqual(ack['status'], 'in_transit')
+        delivery = await Delivery.objects.aget(id=self.delivery.id)
+        self.assertEqual(delivery.status, 'in_transit')
+        self.assertTrue(await DeliveryCheckpoint.objects.filter(
+            delivery=delivery, status='in_transit', notes='Saindo', created_by=self.driver
+        ).aexists())
+
+    async def test_only_the_driver_can_send_updates(self):
+        """Testa que o gerente não envia localização pelo socket"""
+        await Employeer.objects.filter(pk=self.manager.pk).aupdate(companie=self.companie)
+        self.manager_user = await User.objects.aget(pk=self.manager_user.pk)
+
+        with actor_scope(user=self.manager_user):
+            communicator = await self._connect(self.manager_user)
+            await communicator.send_json_to({'type': 'location', 'latitude': 35.0, 'longitude': 45.0})
+            error = await self._receive(communicator, 'error')
+            await communicator.disconnect()
+
+        self.assertEqual(error['request'], 'location')
+        delivery = await Delivery.objects.aget(id=self.delivery.id)
+        self.assertIsNone(delivery.current_location)
@@ -1,3 +1,4 @@
+import datetime
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
@@ -7,8 +8,17 @@ import uuid
 from unittest import mock
 from django.utils.translation import gettext as _
 
-from apps.delivery.models import Delivery, DeliveryCheckpoint
+from django.core import mail
+from django.core.mail import get_connection
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.test.utils import CaptureQueriesContext
+from django_redis import get_redis_connection
+
+from apps.delivery.models import Delivery, DeliveryCheckpoint, DeliveryTrackPoint
 from apps.delivery.services.handlers import DeliveryHandler
+from apps.delivery.services.tracking import DeliveryTrackingService
+from apps.delivery.services.alerts import DeliveryAlertService
 from apps.delivery.services.validators import DeliveryValidator
 from apps.companies.customers.models import Customer
 from apps.companies.employeers.models import Employeer
@@ -275,6 +285,189 @@ class DeliveryHandlerTest(TestCase):
         self.assertEqual(checkpoints[0].location['latitude'], 35.0)
         self.assertEqual(checkpoints[0].location['longitude'], 45.0)
         self.assertEqual(checkpoints[0].notes, 'Atualização de localização')
+
+    def _in_transit_delivery(self):
+        return Delivery.objects.create(
+            customer=self.customer,
+            driver=self.driver,
+            vehicle=self.vehicle,
+            status='in_transit',
+            companie=self.companie,
+            created_by=self.manager,
+            updated_by=self.manager
+        )
+
+    def _clear_tracking_buffer(self):
+        redis = get_redis_connection('default')
+        keys = list(redis.scan_iter(f'{DeliveryTrackingService.PREFIX}:*'))
+        if keys:
+            redis.delete(*keys)
+
+    def test_ingest_buffers_pings_without_writing(self):
+        """Testa que os pings de GPS são acumulados no Redis sem gravar no banco"""
+        self._clear_tracking_buffer()
+        delivery = self._in_transit_delivery()
+
+        with CaptureQueriesContext(connection) as queries:
+            for step in range(20):
+                DeliveryTrackingService.ingest(delivery, {'latitude': 35.0 + step / 100, 'longitude': 45.0})
+
+        self.assertEqual(len(queries), 0)
+        delivery.refresh_from_db()
+        self.assertIsNone(delivery.current_location)
+
+        with self.assertRaises(ValidationError):
+            DeliveryTrackingService.ingest(delivery, {'latitude': 135.0, 'longitude': 45.0})
+
+    def test_flush_writes_latest_location_and_downsampled_track(self):
+        """Testa que o flush grava uma localização por entrega e um ponto por intervalo"""
+        self._clear_tracking_buffer()
+        first = self._in_transit_delivery()
+        second = self._in_transit_delivery()
+        for step in range(10):
+            DeliveryTrackingService.ingest(first, {'latitude': 35.0 + step, 'longitude': 45.0})
+        DeliveryTrackingService.ingest(second, {'latitude': -10.0, 'longitude': -20.0})
+
+        with CaptureQueriesContext(connection) as queries:
+            result = DeliveryTrackingService.flush()
+        updates = [q for q in queries if q['sql'].startswith('UPDATE')]
+
+        self.assertEqual(result, {'deliveries': 2, 'track_points': 2})
+        self.assertEqual(len(updates), 2)
+        first.refresh_from_db()
+        self.assertEqual(first.current_location, {'latitude': 44.0, 'longitude': 45.0})
+        self.assertEqual(DeliveryTrackPoint.objects.filter(delivery=first).count(), 1)
+
+        # Pings inside the track interval of the last point only move the location
+        DeliveryTrackingService.ingest(first, {'latitude': 50.0, 'longitude': 45.0})
+        self.assertEqual(DeliveryTrackingService.flush(), {'deliveries': 1, 'track_points': 0})
+        first.refresh_from_db()
+        self.assertEqual(first.current_location['latitude'], 50.0)
+        self.assertEqual(DeliveryTrackingService.flush(), {'deliveries': 0, 'track_points': 0})
+
+    def test_flush_requeues_pings_on_failure(self):
+        """Testa que os pings voltam ao buffer quando a gravação falha"""
+        self._clear_tracking_buffer()
+        delivery = self._in_transit_delivery()
+        DeliveryTrackingService.ingest(delivery, {'latitude': 35.0, 'longitude': 45.0})
+
+        with mock.patch.object(DeliveryTrackPoint.objects, 'bulk_create', side_effect=RuntimeError('down')):
+            with self.assertRaises(RuntimeError):
+                DeliveryTrackingService.flush()
+
+        self.assertEqual(DeliveryTrackingService.flush(), {'deliveries': 1, 'track_points': 1})
+
+    def test_ingest_rejects_invalid_estimated_arrival(self):
+        """Testa que um ETA inválido é recusado antes de entrar no buffer"""
+        self._clear_tracking_buffer()
+        delivery = self._in_transit_delivery()
+
+        for value in ['2026-13-45T00:00:00', 'amanhã']:
+            with self.assertRaises(ValidationError):
+                DeliveryTrackingService.ingest(delivery, {'latitude': 35.0, 'longitude': 45.0, 'estimated_arrival': value})
+        self.assertEqual(DeliveryTrackingService.flush(), {'deliveries': 0, 'track_points': 0})
+
+        DeliveryTrackingService.ingest(delivery, {'latitude': 35.0, 'longitude': 45.0, 'estimated_arrival': '2026-10-20T15:30:00'})
+        self.assertEqual(DeliveryTrackingService.flush(), {'deliveries': 1, 'track_points': 1})
+        delivery.refresh_from_db()
+        self.assertEqual(delivery.estimated_arrival, datetime.datetime(2026, 10, 20, 15, 30))
+
+    def test_flush_failure_of_one_delivery_does_not_hold_back_the_others(self):
+        """Testa que a falha de uma entrega devolve só os pings dela ao buffer"""
+        self._clear_tracking_buffer()
+        first = self._in_transit_delivery()
+        second = self._in_transit_delivery()
+        DeliveryTrackingService.ingest(first, {'latitude': 35.0, 'longitude': 45.0})
+        DeliveryTrackingService.ingest(second, {'latitude': -10.0, 'longitude': -20.0})
+
+        original_filter = Delivery.objects.filter
+
+        def failing_filter(*args, **kwargs):
+            if kwargs.get('pk') == str(first.pk):
+                raise DatabaseError('locked')
+            return original_filter(*args, **kwargs)
+
+        with mock.patch.object(Delivery.objects, 'filter', side_effect=failing_filter):
+            self.assertEqual(DeliveryTrackingService.flush(), {'deliveries': 1, 'track_points': 1})
+
+        second.refresh_from_db()
+        self.assertEqual(second.current_location, {'latitude': -10.0, 'longitude': -20.0})
+        self.assertEqual(DeliveryTrackingService.flush(), {'deliveries': 1, 'track_points': 1})
+        first.refresh_from_db()
+        self.assertEqual(first.current_location, {'latitude': 35.0, 'longitude': 45.0})
+
+    def test_pings_failing_every_flush_are_dropped(self):
+        """Testa que os pings de uma entrega que nunca grava são descartados após as tentativas"""
+        self._clear_tracking_buffer()
+        delivery = self._in_transit_delivery()
+        DeliveryTrackingService.ingest(delivery, {'latitude': 35.0, 'longitude': 45.0})
+
+        original_filter = Delivery.objects.filter
+
+        def failing_filter(*args, **kwargs):
+            if kwargs.get('pk') == str(delivery.pk):
+                raise DatabaseError('poison')
+            return original_filter(*args, **kwargs)
+
+        with mock.patch.object(DeliveryTrackingService, 'MAX_FLUSH_ATTEMPTS', 2), \
+             mock.patch.object(Delivery.objects, 'filter', side_effect=failing_filter):
+            self.assertEqual(DeliveryTrackingService.flush(), {'deliveries': 0, 'track_points': 0})
+            self.assertEqual(DeliveryTrackingService.flush(), {'deliveries': 0, 'track_points': 0})
+
+        # Nothing is left to retry, and the next pings start a new count
+        self.assertEqual(DeliveryTrackingService.flush(), {'deliveries': 0, 'track_points': 0})
+        redis = get_redis_connection('default')
+        self.assertFalse(redis.exists(DeliveryTrackingService._attempts_key(delivery.pk)))
+        DeliveryTrackingService.ingest(delivery, {'latitude': 36.0, 'longitude': 46.0})
+        self.assertEqual(DeliveryTrackingService.flush(), {'deliveries': 1, 'track_points': 1})
+
+    def test_overlapping_flush_is_skipped(self):
+        """Testa que um flush não roda enquanto outro segura o lock"""
+        self._clear_tracking_buffer()
+        delivery = self._in_transit_delivery()
+        DeliveryTrackingService.ingest(delivery, {'latitude': 35.0, 'longitude': 45.0})
+
+        cache.add(DeliveryTrackingService.FLUSH_LOCK_KEY, 1, DeliveryTrackingService.FLUSH_LOCK_TIMEOUT)
+        try:
+            self.assertEqual(DeliveryTrackingService.flush(), {'deliveries': 0, 'track_points': 0})
+        finally:
+            cache.delete(DeliveryTrackingService.FLUSH_LOCK_KEY)
+
+        self.assertEqual(DeliveryTrackingService.flush(), {'deliveries': 1, 'track_points': 1})
+
+    def test_late_deliveries_are_sent_in_one_digest_per_manager(self):
+        """Testa que os atrasos e mudanças de status vão num único resumo por gerente"""
+        redis = get_redis_connection('default')
+        keys = list(redis.scan_iter(f'{DeliveryAlertService.PREFIX}:*'))
+        if keys:
+            redis.delete(*keys)
+
+        now = timezone.now()
+        late = [self._in_transit_delivery() for _ in range(3)]
+        Delivery.objects.filter(pk__in=[delivery.pk for delivery in late]).update(
+            estimated_arrival=now - timezone.timedelta(hours=2)
+        )
+        on_time = self._in_transit_delivery()
+        Delivery.objects.filter(pk=on_time.pk).update(estimated_arrival=now + timezone.timedelta(hours=2))
+        DeliveryAlertService.queue_status_change(on_time, 'pickup_in_progress', 'in_transit')
+
+        with mock.patch('core.email_handlers.get_connection', wraps=get_connection) as connection_factory:
+            result = DeliveryAlertService.send_digests(now)
+
+        self.assertEqual(connection_factory.call_count, 1)
+        self.assertEqual(result, {'digests': 1, 'messages': 1, 'late_deliveries': 3, 'status_changes': 1})
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['manager@test.com'])
+        self.assertIn('pickup_in_progress', mail.outbox[0].body)
+
+        # Already alerted deliveries are not alerted again
+        self.assertEqual(DeliveryAlertService.send_digests(now)['late_deliveries'], 0)
+        self.assertEqual(len(mail.outbox), 1)
+
+        # Unless their ETA moved and passed again
+        later = now + timezone.timedelta(hours=1)
+        Delivery.objects.filter(pk=late[0].pk).update(estimated_arrival=later - timezone.timedelta(minutes=30))
+        self.assertEqual(DeliveryAlertService.send_digests(later)['late_deliveries'], 1)
     
     def test_delete_delivery(self):
         """Testa a exclusão de uma entrega através do handler"""
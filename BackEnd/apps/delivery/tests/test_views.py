@@ -16,6 +16,7 @@ from apps.inventory.load_order.models import LoadOrder
 from apps.companies.models import Companie
 from apps.delivery.services.validators import DeliveryValidator
 from apps.delivery.services.handlers import DeliveryHandler
+from apps.delivery.services.tracking import DeliveryTrackingService
 
 User = get_user_model()
 
@@ -457,6 +458,32 @@ class DeliveryViewsTest(APITestCase):
         
         # Verificar se o checkpoint foi criado
         self.assertEqual(DeliveryCheckpoint.objects.count(), 2)
+
+    def test_update_location_ping_is_buffered(self):
+        """Testa que um ping sem checkpoint é aceito e gravado pelo flush"""
+        self.client.force_authenticate(user=self.driver_user)
+        url = reverse('delivery:update_location', kwargs={'pk': self.delivery.id})
+
+        response = self.client.post(url, {'latitude': 36.0, 'longitude': 46.0}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['latitude'], 36.0)
+        self.assertEqual(DeliveryCheckpoint.objects.count(), 1)
+
+        DeliveryTrackingService.flush()
+        self.delivery.refresh_from_db()
+        self.assertEqual(self.delivery.current_location, {'latitude': 36.0, 'longitude': 46.0})
+    
+    def test_update_location_rejects_invalid_estimated_arrival(self):
+        """Testa que um ping com ETA inválido retorna 400"""
+        self.client.force_authenticate(user=self.driver_user)
+        url = reverse('delivery:update_location', kwargs={'pk': self.delivery.id})
+
+        response = self.client.post(
+            url, {'latitude': 36.0, 'longitude': 46.0, 'estimated_arrival': '2026-13-45T00:00:00'}, format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
     
     def test_update_status(self):
         """Testa atualização de status"""
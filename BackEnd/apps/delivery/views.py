@@ -25,12 +25,13 @@ import json
 from rest_framework.views import APIView
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext as _
-from .services.validators import DeliveryValidator
 from .services.handlers import DeliveryHandler
+from .services.tracking import DeliveryTrackingService
 from .tasks.handlers import notify_delivery_status_change, generate_delivery_report
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django.shortcuts import get_object_or_404
 from core.constants.choices import DELIVERY_STATUS_CHOICES, USER_TYPE_CHOICES
+from core.actor import get_employeer
 
 logger = logging.getLogger(__name__)
 
@@ -460,7 +461,8 @@ class DeliveryUpdateView(DeliveryBaseView, UpdateAPIView):
             if 'status' in request.data and old_status != updated_delivery.status:
                 # Trigger background notification task
                 notify_delivery_status_change.delay(
-                    str(updated_delivery.id), old_status, updated_delivery.status
+                    str(updated_delivery.id), old_status, updated_delivery.status,
+                    actor_id=str(request.user.id)
                 )
             
             # Serialize result
@@ -551,7 +553,7 @@ class DeliveryDestroyView(DeliveryBaseView, DestroyAPIView):
         tags=['Delivery'],
         operation_id='update_delivery_location',
         summary='Update delivery location',
-        description='Updates the current location of a delivery in transit.',
+        description='Updates the current location of a delivery in transit. Plain pings are broadcast immediately and written to the database in batches (202), pings creating a checkpoint are written immediately (200).',
         parameters=[
             OpenApiParameter(
                 name='id',
@@ -594,6 +596,17 @@ class DeliveryDestroyView(DeliveryBaseView, DestroyAPIView):
         },
         responses={
             200: DeliverySerializer,
+            202: {
+                'description': 'Location buffered',
+                'type': 'object',
+                'properties': {
+                    'latitude': {'type': 'number'},
+                    'longitude': {'type': 'number'},
+                    'recorded_at': {'type': 'string', 'format': 'date-time'},
+                    'status': {'type': 'string'},
+                    'estimated_arrival': {'type': 'string', 'format': 'date-time'}
+                }
+            },
             400: {
                 'description': 'Invalid data',
                 'type': 'object',
@@ -635,6 +648,11 @@ class DeliveryLocationUpdateView(DeliveryBaseView, APIView):
                     status=status.HTTP_403_FORBIDDEN
                 )
             
+            # Plain pings are buffered and written by the next flush
+            if not request.data.get('create_checkpoint', False):
+                ping = DeliveryTrackingService.ingest(delivery, request.data)
+                return Response(ping, status=status.HTTP_202_ACCEPTED)
+            
             # Update location using the handler
             updated_delivery = DeliveryHandler.update_delivery_location(delivery, request.data, request.user)
             
@@ -743,27 +761,13 @@ class DeliveryStatusUpdateView(DeliveryBaseView, APIView):
             old_status = delivery.status
             new_status = request.data['status']
             
-            # Validate status transition
-            DeliveryValidator.validate_status_change(delivery, new_status)
-            
-            # Prepare data for the handler
-            data = {
-                'status': new_status,
-                'notes': request.data.get('notes', f"Status altered from {old_status} to {new_status}")
-            }
-            
-            # Update delivery using the handler
-            updated_delivery = DeliveryHandler.update_delivery(delivery, data, request.user)
-            
-            # Trigger background notification task
-            notify_delivery_status_change.delay(
-                str(updated_delivery.id), old_status, new_status
+            # Validate, update and notify using the handler
+            updated_delivery = DeliveryHandler.change_delivery_status(
+                delivery, new_status, get_employeer(request.user),
+                notes=request.data.get('notes'),
+                actor_id=str(request.user.id)
             )
             
-            # If the status is 'delivered', generate report
-            if new_status == 'delivered':
-                generate_delivery_report.delay(str(updated_delivery.id))
-            
             # Serialize result
             serializer = DeliverySerializer(updated_delivery)
             
@@ -911,7 +915,7 @@ class DeliveryReportView(DeliveryBaseView, APIView):
                 )
             
             # Start generating report
-            task = generate_delivery_report.delay(str(delivery.id))
+            task = generate_delivery_report.delay(str(delivery.id), actor_id=str(request.user.id))
             
             logger.info(f"[DELIVERY VIEWS] - Delivery report generation started for delivery {delivery.id} by {request.user.username}")
             return Response({
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import ExportJob
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'companie', 'export_type', 'file_format', 'status', 'rows_written', 'created_at', 'finished_at')
+    list_filter = ('export_type', 'file_format', 'status')
+    search_fields = ('companie__name',)
+    readonly_fields = [field.name for field in ExportJob._meta.fields]
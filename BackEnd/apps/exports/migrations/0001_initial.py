@@ -0,0 +1,45 @@
+# Generated by Django 5.2 on 2026-10-16 16:52
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('companies', '0004_alter_companie_country'),
+        ('employeers', '0004_alter_employeer_country_alter_employeer_payment_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, null=True)),
+                ('export_type', models.CharField(choices=[('deliveries', 'Deliveries'), ('delivery_checkpoints', 'Delivery Checkpoints'), ('inflow_items', 'Inflow Items'), ('outflow_items', 'Outflow Items'), ('transfer_items', 'Transfer Items'), ('stock_movements', 'Stock Movements'), ('payroll', 'Payroll')], help_text='The dataset exported', max_length=30)),
+                ('file_format', models.CharField(choices=[('csv', 'CSV'), ('xlsx', 'Excel (XLSX)')], default='csv', help_text='The format of the file', max_length=10)),
+                ('filters', models.JSONField(blank=True, default=dict, help_text='The filters of the export')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', help_text='The status of the export', max_length=20)),
+                ('cursor', models.CharField(blank=True, default='', help_text='Primary key of the last row written', max_length=64)),
+                ('parts', models.PositiveIntegerField(default=0, help_text='Number of parts written')),
+                ('rows_written', models.PositiveBigIntegerField(default=0, help_text='Number of rows written')),
+                ('file', models.FileField(blank=True, help_text='The export, once completed', null=True, upload_to='exports/')),
+                ('error', models.TextField(blank=True, default='', help_text='The error of the last failed run')),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('companie', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_companie', to='companies.companie')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created_by', to='employeers.employeer')),
+                ('updated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated_by', to='employeers.employeer')),
+            ],
+            options={
+                'verbose_name': 'Export Job',
+                'verbose_name_plural': 'Export Jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
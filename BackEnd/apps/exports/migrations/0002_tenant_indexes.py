@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-16 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='exportjob',
+            index=models.Index(fields=['companie', '-created_at'], name='export_job_tenant_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+from django.db import models
+from basemodels.models import BaseModel, tenant_indexes
+from core.constants.choices import EXPORT_TYPE_CHOICES, EXPORT_FORMAT_CHOICES, EXPORT_STATUS_CHOICES
+
+
+class ExportJob(BaseModel):
+    """
+    Background export of one dataset of a company to a CSV or XLSX file.
+    
+    The rows are written in parts of ExportService.PART_SIZE rows, walking the
+    queryset by primary key. After each part the job records the cursor, so a
+    failed or interrupted job resumes after the last part written instead of
+    starting over; the parts are joined into ``file`` once every row is written.
+    
+    Fields:
+        export_type: str: The dataset exported (see EXPORT_TYPE_CHOICES)
+        file_format: str: csv or xlsx
+        filters: dict: The filters of the export (date_from, date_to, status)
+        status: str: pending, running, completed or failed
+        cursor: str: Primary key of the last row written
+        parts: int: Number of parts written
+        rows_written: int: Number of rows written
+        file: File: The export, once completed
+        error: str: The error of the last failed run
+        started_at: datetime: When the last run started
+        finished_at: datetime: When the job completed
+        
+    Inheritance:
+        BaseModel{
+            id: UUIDField
+            companie: ForeignKey to Companie
+            created_at: DateTimeField
+            updated_at: DateTimeField
+            created_by: ForeignKey to Employeer
+            updated_by: ForeignKey to Employeer
+        }
+    """
+    export_type = models.CharField(max_length=30, choices=EXPORT_TYPE_CHOICES, help_text='The dataset exported')
+    file_format = models.CharField(max_length=10, choices=EXPORT_FORMAT_CHOICES, default='csv', help_text='The format of the file')
+    filters = models.JSONField(default=dict, blank=True, help_text='The filters of the export')
+    status = models.CharField(max_length=20, choices=EXPORT_STATUS_CHOICES, default='pending', help_text='The status of the export')
+    cursor = models.CharField(max_length=64, blank=True, default='', help_text='Primary key of the last row written')
+    parts = models.PositiveIntegerField(default=0, help_text='Number of parts written')
+    rows_written = models.PositiveBigIntegerField(default=0, help_text='Number of rows written')
+    file = models.FileField(upload_to='exports/', blank=True, null=True, help_text='The export, once completed')
+    error = models.TextField(blank=True, default='', help_text='The error of the last failed run')
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = 'Export Job'
+        verbose_name_plural = 'Export Jobs'
+        ordering = ['-created_at']
+        indexes = tenant_indexes('export_job')
+    
+    def __str__(self):
+        return f"{self.get_export_type_display()} ({self.file_format}) - {self.status}"
@@ -0,0 +1,36 @@
+from rest_framework import serializers
+from core.constants.choices import EXPORT_TYPE_CHOICES, EXPORT_FORMAT_CHOICES
+from .models import ExportJob
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    """
+    Serializer of the export jobs, with the download url once completed.
+    """
+    file_url = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ExportJob
+        fields = [
+            'id', 'export_type', 'file_format', 'filters', 'status',
+            'parts', 'rows_written', 'file_url', 'error',
+            'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+    
+    def get_file_url(self, obj):
+        if not obj.file:
+            return None
+        request = self.context.get('request')
+        return request.build_absolute_uri(obj.file.url) if request else obj.file.url
+
+
+class ExportJobCreateSerializer(serializers.Serializer):
+    """
+    Input of a new export job.
+    """
+    export_type = serializers.ChoiceField(choices=EXPORT_TYPE_CHOICES)
+    file_format = serializers.ChoiceField(choices=EXPORT_FORMAT_CHOICES, default='csv')
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    status = serializers.CharField(required=False)
@@ -0,0 +1,209 @@
+from django.core.exceptions import ValidationError
+from django.db.models import Value
+from django.db.models.functions import Concat
+from django.utils.dateparse import parse_date
+from apps.companies.attendance.models import Payroll
+from apps.delivery.models import Delivery, DeliveryCheckpoint
+from apps.inventory.inflows.models import InflowItems
+from apps.inventory.outflows.models import OutflowItems
+from apps.inventory.transfer.models import TransferItems
+from apps.inventory.warehouse.models import StockLedgerEntry
+
+
+class ExportDefinition:
+    """
+    A dataset exportable by ExportService: the rows of a model scoped to a
+    company, read as ``values_list`` tuples so no model instance is built.
+
+    Args:
+        model: Model exported
+        columns: ``(header, field path)`` pairs, in file order
+        companie_field: Path to the company id of a row
+        date_field: Lookup the date_from/date_to filters apply to
+        status_field: Lookup the status filter applies to, if the dataset has one
+        annotations: Expressions referenced by the columns
+    """
+
+    def __init__(self, model, columns, companie_field, date_field, status_field=None, annotations=None):
+        self.model = model
+        self.columns = columns
+        self.companie_field = companie_field
+        self.date_field = date_field
+        self.status_field = status_field
+        self.annotations = annotations or {}
+
+    @property
+    def headers(self):
+        return [header for header, _ in self.columns]
+
+    @property
+    def paths(self):
+        return [path for _, path in self.columns]
+
+    def clean_filters(self, params):
+        """
+        Validate the filters of an export.
+
+        Returns:
+            dict: The filters, JSON serializable so jobs can store them
+
+        Raises:
+            ValidationError: If a date is invalid or the range is reversed
+        """
+        filters = {}
+        for name in ('date_from', 'date_to'):
+            if params.get(name):
+                if parse_date(str(params[name])) is None:
+                    raise ValidationError(f"Invalid {name}, use YYYY-MM-DD")
+                filters[name] = str(params[name])
+        if 'date_from' in filters and 'date_to' in filters and filters['date_from'] > filters['date_to']:
+            raise ValidationError("date_from must not be after date_to")
+        if params.get('status'):
+            if self.status_field is None:
+                raise ValidationError("This export can not be filtered by status")
+            filters['status'] = str(params['status'])
+        return filters
+
+    def queryset(self, companie_id, filters=None):
+        """
+        Rows of the company matching the filters, ordered by primary key.
+
+        Each row is a tuple of the primary key followed by the columns.
+        """
+        filters = filters or {}
+        queryset = self.model.objects.filter(**{self.companie_field: companie_id})
+        if filters.get('date_from'):
+            queryset = queryset.filter(**{f'{self.date_field}__gte': parse_date(filters['date_from'])})
+        if filters.get('date_to'):
+            queryset = queryset.filter(**{f'{self.date_field}__lte': parse_date(filters['date_to'])})
+        if filters.get('status'):
+            queryset = queryset.filter(**{self.status_field: filters['status']})
+        if self.annotations:
+            queryset = queryset.annotate(**self.annotations)
+        return queryset.order_by('pk').values_list('pk', *self.paths)
+
+
+def _full_name(prefix):
+    return Concat(f'{prefix}first_name', Value(' '), f'{prefix}last_name')
+
+
+EXPORTS = {
+    'deliveries': ExportDefinition(
+        Delivery,
+        [
+            ('Delivery', 'id'),
+            ('Created At', 'created_at'),
+            ('Status', 'status'),
+            ('Customer', 'customer_name'),
+            ('Driver', 'driver__name'),
+            ('Vehicle', 'vehicle__plate_number'),
+            ('Estimated Arrival', 'estimated_arrival'),
+            ('Actual Arrival', 'actual_arrival'),
+        ],
+        companie_field='companie_id',
+        date_field='created_at__date',
+        status_field='status',
+        annotations={'customer_name': _full_name('customer__')},
+    ),
+    'delivery_checkpoints': ExportDefinition(
+        DeliveryCheckpoint,
+        [
+            ('Checkpoint', 'id'),
+            ('Delivery', 'delivery_id'),
+            ('Timestamp', 'timestamp'),
+            ('Status', 'status'),
+            ('Latitude', 'location__latitude'),
+            ('Longitude', 'location__longitude'),
+            ('Notes', 'notes'),
+        ],
+        companie_field='delivery__companie_id',
+        date_field='timestamp__date',
+        status_field='status',
+    ),
+    'inflow_items': ExportDefinition(
+        InflowItems,
+        [
+            ('Inflow', 'inflow_id'),
+            ('Created At', 'inflow__created_at'),
+            ('Status', 'inflow__status'),
+            ('Supplier', 'inflow__origin__name'),
+            ('Warehouse', 'inflow__destiny__name'),
+            ('Product', 'product__name'),
+            ('Quantity', 'quantity'),
+        ],
+        companie_field='inflow__companie_id',
+        date_field='inflow__created_at__date',
+        status_field='inflow__status',
+    ),
+    'outflow_items': ExportDefinition(
+        OutflowItems,
+        [
+            ('Outflow', 'outflow_id'),
+            ('Created At', 'outflow__created_at'),
+            ('Status', 'outflow__status'),
+            ('Warehouse', 'outflow__origin__name'),
+            ('Customer', 'customer_name'),
+            ('Product', 'product__name'),
+            ('Quantity', 'quantity'),
+        ],
+        companie_field='outflow__companie_id',
+        date_field='outflow__created_at__date',
+        status_field='outflow__status',
+        annotations={'customer_name': _full_name('outflow__destiny__')},
+    ),
+    'transfer_items': ExportDefinition(
+        TransferItems,
+        [
+            ('Transfer', 'transfer_id'),
+            ('Created At', 'transfer__created_at'),
+            ('Status', 'transfer__status'),
+            ('Origin', 'transfer__origin__name'),
+            ('Destiny', 'transfer__destiny__name'),
+            ('Product', 'product__name'),
+            ('Quantity', 'quantity'),
+        ],
+        companie_field='transfer__companie_id',
+        date_field='transfer__created_at__date',
+        status_field='transfer__status',
+    ),
+    'stock_movements': ExportDefinition(
+        StockLedgerEntry,
+        [
+            ('Posted At', 'created_at'),
+            ('Movement Type', 'movement_type'),
+            ('Warehouse', 'warehouse__name'),
+            ('Product', 'product__name'),
+            ('Quantity', 'quantity'),
+            ('Document', 'document_id'),
+        ],
+        companie_field='warehouse__companie_id',
+        date_field='created_at__date',
+        status_field='movement_type',
+    ),
+    'payroll': ExportDefinition(
+        Payroll,
+        [
+            ('Employee', 'employee__name'),
+            ('Period Start', 'period_start'),
+            ('Period End', 'period_end'),
+            ('Days Worked', 'days_worked'),
+            ('Hours Worked', 'hours_worked'),
+            ('Amount', 'amount'),
+            ('Status', 'status'),
+        ],
+        companie_field='employee__companie_id',
+        date_field='period_start',
+        status_field='status',
+    ),
+}
+
+
+def get_definition(export_type):
+    """
+    Raises:
+        ValidationError: If the export type is unknown
+    """
+    try:
+        return EXPORTS[export_type]
+    except KeyError:
+        raise ValidationError(f"Unknown export type: {export_type}")
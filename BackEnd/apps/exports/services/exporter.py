@@ -0,0 +1,178 @@
+import logging
+import tempfile
+from datetime import timedelta
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.utils import timezone
+from ..models import ExportJob
+from .definitions import get_definition
+from .writers import WRITERS, CsvExportWriter
+
+logger = logging.getLogger(__name__)
+
+
+class ExportService:
+    """
+    Exports datasets of a company with constant memory.
+
+    Rows are read as tuples with ``.iterator(chunk_size=CHUNK_SIZE)``, either
+    streamed as CSV lines to the client or written by a background job in
+    parts of PART_SIZE rows stored in the default storage. A job records its
+    cursor after each part, so a failed or interrupted job resumes where it
+    stopped; the parts are joined into the final file at the end.
+    """
+
+    CHUNK_SIZE = 2000
+    PART_SIZE = 20000
+    # A running job not updated for this long is considered dead and can be resumed
+    STALE_AFTER = timedelta(minutes=10)
+
+    @staticmethod
+    def get_writer(file_format):
+        """
+        Raises:
+            ValidationError: If the format is unknown
+        """
+        try:
+            return WRITERS[file_format]()
+        except KeyError:
+            raise ValidationError(f"Unknown export format: {file_format}")
+
+    @classmethod
+    def stream_csv(cls, export_type, companie_id, params):
+        """
+        Stream a dataset as CSV lines.
+
+        Returns:
+            generator: The header line, then one line per row
+
+        Raises:
+            ValidationError: If the export type or the filters are invalid
+        """
+        definition = get_definition(export_type)
+        queryset = definition.queryset(companie_id, definition.clean_filters(params))
+        writer = CsvExportWriter()
+
+        def lines():
+            yield writer.header(definition.headers)
+            for row in queryset.iterator(chunk_size=cls.CHUNK_SIZE):
+                yield writer.line(row[1:])
+
+        return lines()
+
+    @classmethod
+    def create_job(cls, companie_id, export_type, file_format, params):
+        """
+        Create a pending export job, validating its type, format and filters.
+
+        Raises:
+            ValidationError: If the export type, the format or the filters are invalid
+        """
+        definition = get_definition(export_type)
+        cls.get_writer(file_format)
+        job = ExportJob.objects.create(
+            companie_id=companie_id,
+            export_type=export_type,
+            file_format=file_format,
+            filters=definition.clean_filters(params)
+        )
+        logger.info(f"[EXPORT SERVICE] Export job {job.id} ({export_type}, {file_format}) created for company {companie_id}")
+        return job
+
+    @classmethod
+    def _claim(cls, job_id):
+        """Mark a job running unless it is completed or running in another worker"""
+        resumable = Q(status__in=['pending', 'failed']) | Q(
+            status='running', updated_at__lt=timezone.now() - cls.STALE_AFTER
+        )
+        return ExportJob.objects.filter(resumable, pk=job_id).update(
+            status='running', error='', started_at=timezone.now(), updated_at=timezone.now()
+        ) == 1
+
+    @staticmethod
+    def _part_name(job, index):
+        return f'exports/parts/{job.pk}/{index:05d}.part'
+
+    @classmethod
+    def _write_part(cls, job, definition, writer, queryset):
+        """Write the next part of a job, returning the number of rows written"""
+        page = queryset.filter(pk__gt=job.cursor) if job.cursor else queryset
+        last_pk = None
+
+        def rows():
+            nonlocal last_pk
+            for row in page[:cls.PART_SIZE].iterator(chunk_size=cls.CHUNK_SIZE):
+                last_pk = row[0]
+                yield row[1:]
+
+        with tempfile.TemporaryFile() as part:
+            count = writer.write_rows(part, rows())
+            if not count:
+                return 0
+            part.seek(0)
+            # A part left by a run interrupted before recording it is overwritten
+            name = cls._part_name(job, job.parts)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            default_storage.save(name, File(part))
+
+        job.cursor = str(last_pk)
+        job.parts += 1
+        job.rows_written += count
+        job.save(update_fields=['cursor', 'parts', 'rows_written', 'updated_at'])
+        return count
+
+    @classmethod
+    def _assemble(cls, job, definition, writer):
+        """Join the parts of a job into its file and drop them"""
+        names = [cls._part_name(job, index) for index in range(job.parts)]
+
+        def parts():
+            for name in names:
+                with default_storage.open(name, 'rb') as part:
+                    yield part
+
+        with tempfile.TemporaryFile() as target:
+            writer.assemble(target, definition.headers, parts())
+            target.seek(0)
+            if job.file:
+                job.file.delete(save=False)
+            job.file.save(f'{job.export_type}-{job.pk}.{writer.extension}', File(target), save=False)
+
+        for name in names:
+            default_storage.delete(name)
+
+    @classmethod
+    def run_job(cls, job_id):
+        """
+        Run or resume an export job.
+
+        Returns:
+            ExportJob: The job, None if it is completed or running elsewhere
+        """
+        if not cls._claim(job_id):
+            logger.info(f"[EXPORT SERVICE] Export job {job_id} is not resumable, skipped")
+            return None
+
+        job = ExportJob.objects.get(pk=job_id)
+        try:
+            definition = get_definition(job.export_type)
+            writer = cls.get_writer(job.file_format)
+            queryset = definition.queryset(job.companie_id, job.filters)
+
+            while cls._write_part(job, definition, writer, queryset) == cls.PART_SIZE:
+                pass
+
+            cls._assemble(job, definition, writer)
+            job.status = 'completed'
+            job.finished_at = timezone.now()
+            job.save(update_fields=['file', 'status', 'finished_at', 'updated_at'])
+            logger.info(f"[EXPORT SERVICE] Export job {job.id} completed with {job.rows_written} rows")
+            return job
+
+        except Exception as e:
+            logger.error(f"[EXPORT SERVICE] Export job {job.id} failed after {job.rows_written} rows: {str(e)}")
+            ExportJob.objects.filter(pk=job.pk).update(status='failed', error=str(e), updated_at=timezone.now())
+            raise
@@ -0,0 +1,145 @@
+import csv
+import io
+import shutil
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+
+def format_value(value):
+    """Text of a cell value"""
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ', timespec='seconds')
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+class CsvExportWriter:
+    """Writes rows as UTF-8 CSV, parts are plain CSV lines"""
+
+    extension = 'csv'
+    content_type = 'text/csv'
+
+    class _Echo:
+        """File-like object returning what is written, to stream csv lines"""
+        def write(self, value):
+            return value
+
+    def header(self, headers):
+        return self.line(headers)
+
+    def line(self, values):
+        """One CSV line, for streaming responses"""
+        return csv.writer(self._Echo()).writerow([format_value(value) for value in values])
+
+    def write_rows(self, fileobj, rows):
+        """Write rows to a binary file, returning how many were written"""
+        text = io.TextIOWrapper(fileobj, encoding='utf-8', newline='')
+        writer = csv.writer(text)
+        count = 0
+        for row in rows:
+            writer.writerow([format_value(value) for value in row])
+            count += 1
+        text.flush()
+        text.detach()
+        return count
+
+    def assemble(self, target, headers, parts):
+        """Write the file to ``target`` (binary): the header, then every part"""
+        target.write(self.header(headers).encode('utf-8'))
+        for part in parts:
+            shutil.copyfileobj(part, target)
+
+
+class XlsxExportWriter:
+    """
+    Writes rows as a one sheet XLSX workbook.
+
+    Cells are inline strings or numbers, so the sheet is written row by row
+    without a shared strings table; parts are ``<row>`` elements of the sheet.
+    """
+
+    extension = 'xlsx'
+    content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+    CONTENT_TYPES = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    )
+    ROOT_RELS = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    )
+    WORKBOOK = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Export" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    )
+    WORKBOOK_RELS = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    )
+    SHEET_START = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+    )
+    SHEET_END = '</sheetData></worksheet>'
+
+    @staticmethod
+    def _cell(value):
+        if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+            return f'<c><v>{value}</v></c>'
+        text = escape(format_value(value))
+        return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+    def row(self, values):
+        return '<row>' + ''.join(self._cell(value) for value in values) + '</row>'
+
+    def write_rows(self, fileobj, rows):
+        """Write rows to a binary file, returning how many were written"""
+        count = 0
+        for row in rows:
+            fileobj.write(self.row(row).encode('utf-8'))
+            count += 1
+        return count
+
+    def assemble(self, target, headers, parts):
+        """Write the workbook to ``target`` (binary), streaming the parts into the sheet"""
+        with zipfile.ZipFile(target, 'w', compression=zipfile.ZIP_DEFLATED) as workbook:
+            workbook.writestr('[Content_Types].xml', self.CONTENT_TYPES)
+            workbook.writestr('_rels/.rels', self.ROOT_RELS)
+            workbook.writestr('xl/workbook.xml', self.WORKBOOK)
+            workbook.writestr('xl/_rels/workbook.xml.rels', self.WORKBOOK_RELS)
+            with workbook.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+                sheet.write(self.SHEET_START.encode('utf-8'))
+                sheet.write(self.row(headers).encode('utf-8'))
+                for part in parts:
+                    shutil.copyfileobj(part, sheet)
+                sheet.write(self.SHEET_END.encode('utf-8'))
+
+
+WRITERS = {
+    'csv': CsvExportWriter,
+    'xlsx': XlsxExportWriter,
+}
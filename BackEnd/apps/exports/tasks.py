@@ -0,0 +1,23 @@
+from celery import shared_task
+from core.actor import actor_context
+from .services.exporter import ExportService
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(
+    name='run_export_job',
+    ignore_result=True,
+    autoretry_for=(Exception,),
+    max_retries=3,
+    retry_backoff=True
+)
+@actor_context
+def run_export_job(job_id):
+    """
+    Run an export job. A retried job resumes after the last part it wrote.
+    """
+    job = ExportService.run_job(job_id)
+    if job is not None:
+        logger.info(f"[EXPORT TASK] Export job {job_id} written to {job.file.name}")
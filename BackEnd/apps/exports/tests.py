@@ -0,0 +1,168 @@
+import io
+import shutil
+import tempfile
+import zipfile
+from unittest.mock import patch
+from django.core.files.storage import default_storage
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from apps.accounts.models import User
+from apps.companies.models import Companie
+from apps.companies.employeers.models import Employeer
+from apps.inventory.inflows.models import Inflow
+from apps.inventory.movements.services.items import MovementItemsService
+from apps.inventory.product.models import Product
+from apps.inventory.supplier.models import Supplier
+from apps.inventory.warehouse.models import Warehouse
+from .models import ExportJob
+from .services.exporter import ExportService
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ExportTests(APITestCase):
+    """Tests for the streamed and the resumable exports"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.company = Companie.objects.create(name='Export Company', type='Headquarters')
+        other_company = Companie.objects.create(name='Other Export Company', type='Headquarters')
+
+        self.manager_user = User.objects.create_user(
+            password='manager123',
+            email='export_manager@test.com',
+            first_name='Export',
+            last_name='Manager',
+            user_type='Manager'
+        )
+        self.employee_user = User.objects.create_user(
+            password='emp123',
+            email='export_employee@test.com',
+            first_name='Export',
+            last_name='Employee',
+            user_type='Employee'
+        )
+        for user in (self.manager_user, self.employee_user):
+            employeer = Employeer.objects.get(user=user)
+            employeer.companie = self.company
+            employeer.save()
+
+        supplier = Supplier.objects.create(name='Export Supplier', companie=self.company)
+        warehouse = Warehouse.objects.create(name='Export Warehouse', companie=self.company)
+        inflow = Inflow.objects.create(origin=supplier, destiny=warehouse, companie=self.company)
+        products = [
+            Product.objects.create(name=f'Export, Product {index}', companie=self.company)
+            for index in range(25)
+        ]
+        MovementItemsService.create_items(inflow, [{'product': product, 'quantity': 2} for product in products])
+
+        foreign_supplier = Supplier.objects.create(name='Foreign Supplier', companie=other_company)
+        foreign_warehouse = Warehouse.objects.create(name='Foreign Warehouse', companie=other_company)
+        foreign_inflow = Inflow.objects.create(origin=foreign_supplier, destiny=foreign_warehouse, companie=other_company)
+        foreign_product = Product.objects.create(name='Foreign Product', companie=other_company)
+        MovementItemsService.create_items(foreign_inflow, [{'product': foreign_product, 'quantity': 1}])
+
+    def read_file(self, job):
+        with default_storage.open(job.file.name, 'rb') as exported:
+            return exported.read()
+
+    def test_stream_returns_company_rows_as_csv(self):
+        self.client.force_authenticate(self.manager_user)
+        response = self.client.get(reverse('exports:stream_export', args=['inflow_items']))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('attachment', response['Content-Disposition'])
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(lines[0], 'Inflow,Created At,Status,Supplier,Warehouse,Product,Quantity')
+        self.assertEqual(len(lines), 26)
+        self.assertIn('"Export, Product 0"', ''.join(lines))
+        self.assertNotIn('Foreign Product', ''.join(lines))
+
+    def test_stream_rejects_invalid_requests(self):
+        self.client.force_authenticate(self.manager_user)
+        response = self.client.get(reverse('exports:stream_export', args=['unknown']))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(
+            reverse('exports:stream_export', args=['inflow_items']), {'date_from': 'yesterday'}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.client.force_authenticate(self.employee_user)
+        response = self.client.get(reverse('exports:stream_export', args=['inflow_items']))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_create_job_enqueues_it_on_commit(self):
+        self.client.force_authenticate(self.manager_user)
+        with patch('apps.exports.views.run_export_job.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse('exports:list_create_export_jobs'),
+                    {'export_type': 'inflow_items', 'file_format': 'xlsx', 'status': 'pending'},
+                    format='json'
+                )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'pending')
+        delay.assert_called_once_with(response.data['id'], actor_id=str(self.manager_user.id))
+        self.assertEqual(ExportJob.objects.get(pk=response.data['id']).filters, {'status': 'pending'})
+
+    @patch.object(ExportService, 'PART_SIZE', 10)
+    def test_job_writes_parts_and_joins_them(self):
+        job = ExportService.create_job(self.company.pk, 'inflow_items', 'csv', {})
+        job = ExportService.run_job(job.pk)
+
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual((job.parts, job.rows_written), (3, 25))
+        lines = self.read_file(job).decode('utf-8').splitlines()
+        self.assertEqual(len(lines), 26)
+        self.assertEqual(len(set(lines)), 26)
+        self.assertFalse(default_storage.exists(ExportService._part_name(job, 0)))
+        # A completed job is not run again
+        self.assertIsNone(ExportService.run_job(job.pk))
+
+    @patch.object(ExportService, 'PART_SIZE', 10)
+    def test_failed_job_resumes_from_its_cursor(self):
+        job = ExportService.create_job(self.company.pk, 'inflow_items', 'csv', {})
+        original = ExportService._write_part
+        calls = []
+
+        def fail_on_third_part(*args):
+            calls.append(args)
+            if len(calls) == 3:
+                raise OSError('storage unavailable')
+            return original(*args)
+
+        with patch.object(ExportService, '_write_part', side_effect=fail_on_third_part):
+            with self.assertRaises(OSError):
+                ExportService.run_job(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual((job.parts, job.rows_written), (2, 20))
+
+        job = ExportService.run_job(job.pk)
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual((job.parts, job.rows_written), (3, 25))
+        lines = self.read_file(job).decode('utf-8').splitlines()
+        self.assertEqual(len(lines), 26)
+        self.assertEqual(len(set(lines)), 26)
+
+    @patch.object(ExportService, 'PART_SIZE', 10)
+    def test_xlsx_job_writes_a_workbook(self):
+        job = ExportService.create_job(self.company.pk, 'inflow_items', 'xlsx', {})
+        job = ExportService.run_job(job.pk)
+
+        self.assertTrue(job.file.name.endswith('.xlsx'))
+        with zipfile.ZipFile(io.BytesIO(self.read_file(job))) as workbook:
+            self.assertIn('xl/workbook.xml', workbook.namelist())
+            sheet = workbook.read('xl/worksheets/sheet1.xml').decode('utf-8')
+        self.assertEqual(sheet.count('<row>'), 26)
+        self.assertIn('Export, Product 0', sheet)
+        self.assertTrue(sheet.endswith('</sheetData></worksheet>'))
@@ -0,0 +1,11 @@
+from django.urls import path
+from . import views
+
+app_name = 'exports'
+
+urlpatterns = [
+    path('jobs/', views.ExportJobListCreateView.as_view(), name='list_create_export_jobs'),
+    path('jobs/<uuid:pk>/', views.ExportJobDetailView.as_view(), name='retrieve_export_job'),
+    path('jobs/<uuid:pk>/resume/', views.ExportJobResumeView.as_view(), name='resume_export_job'),
+    path('<str:export_type>/stream/', views.ExportStreamView.as_view(), name='stream_export'),
+]
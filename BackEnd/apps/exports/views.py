@@ -0,0 +1,174 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiTypes
+from rest_framework import status
+from rest_framework.exceptions import ValidationError, PermissionDenied
+from rest_framework.generics import ListCreateAPIView, RetrieveAPIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+import logging
+from apps.companies.employeers.models import Employeer
+from core.actor import get_employeer
+from .models import ExportJob
+from .serializers import ExportJobSerializer, ExportJobCreateSerializer
+from .services.exporter import ExportService
+from .tasks import run_export_job
+
+logger = logging.getLogger(__name__)
+
+FILTER_PARAMETERS = [
+    OpenApiParameter(name='date_from', type=OpenApiTypes.DATE, description='Only rows from this day'),
+    OpenApiParameter(name='date_to', type=OpenApiTypes.DATE, description='Only rows up to this day'),
+    OpenApiParameter(name='status', type=OpenApiTypes.STR, description='Only rows with this status (movement type for stock movements)'),
+]
+
+
+class ExportAccessMixin:
+    """Exports are restricted to the managers, admins and owners of a company"""
+    permission_classes = [IsAuthenticated]
+
+    def get_companie_id(self):
+        user = self.request.user
+        if user.user_type not in ['Manager', 'Admin', 'Owner']:
+            raise PermissionDenied('Only managers, admins and owners can export data')
+        try:
+            companie_id = get_employeer(user).companie_id
+        except Employeer.DoesNotExist:
+            companie_id = None
+        if companie_id is None:
+            raise PermissionDenied('User is not linked to a company')
+        return companie_id
+
+
+@extend_schema_view(
+    get=extend_schema(
+        tags=['Exports'],
+        summary='Stream an export as CSV',
+        description="""
+        Stream the rows of a dataset of the user's company as a CSV file, read in
+        chunks from the database. Datasets: deliveries, delivery_checkpoints,
+        inflow_items, outflow_items, transfer_items, stock_movements, payroll.
+        Use an export job for XLSX files.
+        """,
+        parameters=[
+            OpenApiParameter(name='export_type', location=OpenApiParameter.PATH, type=OpenApiTypes.STR, description='The dataset exported'),
+            *FILTER_PARAMETERS,
+        ],
+        responses={(200, 'text/csv'): OpenApiTypes.BINARY},
+    )
+)
+class ExportStreamView(ExportAccessMixin, APIView):
+    """
+    Stream an export as CSV.
+    """
+
+    def get(self, request, export_type):
+        companie_id = self.get_companie_id()
+        try:
+            lines = ExportService.stream_csv(export_type, companie_id, request.query_params)
+        except DjangoValidationError as e:
+            raise ValidationError({'detail': e.messages})
+
+        filename = f"{export_type}-{timezone.now().strftime('%Y%m%d%H%M%S')}.csv"
+        response = StreamingHttpResponse(lines, content_type='text/csv')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        logger.info(f"[EXPORTS VIEW] {export_type} streamed for company {companie_id} by {request.user.email}")
+        return response
+
+
+@extend_schema_view(
+    get=extend_schema(
+        tags=['Exports'],
+        summary='List the export jobs',
+        description="List the export jobs of the user's company, newest first.",
+        responses={200: ExportJobSerializer(many=True)},
+    ),
+    post=extend_schema(
+        tags=['Exports'],
+        summary='Start an export job',
+        description="""
+        Export a dataset of the user's company to a CSV or XLSX file in the
+        background. Poll the job until it is completed to get the file url.
+        """,
+        request=ExportJobCreateSerializer,
+        responses={202: ExportJobSerializer},
+    ),
+)
+class ExportJobListCreateView(ExportAccessMixin, ListCreateAPIView):
+    """
+    List and start export jobs.
+    """
+    serializer_class = ExportJobSerializer
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return ExportJob.objects.none()
+        return ExportJob.objects.filter(companie_id=self.get_companie_id())
+
+    def create(self, request, *args, **kwargs):
+        companie_id = self.get_companie_id()
+        serializer = ExportJobCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        filters = {key: data[key] for key in ('date_from', 'date_to', 'status') if key in data}
+
+        try:
+            with transaction.atomic():
+                job = ExportService.create_job(companie_id, data['export_type'], data['file_format'], filters)
+                job_id, actor_id = str(job.id), str(request.user.id)
+                transaction.on_commit(lambda: run_export_job.delay(job_id, actor_id=actor_id))
+        except DjangoValidationError as e:
+            raise ValidationError({'detail': e.messages})
+
+        return Response(ExportJobSerializer(job, context={'request': request}).data, status=status.HTTP_202_ACCEPTED)
+
+
+@extend_schema_view(
+    get=extend_schema(
+        tags=['Exports'],
+        summary='Retrieve an export job',
+        description='Status and progress of an export job, with the file url once completed.',
+        responses={200: ExportJobSerializer},
+    )
+)
+class ExportJobDetailView(ExportAccessMixin, RetrieveAPIView):
+    """
+    Retrieve an export job.
+    """
+    serializer_class = ExportJobSerializer
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return ExportJob.objects.none()
+        return ExportJob.objects.filter(companie_id=self.get_companie_id())
+
+
+@extend_schema_view(
+    post=extend_schema(
+        tags=['Exports'],
+        summary='Resume an export job',
+        description="""
+        Resume a failed export job, or a running one whose worker stopped
+        updating it. The job continues after the last part it wrote.
+        """,
+        request=None,
+        responses={202: ExportJobSerializer},
+    )
+)
+class ExportJobResumeView(ExportAccessMixin, APIView):
+    """
+    Resume an export job.
+    """
+
+    def post(self, request, pk):
+        job = get_object_or_404(ExportJob, pk=pk, companie_id=self.get_companie_id())
+        if job.status == 'completed':
+            raise ValidationError({'detail': 'The export job is already completed'})
+
+        run_export_job.delay(str(job.id), actor_id=str(request.user.id))
+        logger.info(f"[EXPORTS VIEW] Export job {job.id} resumed by {request.user.email} after {job.rows_written} rows")
+        return Response(ExportJobSerializer(job, context={'request': request}).data, status=status.HTTP_202_ACCEPTED)
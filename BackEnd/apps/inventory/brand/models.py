@@ -1,5 +1,5 @@
 from django.db import models
-from basemodels.models import BaseModel
+from basemodels.models import BaseModel, tenant_indexes
 
 
 class Brand(BaseModel):
@@ -28,6 +28,7 @@ class Brand(BaseModel):
         verbose_name = 'Brand'
         verbose_name_plural = 'Brands'
         ordering = ['-created_at']
+        indexes = tenant_indexes('brand')
     
     def __str__(self):
         return self.name
\ No newline at end of file
@@ -15,6 +15,7 @@ from drf_spectacular.utils import (
 from .models import Brand
 from .serializers import BrandSerializer
 import logging
+from core.actor import get_employeer
 
 logger = logging.getLogger(__name__)
 
@@ -25,10 +26,8 @@ class BaseBrandView:
     def get_queryset(self):
         user = self.request.user
         try:
-            employeer = user.employeer
-            return Brand.objects.select_related(
-                'created_by', 'companie'
-            ).filter(companie=employeer.companie)
+            employeer = get_employeer(user)
+            return Brand.objects.with_audit().filter(companie=employeer.companie)
         except Brand.DoesNotExist:
             return Brand.objects.none()
     
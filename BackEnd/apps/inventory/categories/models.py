@@ -1,5 +1,5 @@
 from django.db import models
-from basemodels.models import BaseModel
+from basemodels.models import BaseModel, tenant_indexes
 
 # Create your models here.
 class Category(BaseModel):
@@ -28,6 +28,7 @@ class Category(BaseModel):
         verbose_name = 'Category'
         verbose_name_plural = 'Categories'
         ordering = ['-created_at']
+        indexes = tenant_indexes('category')
 
     def __str__(self):
         return self.name
\ No newline at end of file
@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-16 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inflows', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inflow',
+            index=models.Index(fields=['companie', '-created_at'], name='inflow_tenant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inflow',
+            index=models.Index(fields=['companie', 'status', '-created_at'], name='inflow_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inflowitems',
+            index=models.Index(fields=['companie', '-created_at'], name='inflow_items_tenant_idx'),
+        ),
+    ]
@@ -1,11 +1,11 @@
 from django.db import models
 from ..product.models import Product
 from ..warehouse.models import Warehouse
-from basemodels.models import BaseModel
+from basemodels.models import BaseModel, FieldTrackerMixin, tenant_indexes
 from ..supplier.models import Supplier
 from core.constants.choices import MOVEMENTS_STATUS_CHOICES
 
-class Inflow(BaseModel):
+class Inflow(FieldTrackerMixin, BaseModel):
     """Inflows
     Fields:
         origin: ForeignKey to Supplier : The supplier of the inflow
@@ -37,10 +37,13 @@ class Inflow(BaseModel):
     )
     
     
+    tracked_fields = ('status',)
+
     class Meta:
         verbose_name = 'Inflow'
         verbose_name_plural = 'Inflows'
         ordering = ['-created_at']
+        indexes = tenant_indexes('inflow', 'status')
         permissions = [
             ("can_approve_inflow", "Can approve inflow"),
             ("can_reject_inflow", "Can reject inflow"),
@@ -56,7 +59,7 @@ class Inflow(BaseModel):
         return "Entry"
     
     
-class InflowItems(BaseModel):
+class InflowItems(FieldTrackerMixin, BaseModel):
     """ Inflow Items models is responsible for storing the each product that is part of an inflow
     Fields:
         inflow: ForeignKey to Inflow : id of the inflow the item is part of
@@ -77,10 +80,13 @@ class InflowItems(BaseModel):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='inflow_items', help_text='The products that are coming into stock')
     quantity = models.PositiveIntegerField(default=0, help_text='The quantity of this product coming in')
     
+    tracked_fields = ('quantity',)
+
     class Meta:
         verbose_name = 'Inflow Item'
         verbose_name_plural = 'Inflow Items'
         ordering = ['-created_at']
+        indexes = tenant_indexes('inflow_items')
         
     def __str__(self):
         return self.product.name
\ No newline at end of file
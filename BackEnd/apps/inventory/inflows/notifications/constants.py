@@ -10,6 +10,8 @@ NOTIFICATION_TYPE = {
     'INFLOW_APPROVED': 'inflow_approved',
     'INFLOW_REJECTED': 'inflow_rejected',
     'INFLOW_DELETED': 'inflow_deleted',
+    'INFLOWS_IMPORTED': 'inflows_imported',
+    'INFLOW_REPORT': 'inflow_report',
     'STOCK_UPDATED': 'stock_updated',
     'LOW_STOCK_ALERT': 'low_stock_alert'
 }
@@ -21,6 +23,8 @@ NOTIFICATION_TITLES = {
     NOTIFICATION_TYPE['INFLOW_APPROVED']: gettext("Inflow Approved"),
     NOTIFICATION_TYPE['INFLOW_REJECTED']: gettext("Inflow Rejected"),
     NOTIFICATION_TYPE['INFLOW_DELETED']: gettext("Inflow Deleted"),
+    NOTIFICATION_TYPE['INFLOWS_IMPORTED']: gettext("Inflows Imported"),
+    NOTIFICATION_TYPE['INFLOW_REPORT']: gettext("Inflow Report"),
     NOTIFICATION_TYPE['STOCK_UPDATED']: gettext("Stock Updated"),
     NOTIFICATION_TYPE['LOW_STOCK_ALERT']: gettext("Low Stock Alert")
 }
@@ -42,6 +46,12 @@ NOTIFICATION_MESSAGES = {
     NOTIFICATION_TYPE['INFLOW_DELETED']: gettext(
         "Inflow deleted from %(origin)s to %(destiny)s by %(deleted_by)s"
     ),
+    NOTIFICATION_TYPE['INFLOWS_IMPORTED']: gettext(
+        "%(inflows_count)d inflows imported with %(items_count)d items, status: %(status)s"
+    ),
+    NOTIFICATION_TYPE['INFLOW_REPORT']: gettext(
+        "Inflows from %(start)s to %(end)s: %(total_inflows)d inflows, %(total_items)d items, total value $%(total_value).2f (average $%(avg_value).2f)"
+    ),
     NOTIFICATION_TYPE['STOCK_UPDATED']: gettext(
         "Stock updated in warehouse %(warehouse)s for product %(product)s, new quantity is %(new_quantity)d (previous: %(previous_quantity)d)"
     ),
@@ -64,6 +74,8 @@ NOTIFICATION_PRIORITIES = {
     NOTIFICATION_TYPE['INFLOW_APPROVED']: 'high',
     NOTIFICATION_TYPE['INFLOW_REJECTED']: 'high',
     NOTIFICATION_TYPE['INFLOW_DELETED']: 'high',
+    NOTIFICATION_TYPE['INFLOWS_IMPORTED']: 'normal',
+    NOTIFICATION_TYPE['INFLOW_REPORT']: 'normal',
     NOTIFICATION_TYPE['STOCK_UPDATED']: 'normal',
     NOTIFICATION_TYPE['LOW_STOCK_ALERT']: 'high'
 }
@@ -75,6 +87,8 @@ RECIPIENT_TYPES = {
     NOTIFICATION_TYPE['INFLOW_APPROVED']: ['Stocker', 'Manager', 'Owner', 'CEO', 'Admin'],
     NOTIFICATION_TYPE['INFLOW_REJECTED']: ['Stocker', 'Manager', 'Owner', 'CEO', 'Admin'],
     NOTIFICATION_TYPE['INFLOW_DELETED']: ['Stocker', 'Manager', 'Owner', 'CEO', 'Admin'],
+    NOTIFICATION_TYPE['INFLOWS_IMPORTED']: ['Stocker', 'Manager', 'Admin'],
+    'REPORT': ['Owner', 'CEO', 'Admin'],
     NOTIFICATION_TYPE['STOCK_UPDATED']: ['Stocker', 'Manager'],
     NOTIFICATION_TYPE['LOW_STOCK_ALERT']: ['Stocker', 'Manager', 'Admin', 'Owner', 'CEO']
 }
\ No newline at end of file
@@ -68,8 +68,7 @@ class InflowNotificationHandler(BaseNotificationHandler):
 
                 # Get recipients based on notification type
                 handler = InflowNotificationHandler()
-                recipients = handler.get_recipients_by_type(*RECIPIENT_TYPES[notification_type])
-                recipient_ids = [str(user.id) for user in recipients]
+                recipient_ids = handler.get_recipient_ids(*RECIPIENT_TYPES[notification_type], companie=instance.companie_id)
 
                 # Get common context
                 context = InflowNotificationHandler._get_inflow_context(instance)
@@ -140,8 +139,7 @@ class InflowNotificationHandler(BaseNotificationHandler):
             
             # Get recipients based on notification type
             handler = InflowNotificationHandler()
-            recipients = handler.get_recipients_by_type(*RECIPIENT_TYPES[NOTIFICATION_TYPE['INFLOW_DELETED']])
-            recipient_ids = [str(user.id) for user in recipients]
+            recipient_ids = handler.get_recipient_ids(*RECIPIENT_TYPES[NOTIFICATION_TYPE['INFLOW_DELETED']], companie=instance.companie_id)
             
             # Send notification immediately since the instance will be deleted
             handler.send_to_recipients(
@@ -178,6 +176,56 @@ class InflowNotificationHandler(BaseNotificationHandler):
                 exc_info=True
             )
     
+    @staticmethod
+    def notify_inflows_imported(inflows, items_count):
+        """
+        Send one notification for a batch of imported inflows
+
+        Imported inflows are bulk inserted, so they do not go through the
+        per-inflow notifications.
+        """
+        if not inflows:
+            return
+        try:
+            companie_id = inflows[0].companie_id
+            context = {
+                'inflows_count': len(inflows),
+                'items_count': items_count,
+                'status': inflows[0].status
+            }
+
+            handler = InflowNotificationHandler()
+            recipient_ids = handler.get_recipient_ids(*RECIPIENT_TYPES[NOTIFICATION_TYPE['INFLOWS_IMPORTED']], companie=companie_id)
+
+            handler.send_to_recipients(
+                recipient_ids=recipient_ids,
+                title=NOTIFICATION_TITLES[NOTIFICATION_TYPE['INFLOWS_IMPORTED']],
+                message=NOTIFICATION_MESSAGES[NOTIFICATION_TYPE['INFLOWS_IMPORTED']] % context,
+                app_name=APP_NAME,
+                notification_type=NOTIFICATION_TYPE['INFLOWS_IMPORTED'],
+                data={
+                    'inflow_ids': [str(inflow.id) for inflow in inflows],
+                    'severity': SEVERITY_TYPES['INFO'],
+                    'priority': NOTIFICATION_PRIORITIES[NOTIFICATION_TYPE['INFLOWS_IMPORTED']],
+                    **context
+                }
+            )
+
+            logger.info(
+                "[INFLOW NOTIFICATIONS] Import notification sent successfully",
+                extra={
+                    'inflows_count': len(inflows),
+                    'recipients_count': len(recipient_ids)
+                }
+            )
+
+        except Exception as e:
+            logger.error(
+                "[INFLOW NOTIFICATIONS] Failed to send import notification",
+                extra={'error': str(e)},
+                exc_info=True
+            )
+
     @staticmethod
     def notify_stock_update(warehouse, product, previous_quantity, new_quantity):
         """
@@ -193,8 +241,7 @@ class InflowNotificationHandler(BaseNotificationHandler):
             handler = InflowNotificationHandler()
             
             # Stock update notification
-            recipients = handler.get_recipients_by_type(*RECIPIENT_TYPES[NOTIFICATION_TYPE['STOCK_UPDATED']])
-            recipient_ids = [str(user.id) for user in recipients]
+            recipient_ids = handler.get_recipient_ids(*RECIPIENT_TYPES[NOTIFICATION_TYPE['STOCK_UPDATED']], companie=warehouse.companie_id)
             
             context = {
                 'warehouse': str(warehouse),
@@ -218,10 +265,10 @@ class InflowNotificationHandler(BaseNotificationHandler):
             
             # Check for low stock
             if new_quantity <= product.min_quantity:
-                low_stock_recipients = handler.get_recipients_by_type(
-                    *RECIPIENT_TYPES[NOTIFICATION_TYPE['LOW_STOCK_ALERT']]
+                low_stock_recipient_ids = handler.get_recipient_ids(
+                    *RECIPIENT_TYPES[NOTIFICATION_TYPE['LOW_STOCK_ALERT']],
+                    companie=warehouse.companie_id
                 )
-                low_stock_recipient_ids = [str(user.id) for user in low_stock_recipients]
                 
                 low_stock_context = {
                     'warehouse': str(warehouse),
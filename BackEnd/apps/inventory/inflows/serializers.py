@@ -1,10 +1,12 @@
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from django.core.exceptions import ValidationError as DjangoValidationError
 from .models import Inflow, InflowItems
 from django.db import transaction
 from ..warehouse.models import Warehouse
 from ..product.models import Product
 from ..supplier.models import Supplier
+from ..movements.services.items import MovementItemsService
 import logging
 
 logger = logging.getLogger(__name__)
@@ -163,9 +165,9 @@ class InflowSerializer(serializers.ModelSerializer):
                     'items_data': 'Each item must have product and quantity fields'
                 })
                 
-            if not isinstance(item.get('quantity'), (int, float)):
+            if isinstance(item.get('quantity'), bool) or not isinstance(item.get('quantity'), int):
                 raise ValidationError({
-                    'items_data': 'Quantity must be a number'
+                    'items_data': 'Quantity must be an integer'
                 })
                 
             if item['quantity'] < 1:
@@ -184,19 +186,7 @@ class InflowSerializer(serializers.ModelSerializer):
         """
         items_data = validated_data.pop('items_data')
         inflow = Inflow.objects.create(**validated_data)
-        
-        for item_data in items_data:
-            # Get the Product instance from the validated InflowItemSerializer
-            item_serializer = InflowItemSerializer(data=item_data)
-            item_serializer.is_valid(raise_exception=True)
-            validated_item = item_serializer.validated_data
-            
-            InflowItems.objects.create(
-                inflow=inflow,
-                product=validated_item['product'],
-                quantity=validated_item['quantity'],
-            )
-            
+        MovementItemsService.create_items(inflow, items_data)
         return inflow
         
     @transaction.atomic
@@ -208,21 +198,91 @@ class InflowSerializer(serializers.ModelSerializer):
         """
         if 'items_data' in validated_data:
             items_data = validated_data.pop('items_data')
-            instance.inflow_items.all().delete()
-            
-            for item_data in items_data:
-                # Get the Product instance from the validated InflowItemSerializer
-                item_serializer = InflowItemSerializer(data=item_data)
-                item_serializer.is_valid(raise_exception=True)
-                validated_item = item_serializer.validated_data
-                
-                InflowItems.objects.create(
-                    inflow=instance,
-                    product=validated_item['product'],
-                    quantity=validated_item['quantity'],
-                    companie=instance.companie,
-                    created_by=instance.created_by,
-                    updated_by=instance.updated_by,
-                )
+            instance.items.all().delete()
+            MovementItemsService.create_items(instance, items_data)
                 
-        return super().update(instance, validated_data)
\ No newline at end of file
+        return super().update(instance, validated_data)
+
+class InflowImportSerializer(serializers.Serializer):
+    """Serializer for importing a batch of inflows
+
+    Fields:
+        documents (ListField): Inflows to import, each one with its ``origin``
+            supplier UUID, ``destiny`` warehouse UUID and ``items_data``
+        approve (BooleanField): Approve and post the inflows to stock right away
+
+    Validation:
+        - At most MAX_DOCUMENTS documents and MAX_ITEMS items per import
+        - Suppliers, warehouses and products must belong to the user's company,
+          they are fetched with one query each whatever the size of the import
+        - Each item must have a valid product and a positive integer quantity
+    """
+    MAX_DOCUMENTS = 1000
+    MAX_ITEMS = 50000
+
+    documents = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=MAX_DOCUMENTS,
+        write_only=True
+    )
+    approve = serializers.BooleanField(default=False)
+
+    @staticmethod
+    def _pk(model, value, label):
+        try:
+            return model._meta.pk.to_python(value)
+        except DjangoValidationError:
+            raise ValidationError(f'Invalid {label} id: {value}')
+
+    def validate_documents(self, documents):
+        companie = self.context['request'].user.employeer.companie
+
+        items_count = 0
+        for index, document in enumerate(documents):
+            if not all(document.get(k) for k in ('origin', 'destiny', 'items_data')):
+                raise ValidationError(f'Document {index}: origin, destiny and items_data are required')
+            if not isinstance(document['items_data'], list):
+                raise ValidationError(f'Document {index}: items_data must be a list')
+            for item in document['items_data']:
+                if not isinstance(item, dict) or not all(k in item for k in ('product', 'quantity')):
+                    raise ValidationError(f'Document {index}: each item must have product and quantity fields')
+                if isinstance(item['quantity'], bool) or not isinstance(item['quantity'], int) or item['quantity'] < 1:
+                    raise ValidationError(f'Document {index}: quantity must be a positive integer')
+            items_count += len(document['items_data'])
+
+        if items_count > self.MAX_ITEMS:
+            raise ValidationError(f'An import can not have more than {self.MAX_ITEMS} items')
+
+        # One query per referenced model, whatever the size of the import
+        suppliers = Supplier.objects.filter(companie=companie).in_bulk(
+            {self._pk(Supplier, document['origin'], 'supplier') for document in documents}
+        )
+        warehouses = Warehouse.objects.filter(companie=companie).in_bulk(
+            {self._pk(Warehouse, document['destiny'], 'warehouse') for document in documents}
+        )
+        try:
+            products = MovementItemsService.resolve_products(
+                [item for document in documents for item in document['items_data']],
+                companie=companie
+            )
+        except DjangoValidationError as e:
+            raise ValidationError(e.messages[0])
+
+        resolved = []
+        for index, document in enumerate(documents):
+            origin = suppliers.get(self._pk(Supplier, document['origin'], 'supplier'))
+            destiny = warehouses.get(self._pk(Warehouse, document['destiny'], 'warehouse'))
+            if origin is None:
+                raise ValidationError(f'Document {index}: supplier {document["origin"]} does not exist')
+            if destiny is None:
+                raise ValidationError(f'Document {index}: warehouse {document["destiny"]} does not exist')
+            resolved.append({
+                'origin': origin,
+                'destiny': destiny,
+                'items_data': [
+                    {'product': products[self._pk(Product, item['product'], 'product')], 'quantity': item['quantity']}
+                    for item in document['items_data']
+                ]
+            })
+        return resolved
@@ -5,7 +5,9 @@ from ..models import Inflow, InflowItems
 from ..notifications.handlers import InflowNotificationHandler
 from .validators import InflowBusinessValidator
 from ...warehouse.models import WarehouseProduct
+from ...movements.services.items import MovementItemsService
 import logging
+from core.actor import get_employeer
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +36,8 @@ class InflowService:
         # Validate company access
         self.validator.validate_company_access(data, user)
         
+        employeer = get_employeer(user)
+
         # Create inflow with transaction
         with transaction.atomic():
             # Create inflow
@@ -41,21 +45,13 @@ class InflowService:
                 origin=data['origin'],
                 destiny=data['destiny'],
                 status='pending',
-                companie=user.employeer.companie,
-                created_by=user.employeer,
-                updated_by=user.employeer
+                companie=employeer.companie,
+                created_by=employeer,
+                updated_by=employeer
             )
             
             # Create inflow items
-            for item_data in data['items_data']:
-                InflowItems.objects.create(
-                    inflow=inflow,
-                    product=item_data['product'],
-                    quantity=item_data['quantity'],
-                    companie=user.employeer.companie,
-                    created_by=user.employeer,
-                    updated_by=user.employeer
-                )
+            MovementItemsService.create_items(inflow, data['items_data'], employeer=employeer)
             
             logger.info(
                 f"Inflow created successfully",
@@ -88,24 +84,21 @@ class InflowService:
         # Validate inflow status
         self.validator.validate_inflow_status(inflow)
         
+        employeer = get_employeer(user)
+
         # Update inflow with transaction
         with transaction.atomic():
             # Update inflow fields
             inflow.origin = data['origin']
             inflow.destiny = data['destiny']
-            inflow.updated_by = user.employeer
+            inflow.updated_by = employeer
             inflow.save()
             
             # Delete existing items
             inflow.items.all().delete()
             
             # Create new items
-            for item_data in data['items_data']:
-                InflowItems.objects.create(
-                    inflow=inflow,
-                    product=item_data['product'],
-                    quantity=item_data['quantity']
-                )
+            MovementItemsService.create_items(inflow, data['items_data'], employeer=employeer)
             
             logger.info(
                 f"[INFLOW SERVICE] Inflow updated successfully",
@@ -117,6 +110,76 @@ class InflowService:
             
             return inflow
     
+    def import_inflows(self, documents, user, approve=False):
+        """
+        Import a batch of inflows, e.g. supplier receipts received through EDI
+
+        Documents and their items are inserted with one bulk insert each; when
+        approved, all the documents are posted to stock in a single posting.
+
+        Args:
+            documents (list): Validated documents, dicts with the ``origin`` supplier,
+                the ``destiny`` warehouse and the ``items_data`` with resolved products
+            user: User importing the inflows
+            approve (bool): Whether the inflows are approved and posted right away
+
+        Returns:
+            list: Created inflow instances
+
+        Raises:
+            ValidationError: If validation fails, nothing is imported in that case
+        """
+        employeer = get_employeer(user)
+
+        # Validate company access
+        for document in documents:
+            self.validator.validate_company_access(document, user)
+
+        with transaction.atomic():
+            inflows = Inflow.objects.bulk_create([
+                Inflow(
+                    origin=document['origin'],
+                    destiny=document['destiny'],
+                    status='pending',
+                    companie=employeer.companie,
+                    created_by=employeer,
+                    updated_by=employeer
+                )
+                for document in documents
+            ], batch_size=MovementItemsService.BATCH_SIZE)
+
+            documents_items = []
+            for inflow, document in zip(inflows, documents):
+                products = {item['product'].pk: item['product'] for item in document['items_data']}
+                items = MovementItemsService.build_items(inflow, document['items_data'], products=products, employeer=employeer)
+                if not approve:
+                    MovementItemsService.validate_capacity(inflow, items)
+                documents_items.append(items)
+
+            InflowItems.objects.bulk_create(
+                [item for items in documents_items for item in items],
+                batch_size=MovementItemsService.BATCH_SIZE
+            )
+
+            if approve:
+                MovementItemsService.post_documents(zip(inflows, documents_items), employeer=employeer)
+                Inflow.objects.filter(pk__in=[inflow.pk for inflow in inflows]).update(status='completed')
+                for inflow in inflows:
+                    inflow.status = 'completed'
+
+            items_count = sum(len(items) for items in documents_items)
+            InflowNotificationHandler.notify_inflows_imported(inflows, items_count)
+
+            logger.info(
+                f"[INFLOW SERVICE] Imported {len(inflows)} inflows with {items_count} items",
+                extra={
+                    'user_id': user.id,
+                    'approved': approve
+                }
+            )
+
+            return inflows
+
     def approve_inflow(self, inflow):
         """
         Approve an inflow with validation
@@ -1,6 +1,9 @@
+from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 from django.db.models import Count, Sum, Avg, F, Q, ExpressionWrapper, fields, Min, Max
-from django.db.models.functions import ExtractMonth, TruncMonth
+from django.db.models.functions import ExtractMonth, TruncMonth, TruncDate
+from core.constants.choices import MOVEMENTS_STATUS_CHOICES
 from ..models import Inflow, InflowItems
 import logging
 
@@ -11,14 +14,131 @@ class InflowReportService:
     Service class for generating Inflow reports
     """
     
+    # Closed days are cached under this prefix, one entry per company and day
+    DAILY_CACHE_PREFIX = 'inflow_report_day'
+
+    VALUE_EXPRESSION = ExpressionWrapper(
+        F('quantity') * F('product__price'),
+        output_field=fields.DecimalField(max_digits=20, decimal_places=2)
+    )
+
+    @classmethod
+    def _day_key(cls, companie_id, day):
+        return f"{cls.DAILY_CACHE_PREFIX}:{companie_id or '*'}:{day.isoformat()}"
+
     @staticmethod
-    def generate_daily_report(start_date=None, end_date=None):
+    def _empty_bucket():
+        return {
+            'inflows_count': 0,
+            'items_count': 0,
+            'total_value': 0.0,
+            'status': {status: 0 for status, _ in MOVEMENTS_STATUS_CHOICES}
+        }
+
+    @classmethod
+    def _compute_daily_buckets(cls, start_date, end_date, companie_id=None):
+        """
+        Aggregate the inflows of every day of a period with two grouped queries
+
+        Returns:
+            dict: Bucket per date
+        """
+        inflows = Inflow.objects.filter(
+            created_at__date__gte=start_date,
+            created_at__date__lte=end_date
+        )
+        items = InflowItems.objects.filter(
+            inflow__created_at__date__gte=start_date,
+            inflow__created_at__date__lte=end_date
+        )
+        if companie_id is not None:
+            inflows = inflows.filter(companie_id=companie_id)
+            items = items.filter(inflow__companie_id=companie_id)
+
+        buckets = {}
+        day = start_date
+        while day <= end_date:
+            buckets[day] = cls._empty_bucket()
+            day += timezone.timedelta(days=1)
+
+        status_counts = inflows.annotate(
+            day=TruncDate('created_at')
+        ).order_by().values('day', 'status').annotate(count=Count('id'))
+        for row in status_counts:
+            bucket = buckets[row['day']]
+            bucket['inflows_count'] += row['count']
+            bucket['status'][row['status']] = bucket['status'].get(row['status'], 0) + row['count']
+
+        item_totals = items.annotate(
+            day=TruncDate('inflow__created_at')
+        ).order_by().values('day').annotate(
+            items_count=Count('id'),
+            total_value=Sum(cls.VALUE_EXPRESSION)
+        )
+        for row in item_totals:
+            bucket = buckets[row['day']]
+            bucket['items_count'] = row['items_count']
+            bucket['total_value'] = float(row['total_value'] or 0)
+
+        return buckets
+
+    @classmethod
+    def get_daily_buckets(cls, start_date, end_date, companie_id=None):
+        """
+        Get the per-day aggregates of a period
+
+        Days before today can no longer receive inflows, so their buckets are
+        cached and only the open days (and closed days missing from the cache)
+        are aggregated. A change to an inflow drops the bucket of its day.
+        Closed days keep the product prices they were first reported with.
+
+        Returns:
+            dict: Bucket per date, in date order
+        """
+        today = timezone.now().date()
+        days = []
+        day = start_date
+        while day <= end_date:
+            days.append(day)
+            day += timezone.timedelta(days=1)
+
+        keys = {cls._day_key(companie_id, day): day for day in days if day < today}
+        cached = cache.get_many(list(keys))
+        buckets = {keys[key]: bucket for key, bucket in cached.items()}
+
+        missing = [day for day in days if day not in buckets]
+        if missing:
+            computed = cls._compute_daily_buckets(missing[0], missing[-1], companie_id)
+            closed = {}
+            for day in missing:
+                buckets[day] = computed[day]
+                if day < today:
+                    closed[cls._day_key(companie_id, day)] = computed[day]
+            if closed:
+                cache.set_many(closed, settings.CACHE_TIMEOUTS['reports'])
+            logger.debug(
+                f"[INFLOW REPORTS] Aggregated {len(missing)} days, {len(days) - len(missing)} served from cache"
+            )
+
+        return {day: buckets[day] for day in days}
+
+    @classmethod
+    def invalidate_day(cls, companie_id, day):
+        """Drop the cached bucket of a day, for the company and the global report"""
+        if day is None:
+            return
+        cache.delete_many([cls._day_key(companie_id, day), cls._day_key(None, day)])
+
+    @classmethod
+    def generate_daily_report(cls, start_date=None, end_date=None, companie=None):
         """
         Generate daily inflow report
         
         Args:
             start_date (date, optional): Start date for report. Defaults to 7 days ago.
             end_date (date, optional): End date for report. Defaults to today.
+            companie (optional): Company (instance or pk) the report is scoped to.
+                Defaults to every company.
             
         Returns:
             dict: Report data
@@ -29,28 +149,14 @@ class InflowReportService:
             end_date = timezone.now().date()
             
         try:
-            # Get inflows for period
-            inflows = Inflow.objects.filter(
-                created_at__date__gte=start_date,
-                created_at__date__lte=end_date
-            )
-            
-            # Get items for inflows
-            inflow_items = InflowItems.objects.filter(
-                inflow__in=inflows
-            ).select_related('product')
+            companie_id = getattr(companie, 'pk', companie)
+            buckets = cls.get_daily_buckets(start_date, end_date, companie_id)
             
             # Calculate totals
-            total_value = sum(
-                item.quantity * item.product.price 
-                for item in inflow_items
-            )
-            
-            avg_value = total_value / inflows.count() if inflows.count() > 0 else 0
-            
-            
-            if start_date is None or end_date is None:
-                raise ValueError("start_date and end_date must not be None")
+            total_inflows = sum(bucket['inflows_count'] for bucket in buckets.values())
+            total_items = sum(bucket['items_count'] for bucket in buckets.values())
+            total_value = sum(bucket['total_value'] for bucket in buckets.values())
+            avg_value = total_value / total_inflows if total_inflows > 0 else 0
             
             # Generate report data
             report_data = {
@@ -59,42 +165,26 @@ class InflowReportService:
                     'end': end_date.strftime('%Y-%m-%d')
                 },
                 'summary': {
-                    'total_inflows': inflows.count(),
-                    'total_items': inflow_items.count(),
+                    'total_inflows': total_inflows,
+                    'total_items': total_items,
                     'total_value': float(total_value),
                     'average_value': float(avg_value)
                 },
                 'status_breakdown': {
-                    status: inflows.filter(status=status).count()
+                    status: sum(bucket['status'].get(status, 0) for bucket in buckets.values())
                     for status in ['pending', 'approved', 'rejected']
                 },
-                'daily_totals': []
+                'daily_totals': [
+                    {
+                        'date': day.strftime('%Y-%m-%d'),
+                        'inflows_count': bucket['inflows_count'],
+                        'items_count': bucket['items_count'],
+                        'total_value': bucket['total_value']
+                    }
+                    for day, bucket in buckets.items()
+                ]
             }
             
-            # Add daily breakdown
-            current_date = start_date
-            while current_date <= end_date:
-                daily_inflows = inflows.filter(
-                    created_at__date=current_date
-                )
-                daily_items = inflow_items.filter(
-                    inflow__in=daily_inflows
-                )
-                
-                daily_total = sum(
-                    item.quantity * item.product.price 
-                    for item in daily_items
-                )
-                
-                report_data['daily_totals'].append({
-                    'date': current_date.strftime('%Y-%m-%d'),
-                    'inflows_count': daily_inflows.count(),
-                    'items_count': daily_items.count(),
-                    'total_value': float(daily_total)
-                })
-                
-                current_date += timezone.timedelta(days=1)
-            
             logger.info(
                 "Daily inflow report generated successfully",
                 extra={
@@ -116,6 +206,38 @@ class InflowReportService:
                 exc_info=True
             )
             raise
+
+    @classmethod
+    def generate_supplier_breakdown(cls, start_date, end_date, companie=None):
+        """
+        Get the inflows count and value per supplier of a period with one grouped query
+
+        Returns:
+            list: ``{'name', 'count', 'total_value'}`` dicts, highest value first
+        """
+        inflows = Inflow.objects.filter(
+            created_at__date__gte=start_date,
+            created_at__date__lte=end_date
+        )
+        if companie is not None:
+            inflows = inflows.filter(companie_id=getattr(companie, 'pk', companie))
+
+        suppliers = inflows.order_by().values('origin__name').annotate(
+            count=Count('id', distinct=True),
+            total_value=Sum(
+                F('items__quantity') * F('items__product__price'),
+                output_field=fields.DecimalField(max_digits=20, decimal_places=2)
+            )
+        ).order_by('-total_value', 'origin__name')
+
+        return [
+            {
+                'name': row['origin__name'],
+                'count': row['count'],
+                'total_value': float(row['total_value'] or 0)
+            }
+            for row in suppliers
+        ]
     
     @staticmethod
     def generate_location_report(start_date=None, end_date=None, location_type='origin'):
@@ -1,6 +1,7 @@
 from rest_framework.exceptions import ValidationError
 from ..models import Inflow, InflowItems
 import logging
+from core.actor import get_employeer
 
 logger = logging.getLogger(__name__)
 
@@ -22,14 +23,14 @@ class InflowBusinessValidator:
         Raises:
             ValidationError: If user tries to access resources from another company
         """
-        user_company = user.employeer.companie
+        user_company = get_employeer(user).companie
         
         # Validate origin supplier
-        if data.get('origin') and data['origin'].companie != user_company:
+        if data.get('origin') and data['origin'].companie_id != user_company.pk:
             raise ValidationError("Invalid supplier for user's company")
             
         # Validate destiny warehouse
-        if data.get('destiny') and data['destiny'].companie != user_company:
+        if data.get('destiny') and data['destiny'].companie_id != user_company.pk:
             raise ValidationError("Invalid warehouse for user's company")
             
         logger.debug(
@@ -2,44 +2,16 @@ import logging
 from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.db import transaction
+from django.utils import timezone
 from django.db.models import F
 from django.core.exceptions import ValidationError
 from .models import Inflow, InflowItems
-from ..product.models import Product
 from ..warehouse.models import WarehouseProduct
+from ..warehouse.services.posting import StockPostingService
+from .services.reports import InflowReportService
 
 logger = logging.getLogger(__name__)
 
-@receiver(pre_save, sender=InflowItems)
-def store_previous_quantity(sender, instance, **kwargs):
-    """Store previous quantity before changes"""
-    if instance.pk:
-        try:
-            previous = InflowItems.objects.get(pk=instance.pk)
-            instance._previous_quantity = previous.quantity
-            logger.info(f"[INFLLOW SIGNAL] InflowItems ID {instance.pk}: Previous quantity stored: {previous.quantity}")
-        except InflowItems.DoesNotExist:
-            instance._previous_quantity = 0
-            logger.info(f"[INFLLOW SIGNAL] InflowItems ID {instance.pk}: New record, previous quantity set to 0")
-    else:
-        instance._previous_quantity = 0
-        logger.info("[INFLLOW SIGNAL] New InflowItems: previous quantity set to 0")
-
-@receiver(pre_save, sender=Inflow)
-def store_previous_inflow_status(sender, instance, **kwargs):
-    """Store previous inflow status before changes"""
-    if instance.pk:
-        try:
-            previous = Inflow.objects.get(pk=instance.pk)
-            instance._previous_status = previous.status
-            logger.info(f"[INFLLOW SIGNAL] Inflow ID {instance.pk}: Previous status stored: {previous.status}")
-        except Inflow.DoesNotExist:
-            instance._previous_status = None
-            logger.info(f"[INFLLOW SIGNAL] Inflow ID {instance.pk}: New record, no previous status")
-    else:
-        instance._previous_status = None
-        logger.info("[INFLLOW SIGNAL] New Inflow: no previous status")
-
 @receiver(pre_save, sender=InflowItems)
 def validate_inflow_capacity(sender, instance, **kwargs):
     """Validate warehouse capacity before saving"""
@@ -49,14 +21,7 @@ def validate_inflow_capacity(sender, instance, **kwargs):
         return
         
     # Calculate quantity change
-    if instance.pk:
-        try:
-            previous = InflowItems.objects.get(pk=instance.pk)
-            quantity_change = instance.quantity - previous.quantity
-        except InflowItems.DoesNotExist:
-            quantity_change = instance.quantity
-    else:
-        quantity_change = instance.quantity
+    quantity_change = instance.quantity - (instance.previous('quantity') or 0)
     
     # Calculate projected total
     projected_total = warehouse.quantity + quantity_change
@@ -87,65 +52,46 @@ def update_quantities_on_inflow_status_change(sender, instance, created, **kwarg
         return
         
     # Verificar se o status é 'approved' e se houve mudança de status
-    if instance.status == 'approved' and hasattr(instance, '_previous_status') and instance._previous_status != 'approved':
+    if instance.status == 'approved' and instance.previous('status') != 'approved':
         logger.info(f"[INFLOW SIGNAL] Inflow {instance.id} status changed to 'approved'. Updating quantities...")
         
         # Marcar que estamos processando para evitar recursão
         instance._processing_update = True
         
+        warehouse = instance.destiny
+        if not warehouse:
+            logger.warning(f"[INFLOW SIGNAL] Inflow {instance.id} has no destiny warehouse.")
+            return
+        
         with transaction.atomic():
-            # Processar todos os itens do inflow
-            for item in instance.items.all():
-                try:
-                    product = item.product
-                    warehouse = instance.destiny
-                    
-                    if not product or not warehouse:
-                        logger.warning(f"[INFLOW SIGNAL] InflowItems ID {item.id} has no associated product or warehouse.")
-                        continue
-                    
-                    # Get or create WarehouseProduct
-                    warehouse_product, wp_created = WarehouseProduct.objects.get_or_create(
-                        warehouse=warehouse,
-                        product=product,
-                        defaults={'current_quantity': 0}
-                    )
-                    
-                    # Update WarehouseProduct quantity
-                    previous_quantity = warehouse_product.current_quantity
-                    warehouse_product.current_quantity += item.quantity
-                    warehouse_product.save()
-                    
-                    # Update Product quantity
-                    product_previous_quantity = product.quantity
-                    product.quantity += item.quantity
-                    product.save()
-                    
-                    # Mudar o status para completed sem usar save()
-                    Inflow.objects.filter(pk=instance.pk).update(status='completed')
-                    # Atualizar a instância em memória
-                    instance.status = 'completed'
-                    
-                    logger.info(f"[INFLOW SIGNAL] Inflow {instance.id} status changed to {instance.status} successfully")
-                    
-                    logger.info(
-                        f"[INFLOW SIGNAL] Updated quantities for inflow item {item.id} after approval. "
-                        f"Product: {product.name}, "
-                        f"Previous quantity: {product_previous_quantity}, "
-                        f"New quantity: {product.quantity}, "
-                        f"Warehouse product previous quantity: {previous_quantity}, "
-                        f"Warehouse product new quantity: {warehouse_product.current_quantity}"
-                    )
-                    
-                except Exception as e:
-                    logger.error(f"[INFLOW SIGNAL] Error updating quantities for inflow item {item.id} after approval: {str(e)}")
-                    transaction.set_rollback(True)
-                    raise
+            # Postar todos os itens do inflow de uma vez
+            lines = [
+                (warehouse.pk, product_id, quantity, item_id)
+                for item_id, product_id, quantity in instance.items.values_list('id', 'product_id', 'quantity')
+            ]
+            
+            try:
+                StockPostingService.post(
+                    lines,
+                    employeer=instance.updated_by_id,
+                    movement_type='inflow',
+                    document_id=instance.pk
+                )
+            except Exception as e:
+                logger.error(f"[INFLOW SIGNAL] Error posting quantities for inflow {instance.id} after approval: {str(e)}")
+                transaction.set_rollback(True)
+                raise
             
-            # Update warehouse total quantity - apenas uma vez após processar todos os itens
-            if instance.destiny:
-                instance.destiny.update_total_quantity()
-                logger.info(f"[INFLOW SIGNAL] Updated total quantity for warehouse {instance.destiny.id}")
+            if lines:
+                # Mudar o status para completed sem usar save()
+                Inflow.objects.filter(pk=instance.pk).update(status='completed')
+                # Atualizar a instância em memória
+                instance.status = 'completed'
+            
+            logger.info(
+                f"[INFLOW SIGNAL] Posted {len(lines)} inflow items to warehouse {warehouse.id}. "
+                f"Inflow {instance.id} status changed to {instance.status} successfully"
+            )
 
 
 # Modificar o signal existente para evitar duplicação
@@ -164,7 +110,7 @@ def update_quantities_on_inflow_item_change(sender, instance, created, **kwargs)
     
     # Verificar se estamos no meio de uma aprovação de inflow
     # Se sim, a atualização será tratada pelo signal update_quantities_on_inflow_status_change
-    if hasattr(instance.inflow, '_previous_status') and instance.inflow._previous_status != 'approved':
+    if instance.inflow.has_changed('status'):
         logger.info(
             f"[INFLOW SIGNAL] Skipping quantity update for inflow item {instance.id} because it's part of an inflow being approved"
         )
@@ -178,38 +124,20 @@ def update_quantities_on_inflow_item_change(sender, instance, created, **kwargs)
             logger.warning(f"[INFLOW SIGNAL] InflowItems ID {instance.id} has no associated product or warehouse.")
             return
         
+        # Difference with the quantity before the save, the full quantity for new items
+        quantity_change = instance.quantity - (instance.previous('quantity') or 0)
+        
         try:
-            # Get or create WarehouseProduct
-            warehouse_product, wp_created = WarehouseProduct.objects.get_or_create(
-                warehouse=warehouse,
-                product=product,
-                defaults={'current_quantity': 0}
+            StockPostingService.post(
+                [(warehouse, product, quantity_change, instance.pk)],
+                employeer=instance.updated_by_id,
+                movement_type='inflow',
+                document_id=instance.inflow_id
             )
             
-            if created:
-                # New inflow item
-                quantity_change = instance.quantity
-            else:
-                # Update - calculate difference
-                quantity_change = instance.quantity - getattr(instance, '_previous_quantity', 0)
-            
-            # Update WarehouseProduct quantity
-            warehouse_product.current_quantity += quantity_change
-            warehouse_product.save()
-            
-            # Update Product quantity
-            product.quantity += quantity_change
-            product.save()
-            
-            # Update Warehouse total quantity
-            warehouse.quantity = warehouse.get_total_quantity()
-            warehouse.save()
-            
             logger.info(
                 f"[INFLOW SIGNAL] Updated quantities for inflow item {instance.id} (direct change). "
-                f"Product: {product.name}, New quantity: {product.quantity}, "
-                f"Warehouse product quantity: {warehouse_product.current_quantity}, "
-                f"Total warehouse quantity: {warehouse.quantity}"
+                f"Product: {product.name}, Change: {quantity_change}"
             )
             
         except Exception as e:
@@ -238,36 +166,50 @@ def subtract_quantities_on_inflow_delete(sender, instance, **kwargs):
                 logger.warning(f"[INFLOW SIGNAL] InflowItems ID {instance.id} has no associated product or warehouse.")
                 return
             
-            # Get warehouse product
-            try:
-                warehouse_product = WarehouseProduct.objects.get(
-                    warehouse=warehouse,
-                    product=product
-                )
-                
-                # Update quantities
-                warehouse_product.current_quantity -= instance.quantity
-                product.quantity -= instance.quantity
-                
-                # Save changes
-                warehouse_product.save()
-                product.save()
-                
-                # Update total warehouse quantity
-                warehouse.update_total_quantity()
-                
-                logger.info(
-                    f"[INFLOW SIGNAL] InflowItems deleted: Removed {instance.quantity} from product {product.name}. "
-                    f"Current warehouse quantity: {warehouse_product.current_quantity}"
-                )
-                
-            except WarehouseProduct.DoesNotExist:
+            if not WarehouseProduct.objects.filter(warehouse=warehouse, product=product).exists():
                 logger.warning(
                     f"[INFLOW SIGNAL] WarehouseProduct not found for inflow item {instance.id}. "
                     f"Product: {product.name}, Warehouse: {warehouse.name}"
                 )
+                return
+            
+            StockPostingService.post(
+                [(warehouse, product, -instance.quantity, instance.pk)],
+                employeer=instance.updated_by_id,
+                movement_type='inflow',
+                document_id=instance.inflow_id
+            )
+            
+            logger.info(
+                f"[INFLOW SIGNAL] InflowItems deleted: Removed {instance.quantity} from product {product.name}."
+            )
                 
         except Exception as e:
             logger.error(f"[INFLOW SIGNAL] Error subtracting quantities for inflow item {instance.id}: {str(e)}")
             transaction.set_rollback(True)
-            raise
\ No newline at end of file
+            raise
+
+
+def _invalidate_report_day(companie_id, created_at):
+    """Drop the cached daily report bucket of a closed day once the change commits"""
+    if created_at is None:
+        return
+    day = created_at.date()
+    if day >= timezone.now().date():
+        # Open days are never cached
+        return
+    transaction.on_commit(lambda: InflowReportService.invalidate_day(companie_id, day))
+
+
+@receiver([post_save, post_delete], sender=Inflow)
+def invalidate_inflow_report(sender, instance, **kwargs):
+    """Invalidate the daily report of the inflow's day"""
+    _invalidate_report_day(instance.companie_id, instance.created_at)
+
+
+@receiver([post_save, post_delete], sender=InflowItems)
+def invalidate_inflow_item_report(sender, instance, **kwargs):
+    """Invalidate the daily report of the day of the item's inflow"""
+    inflow = instance.inflow
+    _invalidate_report_day(inflow.companie_id, inflow.created_at)
+
@@ -3,11 +3,25 @@ import logging
 from django.test import TestCase
 from django.db import transaction
 from django.core.exceptions import ValidationError
-from django.contrib.auth.models import Group
+from django.contrib.auth.models import Group, Permission
+from unittest.mock import patch
+from datetime import timedelta
+from decimal import Decimal
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
 
 from ..product.models import Product
-from ..warehouse.models import Warehouse, WarehouseProduct
+from ..warehouse.models import Warehouse, WarehouseProduct, StockLedgerEntry
+from ..warehouse.services.posting import StockPostingService
 from .models import Inflow, InflowItems
+from .services.reports import InflowReportService
+from .tasks import generate_daily_inflow_report
+from .notifications.handlers import InflowNotificationHandler
 from apps.companies.models import Companie
 from apps.accounts.models import User
 from apps.companies.employeers.models import Employeer
@@ -545,3 +559,240 @@ class InflowCapacityTests(TestCase):
         
         # Verificar total após atualização
         self.assertEqual(self.warehouse.quantity, 30)
+
+    def test_inflow_approval_posts_all_items(self):
+        """Test approving an inflow posts every item and completes it"""
+        second_product = Product.objects.create(
+            name="Second Product",
+            companie=self.company,
+            created_by=self.employee,
+            updated_by=self.employee
+        )
+        InflowItems.objects.create(inflow=self.inflow, product=self.product, quantity=30)
+        InflowItems.objects.create(inflow=self.inflow, product=second_product, quantity=20)
+        
+        self.inflow.status = 'approved'
+        self.inflow.save()
+        
+        self.inflow.refresh_from_db()
+        self.warehouse.refresh_from_db()
+        self.product.refresh_from_db()
+        
+        self.assertEqual(self.inflow.status, 'completed')
+        self.assertEqual(self.warehouse.quantity, 50)
+        self.assertEqual(self.product.quantity, 30)
+        self.assertEqual(
+            WarehouseProduct.objects.get(warehouse=self.warehouse, product=second_product).current_quantity,
+            20
+        )
+
+    def test_item_update_posts_the_difference_without_reloading_it(self):
+        """Test editing an item of an approved inflow posts the difference from the tracked quantity"""
+        # Approved without items, so it stays approved and its items post directly
+        self.inflow.status = 'approved'
+        self.inflow.save()
+        item = InflowItems.objects.create(inflow=self.inflow, product=self.product, quantity=20)
+        item = InflowItems.objects.select_related('inflow__destiny', 'product').get(pk=item.pk)
+        
+        item.quantity = 30
+        with CaptureQueriesContext(connection) as queries:
+            item.save()
+        
+        table = InflowItems._meta.db_table
+        reloads = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and f'FROM "{table}"' in query['sql']
+        ]
+        self.assertEqual(reloads, [])
+        self.warehouse.refresh_from_db()
+        self.assertEqual(self.warehouse.quantity, 30)
+
+
+class InflowImportTests(APITestCase):
+    """Tests for the bulk inflow import"""
+
+    def setUp(self):
+        self.company = Companie.objects.create(name="Import Company", type='Headquarters')
+        self.other_company = Companie.objects.create(name="Other Import Company", type='Headquarters')
+        self.user = User.objects.create_user(
+            email="import_manager@example.com",
+            password="import123",
+            first_name="Import",
+            last_name="Manager",
+            user_type='Manager'
+        )
+        self.employee = Employeer.objects.get(user=self.user)
+        self.employee.companie = self.company
+        self.employee.save()
+        # Drop the employeer cached on the user before it joined the company
+        self.user = User.objects.get(pk=self.user.pk)
+
+        self.supplier = Supplier.objects.create(name="EDI Supplier", companie=self.company)
+        self.warehouse = Warehouse.objects.create(name="Import Warehouse", companie=self.company)
+        self.products = [
+            Product.objects.create(name=f"Import Product {index}", companie=self.company)
+            for index in range(40)
+        ]
+        self.foreign_product = Product.objects.create(name="Foreign Product", companie=self.other_company)
+        self.url = reverse('inflows:import_inflows')
+        self.client.force_authenticate(self.user)
+
+    def _documents(self, documents_count, items_count, quantity=2):
+        return [
+            {
+                'origin': str(self.supplier.id),
+                'destiny': str(self.warehouse.id),
+                'items_data': [
+                    {'product': str(product.id), 'quantity': quantity}
+                    for product in self.products[:items_count]
+                ]
+            }
+            for _ in range(documents_count)
+        ]
+
+    def test_import_queries_do_not_grow_with_lines(self):
+        # Warm up the per-request lookups (user, permissions) before counting
+        self.client.post(self.url, {'documents': self._documents(1, 1)}, format='json')
+
+        with CaptureQueriesContext(connection) as small:
+            response = self.client.post(self.url, {'documents': self._documents(2, 2)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.post(self.url, {'documents': self._documents(2, 40)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['items'], 80)
+
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        self.assertEqual(Inflow.objects.filter(companie=self.company, status='pending').count(), 5)
+        self.assertEqual(InflowItems.objects.filter(inflow_id__in=response.data['ids']).count(), 80)
+        self.assertFalse(WarehouseProduct.objects.filter(warehouse=self.warehouse).exists())
+
+    def test_import_with_approval_posts_stock(self):
+        self.user.user_permissions.add(Permission.objects.get(codename='can_approve_inflow'))
+
+        with patch.object(StockPostingService, 'post', wraps=StockPostingService.post) as post:
+            response = self.client.post(
+                self.url,
+                {'documents': self._documents(3, 10, quantity=5), 'approve': True},
+                format='json'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(post.call_count, 1)
+        self.assertEqual(Inflow.objects.filter(id__in=response.data['ids'], status='completed').count(), 3)
+        self.assertEqual(
+            {str(document_id) for document_id in StockLedgerEntry.objects.values_list('document_id', flat=True)},
+            {str(inflow_id) for inflow_id in response.data['ids']}
+        )
+        self.warehouse.refresh_from_db()
+        self.assertEqual(self.warehouse.quantity, 150)
+        self.assertEqual(
+            WarehouseProduct.objects.get(warehouse=self.warehouse, product=self.products[0]).current_quantity,
+            15
+        )
+
+    def test_approval_requires_permission(self):
+        response = self.client.post(
+            self.url,
+            {'documents': self._documents(1, 1), 'approve': True},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Inflow.objects.exists())
+
+    def test_import_is_rejected_as_a_whole(self):
+        documents = self._documents(2, 3)
+        documents[1]['items_data'].append({'product': str(self.foreign_product.id), 'quantity': 1})
+
+        response = self.client.post(self.url, {'documents': documents}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Inflow.objects.exists())
+
+        self.warehouse.limit = 5
+        self.warehouse.save()
+        response = self.client.post(self.url, {'documents': self._documents(1, 3)}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Inflow.objects.exists())
+
+
+class InflowReportTests(TestCase):
+    """Tests for the SQL aggregated inflow reports"""
+
+    def setUp(self):
+        cache.clear()
+        self.company = Companie.objects.create(name="Report Company", type='Headquarters')
+        self.other_company = Companie.objects.create(name="Other Report Company", type='Headquarters')
+        self.supplier = Supplier.objects.create(name="Report Supplier", companie=self.company)
+        self.other_supplier = Supplier.objects.create(name="Second Supplier", companie=self.company)
+        self.warehouse = Warehouse.objects.create(name="Report Warehouse", companie=self.company)
+        self.product = Product.objects.create(name="Report Product", price=Decimal('2.50'), companie=self.company)
+        self.today = timezone.now().date()
+
+        # Two inflows 3 days ago, one today and one from another company
+        self.old_inflow = self._inflow(self.supplier, days_ago=3, quantity=4)
+        self._inflow(self.other_supplier, days_ago=3, quantity=2, status='rejected')
+        self._inflow(self.supplier, days_ago=0, quantity=10)
+        foreign_supplier = Supplier.objects.create(name="Foreign Supplier", companie=self.other_company)
+        foreign_warehouse = Warehouse.objects.create(name="Foreign Warehouse", companie=self.other_company)
+        self._inflow(foreign_supplier, days_ago=3, quantity=100, warehouse=foreign_warehouse, companie=self.other_company)
+
+    def _inflow(self, supplier, days_ago, quantity, status='pending', warehouse=None, companie=None):
+        inflow = Inflow.objects.create(
+            origin=supplier,
+            destiny=warehouse or self.warehouse,
+            companie=companie or self.company
+        )
+        InflowItems.objects.create(inflow=inflow, product=self.product, quantity=quantity)
+        created_at = timezone.now() - timedelta(days=days_ago)
+        Inflow.objects.filter(pk=inflow.pk).update(created_at=created_at, status=status)
+        inflow.refresh_from_db()
+        return inflow
+
+    def test_daily_report_is_aggregated_per_company(self):
+        with CaptureQueriesContext(connection) as queries:
+            report = InflowReportService.generate_daily_report(
+                self.today - timedelta(days=89), self.today, companie=self.company
+            )
+
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(report['summary']['total_inflows'], 3)
+        self.assertEqual(report['summary']['total_items'], 3)
+        self.assertEqual(report['summary']['total_value'], 40.0)
+        self.assertEqual(report['status_breakdown'], {'pending': 2, 'approved': 0, 'rejected': 1})
+        self.assertEqual(len(report['daily_totals']), 90)
+        old_day = next(day for day in report['daily_totals'] if day['date'] == str(self.today - timedelta(days=3)))
+        self.assertEqual(old_day, {'date': old_day['date'], 'inflows_count': 2, 'items_count': 2, 'total_value': 15.0})
+
+    def test_closed_days_are_served_from_cache(self):
+        yesterday = self.today - timedelta(days=1)
+        InflowReportService.generate_daily_report(self.today - timedelta(days=89), yesterday, companie=self.company)
+
+        with CaptureQueriesContext(connection) as queries:
+            report = InflowReportService.generate_daily_report(self.today - timedelta(days=89), yesterday, companie=self.company)
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(report['summary']['total_value'], 15.0)
+
+        # Changing an inflow of a closed day drops its bucket
+        with self.captureOnCommitCallbacks(execute=True):
+            item = self.old_inflow.items.get()
+            item.quantity = 8
+            item.save()
+
+        report = InflowReportService.generate_daily_report(self.today - timedelta(days=89), yesterday, companie=self.company)
+        self.assertEqual(report['summary']['total_value'], 25.0)
+
+    def test_daily_task_reports_each_company(self):
+        with patch.object(InflowNotificationHandler, 'send_to_recipients') as send:
+            reports = generate_daily_inflow_report()
+
+        self.assertEqual(set(reports), {str(self.company.pk), str(self.other_company.pk)})
+        report = reports[str(self.company.pk)]
+        self.assertEqual(report['total_inflows'], 3)
+        self.assertEqual(report['by_supplier'], [
+            {'name': 'Report Supplier', 'count': 2, 'total_value': 35.0},
+            {'name': 'Second Supplier', 'count': 1, 'total_value': 5.0},
+        ])
+        self.assertEqual(send.call_count, 2)
+
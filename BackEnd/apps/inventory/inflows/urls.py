@@ -9,6 +9,7 @@ urlpatterns = [
     path('retrieve/<uuid:pk>/', views.InflowRetrieveView.as_view(), name='retrieve_inflow'),
     path('update/<uuid:pk>/', views.InflowUpdateView.as_view(), name='update_inflow'),
     path('delete/<uuid:pk>/', views.InflowDestroyView.as_view(), name='delete_inflow'),
+    path('import/', views.InflowImportView.as_view(), name='import_inflows'),
     
     # endpoints for approval and rejection
     path('approve/<uuid:pk>/', views.InflowApproveView.as_view(), name='approve_inflow'),
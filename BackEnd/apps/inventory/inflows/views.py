@@ -1,6 +1,6 @@
 from django.shortcuts import render
 from .models import Inflow
-from .serializers import InflowSerializer
+from .serializers import InflowSerializer, InflowImportSerializer
 from .services.handlers import InflowService
 from rest_framework.response import Response
 from rest_framework import status
@@ -16,8 +16,10 @@ from rest_framework.generics import (
 from rest_framework.permissions import IsAuthenticated
 from django.db import transaction
 from rest_framework.exceptions import ValidationError, PermissionDenied
+from django.core.exceptions import ValidationError as DjangoValidationError
 import logging
 from .permissions import InflowBasePermission, CanApproveInflow, CanRejectInflow
+from core.actor import get_employeer
 
 logger = logging.getLogger(__name__)
 
@@ -31,9 +33,12 @@ class InflowBaseView:
             if getattr(self, 'swagger_fake_view', False):
                 return InflowSerializer
             else:
-                employeer = user.employeer
-                queryset = Inflow.objects.select_related(
-                    'companie'
+                employeer = get_employeer(user)
+                queryset = Inflow.objects.with_audit().select_related(
+                    'origin',
+                    'destiny'
+                ).prefetch_related(
+                    'items__product'
                 ).filter(companie=employeer.companie)
             return queryset
         except Inflow.DoesNotExist:
@@ -687,3 +692,96 @@ class InflowRejectView(InflowBaseView, GenericAPIView):
                 {'detail': str(e)},
                 status=status.HTTP_403_FORBIDDEN
             )
+
+
+@extend_schema_view(
+    post=extend_schema(
+        tags=['Inventory - Inflows'],
+        operation_id='import_inflows',
+        summary='Import inflows',
+        description="""
+        Import a batch of inflows at once, e.g. supplier receipts received through EDI.
+        The whole batch is validated before anything is written; documents and items
+        are bulk inserted. With `approve` the inflows are posted to stock right away,
+        which requires the permission to approve inflows.
+        """,
+        request=InflowImportSerializer,
+        responses={
+            201: {
+                'type': 'object',
+                'properties': {
+                    'imported': {'type': 'integer', 'example': 2},
+                    'items': {'type': 'integer', 'example': 1500},
+                    'status': {'type': 'string', 'example': 'completed'},
+                    'ids': {'type': 'array', 'items': {'type': 'string', 'format': 'uuid'}}
+                }
+            },
+            400: {
+                'type': 'object',
+                'properties': {
+                    'detail': {
+                        'type': 'string',
+                        'example': 'Document 0: quantity must be a positive integer'
+                    }
+                }
+            },
+            403: {
+                'type': 'object',
+                'properties': {
+                    'detail': {
+                        'type': 'string',
+                        'example': 'You do not have permission to approve inflows'
+                    }
+                }
+            }
+        }
+    )
+)
+class InflowImportView(InflowBaseView, GenericAPIView):
+    """
+    View for importing a batch of inflows
+    """
+    serializer_class = InflowImportSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        approve = serializer.validated_data['approve']
+
+        if approve and not request.user.has_perm('inflows.can_approve_inflow'):
+            logger.warning(
+                "[INFLOW VIEW] User attempted to import approved inflows without permission",
+                extra={'user_id': request.user.id}
+            )
+            return Response(
+                {'detail': 'You do not have permission to approve inflows'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        try:
+            inflows = InflowService().import_inflows(
+                serializer.validated_data['documents'],
+                request.user,
+                approve=approve
+            )
+        except (ValidationError, DjangoValidationError) as e:
+            detail = e.detail if isinstance(e, ValidationError) else e.messages
+            logger.warning(
+                "[INFLOW VIEW] Validation error when importing inflows",
+                extra={
+                    'user_id': request.user.id,
+                    'error': str(e)
+                }
+            )
+            return Response({'detail': detail}, status=status.HTTP_400_BAD_REQUEST)
+
+        logger.info(f"[INFLOW VIEWS] - {len(inflows)} inflows imported successfully")
+        return Response(
+            {
+                'imported': len(inflows),
+                'items': sum(len(document['items_data']) for document in serializer.validated_data['documents']),
+                'status': 'completed' if approve else 'pending',
+                'ids': [str(inflow.id) for inflow in inflows]
+            },
+            status=status.HTTP_201_CREATED
+        )
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-16 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('load_order', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='loadorder',
+            index=models.Index(fields=['companie', '-created_at'], name='load_order_tenant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loadorderitem',
+            index=models.Index(fields=['companie', '-created_at'], name='load_order_item_tenant_idx'),
+        ),
+    ]
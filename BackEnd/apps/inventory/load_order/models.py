@@ -1,9 +1,11 @@
 from django.db import models
-from basemodels.models import BaseModel
+from basemodels.models import BaseModel, tenant_indexes
 from apps.inventory.product.models import Product
 from apps.companies.customers.models import Customer
 from apps.vehicle.models import Vehicle
-from django.db import transaction, IntegrityError
+from django.db import transaction
+from basemodels.services.sequences import DocumentSequenceService
+from core.actor import get_current_companie
 
 class LoadOrder(BaseModel):
     order_number = models.CharField(max_length=100, blank=True, null=True, help_text='The order number of the load order')
@@ -15,6 +17,7 @@ class LoadOrder(BaseModel):
         verbose_name = 'Load Order'
         verbose_name_plural = 'Load Orders'
         ordering = ['-created_at']
+        indexes = tenant_indexes('load_order')
         
     def __str__(self):
         return self.order_number
@@ -22,51 +25,31 @@ class LoadOrder(BaseModel):
     
     def generate_unique_order_number(self):
         """
-        Generate a unique order number.
+        Allocate the next order number of the company.
         
-        This method attempts to create a unique 5-digit order number
-        by incrementing the last used number. It will retry up to 5 times
-        in case of conflicts.
-        
-        Raises:
-            IntegrityError: If unable to generate a unique number after max retries
+        Numbers come from the company's load order DocumentSequence, so
+        creating orders only waits on other orders of the same company. They
+        are gapless because ``save`` allocates them in the transaction that
+        inserts the order.
         """
         if not self.order_number:
-            max_retries = 5
-            for attempt in range(max_retries):
-                try:
-                    with transaction.atomic():
-                        last_load_order = (
-                            LoadOrder.objects.select_for_update()
-                            .order_by("-order_number")
-                            .first()
-                        )
-                        if last_load_order and last_load_order.order_number:
-                            try:
-                                last_number = int(last_load_order.order_number)
-                            except ValueError:
-                                last_number = 0
-                        else:
-                            last_number = 0
-                        new_number = last_number + 1
-                        self.order_number = f"{new_number:05d}"
-                        return self.order_number
-                except IntegrityError:
-                    if attempt < max_retries - 1:
-                        continue
-                    else:
-                        raise IntegrityError(
-                            "It was not possible to generate a unique delivery number after several attempts."
-                        )
+            self.order_number = DocumentSequenceService.next_number(
+                self.companie_id, 'load_order', existing=LoadOrder.objects.all()
+            )
+        return self.order_number
     
     def save(self, *args, **kwargs):
         """
         Override the default save method to generate a unique order number.
         
-        This method will be called when saving the LoadOrder instance.
+        Orders saved without a company belong to the company of the acting
+        employeer, whose sequence numbers them.
         """
-        self.generate_unique_order_number()
-        super().save(*args, **kwargs)
+        if not self.companie_id:
+            self.companie = get_current_companie()
+        with transaction.atomic():
+            self.generate_unique_order_number()
+            super().save(*args, **kwargs)
         
     
     
@@ -80,6 +63,7 @@ class LoadOrderItem(BaseModel):
         verbose_name = 'Load Order Item'
         verbose_name_plural = 'Load Order Items'
         ordering = ['-created_at']
+        indexes = tenant_indexes('load_order_item')
         
     def __str__(self):
         return self.load_order.order_number
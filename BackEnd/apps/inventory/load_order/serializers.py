@@ -3,7 +3,9 @@ from .models import LoadOrder, LoadOrderItem
 from apps.companies.customers.models import Customer
 from apps.vehicle.models import Vehicle
 from apps.inventory.product.models import Product
+from apps.inventory.movements.services.items import MovementItemsService
 from rest_framework.exceptions import ValidationError
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db import transaction
 import logging
 
@@ -101,11 +103,15 @@ class LoadOrderSerializer(serializers.ModelSerializer):
             'updated_by'
         ]
         
-    def get_customer_name(self, obj) -> str:
-        return obj.customer.first_name + ' ' + obj.customer.last_name
+    def get_customer_name(self, obj) -> str | None:
+        if obj.customer:
+            return obj.customer.full_name()
+        return None
     
-    def get_load_to_name(self, obj) -> str:
-        return obj.load_to.name + ' | ' + obj.load_to.plate
+    def get_load_to_name(self, obj) -> str | None:
+        if obj.load_to:
+            return f'{obj.load_to.nickname} | {obj.load_to.plate_number}'
+        return None
     
     def get_companie(self, obj) -> str | None:
         if obj.companie:
@@ -132,18 +138,16 @@ class LoadOrderSerializer(serializers.ModelSerializer):
         """
         items_data = validated_data.pop('items_data')
         load_order = LoadOrder.objects.create(**validated_data)
-        
-        for item_data in items_data:
-            item_serializer = LoadOrderItemSerializer(data=item_data)
-            item_serializer.is_valid(raise_exception=True)
-            LoadOrderItem.objects.create(
-                load_order=load_order,
-                product=item_serializer.validated_data['product'],
-                quantity=item_serializer.validated_data['quantity'],
-                created_by=load_order.created_by,
-                updated_by=load_order.updated_by,
-            )
-        return load_order 
+        self._create_items(load_order, items_data)
+        return load_order
+    
+    @staticmethod
+    def _create_items(load_order, items_data):
+        """Create the load order items in bulk"""
+        try:
+            MovementItemsService.create_items(load_order, items_data)
+        except DjangoValidationError as e:
+            raise ValidationError({'items_data': e.messages[0]})
     
     @transaction.atomic
     def update(self, instance, validated_data):
@@ -154,16 +158,6 @@ class LoadOrderSerializer(serializers.ModelSerializer):
         if 'items_data' in validated_data:
             items_data = validated_data.pop('items_data')
             instance.items.all().delete()
-            
-            for item_data in items_data:
-                item_serializer = LoadOrderItemSerializer(data=item_data)
-                item_serializer.is_valid(raise_exception=True)
-                LoadOrderItem.objects.create(
-                    load_order=instance,
-                    product=item_serializer.validated_data['product'],
-                    quantity=item_serializer.validated_data['quantity'],
-                    created_by=instance.created_by,
-                    updated_by=instance.updated_by,
-                )
+            self._create_items(instance, items_data)
         return super().update(instance, validated_data)
             
\ No newline at end of file
@@ -1,11 +1,11 @@
 from django.db import transaction
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext as _
-from ..models import LoadOrder, LoadOrderItem
-from apps.inventory.product.models import Product
+from ..models import LoadOrder
 from apps.companies.customers.models import Customer
 from apps.vehicle.models import Vehicle
 from .validators import LoadOrderValidator
+from ...movements.services.items import MovementItemsService
 import logging
 
 logger = logging.getLogger(__name__)
@@ -34,13 +34,7 @@ class LoadOrderHandler:
             load_order.save()
             
             # Create items
-            for item_data in data['items_data']:
-                product = Product.objects.get(id=item_data['product'])
-                LoadOrderItem.objects.create(
-                    load_order=load_order,
-                    product=product,
-                    quantity=item_data['quantity']
-                )
+            MovementItemsService.create_items(load_order, data['items_data'], employeer=created_by)
             
             logger.info(f"[LOAD ORDER HANDLER] Created load order {load_order.order_number}")
             return load_order
@@ -77,13 +71,7 @@ class LoadOrderHandler:
                 load_order.items.all().delete()
                 
                 # Create new items
-                for item_data in data['items_data']:
-                    product = Product.objects.get(id=item_data['product'])
-                    LoadOrderItem.objects.create(
-                        load_order=load_order,
-                        product=product,
-                        quantity=item_data['quantity']
-                    )
+                MovementItemsService.create_items(load_order, data['items_data'], employeer=updated_by)
             
             logger.info(f"[LOAD ORDER HANDLER] Updated load order {load_order.order_number}")
             return load_order
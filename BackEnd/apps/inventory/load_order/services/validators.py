@@ -60,16 +60,19 @@ class LoadOrderValidator:
                 if not item.get('quantity'):
                     raise ValidationError(_("Quantity is required for all items"))
                 
-                # Validate product
-                if not Product.objects.filter(id=item['product']).exists():
-                    raise ValidationError(_("Invalid product"))
-                
                 # Validate quantity
                 if item['quantity'] <= 0:
                     raise ValidationError(_("Quantity must be positive"))
+            
+            # Validate products, fetched at once
+            products = Product.objects.in_bulk({str(item['product']) for item in items_data})
+            products = {str(pk): product for pk, product in products.items()}
+            for item in items_data:
+                product = products.get(str(item['product']))
+                if product is None:
+                    raise ValidationError(_("Invalid product"))
                 
                 # Validate product stock
-                product = Product.objects.get(id=item['product'])
                 if product.quantity < item['quantity']:
                     raise ValidationError(_(f"Insufficient stock for product {product.name}"))
                 
@@ -16,6 +16,7 @@ from .models import LoadOrder
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import ValidationError
 import logging
+from core.actor import get_employeer
 
 logger = logging.getLogger(__name__)
 
@@ -29,9 +30,12 @@ class LoadOrderBaseView:
             if getattr(self, 'swagger_fake_view', False):
                 return LoadOrder.objects.none()
             
-            employeer = user.employeer
-            return LoadOrder.objects.select_related(
-                'companie'
+            employeer = get_employeer(user)
+            return LoadOrder.objects.with_audit().select_related(
+                'customer',
+                'load_to'
+            ).prefetch_related(
+                'items__product'
             ).filter(companie=employeer.companie)
         except LoadOrder.DoesNotExist:
             return LoadOrder.objects.none()
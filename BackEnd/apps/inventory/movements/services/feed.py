@@ -0,0 +1,145 @@
+import heapq
+import logging
+from itertools import islice
+from django.db.models import Q
+from ..models import MovementType, MovementStatus
+from ...inflows.models import Inflow
+from ...outflows.models import Outflow
+from ...transfer.models import Transfer
+
+logger = logging.getLogger(__name__)
+
+
+class MovementFeed:
+    """
+    Unified, newest-first feed of Inflows, Outflows and Transfers.
+
+    The feed never materializes the full history: each page runs one ordered,
+    limited query per movement type, filtered after the keyset position
+    ``(created_at, id)``, and merges the three sorted cursors in Python.
+    Memory and latency per page only depend on the page size.
+    """
+
+    SOURCES = {
+        MovementType.INFLOW.value: Inflow,
+        MovementType.OUTFLOW.value: Outflow,
+        MovementType.TRANSFER.value: Transfer,
+    }
+
+    # Accept the model names as aliases for the movement types
+    TYPE_ALIASES = {
+        'inflow': MovementType.INFLOW.value,
+        'outflow': MovementType.OUTFLOW.value,
+        'transfer': MovementType.TRANSFER.value,
+    }
+
+    ORDERING = ('-created_at', '-id')
+
+    def __init__(self, querysets):
+        self.querysets = list(querysets)
+
+    @classmethod
+    def resolve_types(cls, types):
+        """
+        Normalize the requested movement types.
+
+        Raises:
+            ValueError: If a type is not a known movement type
+        """
+        resolved = []
+        lookup = {value.lower(): value for value in cls.SOURCES}
+        lookup.update(cls.TYPE_ALIASES)
+        for value in types:
+            movement_type = lookup.get(value.strip().lower())
+            if movement_type is None:
+                raise ValueError(f"Invalid movement type: {value}. Valid types: {', '.join(cls.SOURCES)}")
+            if movement_type not in resolved:
+                resolved.append(movement_type)
+        return resolved
+
+    @staticmethod
+    def resolve_statuses(statuses):
+        """
+        Normalize the requested statuses.
+
+        Raises:
+            ValueError: If a status is not a known movement status
+        """
+        resolved = []
+        for value in statuses:
+            status = value.strip().lower()
+            if status not in MovementStatus.values:
+                raise ValueError(f"Invalid status: {value}. Valid statuses: {', '.join(MovementStatus.values)}")
+            if status not in resolved:
+                resolved.append(status)
+        return resolved
+
+    @classmethod
+    def for_employeer(cls, employeer, full_access=False, types=None, statuses=None,
+                      created_after=None, created_before=None):
+        """
+        Build the feed visible to an employeer.
+
+        Args:
+            employeer: Employeer whose company the feed is scoped to
+            full_access (bool): Whether every movement of the company is visible,
+                otherwise only the ones created by the employeer
+            types (list): Movement types to include, defaults to all of them
+            statuses (list): Only include movements in these statuses
+            created_after (datetime): Only include movements created at or after it
+            created_before (datetime): Only include movements created before it
+        """
+        filters = Q(companie=employeer.companie, created_at__isnull=False)
+        if not full_access:
+            filters &= Q(created_by=employeer)
+        if statuses:
+            filters &= Q(status__in=statuses)
+        if created_after is not None:
+            filters &= Q(created_at__gte=created_after)
+        if created_before is not None:
+            filters &= Q(created_at__lt=created_before)
+
+        querysets = [
+            model.objects.select_related('origin', 'destiny').filter(filters)
+            for movement_type, model in cls.SOURCES.items()
+            if not types or movement_type in types
+        ]
+        return cls(querysets)
+
+    @classmethod
+    def empty(cls):
+        return cls([])
+
+    @staticmethod
+    def position(movement):
+        """Keyset position of a movement in the feed"""
+        return movement.created_at, movement.id
+
+    def page(self, after=None, limit=10, reverse=False):
+        """
+        Return up to ``limit`` movements following a keyset position.
+
+        Args:
+            after (tuple): ``(created_at, id)`` position to start after, exclusive
+            limit (int): Maximum number of movements to return
+            reverse (bool): Walk the feed oldest-first (towards newer movements)
+                instead of newest-first
+
+        Returns:
+            list: Movements in walk order
+        """
+        ordering = tuple(field.lstrip('-') for field in self.ORDERING) if reverse else self.ORDERING
+        cursors = []
+        for queryset in self.querysets:
+            if after is not None:
+                created_at, pk = after
+                if reverse:
+                    queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk))
+                else:
+                    queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+            cursors.append(queryset.order_by(*ordering)[:limit])
+
+        merged = heapq.merge(*cursors, key=self.position, reverse=not reverse)
+        movements = list(islice(merged, limit))
+        logger.debug(f"[MOVEMENTS FEED] Page of {len(movements)} movements from {len(cursors)} sources")
+        return movements
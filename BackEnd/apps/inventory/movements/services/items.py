@@ -0,0 +1,268 @@
+"""
+Bulk creation of movement document line items.
+"""
+import logging
+from collections import defaultdict
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from ...inflows.models import Inflow, InflowItems
+from ...outflows.models import Outflow, OutflowItems
+from ...transfer.models import Transfer, TransferItems
+from ...transfer.services.validators import TransferBusinessValidator
+from ...load_order.models import LoadOrder, LoadOrderItem
+from ...product.models import Product
+from ...warehouse.services.posting import StockPostingService
+
+logger = logging.getLogger(__name__)
+
+
+class MovementItemsService:
+    """
+    Creates the line items of a movement document in batches.
+
+    Saving items one by one fires the item signals, which re-read the row and
+    its document for every line. Here the items are inserted with
+    ``bulk_create`` (signals are not sent) and their stock effect, when the
+    document already affects stock, is applied by one explicit posting.
+    """
+
+    BATCH_SIZE = 1000
+
+    # Document model -> (item model, name of the item's document field)
+    ITEM_MODELS = {
+        Inflow: (InflowItems, 'inflow'),
+        Outflow: (OutflowItems, 'outflow'),
+        Transfer: (TransferItems, 'transfer'),
+        LoadOrder: (LoadOrderItem, 'load_order'),
+    }
+
+    # Document model -> statuses in which its items affect stock (None means any status,
+    # transfer items move stock as soon as they are saved)
+    POSTED_STATUSES = {
+        Inflow: ('approved', 'completed'),
+        Outflow: ('approved', 'completed'),
+        Transfer: None,
+    }
+
+    @staticmethod
+    def _pk(value):
+        return getattr(value, 'pk', value)
+
+    @classmethod
+    def resolve_products(cls, items_data, companie=None):
+        """
+        Map the product references of the items to Product instances with one query.
+
+        Args:
+            items_data (list): Item dicts whose ``product`` is a Product or its pk
+            companie: Only accept the products of this company (instance or pk)
+
+        Returns:
+            dict: Product instances keyed by pk
+
+        Raises:
+            ValidationError: If an item has no product or a product does not exist
+        """
+        product_ids = set()
+        for item in items_data:
+            product = item.get('product') if isinstance(item, dict) else None
+            if not product:
+                raise ValidationError("Each item must have product and quantity")
+            try:
+                product_ids.add(Product._meta.pk.to_python(cls._pk(product)))
+            except ValidationError:
+                raise ValidationError(f"Product with id {product} does not exist")
+
+        queryset = Product.objects.all()
+        if companie is not None:
+            queryset = queryset.filter(companie=companie)
+        products = queryset.in_bulk(product_ids)
+        missing = product_ids - set(products)
+        if missing:
+            raise ValidationError(f"Product with id {', '.join(map(str, missing))} does not exist")
+        return products
+
+    @classmethod
+    def build_items(cls, document, items_data, products=None, employeer=None):
+        """
+        Build the unsaved items of a document.
+
+        Args:
+            document: Inflow, Outflow, Transfer or LoadOrder the items belong to
+            items_data (list): ``{'product': ..., 'quantity': ...}`` dicts
+            products (dict): Products keyed by pk, resolved from the items when omitted
+            employeer: Employeer (or its pk) stamped on the items, defaults to the
+                document's last editor
+
+        Returns:
+            list: Unsaved item instances
+        """
+        item_model, document_field = cls.ITEM_MODELS[type(document)]
+        if products is None:
+            products = cls.resolve_products(items_data)
+        employeer_id = cls._pk(employeer) or document.updated_by_id or document.created_by_id
+
+        items = []
+        for item_data in items_data:
+            quantity = item_data.get('quantity')
+            if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity < 1:
+                raise ValidationError("Quantity must be a positive integer")
+            product_id = Product._meta.pk.to_python(cls._pk(item_data['product']))
+            items.append(item_model(**{
+                document_field: document,
+                'product': products[product_id],
+                'quantity': quantity,
+                'companie_id': document.companie_id,
+                'created_by_id': employeer_id,
+                'updated_by_id': employeer_id,
+            }))
+        return items
+
+    @classmethod
+    def create_items(cls, document, items_data, employeer=None, products=None):
+        """
+        Create all the items of a document and apply their stock effect.
+
+        Returns:
+            list: Created items
+        """
+        item_model, _ = cls.ITEM_MODELS[type(document)]
+        items = cls.build_items(document, items_data, products=products, employeer=employeer)
+        if not items:
+            return items
+
+        with transaction.atomic():
+            posted = cls.affects_stock(document)
+            if not posted:
+                cls.validate_capacity(document, items)
+            if isinstance(document, Transfer):
+                cls.validate_origin_quantities(document, items)
+            item_model.objects.bulk_create(items, batch_size=cls.BATCH_SIZE)
+            if posted:
+                cls.post_items(document, items, employeer=employeer)
+
+        logger.info(
+            f"[MOVEMENT ITEMS] Created {len(items)} {item_model._meta.verbose_name_plural} "
+            f"for {type(document).__name__} {document.pk}"
+        )
+        return items
+
+    @classmethod
+    def affects_stock(cls, document):
+        """Whether items added to the document have to be posted to stock"""
+        if type(document) not in cls.POSTED_STATUSES:
+            return False
+        statuses = cls.POSTED_STATUSES[type(document)]
+        return statuses is None or document.status in statuses
+
+    @staticmethod
+    def validate_capacity(document, items):
+        """
+        Check that the items of a pending inflow fit in its destiny warehouse.
+
+        Replaces the per-item capacity check of the InflowItems signals, on the
+        total of the document instead of each line.
+        """
+        if not isinstance(document, Inflow):
+            return
+        warehouse = document.destiny
+        if warehouse is None or not warehouse.limit:
+            return
+
+        incoming = sum(item.quantity for item in items)
+        projected_total = (warehouse.quantity or 0) + incoming
+        if projected_total > warehouse.limit:
+            logger.error(
+                f"[MOVEMENT ITEMS] Inflow would exceed warehouse capacity. "
+                f"Current: {warehouse.quantity}, Change: {incoming}, Limit: {warehouse.limit}"
+            )
+            raise ValidationError(
+                f"Operation would exceed warehouse capacity. "
+                f"Current: {warehouse.quantity}, "
+                f"Change: {incoming}, "
+                f"Limit: {warehouse.limit}"
+            )
+
+    @staticmethod
+    def validate_origin_quantities(document, items):
+        """
+        Check that the origin of a transfer holds the quantities of all its
+        items, with one query for the whole document.
+        """
+        quantities = defaultdict(int)
+        for item in items:
+            quantities[item.product_id] += item.quantity
+        TransferBusinessValidator.validate_origin_quantities(document.origin, quantities)
+
+    @staticmethod
+    def stock_lines(document, items):
+        """
+        Build the StockPostingService lines of the items of a document.
+
+        Returns:
+            tuple: ``(lines, movement_type)``
+        """
+        if isinstance(document, Inflow):
+            warehouses = {'destiny': document.destiny_id}
+            lines = [(document.destiny_id, item.product_id, item.quantity, item.pk) for item in items]
+            movement_type = 'inflow'
+        elif isinstance(document, Outflow):
+            warehouses = {'origin': document.origin_id}
+            lines = [(document.origin_id, item.product_id, -item.quantity, item.pk) for item in items]
+            movement_type = 'outflow'
+        else:
+            warehouses = {'origin': document.origin_id, 'destiny': document.destiny_id}
+            lines = []
+            for item in items:
+                lines.append((document.origin_id, item.product_id, -item.quantity, item.pk))
+                lines.append((document.destiny_id, item.product_id, item.quantity, item.pk))
+            movement_type = 'transfer'
+
+        missing = [name for name, warehouse_id in warehouses.items() if warehouse_id is None]
+        if missing:
+            raise ValidationError(f"Missing {' and '.join(missing)} warehouse information")
+        return lines, movement_type
+
+    @classmethod
+    def post_items(cls, document, items, employeer=None):
+        """
+        Apply the stock effect of new items of a document in a single posting.
+
+        Returns:
+            dict: Net delta applied per (warehouse_id, product_id)
+        """
+        lines, movement_type = cls.stock_lines(document, items)
+        return StockPostingService.post(
+            lines,
+            employeer=cls._pk(employeer) or document.updated_by_id,
+            movement_type=movement_type,
+            document_id=document.pk
+        )
+
+    @classmethod
+    def post_documents(cls, documents_items, employeer=None):
+        """
+        Apply the stock effect of the new items of several documents of the same
+        type in a single posting, each ledger entry keeping its own document.
+
+        Args:
+            documents_items (list): ``(document, items)`` pairs
+            employeer: Employeer (or its pk) stamped on the rows created by the posting
+
+        Returns:
+            dict: Net delta applied per (warehouse_id, product_id)
+        """
+        lines, line_documents, movement_type = [], {}, None
+        for document, items in documents_items:
+            document_lines, movement_type = cls.stock_lines(document, items)
+            lines.extend(document_lines)
+            line_documents.update((item.pk, document.pk) for item in items)
+        if not lines:
+            return {}
+
+        return StockPostingService.post(
+            lines,
+            employeer=cls._pk(employeer),
+            movement_type=movement_type,
+            line_documents=line_documents
+        )
@@ -1,3 +1,256 @@
+from datetime import timedelta
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from django.core.exceptions import ValidationError
 from django.test import TestCase
+from rest_framework.test import APITestCase
+from apps.accounts.models import User
+from apps.companies.models import Companie
+from apps.companies.employeers.models import Employeer
+from ..inflows.models import Inflow, InflowItems
+from ..product.models import Product
+from ..outflows.models import Outflow
+from ..transfer.models import Transfer, TransferItems
+from ..supplier.models import Supplier
+from ..warehouse.models import Warehouse, WarehouseProduct, DailyMovementRollup
+from ..warehouse.services.posting import StockPostingService
+from .services.items import MovementItemsService
 
-# Create your tests here.
+
+class MovementFeedTests(APITestCase):
+    """Tests for the keyset paginated movements feed"""
+
+    def setUp(self):
+        self.company = Companie.objects.create(name='Feed Company', type='Headquarters')
+        self.other_company = Companie.objects.create(name='Other Company', type='Headquarters')
+
+        self.manager_user = User.objects.create_user(
+            password='manager123',
+            email='feed_manager@test.com',
+            first_name='Feed',
+            last_name='Manager',
+            user_type='Manager'
+        )
+        self.employee_user = User.objects.create_user(
+            password='emp123',
+            email='feed_employee@test.com',
+            first_name='Feed',
+            last_name='Employee',
+            user_type='Employee'
+        )
+        self.manager = Employeer.objects.get(user=self.manager_user)
+        self.manager.companie = self.company
+        self.manager.save()
+        self.employee = Employeer.objects.get(user=self.employee_user)
+        self.employee.companie = self.company
+        self.employee.save()
+
+        self.supplier = Supplier.objects.create(name='Feed Supplier', companie=self.company)
+        self.warehouse = Warehouse.objects.create(name='Feed Warehouse A', companie=self.company)
+        self.other_warehouse = Warehouse.objects.create(name='Feed Warehouse B', companie=self.company)
+
+        # Interleave the three movement types over time, with a tie on created_at
+        base = timezone.now() - timedelta(days=30)
+        self.movements = []
+        for index in range(15):
+            if index % 3 == 0:
+                movement = Inflow.objects.create(origin=self.supplier, destiny=self.warehouse, companie=self.company)
+            elif index % 3 == 1:
+                movement = Outflow.objects.create(origin=self.warehouse, companie=self.company)
+            else:
+                movement = Transfer.objects.create(origin=self.warehouse, destiny=self.other_warehouse, companie=self.company)
+            created_by = self.employee if index < 5 else self.manager
+            created_at = base + timedelta(days=index if index != 7 else 6)
+            type(movement).objects.filter(pk=movement.pk).update(created_at=created_at, created_by=created_by)
+            movement.refresh_from_db()
+            self.movements.append(movement)
+
+        foreign_warehouse = Warehouse.objects.create(name='Foreign Warehouse', companie=self.other_company)
+        Outflow.objects.create(origin=foreign_warehouse, companie=self.other_company)
+
+        self.expected = sorted(self.movements, key=lambda m: (m.created_at, m.id), reverse=True)
+        self.url = reverse('movements:list_movements')
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_feed_walks_every_movement_in_order(self):
+        self.client.force_authenticate(self.manager_user)
+        ids = self.walk(f'{self.url}?page_size=4')
+        self.assertEqual(ids, [str(movement.id) for movement in self.expected])
+
+    def test_previous_link_returns_previous_page(self):
+        self.client.force_authenticate(self.manager_user)
+        first = self.client.get(f'{self.url}?page_size=4').data
+        self.assertIsNone(first['previous'])
+        second = self.client.get(first['next']).data
+        back = self.client.get(second['previous']).data
+        self.assertEqual(
+            [row['id'] for row in back['results']],
+            [row['id'] for row in first['results']]
+        )
+
+    def test_employee_only_sees_own_movements(self):
+        self.client.force_authenticate(self.employee_user)
+        ids = self.walk(self.url)
+        expected = [str(m.id) for m in self.expected if m.created_by_id == self.employee.pk]
+        self.assertEqual(ids, expected)
+
+    def test_filters_are_applied(self):
+        self.client.force_authenticate(self.manager_user)
+        ids = self.walk(f'{self.url}?type=Transfer,inflow')
+        expected = [str(m.id) for m in self.expected if not isinstance(m, Outflow)]
+        self.assertEqual(ids, expected)
+
+        Inflow.objects.filter(pk=self.movements[0].pk).update(status='completed')
+        ids = self.walk(f'{self.url}?status=completed')
+        self.assertEqual(ids, [str(self.movements[0].id)])
+
+        after = self.movements[10].created_at.isoformat()
+        response = self.client.get(self.url, {'created_at_after': after, 'page_size': 100})
+        self.assertEqual(len(response.data['results']), 5)
+
+        response = self.client.get(self.url, {'type': 'refund'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_page_queries_do_not_grow_with_history(self):
+        self.client.force_authenticate(self.manager_user)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(f'{self.url}?page_size=3')
+
+        for _ in range(30):
+            Inflow.objects.create(origin=self.supplier, destiny=self.warehouse, companie=self.company)
+
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get(f'{self.url}?page_size=3')
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+
+class MovementItemsServiceTests(TestCase):
+    """Tests for the bulk creation of movement items"""
+
+    def setUp(self):
+        self.company = Companie.objects.create(name='Items Company', type='Headquarters')
+        self.supplier = Supplier.objects.create(name='Items Supplier', companie=self.company)
+        self.origin = Warehouse.objects.create(name='Items Origin', companie=self.company)
+        self.destiny = Warehouse.objects.create(name='Items Destiny', companie=self.company)
+        self.products = [
+            Product.objects.create(name=f'Items Product {index}', companie=self.company)
+            for index in range(30)
+        ]
+        StockPostingService.post([(self.origin, product, 10) for product in self.products])
+
+    def _create_transfer_items(self, products):
+        transfer = Transfer.objects.create(origin=self.origin, destiny=self.destiny, companie=self.company)
+        # Start every run from new rollup rows, the first run's rows would be updated by the next one
+        DailyMovementRollup.objects.all().delete()
+        with CaptureQueriesContext(connection) as queries:
+            MovementItemsService.create_items(
+                transfer,
+                [{'product': str(product.id), 'quantity': 4} for product in products]
+            )
+        return transfer, len(queries)
+
+    def test_transfer_items_are_posted_at_once(self):
+        _, small_queries = self._create_transfer_items(self.products[:3])
+        transfer, large_queries = self._create_transfer_items(self.products)
+
+        self.assertEqual(small_queries, large_queries)
+        self.assertEqual(TransferItems.objects.filter(transfer=transfer).count(), 30)
+        self.origin.refresh_from_db()
+        self.destiny.refresh_from_db()
+        self.assertEqual(self.origin.quantity, 300 - 132)
+        self.assertEqual(self.destiny.quantity, 132)
+        self.assertEqual(
+            WarehouseProduct.objects.get(warehouse=self.origin, product=self.products[0]).current_quantity,
+            2
+        )
+
+    def test_pending_inflow_items_do_not_touch_stock(self):
+        inflow = Inflow.objects.create(origin=self.supplier, destiny=self.destiny, companie=self.company)
+        items = MovementItemsService.create_items(
+            inflow,
+            [{'product': product, 'quantity': 5} for product in self.products]
+        )
+
+        self.assertEqual(InflowItems.objects.filter(inflow=inflow).count(), len(items))
+        self.assertTrue(all(item.companie_id == self.company.pk for item in items))
+        self.assertFalse(WarehouseProduct.objects.filter(warehouse=self.destiny).exists())
+
+    def test_invalid_items_are_rejected(self):
+        transfer = Transfer.objects.create(origin=self.origin, destiny=self.destiny, companie=self.company)
+        with self.assertRaises(ValidationError):
+            MovementItemsService.create_items(transfer, [{'product': self.products[0], 'quantity': 11}])
+        with self.assertRaises(ValidationError):
+            MovementItemsService.create_items(transfer, [{'product': self.products[0], 'quantity': 0}])
+        self.assertFalse(TransferItems.objects.filter(transfer=transfer).exists())
+
+    def test_fractional_quantities_are_rejected(self):
+        inflow = Inflow.objects.create(origin=self.supplier, destiny=self.destiny, companie=self.company)
+        for quantity in (2.5, 2.0, True):
+            with self.subTest(quantity=quantity), self.assertRaises(ValidationError):
+                MovementItemsService.create_items(inflow, [{'product': self.products[0], 'quantity': quantity}])
+        self.assertFalse(InflowItems.objects.filter(inflow=inflow).exists())
+
+
+class MovementSummaryTests(APITestCase):
+    """Tests for the movements summary read from the daily rollup"""
+
+    def setUp(self):
+        self.company = Companie.objects.create(name='Summary Company', type='Headquarters')
+        self.manager_user = User.objects.create_user(
+            password='manager123',
+            email='summary_manager@test.com',
+            first_name='Summary',
+            last_name='Manager',
+            user_type='Manager'
+        )
+        self.employee_user = User.objects.create_user(
+            password='emp123',
+            email='summary_employee@test.com',
+            first_name='Summary',
+            last_name='Employee',
+            user_type='Employee'
+        )
+        Employeer.objects.filter(user__in=[self.manager_user, self.employee_user]).update(companie=self.company)
+        self.manager_user = User.objects.get(pk=self.manager_user.pk)
+
+        self.product = Product.objects.create(name='Summary Product', companie=self.company)
+        self.warehouse = Warehouse.objects.create(name='Summary Warehouse', companie=self.company)
+        StockPostingService.post([(self.warehouse, self.product, 8)], movement_type='inflow')
+        StockPostingService.post([(self.warehouse, self.product, -2)], movement_type='outflow')
+        self.url = reverse('movements:movements_summary')
+
+    def test_summary_reports_totals_per_type(self):
+        self.client.force_authenticate(self.manager_user)
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        totals = {row['movement_type']: row['quantity'] for row in response.data['totals']}
+        self.assertEqual(totals, {'inflow': 8, 'outflow': -2})
+        self.assertEqual(response.data['daily'][0]['date'], str(timezone.now().date()))
+
+        response = self.client.get(self.url, {'start': '2020-01-01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_summary_rejects_invalid_dates(self):
+        self.client.force_authenticate(self.manager_user)
+        for params in ({'end': '2026-02-31'}, {'start': '2026-13-01'}, {'start': 'yesterday'}):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_summary_is_restricted_to_managers(self):
+        self.client.force_authenticate(self.employee_user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
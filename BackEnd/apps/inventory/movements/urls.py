@@ -4,5 +4,6 @@ from . import views
 app_name = 'movements'
 
 urlpatterns = [
-    path('', views.MovementListView.as_view(), name='list_movements')
+    path('', views.MovementListView.as_view(), name='list_movements'),
+    path('summary/', views.MovementSummaryView.as_view(), name='movements_summary'),
 ]
@@ -1,24 +1,23 @@
 from rest_framework.generics import ListAPIView
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError, PermissionDenied
 from apps.companies.employeers.models import Employeer
-from rest_framework import status
-from django.db.models import Q
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.utils import timezone
-from datetime import timedelta
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time, timedelta
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiTypes
-from core.cache import cache_response, cache_get_or_set, get_cache_key, invalidate_cache_key
-import hashlib
-import json
 import logging
+from core.actor import get_employeer
 from .serializers import MovementSerializer
+from .services.feed import MovementFeed
+from .services.pagination import MovementCursorPagination
+from ..warehouse.services.rollup import MovementRollupService
 
 from ..inflows.models import Inflow
-from ..inflows.serializers import InflowSerializer
-from ..outflows.models import Outflow
-from ..outflows.serializers import OutflowSerializer
-from ..transfer.models import Transfer
-from ..transfer.serializers import TransferSerializer
 
 logger = logging.getLogger(__name__)
 
@@ -27,7 +26,17 @@ logger = logging.getLogger(__name__)
     get=extend_schema(
         tags=['Inventory - Movements'],
         summary="List all movements",
-        description="List all movements.",
+        description="""
+        List the inflows, outflows and transfers of the user's company, newest first.
+        Managers, admins and owners see every movement, other users only the ones they created.
+        The list is cursor paginated: follow the `next` and `previous` links.
+        """,
+        parameters=[
+            OpenApiParameter(name='type', type=OpenApiTypes.STR, description='Comma separated movement types (Entry, Exit, Transfer)'),
+            OpenApiParameter(name='status', type=OpenApiTypes.STR, description='Comma separated movement statuses'),
+            OpenApiParameter(name='created_at_after', type=OpenApiTypes.STR, description='Only movements created at or after this date/datetime'),
+            OpenApiParameter(name='created_at_before', type=OpenApiTypes.STR, description='Only movements created before this datetime, or up to the end of this date'),
+        ],
         responses={200: MovementSerializer(many=True)},
     )
 )
@@ -37,66 +46,141 @@ class MovementListView(ListAPIView):
     """
     serializer_class = MovementSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = MovementCursorPagination
+    filter_backends = []
     queryset = Inflow.objects.none()
-    
+
+    @staticmethod
+    def _split(value):
+        return [item for item in (value or '').split(',') if item.strip()]
+
+    @staticmethod
+    def _parse_moment(value, end_of_day=False):
+        """Parse a date or datetime query parameter into an aware datetime"""
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError(f"Invalid date: {value}")
+            if end_of_day:
+                day += timedelta(days=1)
+            moment = datetime.combine(day, time.min)
+        if settings.USE_TZ and timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        elif not settings.USE_TZ and timezone.is_aware(moment):
+            moment = timezone.make_naive(moment)
+        return moment
+
+    def get_filters(self):
+        params = self.request.query_params
+        filters = {}
+        try:
+            filters['types'] = MovementFeed.resolve_types(self._split(params.get('type')))
+            filters['statuses'] = MovementFeed.resolve_statuses(self._split(params.get('status')))
+            if params.get('created_at_after'):
+                filters['created_after'] = self._parse_moment(params['created_at_after'])
+            if params.get('created_at_before'):
+                filters['created_before'] = self._parse_moment(params['created_at_before'], end_of_day=True)
+        except ValueError as e:
+            raise ValidationError({'detail': str(e)})
+        return filters
+
     def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return MovementFeed.empty()
+
         user = self.request.user
-        logger.info(f"[MOVEMENTS VIEW] all movements listed successfully")
-        
+        filters = self.get_filters()
         try:
-            base_inflow_query = (
-                Inflow.objects.select_related('origin', 'destiny', 'created_by', 'companie')
-            )
-            
-            base_outflow_query = (
-                Outflow.objects.select_related('origin', 'destiny', 'created_by', 'companie')
-            )
-            
-            base_transfer_query = (
-                Transfer.objects.select_related('origin', 'destiny', 'created_by', 'companie')
-            )
-            
-            logger.debug(f"[MOVEMENTS VIEW] Total inflows: {base_inflow_query.count()}")
-            logger.debug(f"[MOVEMENTS VIEW] Total outflows: {base_outflow_query.count()}")
-            logger.debug(f"[MOVEMENTS VIEW] Total transfers: {base_transfer_query.count()}")
-            
-            #Check if user_type is [Manager, Admin, or Owner] if so, return all movements
-            if user.user_type in ['Manager', 'Admin', 'Owner']:
-                inflow = list(base_inflow_query.all())
-                outflow = list(base_outflow_query.all())
-                transfer = list(base_transfer_query.all())
-                movements = sorted(
-                    inflow + outflow + transfer,
-                    key=lambda x: x.created_at,
-                    reverse=True
-                )
-                logger.debug(f"[MOVEMENTS VIEW] Total movements: {len(movements)}")
-                return movements
-            # For regular employees, return only movements they created
-            else:
-                try:
-                    employeer = Employeer.objects.get(user=user)
-                    
-                    # Filter movements created by this employee
-                    inflow = list(base_inflow_query.filter(created_by=employeer, companie=employeer.companie))
-                    outflow = list(base_outflow_query.filter(created_by=employeer, companie=employeer.companie))
-                    transfer = list(base_transfer_query.filter(created_by=employeer, companie=employeer.companie))
-                    
-                    logger.debug(f"[MOVEMENTS VIEW] Employee {employeer.name} - Inflows: {len(inflow)}, Outflows: {len(outflow)}, Transfers: {len(transfer)}")
-                    
-                    # Combine and sort movements
-                    movements = sorted(
-                        inflow + outflow + transfer,
-                        key=lambda x: x.created_at,
-                        reverse=True
-                    )
-                    return movements
-                except Employeer.DoesNotExist:
-                    logger.warning(f"[MOVEMENTS VIEW] User {user.email} has no employeer profile")
-                    return []
-                except Exception as e:
-                    logger.error(f"[MOVEMENTS VIEW] Error getting movements: {str(e)}")
-                    return []
-        except Exception as e:
-            logger.error(f"[MOVEMENTS VIEW] Error getting movements: {str(e)}")
-            return []
+            employeer = get_employeer(user)
+        except Employeer.DoesNotExist:
+            logger.warning(f"[MOVEMENTS VIEW] User {user.email} has no employeer profile")
+            return MovementFeed.empty()
+
+        #Check if user_type is [Manager, Admin, or Owner] if so, return all movements of the company
+        full_access = user.user_type in ['Manager', 'Admin', 'Owner']
+        logger.info(f"[MOVEMENTS VIEW] Movements listed for {employeer.name} (full access: {full_access})")
+        return MovementFeed.for_employeer(employeer, full_access=full_access, **filters)
+
+
+@extend_schema_view(
+    get=extend_schema(
+        tags=['Inventory - Movements'],
+        summary="Summarize the stock movements",
+        description="""
+        Quantities and values moved per day and movement type for the user's company,
+        read from the daily movement rollup. Quantities are signed: positive into a
+        warehouse, negative out of it. Only managers, admins and owners can see the summary.
+        """,
+        parameters=[
+            OpenApiParameter(name='start', type=OpenApiTypes.DATE, description='First day of the summary, defaults to 29 days before the end'),
+            OpenApiParameter(name='end', type=OpenApiTypes.DATE, description='Last day of the summary, defaults to today'),
+            OpenApiParameter(name='warehouse', type=OpenApiTypes.UUID, description='Only the movements of this warehouse'),
+        ],
+        responses={200: OpenApiTypes.OBJECT},
+    )
+)
+class MovementSummaryView(APIView):
+    """
+    Summarize the stock movements of the company per day and movement type.
+    """
+    permission_classes = [IsAuthenticated]
+    MAX_DAYS = 366
+
+    @staticmethod
+    def _parse_date(value):
+        """Parse a YYYY-MM-DD date, None if it is malformed or does not exist (e.g. 2026-02-31)"""
+        try:
+            return parse_date(value)
+        except ValueError:
+            return None
+
+    def get_period(self):
+        params = self.request.query_params
+        end = self._parse_date(params['end']) if params.get('end') else timezone.now().date()
+        start = self._parse_date(params['start']) if params.get('start') else (end and end - timedelta(days=29))
+        if start is None or end is None:
+            raise ValidationError({'detail': 'Invalid date, use YYYY-MM-DD'})
+        if start > end:
+            raise ValidationError({'detail': 'start must not be after end'})
+        if (end - start).days >= self.MAX_DAYS:
+            raise ValidationError({'detail': f'The summary can cover at most {self.MAX_DAYS} days'})
+        return start, end
+
+    @staticmethod
+    def _totals(row):
+        return {
+            'quantity': row['total_quantity'] or 0,
+            'value': float(row['total_value'] or 0),
+            'lines': row['total_lines'] or 0,
+        }
+
+    def get(self, request, *args, **kwargs):
+        user = request.user
+        if user.user_type not in ['Manager', 'Admin', 'Owner']:
+            raise PermissionDenied('Only managers, admins and owners can see the movements summary')
+
+        start, end = self.get_period()
+        try:
+            companie_id = get_employeer(user).companie_id
+        except Employeer.DoesNotExist:
+            companie_id = None
+        if companie_id is None:
+            raise PermissionDenied('User is not linked to a company')
+        options = {'warehouse': request.query_params.get('warehouse') or None}
+        try:
+            totals = MovementRollupService.aggregate(companie_id, start, end, ('movement_type',), **options)
+            daily = MovementRollupService.aggregate(companie_id, start, end, ('date', 'movement_type'), **options)
+        except DjangoValidationError as e:
+            raise ValidationError({'detail': e.messages})
+
+        logger.info(f"[MOVEMENTS VIEW] Movements summary from {start} to {end} for company {companie_id}")
+        return Response({
+            'period': {'start': str(start), 'end': str(end)},
+            'totals': [{'movement_type': row['movement_type'], **self._totals(row)} for row in totals],
+            'daily': [
+                {'date': str(row['date']), 'movement_type': row['movement_type'], **self._totals(row)}
+                for row in daily
+            ],
+        })
+
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-16 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outflows', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='outflow',
+            options={'ordering': ['-created_at'], 'verbose_name': 'Outflow', 'verbose_name_plural': 'Outflows'},
+        ),
+        migrations.AlterModelOptions(
+            name='outflowitems',
+            options={'ordering': ['-created_at'], 'verbose_name': 'Outflow Item', 'verbose_name_plural': 'Outflow Items'},
+        ),
+        migrations.AddIndex(
+            model_name='outflow',
+            index=models.Index(fields=['companie', '-created_at'], name='outflow_tenant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='outflow',
+            index=models.Index(fields=['companie', 'status', '-created_at'], name='outflow_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='outflowitems',
+            index=models.Index(fields=['companie', '-created_at'], name='outflow_items_tenant_idx'),
+        ),
+    ]
@@ -1,12 +1,12 @@
 from django.db import models
 from ..product.models import Product
 from ..warehouse.models import Warehouse
-from basemodels.models import BaseModel
+from basemodels.models import BaseModel, FieldTrackerMixin, tenant_indexes
 from apps.companies.customers.models import Customer
 from core.constants.choices import MOVEMENTS_STATUS_CHOICES
 
 
-class Outflow(BaseModel):
+class Outflow(FieldTrackerMixin, BaseModel):
     """
     Fields:
         origin: ForeignKey to Warehouse : The warehouse of the outflow
@@ -45,9 +45,13 @@ class Outflow(BaseModel):
         help_text='Reason for rejection if outflow was rejected'
     )
     
-    verbose_name = 'Outflow'
-    verbose_name_plural = 'Outflows'
-    ordering = ['-created_at']
+    tracked_fields = ('status',)
+
+    class Meta:
+        verbose_name = 'Outflow'
+        verbose_name_plural = 'Outflows'
+        ordering = ['-created_at']
+        indexes = tenant_indexes('outflow', 'status')
     
     def __str__(self):
         return f'{self.origin.name} -> {self.destiny.full_name}'
@@ -91,7 +95,7 @@ class Outflow(BaseModel):
         return "Exit"
             
     
-class OutflowItems(BaseModel):
+class OutflowItems(FieldTrackerMixin, BaseModel):
     """ Outflow Items model is responsible for storing the each product that is part of a outflow
     fields:
         outflow: ForeignKey to Outflow : id of the outflow the item is part of
@@ -117,9 +121,13 @@ class OutflowItems(BaseModel):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='outflow_items', help_text='the products that are going out of the warehouse')
     quantity = models.PositiveIntegerField(default=0, help_text='The quantity of that will be transfered')
     
-    verbose_name = 'Outflow Item'
-    verbose_name_plural = 'Outflow Items'
-    ordering = ['-created_at']
+    tracked_fields = ('quantity',)
+
+    class Meta:
+        verbose_name = 'Outflow Item'
+        verbose_name_plural = 'Outflow Items'
+        ordering = ['-created_at']
+        indexes = tenant_indexes('outflow_items')
     
     def __str__(self):
         return f'{self.outflow.origin.name} -> {self.outflow.destiny.full_name} - {self.product.name} - {self.quantity}'
\ No newline at end of file
@@ -28,8 +28,7 @@ class OutflowNotificationHandler(BaseNotificationHandler):
             return
             
         try:
-            recipients = cls.get_recipients_by_type(*RECIPIENT_TYPES['DEFAULT'])
-            recipient_ids = [str(user.id) for user in recipients]
+            recipient_ids = cls.get_recipient_ids(*RECIPIENT_TYPES['DEFAULT'], companie=instance.companie_id)
             
             data = {
                 'type': SEVERITY_TYPES['INFO'],
@@ -65,8 +64,7 @@ class OutflowNotificationHandler(BaseNotificationHandler):
         """Notifica sobre aprovação de saída."""
         try:
             if recipient_ids is None:
-                recipients = cls.get_recipients_by_type(*RECIPIENT_TYPES['DEFAULT'])
-                recipient_ids = [str(user.id) for user in recipients]
+                recipient_ids = cls.get_recipient_ids(*RECIPIENT_TYPES['DEFAULT'], companie=outflow.companie_id)
             
             data = {
                 'type': SEVERITY_TYPES['INFO'],
@@ -103,8 +101,7 @@ class OutflowNotificationHandler(BaseNotificationHandler):
         """Notifica sobre rejeição de saída."""
         try:
             if recipient_ids is None:
-                recipients = cls.get_recipients_by_type(*RECIPIENT_TYPES['DEFAULT'])
-                recipient_ids = [str(user.id) for user in recipients]
+                recipient_ids = cls.get_recipient_ids(*RECIPIENT_TYPES['DEFAULT'], companie=outflow.companie_id)
             
             data = {
                 'type': SEVERITY_TYPES['WARNING'],
@@ -141,8 +138,7 @@ class OutflowNotificationHandler(BaseNotificationHandler):
         """Notifica sobre entrega de saída."""
         try:
             if recipient_ids is None:
-                recipients = cls.get_recipients_by_type(*RECIPIENT_TYPES['DELIVERY'])
-                recipient_ids = [str(user.id) for user in recipients]
+                recipient_ids = cls.get_recipient_ids(*RECIPIENT_TYPES['DELIVERY'], companie=outflow.companie_id)
             
             data = {
                 'type': SEVERITY_TYPES['INFO'],
@@ -1,10 +1,12 @@
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from django.core.exceptions import ValidationError as DjangoValidationError
 from .models import Outflow, OutflowItems
 from django.db import transaction
 from ..warehouse.models import Warehouse
 from ..product.models import Product
 from apps.companies.customers.models import Customer
+from ..movements.services.items import MovementItemsService
 import logging
 
 logger = logging.getLogger(__name__)
@@ -191,28 +193,35 @@ class OutflowSerializer(serializers.ModelSerializer):
                     'items_data': 'Each item must have product and quantity'
                 })
             
+            if isinstance(item['quantity'], bool) or not isinstance(item['quantity'], int):
+                raise ValidationError({
+                    'items_data': 'Quantity must be an integer'
+                })
+            
             if item['quantity'] < 1:
                 raise ValidationError({
                     'items_data': 'Quantity must be positive'
                 })
-            
-            # Check if product quantity is available in warehouse
-            product_id = item['product']
-            try:
-                product = Product.objects.get(id=product_id)
-                try:
-                    warehouse_product = warehouse.items.get(product=product)
-                    if warehouse_product.current_quantity < item['quantity']:
-                        raise ValidationError({
-                            'items_data': f'Not enough quantity for product {product.name} in warehouse'
-                        })
-                except warehouse.items.model.DoesNotExist:
-                    raise ValidationError({
-                        'items_data': f'Product {product.name} not found in warehouse'
-                    })
-            except Product.DoesNotExist:
+        
+        # Check product quantities are available in warehouse, fetching products and stock at once
+        try:
+            products = MovementItemsService.resolve_products(items)
+        except DjangoValidationError as e:
+            raise ValidationError({'items_data': e.messages[0]})
+        stock = {
+            warehouse_product.product_id: warehouse_product
+            for warehouse_product in warehouse.items.filter(product_id__in=products.keys())
+        }
+        for item in items:
+            product = products[Product._meta.pk.to_python(item['product'])]
+            warehouse_product = stock.get(product.pk)
+            if warehouse_product is None:
                 raise ValidationError({
-                    'items_data': f'Product with id {product_id} does not exist'
+                    'items_data': f'Product {product.name} not found in warehouse'
+                })
+            if warehouse_product.current_quantity < item['quantity']:
+                raise ValidationError({
+                    'items_data': f'Not enough quantity for product {product.name} in warehouse'
                 })
                 
         return attrs
@@ -226,19 +235,7 @@ class OutflowSerializer(serializers.ModelSerializer):
         """
         items_data = validated_data.pop('items_data')
         outflow = Outflow.objects.create(**validated_data)
-        
-        for item_data in items_data:
-            product_id = item_data.pop('product')
-            try:
-                product = Product.objects.get(id=product_id)
-                OutflowItems.objects.create(
-                    outflow=outflow,
-                    product=product,
-                    quantity=item_data['quantity']
-                )
-            except Product.DoesNotExist:
-                raise ValidationError(f'Product with id {product_id} does not exist')
-            
+        MovementItemsService.create_items(outflow, items_data)
         return outflow
         
     @transaction.atomic
@@ -251,17 +248,6 @@ class OutflowSerializer(serializers.ModelSerializer):
         if 'items_data' in validated_data:
             items_data = validated_data.pop('items_data')
             instance.items.all().delete()
-            
-            for item_data in items_data:
-                product_id = item_data.pop('product')
-                try:
-                    product = Product.objects.get(id=product_id)
-                    OutflowItems.objects.create(
-                        outflow=instance,
-                        product=product,
-                        quantity=item_data['quantity']
-                    )
-                except Product.DoesNotExist:
-                    raise ValidationError(f'Product with id {product_id} does not exist')
+            MovementItemsService.create_items(instance, items_data)
                 
         return super().update(instance, validated_data)
\ No newline at end of file
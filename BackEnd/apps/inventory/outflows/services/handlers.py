@@ -1,7 +1,9 @@
-from ..models import Outflow, OutflowItems
+from ..models import Outflow
 from django.db import transaction
 from .validators import OutflowBusinessValidator
+from ...movements.services.items import MovementItemsService
 import logging
+from core.actor import get_employeer
 
 logger = logging.getLogger(__name__)
 
@@ -16,27 +18,21 @@ class OutflowService:
         # Validate company access
         self.validator.validate_company_access(data, user)
         
+        employeer = get_employeer(user)
+
         # Create outflow with transaction
         with transaction.atomic():
             outflow = Outflow.objects.create(
                 origin=data['origin'],
                 destiny=data['destiny'],
                 status='pending',
-                companie=user.employeer.companie,
-                created_by=user.employeer,
-                updated_by=user.employeer
+                companie=employeer.companie,
+                created_by=employeer,
+                updated_by=employeer
             )
             
             # Create outflow items
-            for item_data in data['items_data']:
-                OutflowItems.objects.create(
-                    outflow=outflow,
-                    product=item_data['product'],
-                    quantity=item_data['quantity'],
-                    companie=user.employeer.companie,
-                    created_by=user.employeer,
-                    updated_by=user.employeer
-                )
+            MovementItemsService.create_items(outflow, data['items_data'], employeer=employeer)
             
             logger.info(f"Outflow created successfully", extra={'outflow_id': outflow.id})
             return outflow
@@ -49,26 +45,20 @@ class OutflowService:
         # Validate outflow status
         self.validator.validate_outflow_status(outflow)
         
+        employeer = get_employeer(user)
+
         # Update outflow with transaction
         with transaction.atomic():
             outflow.origin = data['origin']
             outflow.destiny = data['destiny']
-            outflow.updated_by = user.employeer
+            outflow.updated_by = employeer
             outflow.save()
             
             # Delete existing items
             outflow.items.all().delete()
             
             # Create new items
-            for item_data in data['items_data']:
-                OutflowItems.objects.create(
-                    outflow=outflow,
-                    product=item_data['product'],
-                    quantity=item_data['quantity'],
-                    companie=user.employeer.companie,
-                    created_by=user.employeer,
-                    updated_by=user.employeer
-                )
+            MovementItemsService.create_items(outflow, data['items_data'], employeer=employeer)
             
             logger.info(f"Outflow updated successfully", extra={'outflow_id': outflow.id})
             return outflow
@@ -84,7 +74,7 @@ class OutflowService:
         # Approve outflow
         with transaction.atomic():
             outflow.status = 'approved'
-            outflow.updated_by = user.employeer
+            outflow.updated_by = get_employeer(user)
             outflow.save()
             
             logger.info(f"Outflow approved successfully", extra={'outflow_id': outflow.id})
@@ -101,7 +91,7 @@ class OutflowService:
         # Reject outflow
         outflow.status = 'rejected'
         outflow.rejection_reason = rejection_reason
-        outflow.updated_by = user.employeer
+        outflow.updated_by = get_employeer(user)
         outflow.save()
         
         logger.info(f"Outflow rejected successfully", extra={'outflow_id': outflow.id})
@@ -1,6 +1,7 @@
 from rest_framework.exceptions import ValidationError
 from ..models import Outflow, OutflowItems
 import logging
+from core.actor import get_employeer
 
 logger = logging.getLogger(__name__)
 
@@ -10,7 +11,7 @@ class OutflowBusinessValidator:
     @staticmethod
     def validate_company_access(data, user):
         """Validate company access permissions"""
-        user_company = user.employeer.companie
+        user_company = get_employeer(user).companie
         
         # Validate origin warehouse
         if data.get('origin') and data['origin'].companie != user_company:
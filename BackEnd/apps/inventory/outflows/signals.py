@@ -5,34 +5,10 @@ from django.db import transaction
 from django.core.exceptions import ValidationError
 from .models import Outflow, OutflowItems
 from ..warehouse.models import WarehouseProduct
+from ..warehouse.services.posting import StockPostingService
 
 logger = logging.getLogger(__name__)
 
-@receiver(pre_save, sender=Outflow)
-def store_previous_outflow_status(sender, instance, **kwargs):
-    """Store previous outflow status before changes"""
-    if instance.pk:
-        try:
-            previous = Outflow.objects.get(pk=instance.pk)
-            instance._previous_status = previous.status
-            logger.info(f"Outflow ID {instance.pk}: Previous status stored: {previous.status}")
-        except Outflow.DoesNotExist:
-            instance._previous_status = None
-    else:
-        instance._previous_status = None
-
-@receiver(pre_save, sender=OutflowItems)
-def store_previous_quantity(sender, instance, **kwargs):
-    """Store previous quantity before changes"""
-    if instance.pk:
-        try:
-            previous = OutflowItems.objects.get(pk=instance.pk)
-            instance._previous_quantity = previous.quantity
-        except OutflowItems.DoesNotExist:
-            instance._previous_quantity = 0
-    else:
-        instance._previous_quantity = 0
-
 @receiver(pre_save, sender=OutflowItems)
 def validate_quantities(sender, instance, **kwargs):
     """Validate if warehouse has enough quantity"""
@@ -41,7 +17,7 @@ def validate_quantities(sender, instance, **kwargs):
         return
         
     # Also skip if we're in the middle of an approval
-    if hasattr(instance.outflow, '_previous_status') and instance.outflow._previous_status != 'approved':
+    if instance.outflow.has_changed('status'):
         return
     
     warehouse = instance.outflow.origin
@@ -55,14 +31,7 @@ def validate_quantities(sender, instance, **kwargs):
         )
         
         # Calculate change in quantity
-        if instance.pk:
-            try:
-                previous = OutflowItems.objects.get(pk=instance.pk)
-                quantity_change = instance.quantity - previous.quantity
-            except OutflowItems.DoesNotExist:
-                quantity_change = instance.quantity
-        else:
-            quantity_change = instance.quantity
+        quantity_change = instance.quantity - (instance.previous('quantity') or 0)
         
         # Check if we have enough quantity
         if warehouse_product.current_quantity < quantity_change:
@@ -84,48 +53,38 @@ def update_quantities_on_status_change(sender, instance, created, **kwargs):
         return
         
     # Only process when status changes to approved
-    if instance.status == 'approved' and hasattr(instance, '_previous_status') and instance._previous_status != 'approved':
+    if instance.status == 'approved' and instance.previous('status') != 'approved':
         logger.info(f"Outflow {instance.id} status changed to 'approved'. Updating quantities...")
         
         with transaction.atomic():
-            # Process all outflow items
-            for item in instance.items.all():
-                try:
-                    product = item.product
-                    warehouse = instance.origin
-                    
-                    # Get warehouse product
-                    warehouse_product = WarehouseProduct.objects.get(
-                        warehouse=warehouse,
-                        product=product
-                    )
-                    
-                    # Update quantities
-                    warehouse_product.current_quantity -= item.quantity
-                    product.quantity -= item.quantity
-                    
-                    # Save changes
-                    warehouse_product.save()
-                    product.save()
-                    
-                    #Update instance status to completed
-                    instance.status = 'completed'
-                    instance.save()
-                    
-                    logger.info(
-                        f"Updated quantities for outflow item {item.id} after approval. "
-                        f"Product: {product.name}, "
-                        f"New warehouse quantity: {warehouse_product.current_quantity}, "
-                        f"New total quantity: {product.quantity}"
-                    )
-                    
-                except Exception as e:
-                    logger.error(f"Error updating quantities for outflow item {item.id}: {str(e)}")
-                    transaction.set_rollback(True)
-                    raise
-                    
-            # Update warehouse total quantity
-            instance.origin.update_total_quantity()
+            # Post all outflow items at once
+            warehouse = instance.origin
+            lines = [
+                (warehouse.pk, product_id, -quantity, item_id)
+                for item_id, product_id, quantity in instance.items.values_list('id', 'product_id', 'quantity')
+            ]
+            
+            try:
+                StockPostingService.post(
+                    lines,
+                    employeer=instance.updated_by_id,
+                    movement_type='outflow',
+                    document_id=instance.pk
+                )
+            except Exception as e:
+                logger.error(f"Error updating quantities for outflow {instance.id}: {str(e)}")
+                transaction.set_rollback(True)
+                raise
+            
+            if lines:
+                # Update instance status to completed
+                instance.status = 'completed'
+                instance.save()
+            
+            logger.info(
+                f"Updated quantities for {len(lines)} outflow items after approval. "
+                f"Outflow: {instance.id}, Warehouse: {warehouse.id}"
+            )
 
 @receiver(post_save, sender=OutflowItems)
 def update_quantities_on_outflow_item_change(sender, instance, created, **kwargs):
@@ -135,7 +94,7 @@ def update_quantities_on_outflow_item_change(sender, instance, created, **kwargs
         return
     
     # Skip if we're in the middle of an outflow approval
-    if hasattr(instance.outflow, '_previous_status') and instance.outflow._previous_status != 'completed':
+    if instance.outflow.has_changed('status'):
         return
     
     with transaction.atomic():
@@ -143,34 +102,20 @@ def update_quantities_on_outflow_item_change(sender, instance, created, **kwargs
             warehouse = instance.outflow.origin
             product = instance.product
             
-            # Get warehouse product
-            warehouse_product = WarehouseProduct.objects.get(
-                warehouse=warehouse,
-                product=product
-            )
-            
             # Calculate quantity change
-            if created:
-                quantity_change = instance.quantity
-            else:
-                quantity_change = instance.quantity - getattr(instance, '_previous_quantity', 0)
+            quantity_change = instance.quantity - (instance.previous('quantity') or 0)
             
-            # Update quantities
-            warehouse_product.current_quantity -= quantity_change
-            product.quantity -= quantity_change
-            
-            # Save changes
-            warehouse_product.save()
-            product.save()
-            
-            # Update warehouse total
-            warehouse.update_total_quantity()
+            StockPostingService.post(
+                [(warehouse, product, -quantity_change, instance.pk)],
+                employeer=instance.updated_by_id,
+                movement_type='outflow',
+                document_id=instance.outflow_id
+            )
             
             logger.info(
                 f"Updated quantities for outflow item change. "
                 f"Product: {product.name}, "
-                f"Change: {quantity_change}, "
-                f"New warehouse quantity: {warehouse_product.current_quantity}"
+                f"Change: {quantity_change}"
             )
             
         except Exception as e:
@@ -190,28 +135,18 @@ def restore_quantities_on_outflow_delete(sender, instance, **kwargs):
             warehouse = instance.outflow.origin
             product = instance.product
             
-            # Get warehouse product
-            warehouse_product = WarehouseProduct.objects.get(
-                warehouse=warehouse,
-                product=product
-            )
-            
             # Restore quantities
-            warehouse_product.current_quantity += instance.quantity
-            product.quantity += instance.quantity
-            
-            # Save changes
-            warehouse_product.save()
-            product.save()
-            
-            # Update warehouse total
-            warehouse.update_total_quantity()
+            StockPostingService.post(
+                [(warehouse, product, instance.quantity, instance.pk)],
+                employeer=instance.updated_by_id,
+                movement_type='outflow',
+                document_id=instance.outflow_id
+            )
             
             logger.info(
                 f"Restored quantities after outflow item deletion. "
                 f"Product: {product.name}, "
-                f"Quantity: {instance.quantity}, "
-                f"New warehouse quantity: {warehouse_product.current_quantity}"
+                f"Quantity: {instance.quantity}"
             )
             
         except Exception as e:
@@ -17,6 +17,7 @@ from rest_framework.permissions import IsAuthenticated
 from django.db import transaction
 from rest_framework.exceptions import ValidationError
 import logging
+from core.actor import get_employeer
 
 logger = logging.getLogger(__name__)
 
@@ -31,9 +32,14 @@ class OutflowBaseView:
             if getattr(self, 'swagger_fake_view', False):
                     return OutflowSerializer
             
-            employeer = user.employeer
-            return Outflow.objects.select_related(
-                'companie'
+            employeer = get_employeer(user)
+            return Outflow.objects.with_audit().select_related(
+                'origin__companie',
+                'destiny'
+            ).prefetch_related(
+                'items__product',
+                'destiny__project_address',
+                'origin__companie__companie_pick_up_address'
             ).filter(companie=employeer.companie)
         except Outflow.DoesNotExist:
             return Outflow.objects.none()
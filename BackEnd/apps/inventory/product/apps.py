@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ProductConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.inventory.product'
+    
+    def ready(self):
+        """Import signals when app is ready"""
+        import apps.inventory.product.signals  # noqa
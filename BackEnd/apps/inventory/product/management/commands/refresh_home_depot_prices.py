@@ -0,0 +1,61 @@
+"""
+Django Management Command for Refreshing the Home Depot Prices
+
+Refreshes the price and description of every product linked to a Home Depot
+product id, in chunks, recording the price changes. A failed run can be
+resumed with --resume, it continues after the last chunk written.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.inventory.product.models import PriceRefreshRun
+from apps.inventory.product.service.price_refresh import HomeDepotPriceRefreshService
+from apps.inventory.product.tasks import refresh_home_depot_prices
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    """
+    Django command to refresh the Home Depot prices of the products.
+    """
+    
+    help = "Refresh the price and description of the Home Depot products"
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--companie',
+            help='Restrict the refresh to this company id'
+        )
+        parser.add_argument(
+            '--resume',
+            help='Resume this refresh run instead of starting a new one'
+        )
+        parser.add_argument(
+            '--queue',
+            action='store_true',
+            help='Run the refresh in a Celery worker instead of this process'
+        )
+    
+    def handle(self, *args, **options):
+        if options.get('resume'):
+            run = PriceRefreshRun.objects.filter(pk=options['resume']).first()
+            if run is None:
+                raise CommandError(f"Refresh run not found: {options['resume']}")
+        else:
+            run = HomeDepotPriceRefreshService.start_run(companie_id=options.get('companie'))
+        
+        if options.get('queue'):
+            refresh_home_depot_prices.delay(str(run.id))
+            self.stdout.write(self.style.SUCCESS(f"Refresh run {run.id} queued"))
+            return
+        
+        try:
+            run = HomeDepotPriceRefreshService.run(run.id)
+        except Exception as e:
+            raise CommandError(f"Refresh run failed, resume it with --resume: {str(e)}")
+        if run is None:
+            raise CommandError("The refresh run is completed or running in another process")
+        self.stdout.write(self.style.SUCCESS(
+            f"Refresh run {run.id}: {run.products_checked} products checked, "
+            f"{run.prices_changed} prices and {run.descriptions_changed} descriptions changed, {run.errors} errors"
+        ))
@@ -0,0 +1,64 @@
+# Generated by Django 5.2 on 2026-10-16 18:10
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0004_alter_companie_country'),
+        ('employeers', '0004_alter_employeer_country_alter_employeer_payment_type'),
+        ('product', '0005_alter_productinstoreid_product'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductPriceHistory',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, null=True)),
+                ('old_price', models.DecimalField(decimal_places=2, help_text='The price before the change', max_digits=10)),
+                ('new_price', models.DecimalField(decimal_places=2, help_text='The price after the change', max_digits=10)),
+                ('source', models.CharField(choices=[('home_depot', 'Home Depot'), ('manual', 'Manual')], default='home_depot', help_text='Where the new price came from', max_length=20)),
+                ('companie', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_companie', to='companies.companie')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created_by', to='employeers.employeer')),
+                ('product', models.ForeignKey(help_text='The product whose price changed', on_delete=django.db.models.deletion.CASCADE, related_name='price_history', to='product.product')),
+                ('updated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated_by', to='employeers.employeer')),
+            ],
+            options={
+                'verbose_name': 'Product Price History',
+                'verbose_name_plural': 'Product Price Histories',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['product', '-created_at'], name='price_history_product_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PriceRefreshRun',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', help_text='The status of the run', max_length=20)),
+                ('cursor', models.CharField(blank=True, default='', help_text='Id of the last product refreshed', max_length=64)),
+                ('products_checked', models.PositiveIntegerField(default=0, help_text='Number of products looked up')),
+                ('prices_changed', models.PositiveIntegerField(default=0, help_text='Number of prices changed')),
+                ('descriptions_changed', models.PositiveIntegerField(default=0, help_text='Number of descriptions changed')),
+                ('errors', models.PositiveIntegerField(default=0, help_text='Number of products whose lookup failed')),
+                ('error', models.TextField(blank=True, default='', help_text='The error of the last failed run')),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('companie', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_companie', to='companies.companie')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created_by', to='employeers.employeer')),
+                ('scope', models.ForeignKey(blank=True, help_text='Company refreshed, every company when empty', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='price_refresh_runs', to='companies.companie')),
+                ('updated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated_by', to='employeers.employeer')),
+            ],
+            options={
+                'verbose_name': 'Price Refresh Run',
+                'verbose_name_plural': 'Price Refresh Runs',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-16 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0006_productpricehistory_pricerefreshrun'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['companie', '-created_at'], name='product_tenant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productsku',
+            index=models.Index(fields=['companie', '-created_at'], name='product_sku_tenant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productinstoreid',
+            index=models.Index(fields=['companie', '-created_at'], name='product_store_id_tenant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productpricehistory',
+            index=models.Index(fields=['companie', '-created_at'], name='price_history_tenant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pricerefreshrun',
+            index=models.Index(fields=['companie', '-created_at'], name='price_refresh_run_tenant_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
-from basemodels.models import BaseModel
+from basemodels.models import BaseModel, tenant_indexes
+from core.constants.choices import PRICE_REFRESH_STATUS_CHOICES, PRICE_SOURCE_CHOICES
 from ..categories.models import Category
 from ..brand.models import Brand
 
@@ -40,6 +41,7 @@ class Product(BaseModel):
         verbose_name = 'Product'
         verbose_name_plural = 'Products'
         ordering = ['-created_at']
+        indexes = tenant_indexes('product')
     
     def __str__(self):
         return self.name
@@ -71,6 +73,7 @@ class ProductSku(BaseModel):
         verbose_name = 'Product Sku'
         verbose_name_plural = 'Product Skus'
         ordering = ['-created_at']
+        indexes = tenant_indexes('product_sku')
         
 class ProductInStoreID(BaseModel):
     """ProductSupplierID Models is responsible for storing the supplier ids of the products
@@ -94,3 +97,100 @@ class ProductInStoreID(BaseModel):
     """
     product = models.ForeignKey('product.Product', on_delete=models.CASCADE, related_name='store_ids', help_text='The product of the sku')
     in_store_id = models.CharField(max_length=100, blank=True, null=True, help_text='The id of the product in the supplier store')
+
+    class Meta:
+        indexes = tenant_indexes('product_store_id')
+
+
+class ProductPriceHistory(BaseModel):
+    """ProductPriceHistory Models records the price changes of the products
+    
+    Only changes are recorded, a refresh that finds the same price adds no row.
+    
+    Fields:
+        product: ForeignKey to Product : The product whose price changed
+        old_price: Decimal : The price before the change
+        new_price: Decimal : The price after the change
+        source: str : Where the new price came from
+    Meta:
+        verbose_name: str
+        verbose_name_plural: str
+        ordering: list
+    Inheritance:
+        BaseModel{
+            id: UUIDField
+            companie: ForeignKey to Companie
+            created_at: DateTimeField
+            updated_at: DateTimeField
+            created_by: ForeignKey to Employeer
+            updated_by: ForeignKey to Employeer
+        }
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='price_history', help_text='The product whose price changed')
+    old_price = models.DecimalField(max_digits=10, decimal_places=2, help_text='The price before the change')
+    new_price = models.DecimalField(max_digits=10, decimal_places=2, help_text='The price after the change')
+    source = models.CharField(max_length=20, choices=PRICE_SOURCE_CHOICES, default='home_depot', help_text='Where the new price came from')
+    
+    class Meta:
+        verbose_name = 'Product Price History'
+        verbose_name_plural = 'Product Price Histories'
+        ordering = ['-created_at']
+        indexes = tenant_indexes('price_history') + [
+            models.Index(fields=['product', '-created_at'], name='price_history_product_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.product_id}: {self.old_price} -> {self.new_price}"
+
+
+class PriceRefreshRun(BaseModel):
+    """PriceRefreshRun Models tracks a batch refresh of the Home Depot products
+    
+    Products are refreshed in chunks ordered by id. Each chunk is written with
+    the run's cursor in one transaction, so a failed or interrupted run resumes
+    after the last chunk written.
+    
+    Fields:
+        scope: ForeignKey to Companie : Company refreshed, every company when empty
+        status: str : pending, running, completed or failed
+        cursor: str : Id of the last product refreshed
+        products_checked: int : Number of products looked up
+        prices_changed: int : Number of prices changed
+        descriptions_changed: int : Number of descriptions changed
+        errors: int : Number of products whose lookup failed
+        error: str : The error of the last failed run
+        started_at: datetime : When the last run started
+        finished_at: datetime : When the run completed
+    Meta:
+        verbose_name: str
+        verbose_name_plural: str
+        ordering: list
+    Inheritance:
+        BaseModel{
+            id: UUIDField
+            companie: ForeignKey to Companie
+            created_at: DateTimeField
+            updated_at: DateTimeField
+            created_by: ForeignKey to Employeer
+            updated_by: ForeignKey to Employeer
+        }
+    """
+    scope = models.ForeignKey('companies.Companie', on_delete=models.CASCADE, null=True, blank=True, related_name='price_refresh_runs', help_text='Company refreshed, every company when empty')
+    status = models.CharField(max_length=20, choices=PRICE_REFRESH_STATUS_CHOICES, default='pending', help_text='The status of the run')
+    cursor = models.CharField(max_length=64, blank=True, default='', help_text='Id of the last product refreshed')
+    products_checked = models.PositiveIntegerField(default=0, help_text='Number of products looked up')
+    prices_changed = models.PositiveIntegerField(default=0, help_text='Number of prices changed')
+    descriptions_changed = models.PositiveIntegerField(default=0, help_text='Number of descriptions changed')
+    errors = models.PositiveIntegerField(default=0, help_text='Number of products whose lookup failed')
+    error = models.TextField(blank=True, default='', help_text='The error of the last failed run')
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = 'Price Refresh Run'
+        verbose_name_plural = 'Price Refresh Runs'
+        ordering = ['-created_at']
+        indexes = tenant_indexes('price_refresh_run')
+    
+    def __str__(self):
+        return f"Price refresh {self.status} - {self.products_checked} checked"
@@ -29,8 +29,7 @@ class ProductNotificationHandler(BaseNotificationHandler):
             return
             
         try:
-            recipients = cls.get_recipients_by_type(*RECIPIENT_TYPES['DEFAULT'])
-            recipient_ids = [str(user.id) for user in recipients]
+            recipient_ids = cls.get_recipient_ids(*RECIPIENT_TYPES['DEFAULT'], companie=instance.companie_id)
             
             data = {
                 'type': SEVERITY_TYPES['INFO'],
@@ -66,8 +65,7 @@ class ProductNotificationHandler(BaseNotificationHandler):
         """Notifica sobre atualização de produto."""
         try:
             if recipient_ids is None:
-                recipients = cls.get_recipients_by_type(*RECIPIENT_TYPES['DEFAULT'])
-                recipient_ids = [str(user.id) for user in recipients]
+                recipient_ids = cls.get_recipient_ids(*RECIPIENT_TYPES['DEFAULT'], companie=product.companie_id)
             
             data = {
                 'type': SEVERITY_TYPES['INFO'],
@@ -101,8 +99,7 @@ class ProductNotificationHandler(BaseNotificationHandler):
         """Notifica sobre mudança de categoria do produto."""
         try:
             if recipient_ids is None:
-                recipients = cls.get_recipients_by_type(*RECIPIENT_TYPES['CATALOG'])
-                recipient_ids = [str(user.id) for user in recipients]
+                recipient_ids = cls.get_recipient_ids(*RECIPIENT_TYPES['CATALOG'], companie=product.companie_id)
             
             data = {
                 'type': SEVERITY_TYPES['INFO'],
@@ -136,8 +133,7 @@ class ProductNotificationHandler(BaseNotificationHandler):
         """Notifica sobre mudança de marca do produto."""
         try:
             if recipient_ids is None:
-                recipients = cls.get_recipients_by_type(*RECIPIENT_TYPES['CATALOG'])
-                recipient_ids = [str(user.id) for user in recipients]
+                recipient_ids = cls.get_recipient_ids(*RECIPIENT_TYPES['CATALOG'], companie=product.companie_id)
             
             data = {
                 'type': SEVERITY_TYPES['INFO'],
@@ -1,9 +1,13 @@
 import os
+import asyncio
 import logging
+import weakref
 from typing import Dict, List, Optional
 from django.conf import settings
 from rest_framework import status
+import httpx
 import serpapi
+from core.cache import acached_search, cached_search
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +22,9 @@ class HomeDepotServiceException(Exception):
 class HomeDepotService:
     """Service for interacting with Home Depot API"""
     
+    # Async clients shared by the batch lookups of the process, one per event loop
+    _http_clients = weakref.WeakKeyDictionary()
+    
     def __init__(self):
         """Initialize service with API key"""
         self.api_key = settings.SERPAPI_API_KEY
@@ -28,6 +35,19 @@ class HomeDepotService:
             )
         self.client = serpapi.Client(api_key=self.api_key)
         
+    def _search(self, params: Dict) -> Dict:
+        """Run a SerpAPI request through the search cache
+        
+        Args:
+            params (Dict): Parameters of the request, engine included
+            
+        Returns:
+            Dict: The API response, shared with identical recent requests.
+                Error responses are not shared, the next request retries.
+        """
+        # Plain dict, the client's result object is not meant to be pickled
+        return cached_search(params, lambda: dict(self.client.search(params)))
+        
     def _extract_price(self, product_data: Dict) -> Optional[float]:
         """Extract price from product data
         
@@ -76,7 +96,7 @@ class HomeDepotService:
             if delivery_zip:
                 params["delivery_zip"] = delivery_zip
             
-            results = self.client.search(params)
+            results = self._search(params)
             
             if 'products' in results and isinstance(results['products'], list):
                 return [{
@@ -113,34 +133,86 @@ class HomeDepotService:
             Optional[Dict]: Product details if found, None otherwise
         """
         try:
-            params = {
-                "engine": "home_depot_product",
-                "product_id": product_id
-            }
+            params = self._product_params(product_id, store_id, delivery_zip)
+            results = self._search(params)
+            return self._product_details(results, store_id, delivery_zip)
             
-            if store_id:
-                params["store_id"] = store_id
-                
-            if delivery_zip:
-                params["delivery_zip"] = delivery_zip
+        except Exception as e:
+            raise HomeDepotServiceException(
+                f"Error getting product details: {str(e)}",
+                status_code=status.HTTP_502_BAD_GATEWAY
+            )
+    
+    def _product_params(self, product_id: str, store_id: Optional[str] = None, delivery_zip: Optional[str] = None) -> Dict:
+        params = {
+            "engine": "home_depot_product",
+            "product_id": product_id
+        }
+        
+        if store_id:
+            params["store_id"] = store_id
             
-            results = self.client.search(params)
+        if delivery_zip:
+            params["delivery_zip"] = delivery_zip
+        return params
+    
+    def _product_details(self, results: Optional[Dict], store_id: Optional[str], delivery_zip: Optional[str]) -> Optional[Dict]:
+        """Extract the product details of a home_depot_product response"""
+        if results and 'product_results' in results and isinstance(results['product_results'], dict):
+            product_data = results['product_results']
             
-            if 'product_results' in results and isinstance(results['product_results'], dict):
-                product_data = results['product_results']
-                
-                return {
-                    "title": product_data.get('title'),
-                    "price": self._extract_price(product_data),
-                    "description": product_data.get('description'),
-                    "brand": product_data.get('brand'),
-                    "model_number": product_data.get('model_number'),
-                    "store_id": store_id,
-                    "delivery_zip": delivery_zip
-                }
-                
-            return None
+            return {
+                "title": product_data.get('title'),
+                "price": self._extract_price(product_data),
+                "description": product_data.get('description'),
+                "brand": product_data.get('brand'),
+                "model_number": product_data.get('model_number'),
+                "store_id": store_id,
+                "delivery_zip": delivery_zip
+            }
+            
+        return None
+    
+    def _get_http_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = self._http_clients.get(loop)
+        if client is None:
+            client = self._http_clients[loop] = httpx.AsyncClient(
+                timeout=httpx.Timeout(30.0, connect=10.0),
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+            )
+        return client
+    
+    async def _fetch_async(self, params: Dict) -> Dict:
+        response = await self._get_http_client().get(
+            getattr(settings, 'SERPAPI_BASE_URL', None) or "https://serpapi.com/search",
+            params={**params, "api_key": self.api_key}
+        )
+        response.raise_for_status()
+        return response.json()
+    
+    async def aget_product_by_id(
+        self,
+        product_id: str,
+        store_id: Optional[str] = None,
+        delivery_zip: Optional[str] = None
+    ) -> Optional[Dict]:
+        """Get product details from Home Depot without blocking the event loop
+        
+        Same as get_product_by_id, for batches fetching many products concurrently.
+        
+        Args:
+            product_id (str): Home Depot product ID
+            store_id (str, optional): Store ID to check availability
+            delivery_zip (str, optional): ZIP code for delivery
             
+        Returns:
+            Optional[Dict]: Product details if found, None otherwise
+        """
+        params = self._product_params(product_id, store_id, delivery_zip)
+        try:
+            results = await acached_search(params, lambda: self._fetch_async(params))
+            return self._product_details(results, store_id, delivery_zip)
         except Exception as e:
             raise HomeDepotServiceException(
                 f"Error getting product details: {str(e)}",
@@ -0,0 +1,208 @@
+import asyncio
+import logging
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Optional
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+from core.cache import bump_tenant_generation
+from apps.inventory.product.models import Product, ProductPriceHistory, PriceRefreshRun
+from .home_depot_service import HomeDepotService, HomeDepotServiceException
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Spread the calls made on an event loop to at most ``rate`` per second"""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class HomeDepotPriceRefreshService:
+    """
+    Batch refresh of the price and description of every product linked to a
+    Home Depot product id.
+
+    Products are walked by id in chunks of CHUNK_SIZE. The details of a chunk
+    are fetched concurrently, at most CONCURRENCY lookups in flight and
+    REQUESTS_PER_SECOND started per second, through the external search cache.
+    The changes are diffed in memory and written with one bulk_update, the
+    price changes with one bulk_create into ProductPriceHistory, and the run's
+    cursor in the same transaction, so a failed run resumes after the last
+    chunk written.
+    """
+    CHUNK_SIZE = 200
+    CONCURRENCY = 8
+    REQUESTS_PER_SECOND = 10
+    STALE_AFTER = timedelta(minutes=10)
+
+    @classmethod
+    def start_run(cls, companie_id=None, user=None) -> PriceRefreshRun:
+        """
+        Record a pending refresh of a company's products, or of every company's.
+        """
+        run = PriceRefreshRun(scope_id=companie_id)
+        run.save(user=user)
+        return run
+
+    @classmethod
+    def products(cls, run: PriceRefreshRun):
+        """Products of a run with their Home Depot id (``in_store_id``), ordered by id"""
+        queryset = Product.objects.filter(
+            supplier__name='Home Depot',
+            store_ids__in_store_id__gt=''
+        ).select_related('supplier', 'companie').annotate(
+            in_store_id=Min('store_ids__in_store_id')
+        ).order_by('pk')
+        if run.scope_id:
+            queryset = queryset.filter(companie_id=run.scope_id)
+        return queryset
+
+    @classmethod
+    def _claim(cls, run_id) -> bool:
+        """Mark a run running unless it is completed or running in another worker"""
+        resumable = Q(status__in=['pending', 'failed']) | Q(
+            status='running', updated_at__lt=timezone.now() - cls.STALE_AFTER
+        )
+        return PriceRefreshRun.objects.filter(resumable, pk=run_id).update(
+            status='running', error='', started_at=timezone.now(), updated_at=timezone.now()
+        ) == 1
+
+    @classmethod
+    def run(cls, run_id) -> Optional[PriceRefreshRun]:
+        """
+        Run or resume a refresh.
+
+        Returns:
+            PriceRefreshRun: The run, None if it is completed or running elsewhere
+        """
+        if not cls._claim(run_id):
+            logger.info(f"[PRICE REFRESH] Run {run_id} is not resumable, skipped")
+            return None
+
+        run = PriceRefreshRun.objects.get(pk=run_id)
+        try:
+            async_to_sync(cls._refresh)(run)
+        except Exception as e:
+            logger.error(f"[PRICE REFRESH] Run {run.id} failed after {run.products_checked} products: {str(e)}")
+            PriceRefreshRun.objects.filter(pk=run.pk).update(status='failed', error=str(e), updated_at=timezone.now())
+            raise
+
+        run.status = 'completed'
+        run.finished_at = timezone.now()
+        run.save(update_fields=['status', 'finished_at', 'updated_at'])
+        logger.info(
+            f"[PRICE REFRESH] Run {run.id} completed: {run.products_checked} products, "
+            f"{run.prices_changed} prices and {run.descriptions_changed} descriptions changed, {run.errors} errors"
+        )
+        return run
+
+    @classmethod
+    async def _refresh(cls, run):
+        service = HomeDepotService()
+        semaphore = asyncio.Semaphore(cls.CONCURRENCY)
+        limiter = RateLimiter(cls.REQUESTS_PER_SECOND)
+
+        while True:
+            chunk = await sync_to_async(cls._next_chunk)(run)
+            if not chunk:
+                break
+            details = await asyncio.gather(*(cls._lookup(service, product, semaphore, limiter) for product in chunk))
+            await sync_to_async(cls._apply_chunk)(run, chunk, details)
+            if len(chunk) < cls.CHUNK_SIZE:
+                break
+
+    @classmethod
+    def _next_chunk(cls, run):
+        queryset = cls.products(run)
+        if run.cursor:
+            queryset = queryset.filter(pk__gt=run.cursor)
+        return list(queryset[:cls.CHUNK_SIZE])
+
+    @staticmethod
+    async def _lookup(service, product, semaphore, limiter):
+        """Details of a product, None when it could not be looked up"""
+        async with semaphore:
+            await limiter.wait()
+            try:
+                return await service.aget_product_by_id(
+                    product_id=product.in_store_id,
+                    store_id=product.supplier.store_number,
+                    delivery_zip=product.companie.zip_code if product.companie else None
+                )
+            except HomeDepotServiceException as e:
+                logger.warning(f"[PRICE REFRESH] Lookup of product {product.id} failed: {e.message}")
+                return None
+
+    @staticmethod
+    def _price(value) -> Optional[Decimal]:
+        if value is None:
+            return None
+        try:
+            return Decimal(str(value)).quantize(Decimal('0.01'))
+        except InvalidOperation:
+            return None
+
+    @classmethod
+    @transaction.atomic
+    def _apply_chunk(cls, run, chunk, details):
+        """Write the changes of a chunk and advance the run's cursor"""
+        changed, history, fields = [], [], set()
+        for product, detail in zip(chunk, details):
+            if not detail:
+                run.errors += 1
+                continue
+
+            updated = False
+            price = cls._price(detail.get('price'))
+            if price is not None and price != product.price:
+                history.append(ProductPriceHistory(
+                    product=product,
+                    old_price=product.price,
+                    new_price=price,
+                    source='home_depot',
+                    companie_id=product.companie_id
+                ))
+                product.price = price
+                fields.add('price')
+                updated = True
+
+            description = detail.get('description')
+            if description and description != product.description:
+                product.description = description
+                fields.add('description')
+                run.descriptions_changed += 1
+                updated = True
+
+            if updated:
+                changed.append(product)
+
+        if changed:
+            Product.objects.bulk_update_audited(changed, sorted(fields))
+        if history:
+            ProductPriceHistory.objects.bulk_create_audited(history)
+
+        run.products_checked += len(chunk)
+        run.prices_changed += len(history)
+        run.cursor = str(chunk[-1].pk)
+        run.save(update_fields=[
+            'cursor', 'products_checked', 'prices_changed', 'descriptions_changed', 'errors', 'updated_at'
+        ])
+
+        # bulk_update sends no post_save, invalidate the cached product responses here
+        for companie_id in {product.companie_id for product in changed}:
+            bump_tenant_generation(companie_id, 'product')
+        logger.info(f"[PRICE REFRESH] Run {run.id}: {len(chunk)} products checked, {len(changed)} changed")
@@ -0,0 +1,23 @@
+import logging
+from core.actor import get_user_companie_id
+from core.cache import register_tenant_cache
+from .models import Product, ProductSku, ProductInStoreID
+from ..brand.models import Brand
+from ..categories.models import Category
+from ..supplier.models import Supplier
+from apps.accounts.models import User
+from apps.companies.employeers.models import Employeer
+
+logger = logging.getLogger(__name__)
+
+# Product responses embed the SKUs, store ids, the brand, category and supplier names
+# and the names of the users who created and last updated the product, so a change
+# to any of them invalidates the company's cached product responses
+register_tenant_cache(Product, 'product')
+register_tenant_cache(ProductSku, 'product')
+register_tenant_cache(ProductInStoreID, 'product')
+register_tenant_cache(Brand, 'product')
+register_tenant_cache(Category, 'product')
+register_tenant_cache(Supplier, 'product')
+register_tenant_cache(Employeer, 'product')
+register_tenant_cache(User, 'product', companie_of=get_user_companie_id, fields=('first_name', 'last_name'))
@@ -0,0 +1,24 @@
+from celery import shared_task
+from core.actor import actor_context
+from .service.price_refresh import HomeDepotPriceRefreshService
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(
+    name='refresh_home_depot_prices',
+    queue='warehouse',
+    ignore_result=True,
+    autoretry_for=(Exception,),
+    max_retries=3,
+    retry_backoff=True
+)
+@actor_context
+def refresh_home_depot_prices(run_id):
+    """
+    Run a Home Depot price refresh. A retried run resumes after the last chunk it wrote.
+    """
+    run = HomeDepotPriceRefreshService.run(run_id)
+    if run is not None:
+        logger.info(f"[PRODUCT TASK] Price refresh {run_id} checked {run.products_checked} products")
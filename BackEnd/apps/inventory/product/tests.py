@@ -1,3 +1,104 @@
-from django.test import TestCase
+from decimal import Decimal
+from unittest.mock import patch
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from apps.companies.models import Companie
+from apps.inventory.supplier.models import Supplier
+from .models import Product, ProductInStoreID, ProductPriceHistory
+from .service.home_depot_service import HomeDepotService, HomeDepotServiceException
+from .service.price_refresh import HomeDepotPriceRefreshService
 
-# Create your tests here.
+
+@override_settings(SERPAPI_API_KEY='test-key')
+class HomeDepotPriceRefreshTests(TestCase):
+    """Tests for the batch refresh of the Home Depot prices"""
+
+    def setUp(self):
+        self.company = Companie.objects.create(name='Refresh Company', type='Headquarters', zip_code='33101')
+        self.home_depot = Supplier.objects.create(name='Home Depot', store_number='6312', companie=self.company)
+        other_supplier = Supplier.objects.create(name='Local Supplier', companie=self.company)
+
+        self.products = []
+        for index in range(7):
+            product = Product.objects.create(
+                name=f'Drywall Sheet {index}',
+                price=Decimal('10.00'),
+                supplier=self.home_depot,
+                companie=self.company
+            )
+            ProductInStoreID.objects.create(product=product, in_store_id=f'hd-{index}', companie=self.company)
+            self.products.append(product)
+        # Products missing the Home Depot supplier or a Home Depot id are not refreshed
+        Product.objects.create(name='Unlinked Sheet', price=Decimal('5.00'), supplier=self.home_depot, companie=self.company)
+        other = Product.objects.create(name='Local Sheet', price=Decimal('5.00'), supplier=other_supplier, companie=self.company)
+        ProductInStoreID.objects.create(product=other, in_store_id='hd-local', companie=self.company)
+
+        self.lookups = []
+
+    def details(self, fail_on=()):
+        async def aget_product_by_id(service, product_id, store_id=None, delivery_zip=None):
+            self.lookups.append(product_id)
+            if product_id in fail_on:
+                raise HomeDepotServiceException('Not found')
+            index = int(product_id.split('-')[1])
+            # Even products change price, product 3 gets a description
+            price = 12.5 if index % 2 == 0 else '$10.00'
+            return {'price': price, 'description': 'Moisture resistant' if index == 3 else None}
+        return patch.object(HomeDepotService, 'aget_product_by_id', aget_product_by_id)
+
+    def test_refresh_writes_changes_in_bulk(self):
+        run = HomeDepotPriceRefreshService.start_run(self.company.pk)
+
+        with self.details(fail_on={'hd-5'}), CaptureQueriesContext(connection) as queries:
+            HomeDepotPriceRefreshService.run(run.pk)
+
+        run.refresh_from_db()
+        self.assertEqual(
+            (run.status, run.products_checked, run.prices_changed, run.descriptions_changed, run.errors),
+            ('completed', 7, 4, 1, 1)
+        )
+        self.assertEqual(sorted(self.lookups), [f'hd-{index}' for index in range(7)])
+        self.assertEqual(
+            list(Product.objects.filter(pk__in=[p.pk for p in self.products]).order_by('name').values_list('price', flat=True)),
+            [Decimal('12.50'), Decimal('10.00')] * 3 + [Decimal('12.50')]
+        )
+        self.assertEqual(Product.objects.get(pk=self.products[3].pk).description, 'Moisture resistant')
+        history = ProductPriceHistory.objects.filter(product=self.products[0]).get()
+        self.assertEqual((history.old_price, history.new_price, history.companie_id), (Decimal('10.00'), Decimal('12.50'), self.company.pk))
+        updates = [query for query in queries.captured_queries if query['sql'].startswith('UPDATE "product_product"')]
+        self.assertEqual(len(updates), 1)
+
+    def test_failed_run_resumes_after_the_last_chunk(self):
+        run = HomeDepotPriceRefreshService.start_run()
+
+        with patch.object(HomeDepotPriceRefreshService, 'CHUNK_SIZE', 3), \
+             patch.object(HomeDepotPriceRefreshService, '_apply_chunk', side_effect=self._fail_second_chunk()), \
+             self.details():
+            with self.assertRaises(RuntimeError):
+                HomeDepotPriceRefreshService.run(run.pk)
+
+        run.refresh_from_db()
+        self.assertEqual((run.status, run.products_checked, run.error), ('failed', 3, 'Database unavailable'))
+        self.assertEqual(ProductPriceHistory.objects.count(), run.prices_changed)
+
+        self.lookups.clear()
+        with patch.object(HomeDepotPriceRefreshService, 'CHUNK_SIZE', 3), self.details():
+            HomeDepotPriceRefreshService.run(run.pk)
+
+        run.refresh_from_db()
+        self.assertEqual((run.status, run.products_checked, run.prices_changed), ('completed', 7, 4))
+        self.assertEqual(len(self.lookups), 4)
+        self.assertEqual(ProductPriceHistory.objects.count(), 4)
+        self.assertIsNone(HomeDepotPriceRefreshService.run(run.pk))
+
+    def _fail_second_chunk(self):
+        apply_chunk = HomeDepotPriceRefreshService._apply_chunk
+        calls = []
+
+        def side_effect(run, chunk, details):
+            calls.append(chunk)
+            if len(calls) == 2:
+                raise RuntimeError('Database unavailable')
+            return apply_chunk(run, chunk, details)
+        return side_effect
@@ -1,4 +1,5 @@
 from django.shortcuts import render
+from django.conf import settings
 from rest_framework import generics
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -7,10 +8,12 @@ from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from .service.product_services import ProductServices
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiTypes
+from core.cache import tenant_cache_response
 import logging
 
 from .models import Product
 from .serializers import ProductSerializer, HomeDepotActionResultSerializer
+from core.actor import get_employeer
 
 logger = logging.getLogger(__name__)
 
@@ -28,15 +31,14 @@ class ProductBaseView:
         """Get queryset filtered by user's company"""
         user = self.request.user
         try:
-            employeer = user.employeer
-            return self.queryset.select_related(
-                'companie',
-                'created_by',
-                'updated_by',
+            employeer = get_employeer(user)
+            return self.queryset.with_audit().select_related(
                 'brand',
-                'category'
+                'category',
+                'supplier'
             ).prefetch_related(
-                'skus'
+                'skus',
+                'store_ids'
             ).filter(companie=employeer.companie)
         except Product.DoesNotExist:
             return self.queryset.none()
@@ -53,6 +55,10 @@ class ProductListView(ProductBaseView, generics.ListAPIView):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
 
+    @tenant_cache_response(namespaces=['product'], timeout=settings.CACHE_TIMEOUTS['product'])
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
 @extend_schema_view(
     post=extend_schema(
         summary='Create a new product',
@@ -81,6 +87,10 @@ class ProductRetrieveView(ProductBaseView, generics.RetrieveAPIView):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
 
+    @tenant_cache_response(namespaces=['product'], timeout=settings.CACHE_TIMEOUTS['product'])
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
 @extend_schema_view(
     put=extend_schema(
         summary='Update a product',
@@ -1,13 +1,15 @@
 # apps/inventory/purchase_order/models.py
 
 from decimal import Decimal
-from django.db import models, transaction, IntegrityError
+from django.db import models, transaction
 from apps.inventory.product.models import Product
 from apps.inventory.supplier.models import Supplier
-from basemodels.models import BaseModel
+from basemodels.models import BaseModel, FieldTrackerMixin, tenant_indexes
+from basemodels.services.sequences import DocumentSequenceService
 from core.constants.choices import PURCHASE_ORDER_STATUS_CHOICES
+from core.actor import get_current_companie
 
-class PurchaseOrder(BaseModel):
+class PurchaseOrder(FieldTrackerMixin, BaseModel):
     """Purchase Order model for tracking product purchases from suppliers
     
     Fields:
@@ -69,10 +71,13 @@ class PurchaseOrder(BaseModel):
         default=0.00
     )
     
+    tracked_fields = ('supplier', 'status', 'expected_delivery', 'notes')
+
     class Meta:
         verbose_name = 'Purchase Order'
         verbose_name_plural = 'Purchase Orders'
         ordering = ['-created_at']
+        indexes = tenant_indexes('purchase_order', 'status')
         permissions = [
             ('can_approve_order', 'Can approve order'),
             ('can_reject_order', 'Can reject order'),
@@ -99,49 +104,32 @@ class PurchaseOrder(BaseModel):
         self.total = new_total
     
     def generate_unique_order_number(self):
-        """Generate a unique order number.
-        
-        This method attempts to create a unique 5-digit order number
-        by incrementing the last used number. It will retry up to 5 times
-        in case of conflicts.
+        """Allocate the next order number of the company.
         
-        Raises:
-            IntegrityError: If unable to generate a unique number after max retries
+        Numbers come from the company's purchase order DocumentSequence, so
+        creating orders only waits on other orders of the same company. They
+        are gapless because ``save`` allocates them in the transaction that
+        inserts the order.
         """
         if not self.order_number:
-            max_retries = 5
-            for attempt in range(max_retries):
-                try:
-                    with transaction.atomic():
-                        last_purchase_order = (
-                            PurchaseOrder.objects.select_for_update()
-                            .order_by("-order_number")
-                            .first()
-                        )
-                        if last_purchase_order and last_purchase_order.order_number:
-                            try:
-                                last_number = int(last_purchase_order.order_number)
-                            except ValueError:
-                                last_number = 0
-                        else:
-                            last_number = 0
-                        new_number = last_number + 1
-                        self.order_number = f"{new_number:05d}"
-                except IntegrityError:
-                    continue
-                break
-            else:
-                raise IntegrityError("Unable to generate a unique order number after max retries")
+            self.order_number = DocumentSequenceService.next_number(
+                self.companie_id, 'purchase_order', existing=PurchaseOrder.objects.all()
+            )
+        return self.order_number
     
     def save(self, *args, **kwargs):
         """Save the purchase order.
         
-        This method generates a unique order number if not provided.
+        This method generates a unique order number if not provided. Orders
+        saved without a company belong to the company of the acting employeer.
         """
-        self.generate_unique_order_number()
-        super().save(*args, **kwargs)
+        if not self.companie_id:
+            self.companie = get_current_companie()
+        with transaction.atomic():
+            self.generate_unique_order_number()
+            super().save(*args, **kwargs)
 
-class PurchaseOrderItem(BaseModel):
+class PurchaseOrderItem(FieldTrackerMixin, BaseModel):
     """Purchase Order Item for tracking individual products and their prices"""
     
     purchase_order = models.ForeignKey(
@@ -166,10 +154,13 @@ class PurchaseOrderItem(BaseModel):
         help_text='Agreed price per unit'
     )
     
+    tracked_fields = ('quantity', 'unit_price')
+
     class Meta:
         verbose_name = 'Purchase Order Item'
         verbose_name_plural = 'Purchase Order Items'
         ordering = ['purchase_order', 'created_at']
+        indexes = tenant_indexes('purchase_order_item')
     
     def __str__(self):
         return f"{self.product.name} x {self.quantity} @ ${self.unit_price}"
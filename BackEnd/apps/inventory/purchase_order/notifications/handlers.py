@@ -65,8 +65,7 @@ class PurchaseOrderNotificationHandler(BaseNotificationHandler):
                 order = PurchaseOrder.objects.get(pk=instance.pk)
                 
                 handler = PurchaseOrderNotificationHandler()
-                recipients = handler.get_recipients_by_type(*RECIPIENT_TYPES['ORDER'])
-                recipient_ids = [str(user.id) for user in recipients]
+                recipient_ids = handler.get_recipient_ids(*RECIPIENT_TYPES['ORDER'], companie=order.companie_id)
                 
                 data = {
                     'type': SEVERITY_TYPES['INFO'],
@@ -110,25 +109,13 @@ class PurchaseOrderNotificationHandler(BaseNotificationHandler):
             return
             
         try:
-            # Check if any field changed besides total
-            old_instance = sender.objects.get(pk=instance.pk)
-            if (old_instance.supplier_id == instance.supplier_id and 
-                old_instance.status == instance.status and
-                old_instance.expected_delivery == instance.expected_delivery and
-                old_instance.notes == instance.notes and
-                old_instance.total == instance.total):
-                return
-            
-            # If only total changed, don't notify (already notified on item change)
-            if (old_instance.supplier_id == instance.supplier_id and 
-                old_instance.status == instance.status and
-                old_instance.expected_delivery == instance.expected_delivery and
-                old_instance.notes == instance.notes):
+            # Only total changed, or nothing: item changes already notified it.
+            # Status changes are notified by notify_order_status_changed.
+            if not any(instance.has_changed(field) for field in ('supplier', 'expected_delivery', 'notes')):
                 return
             
             handler = PurchaseOrderNotificationHandler()
-            recipients = handler.get_recipients_by_type(*RECIPIENT_TYPES['ORDER'])
-            recipient_ids = [str(user.id) for user in recipients]
+            recipient_ids = handler.get_recipient_ids(*RECIPIENT_TYPES['ORDER'], companie=instance.companie_id)
             
             data = {
                 'type': SEVERITY_TYPES['INFO'],
@@ -163,30 +150,29 @@ class PurchaseOrderNotificationHandler(BaseNotificationHandler):
         Notifies about the change of order status.
         Automatically called before saving a PurchaseOrder.
         """
-        if not instance.pk:
+        if instance._state.adding:
             return
             
         try:
-            old_instance = sender.objects.get(pk=instance.pk)
-            if old_instance.status == instance.status:
+            if not instance.has_changed('status'):
                 return
+            old_status = instance.previous('status')
             
             handler = PurchaseOrderNotificationHandler()
-            recipients = handler.get_recipients_by_type(*RECIPIENT_TYPES['ORDER'])
-            recipient_ids = [str(user.id) for user in recipients]
+            recipient_ids = handler.get_recipient_ids(*RECIPIENT_TYPES['ORDER'], companie=instance.companie_id)
             
             data = {
                 'type': SEVERITY_TYPES['INFO'],
                 'order_id': str(instance.id),
                 'order_number': instance.order_number,
                 'supplier': instance.supplier.name,
-                'old_status': old_instance.status,
+                'old_status': old_status,
                 'new_status': instance.status
             }
             
             message = NOTIFICATION_MESSAGES[NOTIFICATION_TYPE['ORDER_STATUS_CHANGED']] % {
                 'order_number': instance.order_number,
-                'old_status': old_instance.status,
+                'old_status': old_status,
                 'new_status': instance.status
             }
             
@@ -234,8 +220,7 @@ class PurchaseOrderNotificationHandler(BaseNotificationHandler):
                     return
                 
                 handler = PurchaseOrderNotificationHandler()
-                recipients = handler.get_recipients_by_type(*RECIPIENT_TYPES['ITEM'])
-                recipient_ids = [str(user.id) for user in recipients]
+                recipient_ids = handler.get_recipient_ids(*RECIPIENT_TYPES['ITEM'], companie=item.purchase_order.companie_id)
                 
                 data = {
                     'type': SEVERITY_TYPES['INFO'],
@@ -278,13 +263,12 @@ class PurchaseOrderNotificationHandler(BaseNotificationHandler):
         Notifies about changes in item quantity and price.
         Automatically called before saving a PurchaseOrderItem.
         """
-        if not instance.pk:  # If it's a new item, don't check changes
+        if instance._state.adding:  # If it's a new item, don't check changes
             return
             
         try:
             handler = PurchaseOrderNotificationHandler()
-            old_instance = sender.objects.get(pk=instance.pk)
-            changes = PurchaseOrderItemChangeService.check_changes(instance, old_instance)
+            changes = PurchaseOrderItemChangeService.check_changes(instance)
             
             if not (changes['quantity_changed'] or changes['price_changed']):
                 return
@@ -302,8 +286,7 @@ class PurchaseOrderNotificationHandler(BaseNotificationHandler):
             
             # Notify quantity change
             if changes['quantity_changed']:
-                recipients = handler.get_recipients_by_type(*RECIPIENT_TYPES['ITEM'])
-                recipient_ids = [str(user.id) for user in recipients]
+                recipient_ids = handler.get_recipient_ids(*RECIPIENT_TYPES['ITEM'], companie=order.companie_id)
                 
                 data = {
                     'type': SEVERITY_TYPES['INFO'],
@@ -335,8 +318,7 @@ class PurchaseOrderNotificationHandler(BaseNotificationHandler):
             
             # Notify price change
             if changes['price_changed']:
-                recipients = handler.get_recipients_by_type(*RECIPIENT_TYPES['PRICE'])
-                recipient_ids = [str(user.id) for user in recipients]
+                recipient_ids = handler.get_recipient_ids(*RECIPIENT_TYPES['PRICE'], companie=order.companie_id)
                 
                 data = {
                     'type': SEVERITY_TYPES['INFO'],
@@ -391,8 +373,7 @@ class PurchaseOrderNotificationHandler(BaseNotificationHandler):
         """
         try:
             handler = PurchaseOrderNotificationHandler()
-            recipients = handler.get_recipients_by_type(*RECIPIENT_TYPES['ORDER'])
-            recipient_ids = [str(user.id) for user in recipients]
+            recipient_ids = handler.get_recipient_ids(*RECIPIENT_TYPES['ORDER'], companie=instance.companie_id)
             
             data = {
                 'type': SEVERITY_TYPES['WARNING'],
@@ -438,8 +419,7 @@ class PurchaseOrderNotificationHandler(BaseNotificationHandler):
                 return
             
             handler = PurchaseOrderNotificationHandler()
-            recipients = handler.get_recipients_by_type(*RECIPIENT_TYPES['ITEM'])
-            recipient_ids = [str(user.id) for user in recipients]
+            recipient_ids = handler.get_recipient_ids(*RECIPIENT_TYPES['ITEM'], companie=instance.purchase_order.companie_id)
             
             data = {
                 'type': SEVERITY_TYPES['WARNING'],
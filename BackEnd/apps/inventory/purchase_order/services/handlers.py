@@ -219,13 +219,14 @@ class PurchaseOrderItemChangeService:
     """Service for handling changes in purchase order items"""
     
     @staticmethod
-    def check_changes(new_instance, old_instance):
+    def check_changes(new_instance, old_instance=None):
         """
         Check for changes in quantity or price and return the changes detected
         
         Args:
             new_instance: The new PurchaseOrderItem instance being saved
-            old_instance: The existing PurchaseOrderItem instance from the database
+            old_instance: The existing PurchaseOrderItem instance from the database,
+                defaults to the database values tracked by new_instance
             
         Returns:
             dict: Dictionary containing the changes detected:
@@ -242,17 +243,21 @@ class PurchaseOrderItemChangeService:
             'quantity_changed': False,
             'price_changed': False
         }
+        if old_instance is not None:
+            old_quantity, old_price = old_instance.quantity, old_instance.unit_price
+        else:
+            old_quantity, old_price = new_instance.previous('quantity'), new_instance.previous('unit_price')
         
         # Check if the quantity has changed
-        if old_instance.quantity != new_instance.quantity:
+        if old_quantity != new_instance.quantity:
             changes['quantity_changed'] = True
-            changes['old_quantity'] = old_instance.quantity
+            changes['old_quantity'] = old_quantity
             changes['new_quantity'] = new_instance.quantity
         
         # Check if the price has changed
-        if old_instance.unit_price != new_instance.unit_price:
+        if old_price != new_instance.unit_price:
             changes['price_changed'] = True
-            changes['old_price'] = old_instance.unit_price
+            changes['old_price'] = old_price
             changes['new_price'] = new_instance.unit_price
         
         return changes
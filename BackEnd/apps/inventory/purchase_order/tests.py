@@ -416,6 +416,10 @@ class PurchaseOrderAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(PurchaseOrder.objects.count(), 1)
         self.assertEqual(PurchaseOrderItem.objects.count(), 1)
+        # The order belongs to the creator's company, which numbers it
+        order = PurchaseOrder.objects.get()
+        self.assertEqual(order.companie, self.company)
+        self.assertEqual(order.order_number, '00001')
     
     def test_list_orders(self):
         """Test listing orders via API"""
@@ -2,6 +2,7 @@ from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import ValidationError
+from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter, OpenApiTypes
 from .models import PurchaseOrder, PurchaseOrderItem
@@ -9,6 +10,7 @@ from .serializers import PurchaseOrderSerializer
 from .services.handlers import PurchaseOrderService, PurchaseOrderItemService
 from .services.validators import PurchaseOrderValidator
 import logging
+from core.actor import get_employeer
 
 logger = logging.getLogger(__name__)
 
@@ -31,8 +33,8 @@ class PurchaseOrderBaseView:
             return self.queryset.none()
     
         try:
-            employeer = user.employeer
-        except AttributeError:
+            employeer = get_employeer(user)
+        except (AttributeError, ObjectDoesNotExist):
             logger.warning(f"User {user.email} has no associated employeer")
             return self.queryset.none()
 
@@ -41,11 +43,8 @@ class PurchaseOrderBaseView:
             logger.warning(f"User {user.email}'s employeer has no associated company")
             return self.queryset.none()
 
-        return self.queryset.select_related(
-            'companie',
-            'supplier',
-            'created_by',
-            'updated_by'
+        return self.queryset.with_audit().select_related(
+            'supplier'
         ).prefetch_related(
             'items',
             'items__product'
@@ -60,7 +59,7 @@ class PurchaseOrderBaseView:
         description='Retrieve a list of all purchase orders for authenticated user'
     )
 )
-class PurchaseOrderListView(generics.ListAPIView, PurchaseOrderBaseView):
+class PurchaseOrderListView(PurchaseOrderBaseView, generics.ListAPIView):
     """List all purchase orders
     
     Returns a list of purchase orders that belong to the user's company.
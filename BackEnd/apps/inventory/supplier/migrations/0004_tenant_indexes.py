@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-16 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('supplier', '0003_alter_supplier_country'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='supplier',
+            index=models.Index(fields=['companie', '-created_at'], name='supplier_tenant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='supplierproductprice',
+            index=models.Index(fields=['companie', '-created_at'], name='supplier_price_tenant_idx'),
+        ),
+    ]
@@ -1,5 +1,5 @@
 from django.db import models
-from basemodels.models import BaseAddressWithBaseModel, BaseModel
+from basemodels.models import BaseAddressWithBaseModel, BaseModel, tenant_indexes
 from apps.inventory.product.models import Product
 
 class Supplier(BaseAddressWithBaseModel):
@@ -39,6 +39,7 @@ class Supplier(BaseAddressWithBaseModel):
         verbose_name = 'Supplier'
         verbose_name_plural = 'Suppliers'
         ordering = ['-created_at']
+        indexes = tenant_indexes('supplier')
         
     @property
     def full_address_display(self):
@@ -99,7 +100,7 @@ class SupplierProductPrice(BaseModel):
         verbose_name = 'Supplier Product Price'
         verbose_name_plural = 'Supplier Product Prices'
         ordering = ['-created_at']
-        indexes = [
+        indexes = tenant_indexes('supplier_price') + [
             models.Index(fields=['supplier', 'product', 'is_current'])  # Índice composto para melhor performance
         ]
     
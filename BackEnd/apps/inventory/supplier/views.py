@@ -6,6 +6,7 @@ import logging
 
 from .models import Supplier
 from .serializers import SupplierSerializer
+from core.actor import get_employeer
 
 logger = logging.getLogger(__name__)
 
@@ -23,11 +24,8 @@ class SupplierBaseView:
         """Get queryset filtered by user's company"""
         user = self.request.user
         try:
-            employeer = user.employeer
-            return self.queryset.select_related(
-                'companie',
-                'created_by'
-            ).prefetch_related(
+            employeer = get_employeer(user)
+            return self.queryset.with_audit().prefetch_related(
                 'product_prices__product'
             ).filter(companie=employeer.companie)
         except Supplier.DoesNotExist:
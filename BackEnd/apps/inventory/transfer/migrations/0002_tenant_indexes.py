@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-16 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transfer', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transfer',
+            index=models.Index(fields=['companie', '-created_at'], name='transfer_tenant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transfer',
+            index=models.Index(fields=['companie', 'status', '-created_at'], name='transfer_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transferitems',
+            index=models.Index(fields=['companie', '-created_at'], name='transfer_items_tenant_idx'),
+        ),
+    ]
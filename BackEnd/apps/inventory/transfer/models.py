@@ -1,6 +1,6 @@
 from django.db import models
 from ..warehouse.models import Warehouse
-from basemodels.models import BaseModel
+from basemodels.models import BaseModel, FieldTrackerMixin, tenant_indexes
 from ..product.models import Product
 from core.constants.choices import MOVEMENTS_STATUS_CHOICES
 
@@ -48,6 +48,7 @@ class Transfer(BaseModel):
         verbose_name = 'Transfer'
         verbose_name_plural = 'Transfers'
         ordering = ['-created_at']
+        indexes = tenant_indexes('transfer', 'status')
         
     def __str__(self):
         return str(self.id)
@@ -56,7 +57,7 @@ class Transfer(BaseModel):
     def type(self) -> str:
         return "Transfer"
     
-class TransferItems(BaseModel):
+class TransferItems(FieldTrackerMixin, BaseModel):
     """Transfer Items model is responsible for storing the each product that is part of a transfer
     
     Fields:
@@ -83,7 +84,10 @@ class TransferItems(BaseModel):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='transfer_items', help_text='the products that are coming into stock')
     quantity = models.PositiveIntegerField(default=0, help_text='The quantity of that will be transfered')
     
+    tracked_fields = ('quantity',)
+
     class Meta:
         verbose_name = 'Transfer Item'
         verbose_name_plural = 'Transfer Items'
-        ordering = ['-created_at']
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = tenant_indexes('transfer_items')
\ No newline at end of file
@@ -27,8 +27,7 @@ class TransferNotificationHandler(BaseNotificationHandler):
             return
             
         try:
-            recipients = cls.get_recipients_by_type(*RECIPIENT_TYPES['DEFAULT'])
-            recipient_ids = [str(user.id) for user in recipients]
+            recipient_ids = cls.get_recipient_ids(*RECIPIENT_TYPES['DEFAULT'], companie=instance.companie_id)
             
             # Get total quantity from transfer items
             total_quantity = sum(item.quantity for item in instance.items.all())
@@ -70,8 +69,7 @@ class TransferNotificationHandler(BaseNotificationHandler):
         """Notifica sobre aprovação de transferência."""
         try:
             if not recipient_ids:
-                recipients = cls.get_recipients_by_type(*RECIPIENT_TYPES['DEFAULT'])
-                recipient_ids = [str(user.id) for user in recipients]
+                recipient_ids = cls.get_recipient_ids(*RECIPIENT_TYPES['DEFAULT'], companie=transfer.companie_id)
             
             # Get total quantity from transfer items
             total_quantity = sum(item.quantity for item in transfer.items.all())
@@ -92,7 +90,7 @@ class TransferNotificationHandler(BaseNotificationHandler):
             if transfer.items.count() > 1:
                 product_info += f" and {transfer.items.count() - 1} other products"
             
-            cls.send_notification(
+            cls.send_to_recipients(
                 title=NOTIFICATION_TITLES['TRANSFER_APPROVED'],
                 message=NOTIFICATION_MESSAGES['TRANSFER_APPROVED'].format(
                     product_info=product_info,
@@ -115,8 +113,7 @@ class TransferNotificationHandler(BaseNotificationHandler):
         """Notifica sobre rejeição de transferência."""
         try:
             if recipient_ids is None:
-                recipients = cls.get_recipients_by_type(*RECIPIENT_TYPES['DEFAULT'])
-                recipient_ids = [str(user.id) for user in recipients]
+                recipient_ids = cls.get_recipient_ids(*RECIPIENT_TYPES['DEFAULT'], companie=transfer.companie_id)
             
             total_quantity = sum(item.quantity for item in transfer.items.all())
             first_item = transfer.items.first()
@@ -161,8 +158,7 @@ class TransferNotificationHandler(BaseNotificationHandler):
         """Notifica sobre conclusão de transferência."""
         try:
             if recipient_ids is None:
-                recipients = cls.get_recipients_by_type(*RECIPIENT_TYPES['WAREHOUSE'])
-                recipient_ids = [str(user.id) for user in recipients]
+                recipient_ids = cls.get_recipient_ids(*RECIPIENT_TYPES['WAREHOUSE'], companie=transfer.companie_id)
             
             total_quantity = sum(item.quantity for item in transfer.items.all())
             first_item = transfer.items.first()
@@ -1,9 +1,11 @@
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from django.core.exceptions import ValidationError as DjangoValidationError
 from .models import Transfer, TransferItems
 from django.db import transaction
 from ..warehouse.models import Warehouse
 from ..product.models import Product
+from ..movements.services.items import MovementItemsService
 import logging
 
 logger = logging.getLogger(__name__)
@@ -200,16 +202,18 @@ class TransferSerializer(serializers.ModelSerializer):
                 logger.error("Item missing quantity field")
                 raise ValidationError("Each item must have a quantity")
                 
-            try:
-                product = Product.objects.get(id=item['product'])
-                item['product'] = product
-            except Product.DoesNotExist:
-                logger.error(f"Product with id {item['product']} not found")
-                raise ValidationError(f"Product with id {item['product']} does not exist")
-                
             if not isinstance(item['quantity'], int) or item['quantity'] < 1:
                 logger.error(f"Invalid quantity: {item['quantity']}")
                 raise ValidationError("Quantity must be a positive integer")
+        
+        # Fetch every product of the transfer at once
+        try:
+            products = MovementItemsService.resolve_products(items_data)
+        except DjangoValidationError as e:
+            logger.error(f"Invalid transfer products: {e.messages[0]}")
+            raise ValidationError(e.messages[0])
+        for item in items_data:
+            item['product'] = products[Product._meta.pk.to_python(getattr(item['product'], 'pk', item['product']))]
             
         return data
     
@@ -234,21 +238,12 @@ class TransferSerializer(serializers.ModelSerializer):
         # Create transfer instance
         transfer = Transfer.objects.create(**validated_data)
         
-        # Create transfer items individually to trigger signals
-        for item_data in items_data:
-            try:
-                TransferItems.objects.create(
-                    transfer=transfer,
-                    product=item_data['product'],
-                    quantity=item_data['quantity'],
-                    companie=transfer.companie,
-                    created_by=transfer.created_by,
-                    updated_by=transfer.updated_by
-                )
-                logger.info(f"Created transfer item: {item_data['quantity']} units of {item_data['product']}")
-            except Exception as e:
-                logger.error(f"Error creating transfer item: {str(e)}")
-                raise ValidationError(f"Error creating transfer item: {str(e)}")
+        # Create transfer items in bulk, moving their stock in a single posting
+        try:
+            MovementItemsService.create_items(transfer, items_data)
+        except DjangoValidationError as e:
+            logger.error(f"Error creating transfer items: {str(e)}")
+            raise ValidationError(f"Error creating transfer item: {str(e)}")
         
         logger.info(f"Transfer {transfer.id} created successfully")
         return transfer
@@ -283,21 +278,12 @@ class TransferSerializer(serializers.ModelSerializer):
             logger.info(f"Deleting existing items for transfer {instance.id}")
             instance.items.all().delete()
             
-            # Create new items individually to trigger signals
-            for item_data in items_data:
-                try:
-                    TransferItems.objects.create(
-                        transfer=instance,
-                        product=item_data['product'],
-                        quantity=item_data['quantity'],
-                        companie=instance.companie,
-                        created_by=instance.created_by,
-                        updated_by=instance.updated_by
-                    )
-                    logger.info(f"Created new transfer item: {item_data['quantity']} units of {item_data['product']}")
-                except Exception as e:
-                    logger.error(f"Error creating transfer item: {str(e)}")
-                    raise ValidationError(f"Error creating transfer item: {str(e)}")
+            # Create new items in bulk, moving their stock in a single posting
+            try:
+                MovementItemsService.create_items(instance, items_data)
+            except DjangoValidationError as e:
+                logger.error(f"Error creating transfer items: {str(e)}")
+                raise ValidationError(f"Error creating transfer item: {str(e)}")
         
         logger.info(f"Transfer {instance.id} updated successfully")
         return instance
\ No newline at end of file
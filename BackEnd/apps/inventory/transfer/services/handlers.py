@@ -1,7 +1,9 @@
 from django.db import transaction
 import logging
 from .validators import TransferBusinessValidator
-from ..models import Transfer, TransferItems
+from ..models import Transfer
+from ...movements.services.items import MovementItemsService
+from core.actor import get_employeer
 
 logger = logging.getLogger(__name__)
 
@@ -19,27 +21,21 @@ class TransferService:
         # Validate different warehouses
         self.validator.validate_different_warehouses(data)
         
+        employeer = get_employeer(user)
+
         # Create transfer with transaction
         with transaction.atomic():
             transfer = Transfer.objects.create(
                 origin=data['origin'],
                 destiny=data['destiny'],
                 status='pending',
-                companie=user.employeer.companie,
-                created_by=user.employeer,
-                updated_by=user.employeer
+                companie=employeer.companie,
+                created_by=employeer,
+                updated_by=employeer
             )
             
             # Create transfer items
-            for item_data in data['items_data']:
-                TransferItems.objects.create(
-                    transfer=transfer,
-                    product=item_data['product'],
-                    quantity=item_data['quantity'],
-                    companie=user.employeer.companie,
-                    created_by=user.employeer,
-                    updated_by=user.employeer
-                )
+            MovementItemsService.create_items(transfer, data['items_data'], employeer=employeer)
             
             logger.info(f"[Transfer Service] Transfer created successfully", extra={'transfer_id': transfer.id})
             return transfer
@@ -55,26 +51,20 @@ class TransferService:
         # Validate different warehouses
         self.validator.validate_different_warehouses(data)
         
+        employeer = get_employeer(user)
+
         # Update transfer with transaction
         with transaction.atomic():
             transfer.origin = data['origin']
             transfer.destiny = data['destiny']
-            transfer.updated_by = user.employeer
+            transfer.updated_by = employeer
             transfer.save()
             
             # Delete existing items
             transfer.items.all().delete()
             
             # Create new items
-            for item_data in data['items_data']:
-                TransferItems.objects.create(
-                    transfer=transfer,
-                    product=item_data['product'],
-                    quantity=item_data['quantity'],
-                    companie=user.employeer.companie,
-                    created_by=user.employeer,
-                    updated_by=user.employeer
-                )
+            MovementItemsService.create_items(transfer, data['items_data'], employeer=employeer)
             
             logger.info(f"[Transfer Service] Transfer updated successfully", extra={'transfer_id': transfer.id})
             return transfer
@@ -90,7 +80,7 @@ class TransferService:
         # Approve transfer
         with transaction.atomic():
             transfer.status = 'approved'
-            transfer.updated_by = user.employeer
+            transfer.updated_by = get_employeer(user)
             transfer.save()
             
             logger.info(f"[Transfer Service] Transfer approved successfully", extra={'transfer_id': transfer.id})
@@ -107,7 +97,7 @@ class TransferService:
         # Reject transfer
         transfer.status = 'rejected'
         transfer.rejection_reason = rejection_reason
-        transfer.updated_by = user.employeer
+        transfer.updated_by = get_employeer(user)
         transfer.save()
         
         logger.info(f"[Transfer Service] Transfer rejected successfully", extra={'transfer_id': transfer.id})
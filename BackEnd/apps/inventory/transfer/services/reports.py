@@ -0,0 +1,36 @@
+from django.utils import timezone
+from datetime import timedelta
+from ...warehouse.services.rollup import MovementRollupService
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TransferReportService:
+    """Service for generating transfer reports from the daily movement rollup"""
+    
+    @staticmethod
+    def generate_daily_report(start_date=None, end_date=None, companie=None):
+        """
+        Generate the report of the stock transferred between the company's warehouses
+        
+        Quantities are the ones received by the destiny warehouses, the warehouses
+        of the report are the receiving ones.
+        
+        Args:
+            start_date (date): First day of the report, defaults to 7 days ago
+            end_date (date): Last day of the report, defaults to today
+            companie: Company of the report (instance or pk)
+            
+        Returns:
+            dict: Report with period, summary, daily totals, warehouses and products
+        """
+        if not end_date:
+            end_date = timezone.now().date()
+        if not start_date:
+            start_date = end_date - timedelta(days=6)
+        
+        report = MovementRollupService.movement_report(
+            'transfer', start_date, end_date, companie=companie, direction=1
+        )
+        logger.info(f"[TRANSFER REPORTS] Generated daily report from {start_date} to {end_date}")
+        return report
@@ -1,6 +1,8 @@
 from django.core.exceptions import ValidationError
 from ..models import Transfer, TransferItems
+from ...warehouse.models import WarehouseProduct
 import logging
+from core.actor import get_employeer
 
 logger = logging.getLogger(__name__)
 
@@ -10,7 +12,7 @@ class TransferBusinessValidator:
     @staticmethod
     def validate_company_access(data, user):
         """Validate company access permissions"""
-        user_company = user.employeer.companie
+        user_company = get_employeer(user).companie
         
         # Validate origin warehouse
         if data.get('origin') and data['origin'].companie != user_company:
@@ -38,6 +40,39 @@ class TransferBusinessValidator:
             
         logger.debug("[Transfer Validator] Different warehouses validated")
     
+    @staticmethod
+    def validate_origin_quantities(origin, quantities):
+        """
+        Validate that the origin warehouse holds the quantities moved out of it.
+
+        The available quantities are read with one query and nothing is
+        written, products without a WarehouseProduct row have none available.
+
+        Args:
+            origin: The origin Warehouse
+            quantities (dict): Quantity moved out per product pk
+        """
+        requested = {product_id: quantity for product_id, quantity in quantities.items() if quantity > 0}
+        if not requested:
+            return
+
+        available = dict(
+            WarehouseProduct.objects.filter(warehouse=origin, product__in=requested.keys())
+            .values_list('product_id', 'current_quantity')
+        )
+        for product_id, quantity in requested.items():
+            if available.get(product_id, 0) < quantity:
+                logger.error(
+                    f"[Transfer Validator] Insufficient quantity of product {product_id} in origin warehouse. "
+                    f"Available: {available.get(product_id, 0)}, Requested: {quantity}"
+                )
+                raise ValidationError(
+                    f"Insufficient quantity in origin warehouse. "
+                    f"Available: {available.get(product_id, 0)}, Requested: {quantity}"
+                )
+
+        logger.debug("[Transfer Validator] Origin quantities validated")
+
     @staticmethod
     def validate_transfer_items(transfer):
         """Validate transfer items"""
@@ -4,8 +4,8 @@ from django.dispatch import receiver
 from django.db import transaction
 from django.core.exceptions import ValidationError
 from .models import TransferItems
-from ..product.models import Product
-from ..warehouse.models import WarehouseProduct
+from ..warehouse.services.posting import StockPostingService
+from .services.validators import TransferBusinessValidator
 
 logger = logging.getLogger(__name__)
 
@@ -21,33 +21,11 @@ def validate_transfer_quantities(sender, instance, **kwargs):
             if not all([product, origin_warehouse, destiny_warehouse]):
                 raise ValidationError("Missing product or warehouse information")
 
-            # Get or create WarehouseProduct for origin
-            origin_warehouse_product, _ = WarehouseProduct.objects.get_or_create(
-                warehouse=origin_warehouse,
-                product=product,
-                defaults={'current_quantity': 0}
-            )
-
             # Calculate quantity change
-            if not instance.pk:  # New instance
-                quantity_change = instance.quantity
-            else:
-                try:
-                    previous = TransferItems.objects.get(pk=instance.pk)
-                    quantity_change = instance.quantity - previous.quantity
-                except TransferItems.DoesNotExist:
-                    quantity_change = instance.quantity
+            quantity_change = instance.quantity - (instance.previous('quantity') or 0)
 
-            # Validate origin warehouse has enough quantity
-            if not instance.pk:  # For new transfers, check total quantity
-                if origin_warehouse_product.current_quantity < quantity_change:
-                    logger.error(f"Insufficient quantity in origin warehouse. Available: {origin_warehouse_product.current_quantity}, Requested: {quantity_change}")
-                    raise ValidationError(f"Insufficient quantity in origin warehouse. Available: {origin_warehouse_product.current_quantity}, Requested: {quantity_change}")
-            else:  # For updates, check if the change would make quantity negative
-                projected_origin_quantity = origin_warehouse_product.current_quantity - quantity_change
-                if projected_origin_quantity < 0:
-                    logger.error(f"Insufficient quantity in origin warehouse. Available: {origin_warehouse_product.current_quantity}, Requested change: {quantity_change}")
-                    raise ValidationError(f"Insufficient quantity in origin warehouse. Available: {origin_warehouse_product.current_quantity}, Requested change: {quantity_change}")
+            # Validate origin warehouse has enough quantity, without creating its row
+            TransferBusinessValidator.validate_origin_quantities(origin_warehouse, {product.pk: quantity_change})
 
             # Validate destiny warehouse capacity
             if destiny_warehouse.limit > 0:  # Only check if limit is set
@@ -77,16 +55,6 @@ def validate_transfer_quantities(sender, instance, **kwargs):
             logger.error(f"Error validating transfer quantities: {str(e)}")
             raise ValidationError(f"Error validating transfer quantities: {str(e)}")
 
-@receiver(pre_save, sender=TransferItems)
-def store_previous_quantity(sender, instance, **kwargs):
-    """Store previous quantity before saving"""
-    if instance.pk:  # Only for updates
-        try:
-            previous = TransferItems.objects.get(pk=instance.pk)
-            instance._previous_quantity = previous.quantity
-        except TransferItems.DoesNotExist:
-            instance._previous_quantity = 0
-
 @receiver(post_save, sender=TransferItems)
 def update_quantities_on_transfer(sender, instance, created, **kwargs):
     with transaction.atomic():
@@ -99,50 +67,24 @@ def update_quantities_on_transfer(sender, instance, created, **kwargs):
                 logger.warning(f"TransferItems ID {instance.id} has missing product or warehouses.")
                 return
             
-            # Get or create WarehouseProduct for origin and destiny
-            origin_warehouse_product, _ = WarehouseProduct.objects.get_or_create(
-                warehouse=origin_warehouse,
-                product=product,
-                defaults={'current_quantity': 0}
-            )
-            
-            destiny_warehouse_product, _ = WarehouseProduct.objects.get_or_create(
-                warehouse=destiny_warehouse,
-                product=product,
-                defaults={'current_quantity': 0}
-            )
-            
             # Calculate quantity change
-            if created:
-                quantity_change = instance.quantity
-            else:
-                quantity_change = instance.quantity - getattr(instance, '_previous_quantity', 0)
-            
-            # Update WarehouseProduct quantities
-            origin_warehouse_product.current_quantity -= quantity_change
-            destiny_warehouse_product.current_quantity += quantity_change
-            
-            # Final validation check
-            if origin_warehouse_product.current_quantity < 0:
-                raise ValidationError("Origin warehouse product quantity cannot be negative")
-                
-            if destiny_warehouse_product.current_quantity < 0:
-                raise ValidationError("Destiny warehouse product quantity cannot be negative")
+            quantity_change = instance.quantity - (instance.previous('quantity') or 0)
             
-            # Save WarehouseProduct changes
-            origin_warehouse_product.save()
-            destiny_warehouse_product.save()
-            
-            # Update Warehouse total quantities
-            origin_warehouse.update_total_quantity()
-            destiny_warehouse.update_total_quantity()
+            # Move the quantity between warehouses in a single posting
+            StockPostingService.post(
+                [
+                    (origin_warehouse, product, -quantity_change, instance.pk),
+                    (destiny_warehouse, product, quantity_change, instance.pk),
+                ],
+                employeer=instance.updated_by_id,
+                movement_type='transfer',
+                document_id=instance.transfer_id
+            )
             
             logger.info(
                 f"Updated quantities for transfer item {instance.id}. "
-                f"Origin warehouse ({origin_warehouse.name}) quantity: {origin_warehouse_product.current_quantity}, "
-                f"Origin warehouse total: {origin_warehouse.quantity}, "
-                f"Destiny warehouse ({destiny_warehouse.name}) quantity: {destiny_warehouse_product.current_quantity}, "
-                f"Destiny warehouse total: {destiny_warehouse.quantity}"
+                f"Moved {quantity_change} of product {product} "
+                f"from {origin_warehouse.name} to {destiny_warehouse.name}"
             )
             
         except Exception as e:
@@ -161,44 +103,21 @@ def restore_quantities_on_transfer_delete(sender, instance, **kwargs):
                 logger.warning(f"TransferItems ID {instance.id} has missing product or warehouses.")
                 return
 
-            # Get WarehouseProducts
-            try:
-                origin_warehouse_product = WarehouseProduct.objects.get(
-                    warehouse=origin_warehouse,
-                    product=product
-                )
-                destiny_warehouse_product = WarehouseProduct.objects.get(
-                    warehouse=destiny_warehouse,
-                    product=product
-                )
-                
-                # Restore quantities
-                origin_warehouse_product.current_quantity += instance.quantity
-                destiny_warehouse_product.current_quantity -= instance.quantity
-                
-                if origin_warehouse_product.current_quantity < 0:
-                    raise ValidationError("Origin warehouse quantity cannot be negative")
-                    
-                if destiny_warehouse_product.current_quantity < 0:
-                    raise ValidationError("Destiny warehouse quantity cannot be negative")
-                
-                # Save changes
-                origin_warehouse_product.save()
-                destiny_warehouse_product.save()
-                
-                # Update total quantities
-                origin_warehouse.update_total_quantity()
-                destiny_warehouse.update_total_quantity()
-                
-                logger.info(
-                    f"TransferItems deleted: Product {product} transfer reversed. "
-                    f"Origin warehouse {origin_warehouse}: {origin_warehouse_product.current_quantity}, "
-                    f"Destiny warehouse {destiny_warehouse}: {destiny_warehouse_product.current_quantity}"
-                )
-                
-            except WarehouseProduct.DoesNotExist:
-                logger.error(f"WarehouseProduct not found for product {product} in one of the warehouses")
-                raise ValidationError("WarehouseProduct not found in one of the warehouses")
+            # Reverse the transfer in a single posting
+            StockPostingService.post(
+                [
+                    (origin_warehouse, product, instance.quantity, instance.pk),
+                    (destiny_warehouse, product, -instance.quantity, instance.pk),
+                ],
+                employeer=instance.updated_by_id,
+                movement_type='transfer',
+                document_id=instance.transfer_id
+            )
+            
+            logger.info(
+                f"TransferItems deleted: Product {product} transfer reversed. "
+                f"Origin warehouse: {origin_warehouse}, Destiny warehouse: {destiny_warehouse}"
+            )
                 
         except Exception as e:
             logger.error(f"Error restoring quantities on TransferItems {instance.id} deletion: {str(e)}")
@@ -5,6 +5,7 @@ from django.core.exceptions import ValidationError
 from ..warehouse.models import Warehouse, WarehouseProduct
 from ..product.models import Product
 from .models import Transfer, TransferItems
+from .services.validators import TransferBusinessValidator
 from apps.companies.models import Companie
 from apps.accounts.models import User
 from apps.companies.employeers.models import Employeer
@@ -368,3 +369,19 @@ class TransferCapacityTests(TestCase):
         
         self.assertEqual(self.origin_warehouse_product.current_quantity, 100)
         self.assertEqual(destiny_product.current_quantity, 0)
+
+    def test_origin_quantities_are_validated_in_one_query(self):
+        """Test the origin quantities of a whole transfer are read at once, without creating rows"""
+        other_products = [
+            Product.objects.create(name=f"Other Product {index}", companie=self.company)
+            for index in range(3)
+        ]
+        quantities = {self.product.pk: 100, **{product.pk: 0 for product in other_products}}
+
+        with self.assertNumQueries(1):
+            TransferBusinessValidator.validate_origin_quantities(self.origin_warehouse, quantities)
+
+        quantities[other_products[0].pk] = 1
+        with self.assertNumQueries(1), self.assertRaises(ValidationError):
+            TransferBusinessValidator.validate_origin_quantities(self.origin_warehouse, quantities)
+        self.assertFalse(WarehouseProduct.objects.filter(product__in=other_products).exists())
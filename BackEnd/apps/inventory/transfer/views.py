@@ -7,6 +7,7 @@ from django.db import transaction
 from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 import logging
+from core.actor import get_employeer
 
 logger = logging.getLogger(__name__)
 
@@ -21,9 +22,12 @@ class TransferBaseView:
             if getattr(self, 'swagger_fake_view', False):
                 return TransferSerializer
             
-            employeer = user.employeer
-            return Transfer.objects.select_related(
-                'companie'
+            employeer = get_employeer(user)
+            return Transfer.objects.with_audit().select_related(
+                'origin',
+                'destiny'
+            ).prefetch_related(
+                'items__product'
             ).filter(companie=employeer.companie)
         except Transfer.DoesNotExist:
             return Transfer.objects.none()
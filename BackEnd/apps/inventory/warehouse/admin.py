@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Warehouse, WarehouseProduct
+from .models import Warehouse, WarehouseProduct, StockLedgerEntry, StockBalanceSnapshot, DailyMovementRollup
 
 
 class WareHouseProductInline(admin.TabularInline):
@@ -15,4 +15,38 @@ class WareHouseAdmin(admin.ModelAdmin):
     inlines = (WareHouseProductInline, )
     search_fields = ('name', 'created_by', 'updated_by')
     list_filter = ('name', 'created_at', 'updated_at', 'created_by', 'updated_by')
-    readonly_fields = ('id', 'companie', 'created_at', 'updated_at', 'created_by', 'updated_by')
\ No newline at end of file
+    readonly_fields = ('id', 'companie', 'created_at', 'updated_at', 'created_by', 'updated_by')
+
+
+@admin.register(StockLedgerEntry)
+class StockLedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ('id', 'warehouse', 'product', 'quantity', 'movement_type', 'document_id', 'created_at', 'created_by')
+    list_filter = ('movement_type', 'warehouse', 'created_at')
+    search_fields = ('product__name', 'warehouse__name', 'document_id')
+    readonly_fields = [field.name for field in StockLedgerEntry._meta.fields]
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StockBalanceSnapshot)
+class StockBalanceSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('id', 'warehouse', 'product', 'quantity', 'as_of')
+    list_filter = ('warehouse', 'as_of')
+    search_fields = ('product__name', 'warehouse__name')
+    readonly_fields = [field.name for field in StockBalanceSnapshot._meta.fields]
+
+
+
+@admin.register(DailyMovementRollup)
+class DailyMovementRollupAdmin(admin.ModelAdmin):
+    list_display = ('id', 'date', 'movement_type', 'warehouse', 'product', 'quantity', 'value', 'lines')
+    list_filter = ('movement_type', 'warehouse', 'date')
+    search_fields = ('product__name', 'warehouse__name')
+    readonly_fields = [field.name for field in DailyMovementRollup._meta.fields]
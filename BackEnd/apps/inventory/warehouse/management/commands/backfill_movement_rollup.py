@@ -0,0 +1,57 @@
+"""
+Django Management Command for Backfilling the Daily Movement Rollup
+
+Rebuilds the DailyMovementRollup rows of a period from the append-only stock
+ledger. Postings keep the rollup up to date on their own; run this once after
+introducing the table, or to repair a period. Values are recomputed at the
+current product prices.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from apps.inventory.warehouse.services.rollup import MovementRollupService
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    """
+    Django command to rebuild the daily movement rollup from the stock ledger.
+    """
+    
+    help = "Rebuild the daily movement rollup from the stock ledger"
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start',
+            help='First day to rebuild (YYYY-MM-DD), defaults to the first ledger entry'
+        )
+        parser.add_argument(
+            '--end',
+            help='Last day to rebuild (YYYY-MM-DD), defaults to today'
+        )
+        parser.add_argument(
+            '--companie',
+            help='Restrict the backfill to this company id'
+        )
+    
+    def _parse(self, value, name):
+        if not value:
+            return None
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f"Invalid --{name} date: {value}")
+        return day
+    
+    def handle(self, *args, **options):
+        start_date = self._parse(options.get('start'), 'start')
+        end_date = self._parse(options.get('end'), 'end')
+        if start_date and end_date and start_date > end_date:
+            raise CommandError("--start must not be after --end")
+        
+        written = MovementRollupService.backfill(
+            start_date=start_date,
+            end_date=end_date,
+            companie=options.get('companie')
+        )
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} daily movement rollup rows"))
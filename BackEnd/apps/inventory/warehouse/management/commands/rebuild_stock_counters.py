@@ -0,0 +1,56 @@
+"""
+Django Management Command for Rebuilding Stock Counters
+
+Rebuilds WarehouseProduct, Warehouse and Product quantities from the
+append-only stock ledger. Run with --open-balances the first time so the
+stock that existed before the ledger was introduced is recorded as opening
+entries instead of being zeroed.
+"""
+
+from django.core.management.base import BaseCommand
+from apps.inventory.warehouse.services.ledger import StockLedgerService
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    """
+    Django command to rebuild the mutable stock counters from the stock ledger.
+    """
+    
+    help = "Rebuild warehouse and product stock counters from the stock ledger"
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--warehouse',
+            action='append',
+            dest='warehouses',
+            help='Restrict the rebuild to this warehouse id (can be repeated)'
+        )
+        parser.add_argument(
+            '--open-balances',
+            action='store_true',
+            help='Record the current counters as opening entries for products without ledger history'
+        )
+        parser.add_argument(
+            '--compact',
+            action='store_true',
+            help='Compact the ledger into balance snapshots before rebuilding'
+        )
+    
+    def handle(self, *args, **options):
+        warehouse_ids = options.get('warehouses')
+        
+        if options['open_balances']:
+            opened = StockLedgerService.open_balances(warehouse_ids=warehouse_ids)
+            self.stdout.write(f"Recorded {opened} opening balance entries")
+        
+        if options['compact']:
+            written = StockLedgerService.compact()
+            self.stdout.write(f"Wrote {written} stock balance snapshots")
+        
+        summary = StockLedgerService.rebuild_counters(warehouse_ids=warehouse_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f"Corrected {summary['warehouse_products']} warehouse products, "
+            f"{summary['warehouses']} warehouses and {summary['products']} products"
+        ))
@@ -0,0 +1,63 @@
+# Generated by Django 5.2 on 2026-10-16 15:31
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0004_alter_companie_country'),
+        ('employeers', '0004_alter_employeer_country_alter_employeer_payment_type'),
+        ('product', '0005_alter_productinstoreid_product'),
+        ('warehouse', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockBalanceSnapshot',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, null=True)),
+                ('as_of', models.DateTimeField(help_text='Every ledger entry created up to this moment is included')),
+                ('quantity', models.BigIntegerField(default=0, help_text='The balance at as_of')),
+                ('companie', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_companie', to='companies.companie')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created_by', to='employeers.employeer')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to='product.product')),
+                ('updated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated_by', to='employeers.employeer')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to='warehouse.warehouse')),
+            ],
+            options={
+                'verbose_name': 'Stock Balance Snapshot',
+                'verbose_name_plural': 'Stock Balance Snapshots',
+                'ordering': ['-as_of'],
+                'indexes': [models.Index(fields=['as_of'], name='snapshot_as_of_idx')],
+                'unique_together': {('warehouse', 'product', 'as_of')},
+            },
+        ),
+        migrations.CreateModel(
+            name='StockLedgerEntry',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, null=True)),
+                ('quantity', models.BigIntegerField(help_text='Signed quantity moved (positive in, negative out)')),
+                ('movement_type', models.CharField(choices=[('inflow', 'Inflow'), ('outflow', 'Outflow'), ('transfer', 'Transfer'), ('adjustment', 'Adjustment'), ('opening', 'Opening Balance')], default='adjustment', help_text='The kind of document that produced the movement', max_length=20)),
+                ('document_id', models.UUIDField(blank=True, help_text='The document that produced the movement', null=True)),
+                ('line_id', models.UUIDField(blank=True, help_text='The document line that produced the movement', null=True)),
+                ('companie', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_companie', to='companies.companie')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created_by', to='employeers.employeer')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='product.product')),
+                ('updated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated_by', to='employeers.employeer')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='warehouse.warehouse')),
+            ],
+            options={
+                'verbose_name': 'Stock Ledger Entry',
+                'verbose_name_plural': 'Stock Ledger Entries',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['warehouse', 'product', 'created_at'], name='ledger_wh_product_date_idx'), models.Index(fields=['created_at'], name='ledger_created_at_idx')],
+            },
+        ),
+    ]
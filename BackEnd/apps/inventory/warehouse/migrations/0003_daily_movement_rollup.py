@@ -0,0 +1,43 @@
+# Generated by Django 5.2 on 2026-10-16 16:02
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0004_alter_companie_country'),
+        ('employeers', '0004_alter_employeer_country_alter_employeer_payment_type'),
+        ('product', '0005_alter_productinstoreid_product'),
+        ('warehouse', '0002_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyMovementRollup',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, null=True)),
+                ('date', models.DateField(help_text='The day the movements were posted')),
+                ('movement_type', models.CharField(choices=[('inflow', 'Inflow'), ('outflow', 'Outflow'), ('transfer', 'Transfer'), ('adjustment', 'Adjustment'), ('opening', 'Opening Balance')], help_text='The kind of document that produced the movements', max_length=20)),
+                ('quantity', models.BigIntegerField(default=0, help_text='Signed net quantity moved (positive in, negative out)')),
+                ('value', models.DecimalField(decimal_places=2, default=0, help_text='Signed value moved, at the product price when posted', max_digits=18)),
+                ('lines', models.PositiveIntegerField(default=0, help_text='Number of ledger lines folded into the row')),
+                ('companie', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_companie', to='companies.companie')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created_by', to='employeers.employeer')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movement_rollups', to='product.product')),
+                ('updated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated_by', to='employeers.employeer')),
+                ('warehouse', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movement_rollups', to='warehouse.warehouse')),
+            ],
+            options={
+                'verbose_name': 'Daily Movement Rollup',
+                'verbose_name_plural': 'Daily Movement Rollups',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['companie', 'movement_type', 'date'], name='rollup_company_type_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('companie', 'date', 'warehouse', 'product', 'movement_type'), name='unique_daily_movement_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-16 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warehouse', '0003_daily_movement_rollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='warehouse',
+            index=models.Index(fields=['companie', '-created_at'], name='warehouse_tenant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='warehouseproduct',
+            index=models.Index(fields=['companie', '-created_at'], name='warehouse_product_tenant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockledgerentry',
+            index=models.Index(fields=['companie', '-created_at'], name='stock_ledger_tenant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockbalancesnapshot',
+            index=models.Index(fields=['companie', '-created_at'], name='stock_snapshot_tenant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dailymovementrollup',
+            index=models.Index(fields=['companie', '-created_at'], name='movement_rollup_tenant_idx'),
+        ),
+    ]
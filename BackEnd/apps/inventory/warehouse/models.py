@@ -1,10 +1,13 @@
 from django.db import models, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce
 from django.core.exceptions import ValidationError
-from basemodels.models import BaseModel
+from basemodels.models import BaseModel, FieldTrackerMixin, tenant_indexes
 from ..product.models import Product
-from core.cache import cache_method_result, invalidate_cache_key, get_cache_key
+from core.cache import cache_method_result, invalidate_cache_key, get_cache_key, bump_tenant_generation
+from core.constants.choices import STOCK_MOVEMENT_TYPE_CHOICES
 
-class Warehouse(BaseModel):
+class Warehouse(FieldTrackerMixin, BaseModel):
     """
     Fields:
         name: str
@@ -31,10 +34,13 @@ class Warehouse(BaseModel):
     limit = models.BigIntegerField(default=0, blank=True, null=True, help_text='The maximum quantity of the product that warehouse can hold')
     quantity = models.BigIntegerField(default=0, blank=True, null=True, help_text='The current quantity of the product that warehouse has')
     
+    tracked_fields = ('limit', 'quantity')
+
     class Meta:
         verbose_name = 'Warehouse'
         verbose_name_plural = 'Warehouses'
         ordering = ['name']
+        indexes = tenant_indexes('warehouse')
         
     def __str__(self):
         return self.name
@@ -47,8 +53,14 @@ class Warehouse(BaseModel):
             total=models.Sum('current_quantity')
         )['total'] or 0
     
+    def invalidate_cache(self):
+        """Invalidate every cached representation of this warehouse"""
+        invalidate_cache_key(get_cache_key('warehouse', id=self.id), cache_alias='default')
+        invalidate_cache_key(f'warehouse_total_quantity:{self.__class__.__name__}:{self.id}', cache_alias='default')
+        bump_tenant_generation(self.companie_id, 'warehouse')
+    
     def update_total_quantity(self):
-        """Recalculate total quantity and update cache"""
+        """Recalculate total quantity from the warehouse products and update cache"""
         # First invalidate the cache
         invalidate_cache_key(get_cache_key('warehouse', id=self.id), cache_alias='default')
         invalidate_cache_key(f'warehouse_total_quantity:{self.__class__.__name__}:{self.id}', cache_alias='default')
@@ -62,7 +74,28 @@ class Warehouse(BaseModel):
         
         # Update the quantity
         self.quantity = total
-        self.save()
+        self.save(update_fields=['quantity', 'updated_at'])
+    
+    @classmethod
+    def adjust_quantity(cls, warehouse_id, delta):
+        """
+        Add ``delta`` to the warehouse quantity in a single UPDATE.
+        
+        Growing the quantity is a conditional update (``quantity + delta <= limit``),
+        so the capacity check and the increment can not be split by a concurrent write.
+        
+        Returns:
+            bool: False if the change would exceed the warehouse capacity
+        """
+        if not delta:
+            return True
+        
+        warehouses = cls.objects.filter(pk=warehouse_id)
+        if delta > 0:
+            warehouses = warehouses.filter(
+                Q(limit__isnull=True) | Q(limit__lte=0) | Q(quantity__lte=F('limit') - delta)
+            )
+        return warehouses.update(quantity=Coalesce(F('quantity'), 0) + delta) > 0
     
     def get_formatted_address(self):
         """
@@ -108,12 +141,17 @@ class Warehouse(BaseModel):
     def save(self, *args, **kwargs):
         """Save with validation and cache invalidation"""
         self.full_clean()
+        # quantity is a counter maintained with F() updates, so a regular save of a
+        # possibly stale instance must not write it back
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname != 'quantity'
+            ]
         super().save(*args, **kwargs)
         
         # Invalidate warehouse caches
-        invalidate_cache_key(get_cache_key('warehouse', id=self.id), cache_alias='default')
-        invalidate_cache_key('warehouse_list:GET:/api/v1/warehouse/', cache_alias='default')
-        invalidate_cache_key(f'warehouse_detail:GET:/api/v1/warehouse/{self.id}/', cache_alias='default')
+        self.invalidate_cache()
         
 class WarehouseProduct(BaseModel):
     """
@@ -145,6 +183,7 @@ class WarehouseProduct(BaseModel):
         verbose_name = 'Warehouse Product'
         verbose_name_plural = 'Warehouse Products'
         ordering = ['warehouse', 'product']
+        indexes = tenant_indexes('warehouse_product')
         unique_together = ('warehouse', 'product')
         
     def __str__(self):
@@ -155,38 +194,196 @@ class WarehouseProduct(BaseModel):
         super().clean()
         if self.current_quantity < 0:
             raise ValidationError(f"Product {self.product.name} quantity cannot be negative in warehouse {self.warehouse.name}")
+    
+    def save(self, *args, **kwargs):
+        """Save with validation, keeping the warehouse quantity in step with the change"""
+        self.full_clean()
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                previous = (
+                    WarehouseProduct.objects.select_for_update()
+                    .filter(pk=self.pk)
+                    .values('warehouse_id', 'current_quantity')
+                    .first()
+                )
             
-        if self.warehouse.limit > 0:
-            # Calculate total excluding this product's current quantity
-            other_products_total = (
-                WarehouseProduct.objects.filter(warehouse=self.warehouse)
-                .exclude(pk=self.pk)
-                .aggregate(total=models.Sum('current_quantity'))['total'] or 0
-            )
-            
-            # Add this product's new quantity
-            total = other_products_total + self.current_quantity
+            # Moving the row to another warehouse takes its quantity out of the old one
+            if previous and previous['warehouse_id'] != self.warehouse_id:
+                Warehouse.adjust_quantity(previous['warehouse_id'], -(previous['current_quantity'] or 0))
+                previous = None
             
-            if total > self.warehouse.limit:
+            delta = (self.current_quantity or 0) - ((previous or {}).get('current_quantity') or 0)
+            if not Warehouse.adjust_quantity(self.warehouse_id, delta):
+                self.warehouse.refresh_from_db(fields=['quantity', 'limit'])
                 raise ValidationError(
-                    f"Adding {self.current_quantity} of {self.product.name} would exceed "
+                    f"Adding {delta} of {self.product.name} would exceed "
                     f"warehouse {self.warehouse.name} capacity. "
-                    f"Current total: {other_products_total}, "
-                    f"New total would be: {total}, "
+                    f"Current total: {self.warehouse.quantity}, "
+                    f"New total would be: {self.warehouse.quantity + delta}, "
                     f"Limit: {self.warehouse.limit}"
                 )
-    
-    def save(self, *args, **kwargs):
-        """Save with validation and cache invalidation"""
-        self.full_clean()
-        with transaction.atomic():
+            
             super().save(*args, **kwargs)
             
+            self.warehouse.refresh_from_db(fields=['quantity'])
             # Invalidate warehouse caches
-            invalidate_cache_key(get_cache_key('warehouse', id=self.warehouse.id), cache_alias='default')
-            invalidate_cache_key(f'warehouse_total_quantity:{self.warehouse.__class__.__name__}:{self.warehouse.id}', cache_alias='default')
-            invalidate_cache_key('warehouse_list:GET:/api/v1/warehouse/', cache_alias='default')
-            invalidate_cache_key(f'warehouse_detail:GET:/api/v1/warehouse/{self.warehouse.id}/', cache_alias='default')
-            
-            # Update warehouse total quantity
-            self.warehouse.update_total_quantity()
\ No newline at end of file
+            self.warehouse.invalidate_cache()
+    
+    def delete(self, *args, **kwargs):
+        """Delete the row and take its quantity out of the warehouse"""
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            Warehouse.adjust_quantity(self.warehouse_id, -(self.current_quantity or 0))
+            self.warehouse.invalidate_cache()
+        return result
+
+
+class StockLedgerEntry(BaseModel):
+    """
+    Append-only record of every stock movement line posted to a warehouse.
+    Rows are only ever inserted by the StockPostingService; the mutable
+    counters (WarehouseProduct, Product and Warehouse quantities) can be
+    rebuilt from this table.
+    
+    Fields:
+        warehouse: ForeignKey to Warehouse
+        product: ForeignKey to Product
+        quantity: int: Signed quantity moved (positive in, negative out)
+        movement_type: str: The kind of document that produced the movement
+        document_id: UUID: The document (Inflow, Outflow, Transfer...) that produced the movement
+        line_id: UUID: The document line that produced the movement
+    
+    Meta:
+        verbose_name: str
+        verbose_name_plural: str
+        ordering: list
+        
+    Inheritance:
+        BaseModel{
+            id: UUIDField
+            companie: ForeignKey to Companie
+            created_at: DateTimeField
+            updated_at: DateTimeField
+            created_by: ForeignKey to Employeer
+            updated_by: ForeignKey to Employeer
+        }
+    """
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name='ledger_entries')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='ledger_entries')
+    quantity = models.BigIntegerField(help_text='Signed quantity moved (positive in, negative out)')
+    movement_type = models.CharField(max_length=20, choices=STOCK_MOVEMENT_TYPE_CHOICES, default='adjustment', help_text='The kind of document that produced the movement')
+    document_id = models.UUIDField(null=True, blank=True, help_text='The document that produced the movement')
+    line_id = models.UUIDField(null=True, blank=True, help_text='The document line that produced the movement')
+    
+    class Meta:
+        verbose_name = 'Stock Ledger Entry'
+        verbose_name_plural = 'Stock Ledger Entries'
+        ordering = ['-created_at']
+        indexes = tenant_indexes('stock_ledger') + [
+            models.Index(fields=['warehouse', 'product', 'created_at'], name='ledger_wh_product_date_idx'),
+            models.Index(fields=['created_at'], name='ledger_created_at_idx'),
+        ]
+        
+    def __str__(self):
+        return f"{self.movement_type} {self.quantity:+d} - {self.product_id} @ {self.warehouse_id}"
+    
+    def save(self, *args, **kwargs):
+        """Ledger entries are append-only"""
+        if not self._state.adding:
+            raise ValidationError("Stock ledger entries cannot be modified")
+        super().save(*args, **kwargs)
+
+
+class StockBalanceSnapshot(BaseModel):
+    """
+    Balance of a product in a warehouse at a point in time, folded from the
+    StockLedgerEntry rows by the compaction task. The stock at any date is the
+    latest snapshot before it plus the ledger entries posted after the snapshot.
+    
+    Fields:
+        warehouse: ForeignKey to Warehouse
+        product: ForeignKey to Product
+        as_of: datetime: Every ledger entry created up to this moment is included
+        quantity: int: The balance at ``as_of``
+        
+    Inheritance:
+        BaseModel{
+            id: UUIDField
+            companie: ForeignKey to Companie
+            created_at: DateTimeField
+            updated_at: DateTimeField
+            created_by: ForeignKey to Employeer
+            updated_by: ForeignKey to Employeer
+        }
+    """
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name='balance_snapshots')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='balance_snapshots')
+    as_of = models.DateTimeField(help_text='Every ledger entry created up to this moment is included')
+    quantity = models.BigIntegerField(default=0, help_text='The balance at as_of')
+    
+    class Meta:
+        verbose_name = 'Stock Balance Snapshot'
+        verbose_name_plural = 'Stock Balance Snapshots'
+        ordering = ['-as_of']
+        unique_together = ('warehouse', 'product', 'as_of')
+        indexes = tenant_indexes('stock_snapshot') + [
+            models.Index(fields=['as_of'], name='snapshot_as_of_idx'),
+        ]
+        
+    def __str__(self):
+        return f"{self.warehouse_id} - {self.product_id}: {self.quantity} @ {self.as_of}"
+
+
+
+class DailyMovementRollup(BaseModel):
+    """
+    Net stock movement of a product in a warehouse for one day and movement type,
+    maintained incrementally by the StockPostingService and rebuildable from the
+    stock ledger. Dashboards and reports read these rows instead of scanning the
+    movement documents, so their cost grows with the days and dimensions shown
+    rather than with the rows ever written.
+    
+    Fields:
+        warehouse: ForeignKey to Warehouse
+        product: ForeignKey to Product
+        date: date: The day the movements were posted
+        movement_type: str: The kind of document that produced the movements
+        quantity: int: Signed net quantity moved (positive in, negative out)
+        value: Decimal: Signed value moved, at the product price when posted
+        lines: int: Number of ledger lines folded into the row
+        
+    Inheritance:
+        BaseModel{
+            id: UUIDField
+            companie: ForeignKey to Companie
+            created_at: DateTimeField
+            updated_at: DateTimeField
+            created_by: ForeignKey to Employeer
+            updated_by: ForeignKey to Employeer
+        }
+    """
+    warehouse = models.ForeignKey(Warehouse, on_delete=models.CASCADE, related_name='movement_rollups')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='movement_rollups')
+    date = models.DateField(help_text='The day the movements were posted')
+    movement_type = models.CharField(max_length=20, choices=STOCK_MOVEMENT_TYPE_CHOICES, help_text='The kind of document that produced the movements')
+    quantity = models.BigIntegerField(default=0, help_text='Signed net quantity moved (positive in, negative out)')
+    value = models.DecimalField(max_digits=18, decimal_places=2, default=0, help_text='Signed value moved, at the product price when posted')
+    lines = models.PositiveIntegerField(default=0, help_text='Number of ledger lines folded into the row')
+    
+    class Meta:
+        verbose_name = 'Daily Movement Rollup'
+        verbose_name_plural = 'Daily Movement Rollups'
+        ordering = ['-date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['companie', 'date', 'warehouse', 'product', 'movement_type'],
+                name='unique_daily_movement_rollup'
+            ),
+        ]
+        indexes = tenant_indexes('movement_rollup') + [
+            models.Index(fields=['companie', 'movement_type', 'date'], name='rollup_company_type_date_idx'),
+        ]
+        
+    def __str__(self):
+        return f"{self.date} {self.movement_type} {self.quantity:+d} - {self.product_id} @ {self.warehouse_id}"
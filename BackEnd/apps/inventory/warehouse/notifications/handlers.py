@@ -63,10 +63,10 @@ class WarehouseNotificationHandler(BaseNotificationHandler):
         """
         try:
             if recipient_ids is None:
-                recipients = cls.get_recipients_by_type(
-                    'Stock_Controller', 'Manager', 'Owner', 'CEO', 'Admin'
+                recipient_ids = cls.get_recipient_ids(
+                    'Stock_Controller', 'Manager', 'Owner', 'CEO', 'Admin',
+                    companie=warehouse.companie_id
                 )
-                recipient_ids = [str(user.id) for user in recipients]
             
             severity_type, severity_label = cls._calculate_severity(
                 current_quantity, 
@@ -132,8 +132,7 @@ class WarehouseNotificationHandler(BaseNotificationHandler):
         """
         try:
             if recipient_ids is None:
-                recipients = cls.get_recipients_by_type('Stock_Controller', 'Manager')
-                recipient_ids = [str(user.id) for user in recipients]
+                recipient_ids = cls.get_recipient_ids('Stock_Controller', 'Manager', companie=warehouse.companie_id)
             
             data = {
                 'type': SEVERITY_TYPES['INFO'],
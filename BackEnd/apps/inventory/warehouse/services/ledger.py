@@ -0,0 +1,311 @@
+import logging
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Sum, Max, OuterRef, Subquery
+from django.utils import timezone
+from core.cache import bump_tenant_generation
+from ..models import Warehouse, WarehouseProduct, StockLedgerEntry, StockBalanceSnapshot
+from ...product.models import Product
+
+logger = logging.getLogger(__name__)
+
+
+class StockLedgerService:
+    """
+    Service class for the append-only stock ledger.
+
+    Every posted movement line becomes a StockLedgerEntry. The compaction task
+    periodically folds the entries into StockBalanceSnapshot rows so that the
+    stock at any date is one snapshot per pair plus a small scan of the entries
+    posted after it, and the mutable counters can be rebuilt in bulk when they
+    drift. A compaction only snapshots the (warehouse, product) pairs that moved
+    since the previous one, the others keep their last snapshot.
+    """
+
+    BATCH_SIZE = 1000
+
+    @staticmethod
+    def record(lines, warehouses, movement_type='adjustment', document_id=None, employeer_id=None, line_documents=None):
+        """
+        Append one ledger entry per movement line.
+
+        Args:
+            lines (list): ``(warehouse_id, product_id, quantity, line_id)`` tuples
+            warehouses (dict): Warehouse instances by pk, used to stamp the company
+            movement_type (str): One of STOCK_MOVEMENT_TYPE_CHOICES
+            document_id: The document that produced the movement
+            employeer_id: Employeer stamped as creator of the entries
+            line_documents (dict): Document of each line id, overrides ``document_id``
+        """
+        line_documents = line_documents or {}
+        entries = [
+            StockLedgerEntry(
+                warehouse_id=warehouse_id,
+                product_id=product_id,
+                quantity=quantity,
+                movement_type=movement_type,
+                document_id=line_documents.get(line_id, document_id),
+                line_id=line_id,
+                companie_id=warehouses[warehouse_id].companie_id,
+                created_by_id=employeer_id,
+                updated_by_id=employeer_id
+            )
+            for warehouse_id, product_id, quantity, line_id in lines
+            if quantity
+        ]
+        StockLedgerEntry.objects.bulk_create(entries, batch_size=StockLedgerService.BATCH_SIZE)
+        return len(entries)
+
+    @staticmethod
+    def latest_snapshot_date(before=None):
+        """Return the ``as_of`` of the most recent snapshot, optionally not after ``before``"""
+        snapshots = StockBalanceSnapshot.objects.all()
+        if before is not None:
+            snapshots = snapshots.filter(as_of__lte=before)
+        return snapshots.aggregate(latest=Max('as_of'))['latest']
+
+    @staticmethod
+    def latest_snapshots(before, warehouse_ids=None, product_ids=None):
+        """
+        Return the most recent snapshot of every (warehouse, product) pair taken
+        up to ``before``.
+        """
+        latest = StockBalanceSnapshot.objects.filter(
+            warehouse_id=OuterRef('warehouse_id'),
+            product_id=OuterRef('product_id'),
+            as_of__lte=before
+        ).order_by('-as_of').values('pk')[:1]
+        snapshots = StockBalanceSnapshot.objects.filter(as_of__lte=before, pk=Subquery(latest))
+        if warehouse_ids is not None:
+            snapshots = snapshots.filter(warehouse_id__in=warehouse_ids)
+        if product_ids is not None:
+            snapshots = snapshots.filter(product_id__in=product_ids)
+        return snapshots
+
+    @classmethod
+    def balances_as_of(cls, as_of=None, warehouse_ids=None, product_ids=None):
+        """
+        Compute the stock balances at a given moment.
+
+        Args:
+            as_of (datetime): Moment of the balance, defaults to now
+            warehouse_ids (iterable): Restrict to these warehouses
+            product_ids (iterable): Restrict to these products
+
+        Returns:
+            dict: Quantity per (warehouse_id, product_id)
+        """
+        as_of = as_of or timezone.now()
+        snapshot_date = cls.latest_snapshot_date(before=as_of)
+
+        snapshots = StockBalanceSnapshot.objects.none()
+        entries = StockLedgerEntry.objects.filter(created_at__lte=as_of)
+        if snapshot_date is not None:
+            # A pair that did not move in the last compactions has an older snapshot,
+            # and no entry between that snapshot and snapshot_date
+            snapshots = cls.latest_snapshots(snapshot_date, warehouse_ids, product_ids)
+            entries = entries.filter(created_at__gt=snapshot_date)
+
+        if warehouse_ids is not None:
+            entries = entries.filter(warehouse_id__in=warehouse_ids)
+        if product_ids is not None:
+            entries = entries.filter(product_id__in=product_ids)
+
+        balances = defaultdict(int)
+        for warehouse_id, product_id, quantity in snapshots.values_list('warehouse_id', 'product_id', 'quantity'):
+            balances[(warehouse_id, product_id)] += quantity
+
+        deltas = (
+            entries.order_by()
+            .values('warehouse_id', 'product_id')
+            .annotate(total=Sum('quantity'))
+            .values_list('warehouse_id', 'product_id', 'total')
+        )
+        for warehouse_id, product_id, total in deltas:
+            balances[(warehouse_id, product_id)] += total or 0
+
+        return dict(balances)
+
+    @classmethod
+    def compact(cls, cutoff=None):
+        """
+        Fold the ledger entries posted up to ``cutoff`` into snapshots of the
+        pairs they moved.
+
+        The cutoff defaults to the start of the current day so entries from
+        transactions that are still open are not skipped. Pairs without entries
+        since the previous compaction are not snapshotted again.
+
+        Returns:
+            int: Number of snapshot rows written
+        """
+        cutoff = cutoff or timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        previous_date = cls.latest_snapshot_date()
+
+        if previous_date is not None and previous_date >= cutoff:
+            logger.info(f"[STOCK LEDGER] Ledger already compacted up to {previous_date}")
+            return 0
+
+        entries = StockLedgerEntry.objects.filter(created_at__lte=cutoff)
+        if previous_date is not None:
+            entries = entries.filter(created_at__gt=previous_date)
+
+        deltas = list(
+            entries.order_by()
+            .values('warehouse_id', 'product_id', 'warehouse__companie_id')
+            .annotate(total=Sum('quantity'))
+            .values_list('warehouse_id', 'product_id', 'warehouse__companie_id', 'total')
+        )
+        if not deltas:
+            logger.info(f"[STOCK LEDGER] No ledger entries to compact up to {cutoff}")
+            return 0
+
+        balances = {
+            (warehouse_id, product_id): [companie_id, total or 0]
+            for warehouse_id, product_id, companie_id, total in deltas
+        }
+        if previous_date is not None:
+            previous = cls.latest_snapshots(
+                previous_date,
+                warehouse_ids={warehouse_id for warehouse_id, _ in balances},
+                product_ids={product_id for _, product_id in balances}
+            ).values_list('warehouse_id', 'product_id', 'quantity')
+            for warehouse_id, product_id, quantity in previous:
+                balance = balances.get((warehouse_id, product_id))
+                if balance is not None:
+                    balance[1] += quantity
+
+        snapshots = [
+            StockBalanceSnapshot(
+                warehouse_id=warehouse_id,
+                product_id=product_id,
+                companie_id=companie_id,
+                as_of=cutoff,
+                quantity=quantity
+            )
+            for (warehouse_id, product_id), (companie_id, quantity) in balances.items()
+        ]
+        with transaction.atomic():
+            StockBalanceSnapshot.objects.bulk_create(snapshots, batch_size=cls.BATCH_SIZE)
+
+        logger.info(f"[STOCK LEDGER] Compacted the pairs moved up to {cutoff} into {len(snapshots)} snapshots")
+        return len(snapshots)
+
+    @classmethod
+    def open_balances(cls, warehouse_ids=None):
+        """
+        Write an opening entry for every WarehouseProduct that has stock but no
+        ledger history yet, so the ledger starts from the current counters.
+
+        Returns:
+            int: Number of opening entries written
+        """
+        rows = WarehouseProduct.objects.exclude(current_quantity=0)
+        if warehouse_ids is not None:
+            rows = rows.filter(warehouse_id__in=warehouse_ids)
+
+        known_pairs = set(
+            StockLedgerEntry.objects.filter(warehouse_id__in=rows.values('warehouse_id'))
+            .order_by()
+            .values_list('warehouse_id', 'product_id')
+            .distinct()
+        )
+        entries = [
+            StockLedgerEntry(
+                warehouse_id=warehouse_id,
+                product_id=product_id,
+                companie_id=companie_id,
+                quantity=quantity,
+                movement_type='opening'
+            )
+            for warehouse_id, product_id, companie_id, quantity in rows.values_list(
+                'warehouse_id', 'product_id', 'warehouse__companie_id', 'current_quantity'
+            )
+            if (warehouse_id, product_id) not in known_pairs
+        ]
+        StockLedgerEntry.objects.bulk_create(entries, batch_size=cls.BATCH_SIZE)
+        logger.info(f"[STOCK LEDGER] Wrote {len(entries)} opening balance entries")
+        return len(entries)
+
+    @classmethod
+    def rebuild_counters(cls, warehouse_ids=None):
+        """
+        Rebuild WarehouseProduct, Warehouse and Product quantities from the ledger.
+
+        Args:
+            warehouse_ids (iterable): Restrict the rebuild to these warehouses
+
+        Returns:
+            dict: Number of warehouse products, warehouses and products corrected
+        """
+        balances = cls.balances_as_of(warehouse_ids=warehouse_ids)
+
+        with transaction.atomic():
+            rows = WarehouseProduct.objects.select_for_update()
+            warehouses = Warehouse.objects.select_for_update()
+            if warehouse_ids is not None:
+                rows = rows.filter(warehouse_id__in=warehouse_ids)
+                warehouses = warehouses.filter(pk__in=warehouse_ids)
+            warehouses = {warehouse.pk: warehouse for warehouse in warehouses}
+
+            changed_rows = []
+            seen_pairs = set()
+            for row in rows.only('id', 'warehouse_id', 'product_id', 'current_quantity'):
+                pair = (row.warehouse_id, row.product_id)
+                seen_pairs.add(pair)
+                expected = balances.get(pair, 0)
+                if row.current_quantity != expected:
+                    row.current_quantity = expected
+                    changed_rows.append(row)
+
+            new_rows = [
+                WarehouseProduct(
+                    warehouse_id=warehouse_id,
+                    product_id=product_id,
+                    current_quantity=quantity,
+                    companie_id=warehouses[warehouse_id].companie_id
+                )
+                for (warehouse_id, product_id), quantity in balances.items()
+                if (warehouse_id, product_id) not in seen_pairs and quantity and warehouse_id in warehouses
+            ]
+
+            WarehouseProduct.objects.bulk_update(changed_rows, ['current_quantity'], batch_size=cls.BATCH_SIZE)
+            WarehouseProduct.objects.bulk_create(new_rows, batch_size=cls.BATCH_SIZE)
+
+            warehouse_totals = defaultdict(int)
+            for (warehouse_id, _), quantity in balances.items():
+                warehouse_totals[warehouse_id] += quantity
+            changed_warehouses = []
+            for warehouse_id, warehouse in warehouses.items():
+                if warehouse.quantity != warehouse_totals.get(warehouse_id, 0):
+                    warehouse.quantity = warehouse_totals.get(warehouse_id, 0)
+                    changed_warehouses.append(warehouse)
+            Warehouse.objects.bulk_update(changed_warehouses, ['quantity'], batch_size=cls.BATCH_SIZE)
+
+            product_ids = {product_id for _, product_id in balances} | {row.product_id for row in changed_rows}
+            product_totals = dict(
+                WarehouseProduct.objects.filter(product_id__in=product_ids)
+                .order_by()
+                .values('product_id')
+                .annotate(total=Sum('current_quantity'))
+                .values_list('product_id', 'total')
+            )
+            changed_products = []
+            for product in Product.objects.filter(pk__in=product_ids).only('id', 'companie_id', 'quantity'):
+                expected = max(product_totals.get(product.pk) or 0, 0)
+                if product.quantity != expected:
+                    product.quantity = expected
+                    changed_products.append(product)
+            Product.objects.bulk_update(changed_products, ['quantity'], batch_size=cls.BATCH_SIZE)
+            for companie_id in {product.companie_id for product in changed_products}:
+                bump_tenant_generation(companie_id, 'product')
+
+        transaction.on_commit(lambda: [warehouse.invalidate_cache() for warehouse in changed_warehouses])
+
+        summary = {
+            'warehouse_products': len(changed_rows) + len(new_rows),
+            'warehouses': len(changed_warehouses),
+            'products': len(changed_products),
+        }
+        logger.info(f"[STOCK LEDGER] Rebuilt stock counters from ledger: {summary}")
+        return summary
@@ -0,0 +1,273 @@
+import logging
+from collections import defaultdict
+from django.db import models, transaction, IntegrityError
+from django.db.models import F, Sum, Case, When, Value
+from django.core.exceptions import ValidationError
+from core.cache import bump_tenant_generation
+from ..models import Warehouse, WarehouseProduct
+from ..signals import warn_if_near_capacity
+from .ledger import StockLedgerService
+from .rollup import MovementRollupService
+from ...product.models import Product
+
+logger = logging.getLogger(__name__)
+
+
+class StockPostingService:
+    """
+    Applies the stock effect of a whole movement document as one set-based operation.
+
+    Every movement type (inflows, outflows and transfers) posts its lines through
+    this service instead of saving each WarehouseProduct/Product individually, so
+    the number of queries does not grow with the number of lines in the document.
+
+    A line is a tuple ``(warehouse, product, quantity)`` where ``warehouse`` and
+    ``product`` can be model instances or primary keys and ``quantity`` is the
+    signed delta to apply (positive for entries, negative for exits). An optional
+    fourth element identifies the document line in the stock ledger.
+    """
+
+    @staticmethod
+    def _pk(value):
+        return getattr(value, 'pk', value)
+
+    @classmethod
+    def _normalize_lines(cls, lines):
+        """Return the lines as ``(warehouse_id, product_id, quantity, line_id)`` tuples"""
+        normalized = []
+        for line in lines:
+            warehouse, product, quantity = line[:3]
+            line_id = line[3] if len(line) > 3 else None
+            normalized.append((cls._pk(warehouse), cls._pk(product), int(quantity or 0), line_id))
+        return normalized
+
+    @staticmethod
+    def _aggregate_lines(lines):
+        """
+        Collapse the document lines into net deltas per (warehouse, product),
+        per product and per warehouse, dropping the ones that net to zero.
+        """
+        pair_deltas = defaultdict(int)
+        for warehouse_id, product_id, quantity, _ in lines:
+            if not quantity:
+                continue
+            pair_deltas[(warehouse_id, product_id)] += quantity
+
+        pair_deltas = {pair: delta for pair, delta in pair_deltas.items() if delta}
+
+        product_deltas = defaultdict(int)
+        warehouse_deltas = defaultdict(int)
+        for (warehouse_id, product_id), delta in pair_deltas.items():
+            product_deltas[product_id] += delta
+            warehouse_deltas[warehouse_id] += delta
+
+        product_deltas = {pk: delta for pk, delta in product_deltas.items() if delta}
+        return pair_deltas, product_deltas, dict(warehouse_deltas)
+
+    @staticmethod
+    def _delta_case(deltas):
+        """Build a CASE expression mapping each primary key to its delta"""
+        return Case(
+            *[When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()],
+            default=Value(0),
+            output_field=models.BigIntegerField()
+        )
+
+    @classmethod
+    def post(cls, lines, employeer=None, update_products=True, movement_type='adjustment', document_id=None,
+             line_documents=None):
+        """
+        Post a set of stock movement lines atomically and record them in the stock ledger.
+
+        Args:
+            lines (iterable): ``(warehouse, product, quantity[, line_id])`` tuples
+            employeer: Employeer (or its pk) stamped on the rows created by the posting
+            update_products (bool): Whether Product.quantity should follow the deltas
+            movement_type (str): Ledger movement type, one of STOCK_MOVEMENT_TYPE_CHOICES
+            document_id: The document that produced the movement
+            line_documents (dict): Document of each line id, when the lines of
+                several documents are posted together
+
+        Returns:
+            dict: Net delta applied per (warehouse_id, product_id)
+
+        Raises:
+            ValidationError: If a warehouse would go negative on a product or
+                exceed its capacity limit. Nothing is written in that case.
+        """
+        lines = cls._normalize_lines(lines)
+        pair_deltas, product_deltas, warehouse_deltas = cls._aggregate_lines(lines)
+        if not pair_deltas:
+            return {}
+
+        with transaction.atomic():
+            # Locking the warehouses serializes concurrent postings on the same
+            # warehouse, so no update can be lost between the read and the write.
+            # Rows are locked in pk order, two postings can't wait on each other.
+            warehouses = {
+                warehouse.pk: warehouse
+                for warehouse in Warehouse.objects.select_for_update().filter(pk__in=warehouse_deltas.keys()).order_by('pk')
+            }
+            missing_warehouses = set(warehouse_deltas) - set(warehouses)
+            if missing_warehouses:
+                raise ValidationError(f"Warehouse(s) not found: {', '.join(map(str, missing_warehouses))}")
+
+            existing = {
+                (row.warehouse_id, row.product_id): row
+                for row in WarehouseProduct.objects.select_for_update().filter(
+                    warehouse_id__in=warehouse_deltas.keys(),
+                    product_id__in={product_id for _, product_id in pair_deltas}
+                ).only('id', 'warehouse_id', 'product_id', 'current_quantity').order_by('pk')
+            }
+
+            to_create = []
+            row_deltas = {}
+            for (warehouse_id, product_id), delta in pair_deltas.items():
+                row = existing.get((warehouse_id, product_id))
+                warehouse = warehouses[warehouse_id]
+
+                if row is None:
+                    if delta < 0:
+                        raise ValidationError(
+                            f"Product {product_id} not available in warehouse {warehouse.name}"
+                        )
+                    to_create.append(WarehouseProduct(
+                        warehouse_id=warehouse_id,
+                        product_id=product_id,
+                        current_quantity=delta,
+                        companie_id=warehouse.companie_id,
+                        created_by_id=cls._pk(employeer),
+                        updated_by_id=cls._pk(employeer)
+                    ))
+                    continue
+
+                if row.current_quantity + delta < 0:
+                    raise ValidationError(
+                        f"Not enough stock for product {product_id} in warehouse {warehouse.name}. "
+                        f"Available: {row.current_quantity}, "
+                        f"Requested: {-delta}"
+                    )
+                row_deltas[row.pk] = delta
+
+            if to_create:
+                WarehouseProduct.objects.bulk_create(to_create)
+
+            if row_deltas:
+                WarehouseProduct.objects.filter(pk__in=row_deltas.keys()).update(
+                    current_quantity=F('current_quantity') + cls._delta_case(row_deltas)
+                )
+
+            if update_products and product_deltas:
+                try:
+                    with transaction.atomic():
+                        Product.objects.filter(pk__in=product_deltas.keys()).update(
+                            quantity=F('quantity') + cls._delta_case(product_deltas)
+                        )
+                except IntegrityError:
+                    raise ValidationError("Posting would make a product's total quantity negative")
+                # Product responses show the quantity, which update() changes without signals
+                for companie_id in {warehouse.companie_id for warehouse in warehouses.values()}:
+                    bump_tenant_generation(companie_id, 'product')
+
+            cls._refresh_warehouse_totals(warehouses, warehouse_deltas)
+
+            posted_lines = [line for line in lines if (line[0], line[1]) in pair_deltas]
+            StockLedgerService.record(
+                posted_lines,
+                warehouses,
+                movement_type=movement_type,
+                document_id=document_id,
+                line_documents=line_documents,
+                employeer_id=cls._pk(employeer)
+            )
+            MovementRollupService.apply(
+                posted_lines,
+                warehouses,
+                movement_type=movement_type,
+                employeer_id=cls._pk(employeer)
+            )
+
+        logger.info(
+            f"[STOCK POSTING] Posted {len(pair_deltas)} warehouse product deltas "
+            f"across {len(warehouses)} warehouse(s)"
+        )
+        return pair_deltas
+
+    @classmethod
+    def _refresh_warehouse_totals(cls, warehouses, warehouse_deltas):
+        """
+        Apply the net delta of every warehouse touched by the posting to
+        Warehouse.quantity, enforcing the capacity limit on the ones that grow.
+        
+        Each warehouse costs one conditional UPDATE, whatever the number of
+        products it holds.
+        """
+        for warehouse_id, warehouse in warehouses.items():
+            delta = warehouse_deltas.get(warehouse_id, 0)
+            if not Warehouse.adjust_quantity(warehouse_id, delta):
+                total = (warehouse.quantity or 0) + delta
+                logger.error(
+                    f"[STOCK POSTING] Operation would exceed warehouse capacity for {warehouse.name}. "
+                    f"Total after posting: {total}, Limit: {warehouse.limit}"
+                )
+                raise ValidationError(
+                    f"Operation would exceed warehouse capacity. "
+                    f"Total after change: {total}, "
+                    f"Limit: {warehouse.limit}"
+                )
+            # The row is locked by the posting, so the in-memory value stays exact
+            warehouse.quantity = (warehouse.quantity or 0) + delta
+
+        for warehouse in warehouses.values():
+            warn_if_near_capacity(warehouse)
+
+        def invalidate():
+            for warehouse in warehouses.values():
+                warehouse.invalidate_cache()
+
+        transaction.on_commit(invalidate)
+
+    @classmethod
+    def reconcile_warehouse_totals(cls, warehouse_ids=None, batch_size=500):
+        """
+        Fix any drift between Warehouse.quantity and the sum of its warehouse products.
+        
+        Warehouses are processed in batches, each one locked while its totals are
+        recomputed so concurrent postings can not interleave with the correction.
+        
+        Returns:
+            int: Number of warehouses corrected
+        """
+        all_ids = Warehouse.objects.order_by('pk').values_list('pk', flat=True)
+        if warehouse_ids is not None:
+            all_ids = all_ids.filter(pk__in=warehouse_ids)
+        all_ids = list(all_ids)
+
+        corrected = []
+        for start in range(0, len(all_ids), batch_size):
+            batch = all_ids[start:start + batch_size]
+            with transaction.atomic():
+                warehouses = list(Warehouse.objects.select_for_update().filter(pk__in=batch).only('id', 'companie_id', 'quantity').order_by('pk'))
+                totals = dict(
+                    WarehouseProduct.objects.filter(warehouse_id__in=batch)
+                    .order_by()
+                    .values('warehouse_id')
+                    .annotate(total=Sum('current_quantity'))
+                    .values_list('warehouse_id', 'total')
+                )
+                drifted = []
+                for warehouse in warehouses:
+                    total = totals.get(warehouse.pk) or 0
+                    if warehouse.quantity != total:
+                        logger.warning(
+                            f"[STOCK POSTING] Warehouse {warehouse.pk} quantity drifted: "
+                            f"counter {warehouse.quantity}, products {total}"
+                        )
+                        warehouse.quantity = total
+                        drifted.append(warehouse)
+                Warehouse.objects.bulk_update(drifted, ['quantity'])
+                transaction.on_commit(lambda drifted=drifted: [warehouse.invalidate_cache() for warehouse in drifted])
+            corrected.extend(drifted)
+
+        logger.info(f"[STOCK POSTING] Reconciled warehouse quantities, {len(corrected)} corrected")
+        return len(corrected)
@@ -0,0 +1,278 @@
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from django.db import models, transaction
+from django.db.models import F, Sum, Count, Case, When, Value, ExpressionWrapper
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+from ..models import DailyMovementRollup, StockLedgerEntry
+from ...product.models import Product
+
+logger = logging.getLogger(__name__)
+
+
+class MovementRollupService:
+    """
+    Service class for the DailyMovementRollup fact table.
+
+    The StockPostingService folds every posting into the rollup row of its
+    (company, day, warehouse, product, movement type), so reports aggregate a
+    handful of rows per day instead of every document line. The table can be
+    rebuilt from the stock ledger with the ``backfill_movement_rollup`` command.
+    """
+
+    BATCH_SIZE = 1000
+
+    VALUE_FIELD = models.DecimalField(max_digits=18, decimal_places=2)
+
+    @staticmethod
+    def _delta_case(deltas, output_field):
+        """Build a CASE expression mapping each rollup pk to its delta"""
+        return Case(
+            *[When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()],
+            default=Value(0),
+            output_field=output_field
+        )
+
+    @classmethod
+    def apply(cls, lines, warehouses, movement_type='adjustment', day=None, employeer_id=None):
+        """
+        Add posted movement lines to the rollup of their day.
+
+        Must run inside the posting transaction, with the warehouses of the
+        lines locked, so concurrent postings can not race on the same rows.
+
+        Args:
+            lines (list): ``(warehouse_id, product_id, quantity, line_id)`` tuples
+            warehouses (dict): Warehouse instances by pk, used to stamp the company
+            movement_type (str): One of STOCK_MOVEMENT_TYPE_CHOICES
+            day (date): Day of the movements, defaults to today
+            employeer_id: Employeer stamped as creator of new rows
+
+        Returns:
+            int: Number of rollup rows touched
+        """
+        day = day or timezone.now().date()
+        quantities = defaultdict(int)
+        counts = defaultdict(int)
+        for warehouse_id, product_id, quantity, _ in lines:
+            if not quantity:
+                continue
+            quantities[(warehouse_id, product_id)] += quantity
+            counts[(warehouse_id, product_id)] += 1
+        if not counts:
+            return 0
+
+        prices = dict(
+            Product.objects.filter(pk__in={product_id for _, product_id in counts})
+            .values_list('id', 'price')
+        )
+        existing = {
+            (warehouse_id, product_id): pk
+            for pk, warehouse_id, product_id in DailyMovementRollup.objects.filter(
+                date=day,
+                movement_type=movement_type,
+                warehouse_id__in={warehouse_id for warehouse_id, _ in counts},
+                product_id__in={product_id for _, product_id in counts}
+            ).values_list('id', 'warehouse_id', 'product_id')
+        }
+
+        to_create = []
+        quantity_deltas, value_deltas, line_deltas = {}, {}, {}
+        for pair, quantity in quantities.items():
+            warehouse_id, product_id = pair
+            value = (prices.get(product_id) or Decimal('0')) * quantity
+            pk = existing.get(pair)
+            if pk is None:
+                to_create.append(DailyMovementRollup(
+                    warehouse_id=warehouse_id,
+                    product_id=product_id,
+                    date=day,
+                    movement_type=movement_type,
+                    quantity=quantity,
+                    value=value,
+                    lines=counts[pair],
+                    companie_id=warehouses[warehouse_id].companie_id,
+                    created_by_id=employeer_id,
+                    updated_by_id=employeer_id
+                ))
+                continue
+            quantity_deltas[pk] = quantity
+            value_deltas[pk] = value
+            line_deltas[pk] = counts[pair]
+
+        if to_create:
+            DailyMovementRollup.objects.bulk_create(to_create, batch_size=cls.BATCH_SIZE)
+        if line_deltas:
+            DailyMovementRollup.objects.filter(pk__in=line_deltas.keys()).update(
+                quantity=F('quantity') + cls._delta_case(quantity_deltas, models.BigIntegerField()),
+                value=F('value') + cls._delta_case(value_deltas, cls.VALUE_FIELD),
+                lines=F('lines') + cls._delta_case(line_deltas, models.PositiveIntegerField()),
+                updated_at=timezone.now()
+            )
+        return len(counts)
+
+    @classmethod
+    def backfill(cls, start_date=None, end_date=None, companie=None):
+        """
+        Rebuild the rollup rows of a period from the stock ledger.
+
+        Values are computed at the current product prices, the ledger does not
+        record the price a movement was posted at.
+
+        Args:
+            start_date (date): First day to rebuild, defaults to the first ledger entry
+            end_date (date): Last day to rebuild, defaults to today
+            companie: Only rebuild the rows of this company (instance or pk)
+
+        Returns:
+            int: Number of rollup rows written
+        """
+        entries = StockLedgerEntry.objects.all()
+        rollups = DailyMovementRollup.objects.all()
+        if companie is not None:
+            entries = entries.filter(companie=companie)
+            rollups = rollups.filter(companie=companie)
+        if start_date:
+            entries = entries.filter(created_at__date__gte=start_date)
+            rollups = rollups.filter(date__gte=start_date)
+        if end_date:
+            entries = entries.filter(created_at__date__lte=end_date)
+            rollups = rollups.filter(date__lte=end_date)
+
+        grouped = (
+            entries.order_by()
+            .annotate(day=TruncDate('created_at'))
+            .values('day', 'companie_id', 'warehouse_id', 'product_id', 'movement_type')
+            .annotate(
+                total=Sum('quantity'),
+                total_value=Sum(ExpressionWrapper(
+                    F('quantity') * Coalesce(F('product__price'), Value(Decimal('0'))),
+                    output_field=cls.VALUE_FIELD
+                )),
+                line_count=Count('id')
+            )
+        )
+        rows = [
+            DailyMovementRollup(
+                date=group['day'],
+                companie_id=group['companie_id'],
+                warehouse_id=group['warehouse_id'],
+                product_id=group['product_id'],
+                movement_type=group['movement_type'],
+                quantity=group['total'] or 0,
+                value=group['total_value'] or Decimal('0'),
+                lines=group['line_count']
+            )
+            for group in grouped
+        ]
+
+        with transaction.atomic():
+            deleted, _ = rollups.delete()
+            DailyMovementRollup.objects.bulk_create(rows, batch_size=cls.BATCH_SIZE)
+
+        logger.info(
+            f"[MOVEMENT ROLLUP] Backfilled {len(rows)} rollup rows from {start_date or 'the first entry'} "
+            f"to {end_date or 'today'}, replacing {deleted}"
+        )
+        return len(rows)
+
+    @staticmethod
+    def aggregate(companie, start_date, end_date, group_by=('date',), movement_types=None,
+                  warehouse=None, direction=None):
+        """
+        Aggregate the rollup rows of a company over a period.
+
+        Args:
+            companie: Company of the rows (instance or pk)
+            start_date (date): First day of the period
+            end_date (date): Last day of the period
+            group_by (tuple): Rollup fields (or lookups) to group by
+            movement_types (iterable): Restrict to these movement types
+            warehouse: Restrict to this warehouse (instance or pk)
+            direction (int): 1 for entries only, -1 for exits only
+
+        Returns:
+            list: Dicts with the ``group_by`` values plus ``total_quantity``,
+                ``total_value`` and ``total_lines``
+        """
+        rows = DailyMovementRollup.objects.filter(companie=companie, date__range=[start_date, end_date])
+        if movement_types is not None:
+            rows = rows.filter(movement_type__in=movement_types)
+        if warehouse is not None:
+            rows = rows.filter(warehouse=warehouse)
+        if direction == 1:
+            rows = rows.filter(quantity__gt=0)
+        elif direction == -1:
+            rows = rows.filter(quantity__lt=0)
+
+        return list(
+            rows.order_by()
+            .values(*group_by)
+            .annotate(total_quantity=Sum('quantity'), total_value=Sum('value'), total_lines=Sum('lines'))
+            .order_by(*group_by)
+        )
+
+    @classmethod
+    def movement_report(cls, movement_type, start_date=None, end_date=None, companie=None, direction=-1):
+        """
+        Build the daily report of one movement type from the rollup.
+
+        Quantities and values are reported as positive amounts of the given
+        direction: exits for outflows, receiving warehouses for transfers.
+
+        Returns:
+            dict: Report with period, summary, daily totals, warehouses and products
+        """
+        end_date = end_date or timezone.now().date()
+        start_date = start_date or end_date - timedelta(days=6)
+        options = {'movement_types': [movement_type], 'direction': direction}
+
+        def positive(rows, *fields):
+            return [
+                {
+                    **{field: row[field] for field in fields},
+                    'quantity': abs(row['total_quantity'] or 0),
+                    'value': float(abs(row['total_value'] or 0)),
+                    'lines': row['total_lines'] or 0,
+                }
+                for row in rows
+            ]
+
+        by_day = {row['date']: row for row in positive(
+            cls.aggregate(companie, start_date, end_date, ('date',), **options), 'date'
+        )}
+        daily_totals = []
+        day = start_date
+        while day <= end_date:
+            row = by_day.get(day, {'quantity': 0, 'value': 0.0, 'lines': 0})
+            daily_totals.append({'date': str(day), 'quantity': row['quantity'], 'value': row['value'], 'lines': row['lines']})
+            day += timedelta(days=1)
+
+        by_warehouse = positive(
+            cls.aggregate(companie, start_date, end_date, ('warehouse_id', 'warehouse__name'), **options),
+            'warehouse_id', 'warehouse__name'
+        )
+        by_product = positive(
+            cls.aggregate(companie, start_date, end_date, ('product_id', 'product__name'), **options),
+            'product_id', 'product__name'
+        )
+
+        return {
+            'period': {'start': str(start_date), 'end': str(end_date)},
+            'summary': {
+                'total_quantity': sum(row['quantity'] for row in daily_totals),
+                'total_value': round(sum(row['value'] for row in daily_totals), 2),
+                'total_lines': sum(row['lines'] for row in daily_totals),
+            },
+            'daily_totals': daily_totals,
+            'by_warehouse': [
+                {'warehouse_id': str(row['warehouse_id']), 'name': row['warehouse__name'], 'quantity': row['quantity'], 'value': row['value']}
+                for row in sorted(by_warehouse, key=lambda row: -row['quantity'])
+            ],
+            'by_product': [
+                {'product_id': str(row['product_id']), 'name': row['product__name'], 'quantity': row['quantity'], 'value': row['value']}
+                for row in sorted(by_product, key=lambda row: -row['quantity'])
+            ],
+        }
@@ -1,8 +1,11 @@
 import logging
 from celery import shared_task
+from core.actor import actor_context
 from django.db.models import F
 from apps.inventory.product.models import Product
 from apps.inventory.warehouse.models import WarehouseProduct
+from apps.inventory.warehouse.services.ledger import StockLedgerService
+from apps.inventory.warehouse.services.posting import StockPostingService
 from apps.inventory.warehouse.notifications.handlers import WarehouseNotificationHandler
 from django.utils.translation import gettext_lazy as _
 
@@ -15,6 +18,7 @@ logger = logging.getLogger(__name__)
     max_retries=3,
     retry_backoff=True
 )
+@actor_context
 def check_low_stock():
     """
     Check for products with low stock across all warehouses.
@@ -72,6 +76,7 @@ def check_low_stock():
     max_retries=3,
     retry_backoff=True
 )
+@actor_context
 def check_specific_product(product_id=None):
     """
     Check stock levels for a specific product across all warehouses.
@@ -117,4 +122,45 @@ def check_specific_product(product_id=None):
         return f"Product with id {product_id} not found"
     except Exception as e:
         logger.error(f"Error checking product: {str(e)}")
-        return f"Error checking product: {str(e)}"
\ No newline at end of file
+        return f"Error checking product: {str(e)}"
+
+
+@shared_task(
+    name='compact_stock_ledger',
+    queue='warehouse',
+    autoretry_for=(Exception,),
+    max_retries=3,
+    retry_backoff=True
+)
+@actor_context
+def compact_stock_ledger():
+    """
+    Fold the stock ledger entries posted before today into balance snapshots.
+    """
+    try:
+        written = StockLedgerService.compact()
+        return f"Wrote {written} stock balance snapshots"
+    except Exception as e:
+        logger.error(f"Error in compact_stock_ledger task: {str(e)}")
+        raise
+
+
+
+@shared_task(
+    name='reconcile_warehouse_quantities',
+    queue='warehouse',
+    autoretry_for=(Exception,),
+    max_retries=3,
+    retry_backoff=True
+)
+@actor_context
+def reconcile_warehouse_quantities():
+    """
+    Fix any drift between the incremental warehouse quantities and their products.
+    """
+    try:
+        corrected = StockPostingService.reconcile_warehouse_totals()
+        return f"Corrected {corrected} warehouse quantities"
+    except Exception as e:
+        logger.error(f"Error in reconcile_warehouse_quantities task: {str(e)}")
+        raise
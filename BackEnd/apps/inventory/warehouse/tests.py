@@ -1,9 +1,23 @@
 from django.test import TestCase
-from django.db import transaction
+from django.db import transaction, connection
+from django.test.utils import CaptureQueriesContext
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import Group
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
 from ..product.models import Product
-from .models import Warehouse, WarehouseProduct
+from datetime import timedelta
+from django.utils import timezone
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from .models import Warehouse, WarehouseProduct, StockLedgerEntry, StockBalanceSnapshot, DailyMovementRollup
+from .services.posting import StockPostingService
+from .services.ledger import StockLedgerService
+from .services.rollup import MovementRollupService
+from ..outflows.services.reports import OutflowReportService
+from ..transfer.services.reports import TransferReportService
 from apps.companies.models import Companie
 from apps.accounts.models import User
 from apps.companies.employeers.models import Employeer
@@ -165,3 +179,389 @@ class WarehouseCapacityTests(TestCase):
         with self.assertRaises(ValidationError):
             self.warehouse.limit = 70
             self.warehouse.save()
+
+
+class StockPostingServiceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Companie.objects.create(name="Posting Company")
+        cls.employee = Employeer.objects.create(
+            name="Posting Test User",
+            companie=cls.company,
+            email="posting_test@example.com"
+        )
+        cls.products = [
+            Product.objects.create(
+                name=f"Posting Product {index}",
+                companie=cls.company,
+                created_by=cls.employee,
+                updated_by=cls.employee
+            )
+            for index in range(40)
+        ]
+    
+    def setUp(self):
+        self.warehouse = Warehouse.objects.create(
+            name="Posting Warehouse",
+            limit=1000,
+            companie=self.company,
+            created_by=self.employee,
+            updated_by=self.employee
+        )
+    
+    def test_post_creates_and_updates_rows(self):
+        """Test posting creates missing rows and applies deltas to existing ones"""
+        product = self.products[0]
+        StockPostingService.post([(self.warehouse, product, 30)], employeer=self.employee)
+        StockPostingService.post([(self.warehouse, product, 20), (self.warehouse, product, -5)])
+        
+        warehouse_product = WarehouseProduct.objects.get(warehouse=self.warehouse, product=product)
+        product.refresh_from_db()
+        self.warehouse.refresh_from_db()
+        
+        self.assertEqual(warehouse_product.current_quantity, 45)
+        self.assertEqual(warehouse_product.companie, self.company)
+        self.assertEqual(warehouse_product.created_by, self.employee)
+        self.assertEqual(product.quantity, 45)
+        self.assertEqual(self.warehouse.quantity, 45)
+    
+    def test_post_rejects_negative_stock(self):
+        """Test posting more than the available stock fails without side effects"""
+        product = self.products[0]
+        StockPostingService.post([(self.warehouse, product, 10)])
+        
+        with self.assertRaises(ValidationError):
+            StockPostingService.post([(self.warehouse, product, -11)])
+        with self.assertRaises(ValidationError):
+            StockPostingService.post([(self.warehouse, self.products[1], -1)])
+        
+        self.warehouse.refresh_from_db()
+        self.assertEqual(self.warehouse.quantity, 10)
+    
+    def test_post_rejects_capacity_overflow(self):
+        """Test posting over the warehouse limit rolls back every line"""
+        lines = [(self.warehouse, product, 100) for product in self.products[:11]]
+        
+        with self.assertRaises(ValidationError):
+            StockPostingService.post(lines)
+        
+        self.warehouse.refresh_from_db()
+        self.assertEqual(self.warehouse.quantity, 0)
+        self.assertFalse(WarehouseProduct.objects.filter(warehouse=self.warehouse).exists())
+    
+    def _count_posting_queries(self, line_count):
+        lines = [(self.warehouse, product, 1) for product in self.products[:line_count]]
+        # First posting creates the rows, the second one updates them
+        with CaptureQueriesContext(connection) as create_queries:
+            StockPostingService.post(lines)
+        with CaptureQueriesContext(connection) as update_queries:
+            StockPostingService.post(lines)
+        WarehouseProduct.objects.filter(warehouse=self.warehouse).delete()
+        DailyMovementRollup.objects.filter(warehouse=self.warehouse).delete()
+        return len(create_queries), len(update_queries)
+    
+    def test_query_count_is_flat_with_line_count(self):
+        """Benchmark: posting 40 lines costs the same queries as posting 5"""
+        small = self._count_posting_queries(5)
+        large = self._count_posting_queries(40)
+        
+        self.assertEqual(small, large)
+        # Includes the prices, lookup and write of the daily movement rollup
+        self.assertLessEqual(max(large), 15)
+    
+    def _count_save_queries(self, sku_count):
+        warehouse = Warehouse.objects.create(name=f"SKU Warehouse {sku_count}", limit=1000, companie=self.company)
+        StockPostingService.post([(warehouse, product, 1) for product in self.products[:sku_count]])
+        warehouse_product = WarehouseProduct.objects.get(warehouse=warehouse, product=self.products[0])
+        warehouse_product.current_quantity += 5
+        with CaptureQueriesContext(connection) as queries:
+            warehouse_product.save()
+        warehouse.refresh_from_db()
+        self.assertEqual(warehouse.quantity, sku_count + 5)
+        return len(queries)
+    
+    def test_save_cost_is_independent_of_sku_count(self):
+        """Benchmark: saving one warehouse product does not scan the other SKUs"""
+        self.assertEqual(self._count_save_queries(1), self._count_save_queries(40))
+    
+    def test_adjust_quantity_is_a_conditional_update(self):
+        """Test growing the quantity past the limit is refused, shrinking is not"""
+        self.assertTrue(Warehouse.adjust_quantity(self.warehouse.pk, 1000))
+        self.assertFalse(Warehouse.adjust_quantity(self.warehouse.pk, 1))
+        self.assertTrue(Warehouse.adjust_quantity(self.warehouse.pk, -10))
+        
+        self.warehouse.refresh_from_db()
+        self.assertEqual(self.warehouse.quantity, 990)
+    
+    def test_stale_warehouse_save_keeps_the_counter(self):
+        """Test saving an outdated Warehouse instance does not overwrite its quantity"""
+        stale = Warehouse.objects.get(pk=self.warehouse.pk)
+        StockPostingService.post([(self.warehouse, self.products[0], 30)])
+        
+        stale.name = "Renamed Posting Warehouse"
+        stale.save()
+        
+        self.warehouse.refresh_from_db()
+        self.assertEqual(self.warehouse.name, "Renamed Posting Warehouse")
+        self.assertEqual(self.warehouse.quantity, 30)
+    
+    def test_reconcile_fixes_drift(self):
+        """Test the reconciliation job realigns drifted warehouse quantities"""
+        StockPostingService.post([(self.warehouse, self.products[0], 30)])
+        Warehouse.objects.filter(pk=self.warehouse.pk).update(quantity=7)
+        
+        self.assertEqual(StockPostingService.reconcile_warehouse_totals(), 1)
+        self.warehouse.refresh_from_db()
+        self.assertEqual(self.warehouse.quantity, 30)
+        self.assertEqual(StockPostingService.reconcile_warehouse_totals(), 0)
+
+
+class StockLedgerServiceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Companie.objects.create(name="Ledger Company")
+        cls.product = Product.objects.create(name="Ledger Product", companie=cls.company)
+        cls.warehouse = Warehouse.objects.create(name="Ledger Warehouse", companie=cls.company)
+    
+    def test_posting_appends_ledger_entries(self):
+        """Test every posted line is recorded in the ledger"""
+        StockPostingService.post(
+            [(self.warehouse, self.product, 10), (self.warehouse, self.product, 5)],
+            movement_type='inflow'
+        )
+        StockPostingService.post([(self.warehouse, self.product, -3)], movement_type='outflow')
+        
+        entries = StockLedgerEntry.objects.filter(warehouse=self.warehouse, product=self.product)
+        self.assertEqual(entries.count(), 3)
+        self.assertEqual(sorted(entries.values_list('quantity', flat=True)), [-3, 5, 10])
+        self.assertEqual(entries.filter(movement_type='outflow').count(), 1)
+    
+    def test_balance_as_of_uses_snapshot_plus_delta(self):
+        """Test the balance at a date combines the snapshot with later entries"""
+        StockPostingService.post([(self.warehouse, self.product, 10)], movement_type='inflow')
+        cutoff = timezone.now()
+        StockPostingService.post([(self.warehouse, self.product, -4)], movement_type='outflow')
+        
+        self.assertEqual(StockLedgerService.compact(cutoff=cutoff), 1)
+        self.assertEqual(StockBalanceSnapshot.objects.get(as_of=cutoff).quantity, 10)
+        
+        pair = (self.warehouse.pk, self.product.pk)
+        self.assertEqual(StockLedgerService.balances_as_of(cutoff)[pair], 10)
+        self.assertEqual(StockLedgerService.balances_as_of()[pair], 6)
+        self.assertEqual(StockLedgerService.balances_as_of(cutoff - timedelta(days=1)), {})
+    
+    def test_compact_snapshots_only_the_pairs_that_moved(self):
+        """Test a compaction skips the pairs without entries since the previous one"""
+        other_product = Product.objects.create(name="Idle Ledger Product", companie=self.company)
+        StockPostingService.post(
+            [(self.warehouse, self.product, 10), (self.warehouse, other_product, 7)],
+            movement_type='inflow'
+        )
+        first_cutoff = timezone.now()
+        self.assertEqual(StockLedgerService.compact(cutoff=first_cutoff), 2)
+
+        StockPostingService.post([(self.warehouse, self.product, -4)], movement_type='outflow')
+        second_cutoff = timezone.now()
+        self.assertEqual(StockLedgerService.compact(cutoff=second_cutoff), 1)
+
+        self.assertEqual(StockBalanceSnapshot.objects.get(as_of=second_cutoff).quantity, 6)
+        self.assertEqual(StockBalanceSnapshot.objects.count(), 3)
+        self.assertEqual(StockLedgerService.balances_as_of(second_cutoff), {
+            (self.warehouse.pk, self.product.pk): 6,
+            (self.warehouse.pk, other_product.pk): 7,
+        })
+    
+    def test_rebuild_counters_fixes_drift(self):
+        """Test drifted counters are rebuilt from the ledger"""
+        StockPostingService.post([(self.warehouse, self.product, 25)], movement_type='inflow')
+        WarehouseProduct.objects.filter(warehouse=self.warehouse).update(current_quantity=999)
+        Warehouse.objects.filter(pk=self.warehouse.pk).update(quantity=999)
+        
+        summary = StockLedgerService.rebuild_counters()
+        
+        self.warehouse.refresh_from_db()
+        self.product.refresh_from_db()
+        self.assertEqual(summary['warehouse_products'], 1)
+        self.assertEqual(self.warehouse.quantity, 25)
+        self.assertEqual(self.product.quantity, 25)
+        self.assertEqual(
+            WarehouseProduct.objects.get(warehouse=self.warehouse, product=self.product).current_quantity,
+            25
+        )
+    
+    def test_ledger_entries_are_append_only(self):
+        """Test saving an existing ledger entry is refused"""
+        StockPostingService.post([(self.warehouse, self.product, 1)])
+        entry = StockLedgerEntry.objects.get()
+        
+        with self.assertRaises(ValidationError):
+            entry.quantity = 2
+            entry.save()
+
+
+
+
+class MovementRollupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Companie.objects.create(name="Rollup Company")
+        cls.product = Product.objects.create(name="Rollup Product", price=Decimal('2.00'), companie=cls.company)
+        cls.warehouse = Warehouse.objects.create(name="Rollup Warehouse", companie=cls.company)
+        cls.other_warehouse = Warehouse.objects.create(name="Rollup Store", companie=cls.company)
+    
+    def _rollup(self):
+        return sorted(
+            DailyMovementRollup.objects.values_list('date', 'warehouse_id', 'movement_type', 'quantity', 'value', 'lines')
+        )
+    
+    def test_postings_accumulate_in_the_rollup(self):
+        """Test postings of the same day fold into one row per warehouse, product and type"""
+        StockPostingService.post([(self.warehouse, self.product, 10)], movement_type='inflow')
+        StockPostingService.post([(self.warehouse, self.product, 5)], movement_type='inflow')
+        StockPostingService.post([(self.warehouse, self.product, -3)], movement_type='outflow')
+        StockPostingService.post(
+            [(self.warehouse, self.product, -4), (self.other_warehouse, self.product, 4)],
+            movement_type='transfer'
+        )
+        
+        inflow = DailyMovementRollup.objects.get(movement_type='inflow')
+        self.assertEqual((inflow.quantity, inflow.value, inflow.lines), (15, Decimal('30.00'), 2))
+        self.assertEqual(inflow.companie_id, self.company.pk)
+        self.assertEqual(inflow.date, timezone.now().date())
+        self.assertEqual(DailyMovementRollup.objects.count(), 4)
+        
+        today = timezone.now().date()
+        outflows = OutflowReportService.generate_daily_report(companie=self.company)
+        self.assertEqual(outflows['summary'], {'total_quantity': 3, 'total_value': 6.0, 'total_lines': 1})
+        self.assertEqual(outflows['daily_totals'][-1]['date'], str(today))
+        self.assertEqual(len(outflows['daily_totals']), 7)
+        transfers = TransferReportService.generate_daily_report(companie=self.company)
+        self.assertEqual(transfers['summary']['total_quantity'], 4)
+        self.assertEqual(transfers['by_warehouse'][0]['name'], "Rollup Store")
+    
+    def test_report_queries_do_not_grow_with_postings(self):
+        """Benchmark: the report reads the rollup, not the posted lines"""
+        StockPostingService.post([(self.warehouse, self.product, 50)], movement_type='inflow')
+        StockPostingService.post([(self.warehouse, self.product, -1)], movement_type='outflow')
+        with CaptureQueriesContext(connection) as small:
+            OutflowReportService.generate_daily_report(companie=self.company)
+        
+        for _ in range(20):
+            StockPostingService.post([(self.warehouse, self.product, -1)], movement_type='outflow')
+        with CaptureQueriesContext(connection) as large:
+            report = OutflowReportService.generate_daily_report(companie=self.company)
+        
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(report['summary']['total_quantity'], 21)
+        self.assertEqual(DailyMovementRollup.objects.filter(movement_type='outflow').count(), 1)
+    
+    def test_backfill_rebuilds_the_rollup_from_the_ledger(self):
+        """Test the backfill command reproduces the incrementally maintained rows"""
+        StockPostingService.post([(self.warehouse, self.product, 10)], movement_type='inflow')
+        StockPostingService.post(
+            [(self.warehouse, self.product, -4), (self.other_warehouse, self.product, 4)],
+            movement_type='transfer'
+        )
+        expected = self._rollup()
+        
+        DailyMovementRollup.objects.all().delete()
+        call_command('backfill_movement_rollup', stdout=StringIO())
+        
+        self.assertEqual(self._rollup(), expected)
+        self.assertEqual(MovementRollupService.backfill(end_date=timezone.now().date() - timedelta(days=1)), 0)
+        self.assertEqual(self._rollup(), expected)
+
+class TenantResponseCacheTests(APITestCase):
+    """Tests for the tenant scoped, generation stamped warehouse list cache"""
+
+    def setUp(self):
+        self.company = Companie.objects.create(name='Cache Company', type='Headquarters')
+        self.other_company = Companie.objects.create(name='Other Cache Company', type='Headquarters')
+
+        self.user = User.objects.create_user(
+            password='cache123',
+            email='cache_manager@test.com',
+            first_name='Cache',
+            last_name='Manager',
+            user_type='Manager'
+        )
+        self.other_user = User.objects.create_user(
+            password='cache123',
+            email='cache_other@test.com',
+            first_name='Other',
+            last_name='Manager',
+            user_type='Manager'
+        )
+        for user, company in ((self.user, self.company), (self.other_user, self.other_company)):
+            employeer = Employeer.objects.get(user=user)
+            employeer.companie = company
+            employeer.save()
+            user.refresh_from_db()
+
+        self.warehouse = Warehouse.objects.create(name='Cached Warehouse', companie=self.company)
+        Warehouse.objects.create(name='Foreign Warehouse', companie=self.other_company)
+        self.url = reverse('warehouse:warehouse_list')
+
+    def names(self, response):
+        results = response.data['results'] if isinstance(response.data, dict) else response.data
+        return [row['name'] for row in results]
+
+    def test_list_is_served_from_cache_with_etag(self):
+        self.client.force_authenticate(self.user)
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertIn('ETag', first)
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(self.url)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertFalse(any('inventory_warehouse' in query['sql'] for query in queries.captured_queries))
+
+        not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_tenants_do_not_share_cached_responses(self):
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.names(self.client.get(self.url)), ['Cached Warehouse'])
+
+        self.client.force_authenticate(self.other_user)
+        self.assertEqual(self.names(self.client.get(self.url)), ['Foreign Warehouse'])
+
+    def test_save_bumps_the_tenant_generation(self):
+        self.client.force_authenticate(self.user)
+        first = self.client.get(self.url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.warehouse.name = 'Renamed Warehouse'
+            self.warehouse.save()
+
+        second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+        self.assertEqual(self.names(second), ['Renamed Warehouse'])
+
+    def test_product_and_user_renames_bump_the_tenant_generation(self):
+        self.client.force_authenticate(self.user)
+        product = Product.objects.create(name='Cached Product', companie=self.company)
+        with self.captureOnCommitCallbacks(execute=True):
+            WarehouseProduct.objects.create(warehouse=self.warehouse, product=product, current_quantity=1, companie=self.company)
+        etag = self.client.get(self.url)['ETag']
+
+        renames = [
+            (product, 'name', 'Renamed Product'),
+            (self.user, 'first_name', 'Renamed'),
+        ]
+        for instance, field, value in renames:
+            with self.subTest(model=type(instance).__name__):
+                with self.captureOnCommitCallbacks(execute=True):
+                    setattr(instance, field, value)
+                    instance.save()
+                response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                etag = response['ETag']
+
+        # Saves that leave the names alone keep the cached responses
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save(update_fields=['last_login'])
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
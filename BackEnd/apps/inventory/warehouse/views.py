@@ -5,11 +5,11 @@ from django.db import transaction
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
 from core.cache import (
-    cache_response, 
+    tenant_cache_response,
     invalidate_cache_key, 
-    get_cache_key,
-    cache_get_or_set
+    get_cache_key
 )
 from drf_spectacular.utils import (
     extend_schema, extend_schema_view,
@@ -22,6 +22,7 @@ from rest_framework.generics import (
 )
 from rest_framework.exceptions import ValidationError
 import logging
+from core.actor import get_employeer
 
 logger = logging.getLogger(__name__)
 
@@ -35,9 +36,9 @@ class WareHouseBaseView:
             if getattr(self, 'swagger_fake_view', False):
                 return Warehouse.objects.none()
             
-            employeer = user.employeer
-            return Warehouse.objects.select_related(
-                'companie'
+            employeer = get_employeer(user)
+            return Warehouse.objects.with_audit().prefetch_related(
+                'items__product'
             ).filter(companie=employeer.companie)
         except Warehouse.DoesNotExist:
             return Warehouse.objects.none()
@@ -58,28 +59,11 @@ class WareHouseBaseView:
 class WarehouseListView(WareHouseBaseView, ListAPIView):
     serializer_class = WarehouseSerializer
     
+    @tenant_cache_response(namespaces=['warehouse'], timeout=settings.CACHE_TIMEOUTS['warehouse'])
     def list(self, request, *args, **kwargs):
-        cache_key = 'warehouse_list:GET:/api/v1/warehouse/'
-        
-        def get_fresh_data():
-            queryset = self.get_queryset()
-            serializer = self.get_serializer(queryset, many=True)
-            logger.info(f"[WAREHOUSE VIEWS] - Warehouses list retrieved successfully (cache miss)")
-            return serializer.data
-        
-        # Get the latest updated_at from all warehouses to use as cache version
-        latest_warehouse = Warehouse.objects.order_by('-updated_at').first()
-        cache_version = int(latest_warehouse.updated_at.timestamp()) if latest_warehouse else 0
-        
-        data = cache_get_or_set(
-            key=cache_key,
-            default_func=get_fresh_data,
-            timeout=300,
-            cache_alias='default'
-        )
-        
-        logger.info(f"[WAREHOUSE VIEWS] - Warehouses list retrieved successfully (cache hit)")
-        return Response(data, headers={'Cache-Version': str(cache_version)})
+        response = super().list(request, *args, **kwargs)
+        logger.info(f"[WAREHOUSE VIEWS] - Warehouses list retrieved successfully (cache miss)")
+        return response
 
 @extend_schema_view(
     post=extend_schema(
@@ -111,9 +95,6 @@ class WarehouseCreateView(WareHouseBaseView, CreateAPIView):
         warehouse = serializer.save()
         logger.info(f"[WAREHOUSE VIEWS] - Warehouse created successfully")
         
-        # Invalidate warehouse list cache
-        invalidate_cache_key('warehouse_list:GET:/api/v1/warehouse/', cache_alias='drywall')
-        
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
     
@@ -140,34 +121,11 @@ class WarehouseCreateView(WareHouseBaseView, CreateAPIView):
 class WarehouseRetrieveView(WareHouseBaseView, RetrieveAPIView):
     serializer_class = WarehouseSerializer
     
+    @tenant_cache_response(namespaces=['warehouse'], timeout=settings.CACHE_TIMEOUTS['warehouse'])
     def retrieve(self, request, *args, **kwargs):
-        try:
-            instance = self.get_object()
-            cache_key = f'warehouse_detail:GET:/api/v1/warehouse/{instance.id}/'
-            
-            def get_fresh_data():
-                serializer = self.get_serializer(instance)
-                logger.info(f"[WAREHOUSE VIEWS] - Warehouse {instance.id} retrieved successfully (cache miss)")
-                return serializer.data
-            
-            # Use cache_get_or_set with version based on updated_at
-            cache_version = int(instance.updated_at.timestamp())
-            data = cache_get_or_set(
-                key=cache_key,
-                default_func=get_fresh_data,
-                timeout=300,
-                cache_alias='default'
-            )
-            
-            logger.info(f"[WAREHOUSE VIEWS] - Warehouse {instance.id} retrieved successfully (cache hit)")
-            return Response(data, headers={'Cache-Version': str(cache_version)})
-            
-        except Exception as e:
-            logger.error(f"[WAREHOUSE VIEWS] - Error retrieving warehouse: {str(e)}")
-            return Response(
-                {"detail": "Error retrieving warehouse"},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        response = super().retrieve(request, *args, **kwargs)
+        logger.info(f"[WAREHOUSE VIEWS] - Warehouse {kwargs.get('pk')} retrieved successfully (cache miss)")
+        return response
 
 @extend_schema_view(
     put=extend_schema(
@@ -235,21 +193,9 @@ class WarehouseUpdateView(WareHouseBaseView, UpdateAPIView):
             serializer = self.get_serializer(instance, data=request.data)
             serializer.is_valid(raise_exception=True)
             
+            # Cached responses are invalidated by the warehouse save (tenant generation bump)
             with transaction.atomic():
                 warehouse = serializer.save()
-                
-                # Invalidar todos os caches relacionados
-                cache_keys = [
-                    'warehouse_list:GET:/api/v1/warehouse/',  # warehouse list
-                    f'warehouse_detail:GET:/api/v1/warehouse/{instance.id}/',  # warehouse detail
-                    get_cache_key('warehouse', id=instance.id),  # Object cache
-                    f'warehouse_total_quantity:{instance.__class__.__name__}:{instance.id}',  # Quantity cache
-                ]
-                
-                for key in cache_keys:
-                    invalidate_cache_key(key, cache_alias='default')
-                    logger.info(f"[WAREHOUSE VIEWS] - Cache invalidated for key: {key}")
-                
                 logger.info(f"[WAREHOUSE VIEWS] - Warehouse {instance.id} updated successfully")
                 return Response(serializer.data)
                 
@@ -290,11 +236,7 @@ class WarehouseDeleteView(WareHouseBaseView, DestroyAPIView):
             warehouse_id = instance.id
             self.perform_destroy(instance)
             logger.info(f"[WAREHOUSE VIEWS] - Warehouse deleted successfully")
-            
-            # Invalidate all related caches
-            invalidate_cache_key('warehouse_list:GET:/api/v1/warehouse/', cache_alias='drywall')
-            invalidate_cache_key(f'warehouse_detail:GET:/api/v1/warehouse/{warehouse_id}/', cache_alias='drywall')
-            invalidate_cache_key(get_cache_key('warehouse', id=warehouse_id), cache_alias='drywall')
+            invalidate_cache_key(get_cache_key('warehouse', id=warehouse_id), cache_alias='default')
             
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Exception as e:
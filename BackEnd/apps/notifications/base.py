@@ -1,24 +1,55 @@
 # Adicionar em apps/notifications/base.py
+from django.core.cache import cache
 from apps.accounts.models import User
-from apps.notifications.utils import send_notification
+from apps.notifications.utils import enqueue_notifications
+from apps.notifications.services.recipients import RecipientIndex
 
 
 class BaseNotificationHandler:
+    # System-wide recipient lists are not invalidated, a short cache absorbs bursts of events
+    RECIPIENTS_CACHE_TIMEOUT = 60
+
     @staticmethod
     def get_recipients_by_type(*user_types):
         return User.objects.filter(
             user_type__in=user_types,
             is_active=True
         )
-    
+
+    @classmethod
+    def get_recipient_ids(cls, *user_types, companie=None):
+        """
+        Get the ids of the active users of the given types.
+
+        Args:
+            user_types: User types to notify
+            companie: Company whose users are notified. Served from the
+                tenant-aware RecipientIndex; without it every company's users
+                are returned (only meant for system-wide events)
+
+        Returns:
+            list: Recipient user ids as strings
+        """
+        if companie is not None:
+            return RecipientIndex.recipient_ids(companie, *user_types)
+
+        cache_key = f"notification_recipients:*:{','.join(sorted(set(user_types)))}"
+        recipient_ids = cache.get(cache_key)
+        if recipient_ids is None:
+            recipient_ids = [
+                str(user_id) for user_id in cls.get_recipients_by_type(*user_types).values_list('id', flat=True)
+            ]
+            cache.set(cache_key, recipient_ids, cls.RECIPIENTS_CACHE_TIMEOUT)
+        return recipient_ids
+
     @staticmethod
     def send_to_recipients(recipient_ids, title, message, app_name, notification_type, data):
-        for user_id in recipient_ids:
-            send_notification(
-                user_id=user_id,
-                title=title,
-                app_name=app_name,
-                message=message,
-                notification_type=notification_type,
-                data=data
-            )
\ No newline at end of file
+        """Queue one notification event for all recipients, delivered in batch by a Celery worker"""
+        enqueue_notifications(
+            recipient_ids=recipient_ids,
+            title=title,
+            app_name=app_name,
+            message=message,
+            notification_type=notification_type,
+            data=data
+        )
@@ -117,4 +117,19 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             
         except Exception as e:
             logger.error(f"Error sending notification: {str(e)}", exc_info=True)
-            await self.close(code=4005)
\ No newline at end of file
+            await self.close(code=4005)
+
+    async def job_progress(self, event):
+        """
+        Handle progress frames of the user's background jobs.
+        """
+        try:
+            await self.send(text_data=json.dumps({
+                "type": "job_progress",
+                "job": event["job"],
+                "job_id": event["job_id"],
+                "status": event["status"],
+                "data": event.get("data", {})
+            }))
+        except Exception as e:
+            logger.error(f"Error sending job progress: {str(e)}", exc_info=True)
@@ -1,5 +1,5 @@
 from django.db import models
-from basemodels.models import BaseModel
+from basemodels.models import BaseModel, tenant_indexes
 from django.conf import settings
 from django.utils.translation import gettext
 
@@ -19,6 +19,7 @@ class Notification(BaseModel):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = tenant_indexes('notification')
         verbose_name = gettext('Notification')
         verbose_name_plural = gettext('Notifications')
         
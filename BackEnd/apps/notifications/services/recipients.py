@@ -0,0 +1,124 @@
+import logging
+import time
+from collections import OrderedDict
+from django.core.cache import cache
+from apps.accounts.models import User
+from core.cache import get_tenant_generations, bump_tenant_generation
+
+logger = logging.getLogger(__name__)
+
+
+class RecipientIndex:
+    """
+    Tenant-aware index of notification recipients keyed by (companie, user_type).
+
+    Each entry is the list of ``(user_id, email)`` pairs of the company's active
+    users of one type. Entries live in the shared cache and, for a few seconds,
+    in a small per-process memory; both are stamped with the company's
+    'recipients' generation, which the User/Employeer signals bump, so a change
+    of role, company or active flag is picked up on the next lookup.
+    """
+
+    NAMESPACE = 'recipients'
+    CACHE_TIMEOUT = 60 * 60
+    LOCAL_TIMEOUT = 30
+    LOCAL_MAX_ENTRIES = 1024
+
+    _local = OrderedDict()
+
+    @classmethod
+    def _key(cls, companie_id, generation, user_type):
+        return f'recipient_index:{companie_id}:{generation}:{user_type}'
+
+    @classmethod
+    def _local_get(cls, key):
+        entry = cls._local.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            cls._local.pop(key, None)
+            return None
+        return value
+
+    @classmethod
+    def _local_set(cls, key, value):
+        cls._local[key] = (time.monotonic() + cls.LOCAL_TIMEOUT, value)
+        cls._local.move_to_end(key)
+        while len(cls._local) > cls.LOCAL_MAX_ENTRIES:
+            cls._local.popitem(last=False)
+
+    @classmethod
+    def entries(cls, companie, *user_types):
+        """
+        Get the ``(user_id, email)`` pairs of the company's active users of the given types.
+
+        Args:
+            companie: Companie instance or pk
+            user_types: User types to include
+
+        Returns:
+            list: ``(user_id, email)`` pairs, user ids as strings
+        """
+        companie_id = getattr(companie, 'pk', companie)
+        user_types = sorted(set(user_types))
+        if companie_id is None or not user_types:
+            return []
+
+        generation = get_tenant_generations(companie_id, [cls.NAMESPACE])[cls.NAMESPACE]
+        keys = {cls._key(companie_id, generation, user_type): user_type for user_type in user_types}
+
+        found = {}
+        for key in keys:
+            value = cls._local_get(key)
+            if value is not None:
+                found[key] = value
+
+        missing = [key for key in keys if key not in found]
+        if missing:
+            shared = cache.get_many(missing)
+            for key, value in shared.items():
+                cls._local_set(key, value)
+            found.update(shared)
+
+        missing_types = [keys[key] for key in keys if key not in found]
+        if missing_types:
+            rows = {user_type: [] for user_type in missing_types}
+            for user_id, email, user_type in User.objects.filter(
+                user_type__in=missing_types,
+                is_active=True,
+                employeer__companie_id=companie_id
+            ).values_list('id', 'email', 'user_type'):
+                rows[user_type].append((str(user_id), email))
+
+            built = {cls._key(companie_id, generation, user_type): value for user_type, value in rows.items()}
+            cache.set_many(built, cls.CACHE_TIMEOUT)
+            for key, value in built.items():
+                cls._local_set(key, value)
+            found.update(built)
+            logger.debug(f"[RECIPIENT INDEX] Built {len(built)} entries for companie {companie_id}")
+
+        seen = set()
+        result = []
+        for key in keys:
+            for user_id, email in found[key]:
+                if user_id not in seen:
+                    seen.add(user_id)
+                    result.append((user_id, email))
+        return result
+
+    @classmethod
+    def recipient_ids(cls, companie, *user_types):
+        """Get the ids of the company's active users of the given types"""
+        return [user_id for user_id, _ in cls.entries(companie, *user_types)]
+
+    @classmethod
+    def recipient_emails(cls, companie, *user_types):
+        """Get the emails of the company's active users of the given types"""
+        return [email for _, email in cls.entries(companie, *user_types) if email]
+
+    @classmethod
+    def invalidate(cls, *companie_ids):
+        """Drop the index of the given companies (after the current transaction commits)"""
+        for companie_id in {companie_id for companie_id in companie_ids if companie_id is not None}:
+            bump_tenant_generation(companie_id, cls.NAMESPACE)
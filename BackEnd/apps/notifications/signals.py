@@ -0,0 +1,34 @@
+import logging
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from apps.accounts.models import User
+from apps.companies.employeers.models import Employeer
+from .services.recipients import RecipientIndex
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(pre_save, sender=Employeer)
+def store_previous_employeer_companie(sender, instance, **kwargs):
+    """Store the previous company so moving an employeer invalidates both indexes"""
+    instance._previous_companie_id = None
+    if not instance._state.adding:
+        instance._previous_companie_id = (
+            Employeer.objects.filter(pk=instance.pk).values_list('companie_id', flat=True).first()
+        )
+
+
+@receiver([post_save, post_delete], sender=Employeer)
+def invalidate_employeer_recipients(sender, instance, **kwargs):
+    """Invalidate the recipient index of the employeer's company"""
+    RecipientIndex.invalidate(instance.companie_id, getattr(instance, '_previous_companie_id', None))
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_recipients(sender, instance, update_fields=None, **kwargs):
+    """Invalidate the recipient index when a user's type or active flag may have changed"""
+    # Saves that only touch other fields (e.g. last_login on every login) can not change the index
+    if update_fields is not None and not {'user_type', 'is_active', 'email'} & set(update_fields):
+        return
+    companie_ids = Employeer.objects.filter(user_id=instance.pk).values_list('companie_id', flat=True)
+    RecipientIndex.invalidate(*companie_ids)
@@ -0,0 +1,71 @@
+import logging
+from celery import shared_task
+from django.db import transaction
+from core.actor import actor_context
+from .models import Notification
+from .utils import store_notifications, broadcast_notifications
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(
+    name='dispatch_notifications',
+    queue='notifications'
+)
+@actor_context
+def dispatch_notifications_task(recipient_ids, title, message, app_name='', notification_type='info', data=None):
+    """
+    Deliver one notification event to all of its recipients in a batch.
+
+    The notifications are stored once, this task is not retried. Only the
+    broadcast, published after the rows are committed, is retried.
+    """
+    try:
+        with transaction.atomic():
+            notifications = store_notifications(
+                recipient_ids=recipient_ids,
+                title=title,
+                message=message,
+                app_name=app_name,
+                notification_type=notification_type,
+                data=data
+            )
+            notification_ids = [str(notification.id) for notification in notifications]
+            if notification_ids:
+                transaction.on_commit(lambda: publish_broadcast(notification_ids))
+        return f"Dispatched '{title}' to {len(notification_ids)} users"
+    except Exception as e:
+        logger.error(f"Error in dispatch_notifications task: {str(e)}")
+        raise
+
+
+def publish_broadcast(notification_ids):
+    """Queue the broadcast of stored notifications, or send it inline if the broker is down"""
+    try:
+        broadcast_notifications_task.delay(notification_ids=notification_ids)
+    except Exception as e:
+        logger.warning(f"[NOTIFICATIONS] Broker unavailable, broadcasting {len(notification_ids)} notifications inline: {str(e)}")
+        broadcast_notifications(Notification.objects.filter(pk__in=notification_ids))
+
+
+@shared_task(
+    bind=True,
+    name='broadcast_notifications',
+    queue='notifications',
+    max_retries=3
+)
+def broadcast_notifications_task(self, notification_ids):
+    """
+    Push stored notifications to their recipients.
+
+    A retry only pushes the notifications whose push failed, nothing is written.
+    """
+    try:
+        failed = broadcast_notifications(Notification.objects.filter(pk__in=notification_ids))
+    except Exception as e:
+        logger.error(f"Error in broadcast_notifications task: {str(e)}")
+        failed = notification_ids
+
+    if failed:
+        raise self.retry(kwargs={'notification_ids': failed}, countdown=2 ** self.request.retries)
+    return f"Broadcast {len(notification_ids)} notifications"
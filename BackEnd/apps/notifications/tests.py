@@ -1,3 +1,185 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+from celery.exceptions import Retry
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from apps.accounts.models import User
+from apps.companies.models import Companie
+from apps.companies.employeers.models import Employeer
+from .base import BaseNotificationHandler
+from .models import Notification
+from .services.recipients import RecipientIndex
+from .tasks import broadcast_notifications_task, dispatch_notifications_task
+from .utils import dispatch_notifications, enqueue_notifications
 
-# Create your tests here.
+
+class NotificationDispatchTests(TestCase):
+    """Tests for the batched notification fan-out"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(
+                email=f'fanout_{index}@example.com',
+                password='fanout123',
+                first_name='Fanout',
+                last_name=str(index),
+                user_type='Manager'
+            )
+            for index in range(30)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def _dispatch(self, recipients):
+        channel_layer = MagicMock()
+        channel_layer.group_send = AsyncMock()
+        with patch('apps.notifications.utils.get_channel_layer', return_value=channel_layer):
+            with CaptureQueriesContext(connection) as queries:
+                delivered = dispatch_notifications(
+                    recipient_ids=[user.id for user in recipients],
+                    title='Inflow Approved',
+                    message='Inflow approved',
+                    app_name='inflows',
+                    notification_type='info',
+                    data={'inflow_id': 'abc'}
+                )
+        return delivered, len(queries), channel_layer.group_send
+
+    def test_dispatch_is_batched(self):
+        """Benchmark: 30 recipients cost the same queries as 2"""
+        _, small_queries, _ = self._dispatch(self.users[:2])
+        delivered, large_queries, group_send = self._dispatch(self.users)
+
+        self.assertEqual(delivered, 30)
+        self.assertEqual(small_queries, large_queries)
+        self.assertEqual(group_send.await_count, 30)
+        group, message = group_send.await_args_list[0].args
+        self.assertTrue(group.startswith('user_'))
+        self.assertEqual(message['type'], 'notification_message')
+        self.assertEqual(Notification.objects.filter(title='Inflow Approved').count(), 32)
+
+    def test_enqueue_defers_delivery_to_the_queue(self):
+        """Test the request only publishes one task per event, after commit"""
+        with patch('apps.notifications.tasks.dispatch_notifications_task.delay') as delay:
+            with CaptureQueriesContext(connection) as queries:
+                with self.captureOnCommitCallbacks(execute=True):
+                    enqueue_notifications(
+                        recipient_ids=[user.id for user in self.users],
+                        title='Inflow Approved',
+                        message='Inflow approved',
+                        data={'inflow_id': self.users[0].id}
+                    )
+
+        self.assertEqual(len(queries), 0)
+        delay.assert_called_once()
+        self.assertEqual(len(delay.call_args.kwargs['recipient_ids']), 30)
+        self.assertEqual(delay.call_args.kwargs['data']['inflow_id'], str(self.users[0].id))
+        self.assertFalse(Notification.objects.exists())
+
+    def test_failed_broadcast_is_retried_without_storing_again(self):
+        """Test a retry only pushes the failed notifications and writes no rows"""
+        with patch('apps.notifications.tasks.broadcast_notifications_task.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                dispatch_notifications_task(
+                    recipient_ids=[user.id for user in self.users[:2]],
+                    title='Transfer Approved',
+                    message='Transfer approved'
+                )
+        notification_ids = delay.call_args.kwargs['notification_ids']
+        self.assertEqual(len(notification_ids), 2)
+
+        channel_layer = MagicMock()
+        channel_layer.group_send = AsyncMock(side_effect=[None, RuntimeError('Channel layer unavailable')])
+        with patch('apps.notifications.utils.get_channel_layer', return_value=channel_layer), \
+             patch.object(broadcast_notifications_task, 'retry', side_effect=Retry()) as retry:
+            with self.assertRaises(Retry):
+                broadcast_notifications_task(notification_ids=notification_ids)
+
+        self.assertEqual(len(retry.call_args.kwargs['kwargs']['notification_ids']), 1)
+        self.assertEqual(Notification.objects.filter(title='Transfer Approved').count(), 2)
+
+    def test_recipient_ids_are_cached(self):
+        """Test recipient resolution is served from the cache after the first lookup"""
+        first = BaseNotificationHandler.get_recipient_ids('Manager', 'Admin')
+        with CaptureQueriesContext(connection) as queries:
+            second = BaseNotificationHandler.get_recipient_ids('Admin', 'Manager')
+
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(sorted(first), sorted(second))
+        self.assertEqual(len(first), 30)
+
+
+class RecipientIndexTests(TestCase):
+    """Tests for the tenant-aware recipient index"""
+
+    def setUp(self):
+        cache.clear()
+        RecipientIndex._local.clear()
+        self.company = Companie.objects.create(name='Index Company', type='Headquarters')
+        self.other_company = Companie.objects.create(name='Other Index Company', type='Headquarters')
+        self.manager = self._create_user('index_manager@example.com', 'Manager', self.company)
+        self.employee = self._create_user('index_employee@example.com', 'Employee', self.company)
+        self.foreign_manager = self._create_user('foreign_manager@example.com', 'Manager', self.other_company)
+
+    def _create_user(self, email, user_type, company):
+        user = User.objects.create_user(
+            email=email,
+            password='index123',
+            first_name='Index',
+            last_name=user_type,
+            user_type=user_type
+        )
+        employeer = Employeer.objects.get(user=user)
+        employeer.companie = company
+        employeer.save()
+        return user
+
+    def test_index_is_scoped_to_the_company(self):
+        recipient_ids = BaseNotificationHandler.get_recipient_ids('Manager', companie=self.company.pk)
+        self.assertEqual(recipient_ids, [str(self.manager.id)])
+        self.assertEqual(
+            RecipientIndex.recipient_emails(self.other_company, 'Manager'),
+            ['foreign_manager@example.com']
+        )
+
+    def test_index_hit_skips_the_database(self):
+        first = RecipientIndex.recipient_ids(self.company.pk, 'Manager', 'Employee')
+        with CaptureQueriesContext(connection) as queries:
+            second = RecipientIndex.recipient_ids(self.company.pk, 'Employee', 'Manager')
+
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(sorted(first), sorted(second))
+        self.assertEqual(len(first), 2)
+
+    def test_role_change_invalidates_the_index(self):
+        self.assertEqual(RecipientIndex.recipient_ids(self.company.pk, 'Manager'), [str(self.manager.id)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employee.user_type = 'Manager'
+            self.employee.save()
+
+        self.assertCountEqual(
+            RecipientIndex.recipient_ids(self.company.pk, 'Manager'),
+            [str(self.manager.id), str(self.employee.id)]
+        )
+
+    def test_company_change_invalidates_both_indexes(self):
+        self.assertEqual(len(RecipientIndex.recipient_ids(self.other_company.pk, 'Manager')), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            employeer = Employeer.objects.get(user=self.manager)
+            employeer.companie = self.other_company
+            employeer.save()
+
+        self.assertEqual(RecipientIndex.recipient_ids(self.company.pk, 'Manager'), [])
+        self.assertEqual(len(RecipientIndex.recipient_ids(self.other_company.pk, 'Manager')), 2)
+
+    def test_unrelated_user_save_keeps_the_index(self):
+        RecipientIndex.recipient_ids(self.company.pk, 'Manager')
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.manager.save(update_fields=['last_login'])
+
+        self.assertEqual(len(callbacks), 0)
@@ -1,9 +1,13 @@
+import asyncio
+import json
 import logging
-from typing import Optional, Dict, Any, Union
+from typing import Optional, Dict, Any, Iterable, Union
 from uuid import UUID
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
 from django.contrib.auth import get_user_model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
 from .models import Notification
 
 logger = logging.getLogger(__name__)
@@ -110,4 +114,215 @@ def send_bulk_notification(
             notification_type=notification_type,
             data=data
         )
-    return results
\ No newline at end of file
+    return results
+
+
+def _build_channel_message(title, message, notification_id, app_name, notification_type, data):
+    return {
+        "type": "notification_message",
+        "title": title,
+        "message": message,
+        "notification_id": notification_id,
+        "data": {
+            "app_name": app_name,
+            "type": notification_type,
+            **(data or {})
+        }
+    }
+
+
+async def _group_send_all(channel_layer, messages):
+    """
+    Send every (group, message) pair concurrently over the channel layer connection pool.
+
+    Returns the result of every send, in order, the exception for the failed ones.
+    """
+    return await asyncio.gather(
+        *(channel_layer.group_send(group, message) for group, message in messages),
+        return_exceptions=True
+    )
+
+
+def store_notifications(
+    recipient_ids: Iterable[Union[str, UUID]],
+    title: str,
+    message: str,
+    app_name: str = "",
+    notification_type: str = "info",
+    data: Optional[Dict[str, Any]] = None
+) -> list:
+    """
+    Grava as notificações de um evento para os destinatários ativos.
+    
+    Uma única consulta resolve os destinatários e um único bulk_create grava as
+    notificações, sem enviá-las pelo channel layer.
+    
+    Returns:
+        list: Notificações gravadas
+    """
+    recipient_ids = {str(user_id) for user_id in recipient_ids}
+    if not recipient_ids:
+        return []
+    
+    user_ids = list(User.objects.filter(id__in=recipient_ids, is_active=True).values_list('id', flat=True))
+    missing = len(recipient_ids) - len(user_ids)
+    if missing:
+        logger.warning(f"[NOTIFICATIONS] {missing} recipient(s) of '{title}' not found or inactive")
+    
+    return Notification.objects.bulk_create([
+        Notification(
+            recipient_id=user_id,
+            title=title,
+            app_name=app_name,
+            message=message,
+            notification_type=notification_type,
+            data=data or {}
+        )
+        for user_id in user_ids
+    ])
+
+
+def broadcast_notifications(notifications: Iterable[Notification]) -> list:
+    """
+    Envia notificações já gravadas aos grupos dos destinatários.
+    
+    Todos os group_send são feitos concorrentemente em uma única passagem pelo
+    event loop, então o custo não cresce em round-trips por usuário.
+    
+    Returns:
+        list: Ids das notificações cujo envio falhou
+    """
+    notifications = list(notifications)
+    messages = [
+        (
+            f"user_{notification.recipient_id}",
+            _build_channel_message(
+                notification.title,
+                notification.message,
+                str(notification.id),
+                notification.app_name,
+                notification.notification_type,
+                notification.data
+            )
+        )
+        for notification in notifications
+    ]
+    results = async_to_sync(_group_send_all)(get_channel_layer(), messages)
+    
+    failed = []
+    for notification, result in zip(notifications, results):
+        if isinstance(result, Exception):
+            logger.error(f"[NOTIFICATIONS] Error pushing notification '{notification.title}': {str(result)}")
+            failed.append(str(notification.id))
+    return failed
+
+
+def dispatch_notifications(
+    recipient_ids: Iterable[Union[str, UUID]],
+    title: str,
+    message: str,
+    app_name: str = "",
+    notification_type: str = "info",
+    data: Optional[Dict[str, Any]] = None
+) -> int:
+    """
+    Entrega um evento de notificação para vários usuários em lote.
+    
+    Grava as notificações com store_notifications e as envia com
+    broadcast_notifications. Falhas de envio são registradas, as notificações
+    continuam gravadas.
+    
+    Returns:
+        int: Número de notificações entregues
+    """
+    notifications = store_notifications(recipient_ids, title, message, app_name, notification_type, data)
+    if not notifications:
+        return 0
+    
+    broadcast_notifications(notifications)
+    logger.info(f"[NOTIFICATIONS] Notification '{title}' dispatched to {len(notifications)} user(s)")
+    return len(notifications)
+
+
+def enqueue_notifications(
+    recipient_ids: Iterable[Union[str, UUID]],
+    title: str,
+    message: str,
+    app_name: str = "",
+    notification_type: str = "info",
+    data: Optional[Dict[str, Any]] = None
+) -> bool:
+    """
+    Agenda a entrega de um evento de notificação na fila do Celery.
+    
+    A publicação acontece depois do commit da transação atual, então a requisição
+    que gerou o evento não espera pela entrega. Se o broker estiver indisponível a
+    entrega é feita imediatamente como fallback.
+    
+    Returns:
+        bool: True se havia destinatários para notificar
+    """
+    recipient_ids = sorted({str(user_id) for user_id in recipient_ids})
+    if not recipient_ids:
+        return False
+    
+    payload = {
+        'recipient_ids': recipient_ids,
+        'title': str(title),
+        'message': str(message),
+        'app_name': str(app_name),
+        'notification_type': str(notification_type),
+        # Garante um payload JSON (UUID, Decimal, datetime...) para o broker e o JSONField
+        'data': json.loads(json.dumps(data or {}, cls=DjangoJSONEncoder)),
+    }
+    
+    def publish():
+        from .tasks import dispatch_notifications_task
+        try:
+            dispatch_notifications_task.delay(**payload)
+        except Exception as e:
+            logger.warning(f"[NOTIFICATIONS] Broker unavailable, dispatching '{title}' inline: {str(e)}")
+            dispatch_notifications(**payload)
+    
+    transaction.on_commit(publish)
+    return True
+
+
+def send_progress(
+    user_id: Union[str, UUID],
+    job: str,
+    job_id: Union[str, UUID],
+    status: str,
+    data: Optional[Dict[str, Any]] = None
+) -> bool:
+    """
+    Envia o progresso de um job em segundo plano para o WebSocket de notificações do usuário.
+    
+    Diferente de uma notificação, o progresso não é gravado no banco: um usuário
+    desconectado simplesmente perde os quadros e consulta o job depois.
+    
+    Args:
+        user_id: ID do usuário que iniciou o job
+        job: Tipo do job (ex: lead_generation)
+        job_id: ID do job
+        status: Status atual do job
+        data: Dados do progresso (opcional)
+    
+    Returns:
+        bool: True se o progresso foi enviado, False caso contrário
+    """
+    try:
+        async_to_sync(get_channel_layer().group_send)(
+            f"user_{user_id}",
+            {
+                "type": "job_progress",
+                "job": job,
+                "job_id": str(job_id),
+                "status": status,
+                "data": json.loads(json.dumps(data or {}, cls=DjangoJSONEncoder)),
+            }
+        )
+        return True
+    except Exception as e:
+        logger.error(f"[NOTIFICATIONS] Error sending progress of {job} {job_id}: {str(e)}")
+        return False
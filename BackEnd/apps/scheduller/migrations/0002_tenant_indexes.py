@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-16 19:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scheduller', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jobstypeschedullerregister',
+            index=models.Index(fields=['companie', '-created_at'], name='job_type_tenant_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scheduller',
+            index=models.Index(fields=['companie', '-created_at'], name='scheduller_tenant_idx'),
+        ),
+    ]
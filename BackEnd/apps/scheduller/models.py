@@ -1,5 +1,5 @@
 from django.db import models
-from basemodels.models import BaseModel
+from basemodels.models import BaseModel, tenant_indexes
 from django.core.exceptions import ValidationError
 
 class JobsTypeSchedullerRegister(BaseModel):
@@ -20,6 +20,7 @@ class JobsTypeSchedullerRegister(BaseModel):
     class Meta:
         verbose_name = "Jobs Type Scheduller Register"
         verbose_name_plural = "Jobs Type Scheduller Registers"
+        indexes = tenant_indexes('job_type')
         
     def __str__(self):
         return self.name
@@ -53,6 +54,7 @@ class Scheduller(BaseModel):
         verbose_name = "Scheduller"
         verbose_name_plural = "Schedullers"
         ordering = ['-created_at']
+        indexes = tenant_indexes('scheduller')
         
     def __str__(self):
         return f'{self.location} | {self.date}'
\ No newline at end of file
@@ -1,7 +1,7 @@
 from django.db import models
 from django.utils.translation import gettext
 from django.core.validators import RegexValidator
-from basemodels.models import BaseModel
+from basemodels.models import BaseModel, tenant_indexes
 from core.constants.choices import (
     VEHICLE_TYPE_CHOICES, 
     VEHICLE_MAKER_CHOICES, 
@@ -78,6 +78,7 @@ class Vehicle(BaseModel):
         verbose_name = gettext('Vehicle')
         verbose_name_plural = gettext('Vehicles')
         ordering = ['plate_number']
+        indexes = tenant_indexes('vehicle')
         permissions = [
             ('assign_driver', gettext('Can assign drivers to vehicles')),
             ('update_status', gettext('Can update vehicle status')),
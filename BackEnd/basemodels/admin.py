@@ -1,3 +1,10 @@
 from django.contrib import admin
+from .models import DocumentSequence
 
-# Register your models here.
+
+@admin.register(DocumentSequence)
+class DocumentSequenceAdmin(admin.ModelAdmin):
+    list_display = ('id', 'companie', 'document_type', 'last_value', 'updated_at')
+    list_filter = ('document_type',)
+    search_fields = ('companie__name',)
+    readonly_fields = [field.name for field in DocumentSequence._meta.fields]
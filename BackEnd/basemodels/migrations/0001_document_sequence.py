@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-16 16:20
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('companies', '0004_alter_companie_country'),
+        ('employeers', '0004_alter_employeer_country_alter_employeer_payment_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSequence',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, null=True)),
+                ('document_type', models.CharField(choices=[('load_order', 'Load Order'), ('purchase_order', 'Purchase Order'), ('delivery', 'Delivery'), ('invoice', 'Invoice')], help_text='The kind of document numbered by the sequence', max_length=30)),
+                ('last_value', models.PositiveBigIntegerField(default=0, help_text='The last number allocated')),
+                ('companie', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='document_sequences', to='companies.companie')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_created_by', to='employeers.employeer')),
+                ('updated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='%(class)s_updated_by', to='employeers.employeer')),
+            ],
+            options={
+                'verbose_name': 'Document Sequence',
+                'verbose_name_plural': 'Document Sequences',
+                'constraints': [models.UniqueConstraint(fields=('companie', 'document_type'), name='unique_document_sequence'), models.UniqueConstraint(condition=models.Q(('companie__isnull', True)), fields=('document_type',), name='unique_document_sequence_without_companie')],
+            },
+        ),
+    ]
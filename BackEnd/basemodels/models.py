@@ -1,9 +1,146 @@
 from django.db import models
 from uuid import uuid4
 from apps.companies.models import Companie
-from core.constants.choices import COUNTRY_CHOICES, STATE_CHOICES
+from core.constants.choices import COUNTRY_CHOICES, STATE_CHOICES, DOCUMENT_TYPE_CHOICES
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import AnonymousUser
+from django.utils import timezone
+
+class BaseQuerySet(models.QuerySet):
+    """
+    QuerySet shared by every BaseModel.
+    
+    The serializers render the company and the creator/updater names of each
+    row (``obj.created_by.user.get_full_name()``), which costs two queries per
+    row and audit field unless the relations are joined up front.
+    """
+    AUDIT_RELATED = ('companie', 'created_by__user', 'updated_by__user')
+    
+    def with_audit(self):
+        """Join the company and the creator/updater employeers with their users"""
+        return self.select_related(*self.AUDIT_RELATED)
+    
+    @staticmethod
+    def _audit_actor(user=None):
+        """The employeer BaseModel.save would stamp, resolved once for a bulk write"""
+        from core.actor import get_current_user, get_employeer
+        from apps.companies.employeers.models import Employeer
+
+        if not user or isinstance(user, AnonymousUser):
+            user = get_current_user()
+        if not user or isinstance(user, AnonymousUser):
+            return None
+        try:
+            return get_employeer(user)
+        except Employeer.DoesNotExist:
+            raise ValidationError('User does not exist or is not associated with an employee')
+    
+    def bulk_create_audited(self, objs, user=None, **kwargs):
+        """
+        ``bulk_create`` stamping the company and creator/updater like ``save``.
+        
+        With ``update_conflicts`` the updater and update time of the
+        conflicting rows are updated too.
+        """
+        objs = list(objs)
+        actor = self._audit_actor(user)
+        if actor is not None:
+            for obj in objs:
+                if not obj.created_by_id:
+                    obj.created_by = actor
+                obj.updated_by = actor
+                if not obj.companie_id and actor.companie_id:
+                    obj.companie_id = actor.companie_id
+        if kwargs.get('update_conflicts'):
+            kwargs['update_fields'] = list(dict.fromkeys([*kwargs.get('update_fields', []), 'updated_by', 'updated_at']))
+        return self.bulk_create(objs, **kwargs)
+    
+    def bulk_update_audited(self, objs, fields, user=None, **kwargs):
+        """``bulk_update`` stamping the updater and update time like ``save``"""
+        objs = list(objs)
+        actor = self._audit_actor(user)
+        now = timezone.now()
+        for obj in objs:
+            if actor is not None:
+                obj.updated_by = actor
+            obj.updated_at = now
+        return self.bulk_update(objs, list(dict.fromkeys([*fields, 'updated_by', 'updated_at'])), **kwargs)
+
+
+class FieldTrackerMixin:
+    """
+    Remember the database values of ``tracked_fields``, so signals can tell
+    what a save changes without fetching the row again.
+    
+    Values are captured when the row is loaded and after each save, so inside
+    the pre_save and post_save signals ``previous`` still returns the value the
+    row had before the save. Rows built in memory count as new until saved.
+    """
+    tracked_fields = ()
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._tracked_values = None
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked_fields()
+        return instance
+    
+    def _snapshot_tracked_fields(self, fields=None):
+        """Record the current value of the tracked fields, or only of ``fields``"""
+        values = self._tracked_values or {}
+        for name in self.tracked_fields:
+            attname = self._meta.get_field(name).attname
+            if fields is not None and name not in fields and attname not in fields:
+                continue
+            # Deferred fields are not loaded, they are looked up on demand
+            if attname in self.__dict__:
+                values[name] = self.__dict__[attname]
+        self._tracked_values = values
+    
+    def previous(self, field):
+        """Return the value ``field`` has in the database, None for new rows"""
+        if self._tracked_values is None:
+            return None
+        if field in self._tracked_values:
+            return self._tracked_values[field]
+        attname = self._meta.get_field(field).attname
+        return type(self)._base_manager.filter(pk=self.pk).values_list(attname, flat=True).first()
+    
+    def has_changed(self, field):
+        """Tell whether ``field`` differs from its database value, always True for new rows"""
+        if self._tracked_values is None:
+            return True
+        return getattr(self, self._meta.get_field(field).attname) != self.previous(field)
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._snapshot_tracked_fields(kwargs.get('update_fields'))
+    
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        self._snapshot_tracked_fields(fields)
+
+
+def tenant_indexes(prefix, *fields):
+    """
+    Indexes of a tenant table, for its ``Meta.indexes``.
+
+    The list endpoints filter on the company and read the newest rows first,
+    ``(companie, -created_at)`` serves both without a sort. Each of ``fields``
+    adds a ``(companie, field, -created_at)`` index for the filters on that
+    field. The names are built from ``prefix`` and can't exceed 30 characters.
+    """
+    return [
+        models.Index(fields=['companie', '-created_at'], name=f'{prefix}_tenant_idx'),
+        *(
+            models.Index(fields=['companie', field, '-created_at'], name=f'{prefix}_{field}_idx')
+            for field in fields
+        ),
+    ]
+
 
 class BaseModel(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid4, editable=False, unique=True)
@@ -15,25 +152,28 @@ class BaseModel(models.Model):
     created_by = models.ForeignKey('employeers.Employeer', on_delete=models.SET_NULL, null=True, blank=True, related_name='%(class)s_created_by')
     updated_by = models.ForeignKey('employeers.Employeer', on_delete=models.SET_NULL, null=True, blank=True, related_name='%(class)s_updated_by')
     
+    objects = BaseQuerySet.as_manager()
+    
     class Meta:
         abstract = True
         
     def save(self, *args, **kwargs):
+        from core.actor import get_current_user, get_employeer, forget_employeer
+        from apps.companies.employeers.models import Employeer
+
         # get the actual user
         user = kwargs.pop('user', None)
 
         if not user or isinstance(user, AnonymousUser):
-            from crum import get_current_user
             user = get_current_user()
 
         if user and not isinstance(user, AnonymousUser):
+            # The employeer is resolved once per request/task by the actor context
             try:
-                from apps.companies.employeers.models import Employeer
-
                 if isinstance(self, Employeer):
                     # Special case for creating an Employer
                     try:
-                        creator_employeer = Employeer.objects.get(user=user)
+                        creator_employeer = get_employeer(user)
                         if not self.created_by:
                             self.created_by = creator_employeer
                         self.updated_by = creator_employeer
@@ -46,7 +186,7 @@ class BaseModel(models.Model):
                         pass
                 else:
                     # Normal behavior for other models
-                    employeer = Employeer.objects.get(user=user)
+                    employeer = get_employeer(user)
                     if not self.created_by:
                         self.created_by = employeer
                     self.updated_by = employeer
@@ -58,6 +198,9 @@ class BaseModel(models.Model):
                 if not isinstance(self, Employeer):
                     raise ValidationError('User does not exist or is not associated with an employee')
         super().save(*args, **kwargs)
+
+        if isinstance(self, Employeer):
+            forget_employeer(self.user_id)
             
         
 class BaseAddressWithBaseModel(BaseModel):
@@ -70,4 +213,49 @@ class BaseAddressWithBaseModel(BaseModel):
     country = models.CharField(max_length=100, choices=COUNTRY_CHOICES, default='USA')
     
     class Meta:
-        abstract = True
\ No newline at end of file
+        abstract = True
+
+
+class DocumentSequence(BaseModel):
+    """
+    Last number handed out for one document type of a company.
+    
+    Numbers are allocated by DocumentSequenceService with a single
+    ``UPDATE ... RETURNING`` on this row, so only the documents of the same
+    company and type wait on each other, and a rolled back document gives its
+    number back.
+    
+    Fields:
+        document_type: str: The kind of document numbered by the sequence
+        last_value: int: The last number allocated, 0 before the first one
+        
+    Inheritance:
+        BaseModel{
+            id: UUIDField
+            companie: ForeignKey to Companie
+            created_at: DateTimeField
+            updated_at: DateTimeField
+            created_by: ForeignKey to Employeer
+            updated_by: ForeignKey to Employeer
+        }
+    """
+    # A deleted company takes its sequences with it
+    companie = models.ForeignKey(Companie, on_delete=models.CASCADE, null=True, blank=True, related_name='document_sequences')
+    document_type = models.CharField(max_length=30, choices=DOCUMENT_TYPE_CHOICES, help_text='The kind of document numbered by the sequence')
+    last_value = models.PositiveBigIntegerField(default=0, help_text='The last number allocated')
+    
+    class Meta:
+        verbose_name = 'Document Sequence'
+        verbose_name_plural = 'Document Sequences'
+        constraints = [
+            models.UniqueConstraint(fields=['companie', 'document_type'], name='unique_document_sequence'),
+            # Documents without a company share one sequence per type
+            models.UniqueConstraint(
+                fields=['document_type'],
+                condition=models.Q(companie__isnull=True),
+                name='unique_document_sequence_without_companie'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_document_type_display()} #{self.last_value}"
@@ -0,0 +1,139 @@
+import logging
+from collections import defaultdict
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction, IntegrityError
+from django.db.models import BigIntegerField, Max
+from django.db.models.functions import Cast
+from django.utils import timezone
+from ..models import DocumentSequence
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentSequenceService:
+    """
+    Service class allocating document numbers per company and document type.
+
+    Each allocation is one ``UPDATE ... RETURNING`` on the DocumentSequence row
+    of the company and type: orders of other companies (or other document
+    types) never wait on it. The row stays locked until the surrounding
+    transaction ends, so numbers are gapless when the documents are saved in
+    the transaction that allocated them.
+    """
+
+    WIDTH = 5
+
+    @staticmethod
+    def _companie_id(companie):
+        return getattr(companie, 'pk', companie)
+
+    @staticmethod
+    def _increment(companie_id, document_type, count):
+        """Add ``count`` to the sequence, returning its new last value or None if it does not exist"""
+        meta = DocumentSequence._meta
+        params = [
+            count,
+            meta.get_field('updated_at').get_db_prep_value(timezone.now(), connection),
+            document_type,
+        ]
+        if companie_id is None:
+            companie_filter = 'companie_id IS NULL'
+        else:
+            companie_filter = 'companie_id = %s'
+            params.append(meta.get_field('companie').get_db_prep_value(companie_id, connection))
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {connection.ops.quote_name(meta.db_table)} "
+                f"SET last_value = last_value + %s, updated_at = %s "
+                f"WHERE document_type = %s AND {companie_filter} "
+                f"RETURNING last_value",
+                params
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def last_number(documents, field='order_number'):
+        """Return the highest numeric ``field`` value among the documents, 0 if there is none"""
+        result = documents.filter(**{f'{field}__regex': r'^[0-9]+$'}).aggregate(
+            last=Max(Cast(field, output_field=BigIntegerField()))
+        )
+        return result['last'] or 0
+
+    @classmethod
+    def _create(cls, companie_id, document_type, existing=None, field='order_number'):
+        """Create a sequence, starting after the highest number the company already uses"""
+        start = cls.last_number(existing.filter(companie_id=companie_id), field) if existing is not None else 0
+        try:
+            with transaction.atomic():
+                DocumentSequence.objects.create(companie_id=companie_id, document_type=document_type, last_value=start)
+            logger.info(f"[DOCUMENT SEQUENCE] Sequence {document_type} of company {companie_id} created at {start}")
+        except IntegrityError:
+            # Created by a concurrent allocation, which is now committed
+            pass
+
+    @classmethod
+    def allocate(cls, companie, document_type, count=1, existing=None, field='order_number'):
+        """
+        Allocate a block of consecutive numbers.
+
+        Args:
+            companie: Company of the documents (instance, pk or None)
+            document_type (str): One of DOCUMENT_TYPE_CHOICES
+            count (int): How many numbers to allocate
+            existing (QuerySet): Documents numbered by the sequence, a new
+                sequence starts after the highest number they use
+            field (str): Field of ``existing`` holding the number
+
+        Returns:
+            range: The allocated numbers
+
+        Raises:
+            ValidationError: If count is not positive
+        """
+        if count < 1:
+            raise ValidationError('At least one number must be allocated')
+        companie_id = cls._companie_id(companie)
+
+        with transaction.atomic():
+            last = cls._increment(companie_id, document_type, count)
+            if last is None:
+                cls._create(companie_id, document_type, existing, field)
+                last = cls._increment(companie_id, document_type, count)
+        return range(last - count + 1, last + 1)
+
+    @classmethod
+    def format_number(cls, number):
+        """Format a number as a zero padded document number"""
+        return f"{number:0{cls.WIDTH}d}"
+
+    @classmethod
+    def next_number(cls, companie, document_type, existing=None, field='order_number'):
+        """Allocate and format the next document number of a company"""
+        return cls.format_number(cls.allocate(companie, document_type, 1, existing, field)[0])
+
+    @classmethod
+    def number_documents(cls, documents, document_type, existing=None, field='order_number'):
+        """
+        Number unsaved documents in bulk, allocating one block per company.
+
+        Documents that already have a number keep it. Save the documents in the
+        transaction that numbered them to keep the numbers gapless.
+
+        Returns:
+            list: The documents
+        """
+        pending = defaultdict(list)
+        for document in documents:
+            if not getattr(document, field):
+                pending[document.companie_id].append(document)
+
+        # Lock the sequences in a stable order so concurrent imports can not deadlock
+        with transaction.atomic():
+            for companie_id in sorted(pending, key=lambda pk: str(pk or '')):
+                group = pending[companie_id]
+                numbers = cls.allocate(companie_id, document_type, len(group), existing, field)
+                for document, number in zip(group, numbers):
+                    setattr(document, field, cls.format_number(number))
+        return documents
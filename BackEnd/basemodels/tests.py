@@ -1,3 +1,455 @@
+from datetime import timedelta
+from django.db import connection, transaction
 from django.test import TestCase
+from django.db.models.signals import pre_save, post_save
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from apps.accounts.models import User
+from apps.companies.models import Companie
+from apps.companies.attendance.models import TimeTracking
+from apps.companies.customers.models import Customer
+from apps.companies.employeers.models import Employeer
+from apps.delivery.models import Delivery, DeliveryCheckpoint
+from apps.inventory.brand.models import Brand
+from apps.inventory.inflows.models import Inflow, InflowItems
+from apps.inventory.load_order.models import LoadOrder, LoadOrderItem
+from apps.inventory.outflows.models import Outflow, OutflowItems
+from apps.inventory.product.models import Product
+from apps.inventory.purchase_order.models import PurchaseOrder, PurchaseOrderItem
+from apps.inventory.supplier.models import Supplier
+from apps.inventory.transfer.models import Transfer
+from apps.inventory.warehouse.models import Warehouse
+from apps.vehicle.models import Vehicle
+from basemodels.models import DocumentSequence
+from basemodels.services.sequences import DocumentSequenceService
+from core.actor import actor_context, actor_scope, get_current_companie, get_current_employeer, get_employeer
+from core.testing import QueryBudgetMixin, QueryPlanMixin
 
-# Create your tests here.
+
+class ListEndpointDataMixin:
+    """A manager of a company and builders of the rows the inventory endpoints list"""
+
+    def setUp(self):
+        self.company = Companie.objects.create(name='Budget Company', type='Headquarters')
+        user = User.objects.create_user(
+            email='budget_manager@example.com',
+            password='budget123',
+            first_name='Budget',
+            last_name='Manager',
+            user_type='Manager'
+        )
+        Employeer.objects.filter(user=user).update(companie=self.company)
+        self.user = User.objects.get(pk=user.pk)
+        self.employeer = self.user.employeer
+        self.client.force_authenticate(self.user)
+
+        self.supplier = Supplier.objects.create(name='Budget Supplier', companie=self.company)
+        self.product = Product.objects.create(name='Budget Product', companie=self.company)
+        self.warehouse = Warehouse.objects.create(name='Budget Warehouse', companie=self.company)
+        self.other_warehouse = Warehouse.objects.create(name='Budget Store', companie=self.company)
+        self.customer = Customer.objects.create(first_name='Budget', last_name='Customer', companie=self.company)
+        self.vehicle = Vehicle.objects.create(nickname='Budget Truck', plate_number='BDG1234', companie=self.company)
+
+    def _stamp(self, model, rows):
+        """Give the rows a creator and updater, as the views and services do"""
+        model.objects.filter(pk__in=[row.pk for row in rows]).update(
+            created_by=self.employeer,
+            updated_by=self.employeer
+        )
+
+    def _warehouses(self, count):
+        self._stamp(Warehouse, [
+            Warehouse.objects.create(name=f'Budget Warehouse {index}', companie=self.company)
+            for index in range(count)
+        ])
+
+    def _brands(self, count):
+        self._stamp(Brand, [
+            Brand.objects.create(name=f'Budget Brand {index}', companie=self.company)
+            for index in range(count)
+        ])
+
+    def _suppliers(self, count):
+        self._stamp(Supplier, [
+            Supplier.objects.create(name=f'Budget Supplier {index}', companie=self.company)
+            for index in range(count)
+        ])
+
+    def _products(self, count):
+        self._stamp(Product, [
+            Product.objects.create(name=f'Budget Product {index}', companie=self.company)
+            for index in range(count)
+        ])
+
+    def _purchase_orders(self, count):
+        orders = []
+        for _ in range(count):
+            order = PurchaseOrder.objects.create(
+                supplier=self.supplier,
+                expected_delivery=timezone.now().date(),
+                companie=self.company
+            )
+            PurchaseOrderItem.objects.create(purchase_order=order, product=self.product, quantity=1, unit_price=1, companie=self.company)
+            orders.append(order)
+        self._stamp(PurchaseOrder, orders)
+
+    def _inflows(self, count):
+        inflows = []
+        for _ in range(count):
+            inflow = Inflow.objects.create(origin=self.supplier, destiny=self.warehouse, companie=self.company)
+            InflowItems.objects.create(inflow=inflow, product=self.product, quantity=1, companie=self.company)
+            inflows.append(inflow)
+        self._stamp(Inflow, inflows)
+
+    def _outflows(self, count):
+        outflows = []
+        for _ in range(count):
+            outflow = Outflow.objects.create(origin=self.warehouse, destiny=self.customer, companie=self.company)
+            OutflowItems.objects.bulk_create([OutflowItems(outflow=outflow, product=self.product, quantity=1, companie=self.company)])
+            outflows.append(outflow)
+        self._stamp(Outflow, outflows)
+
+    def _transfers(self, count):
+        self._stamp(Transfer, [
+            Transfer.objects.create(origin=self.warehouse, destiny=self.other_warehouse, companie=self.company)
+            for _ in range(count)
+        ])
+
+    def _load_orders(self, count):
+        orders = []
+        for _ in range(count):
+            order = LoadOrder.objects.create(
+                customer=self.customer,
+                load_to=self.vehicle,
+                load_date=timezone.now().date(),
+                companie=self.company
+            )
+            LoadOrderItem.objects.create(load_order=order, product=self.product, quantity=1, companie=self.company)
+            orders.append(order)
+        self._stamp(LoadOrder, orders)
+
+
+class ListQueryBudgetTests(ListEndpointDataMixin, QueryBudgetMixin, APITestCase):
+    """
+    Every inventory list endpoint costs a fixed number of queries, whatever the
+    number of rows it lists.
+    """
+
+    # Authentication, permissions and the employeer lookup of the views are included
+    BUDGET = 12
+
+    def test_list_endpoints_do_not_query_per_row(self):
+        endpoints = [
+            ('warehouse:warehouse_list', self._warehouses),
+            ('brand:list_brands', self._brands),
+            ('supplier:supplier-list', self._suppliers),
+            ('product:list_products', self._products),
+            ('purchase_order:list', self._purchase_orders),
+            ('inflows:list_inflows', self._inflows),
+            ('outflows:list_outflows', self._outflows),
+            ('transfer:list_transfers', self._transfers),
+            ('load_order:list_load_orders', self._load_orders),
+        ]
+        for name, add_rows in endpoints:
+            with self.subTest(endpoint=name):
+                add_rows(1)
+                self.assertFlatQueries(reverse(name), add_rows, self.BUDGET)
+
+
+class ListQueryPlanTests(ListEndpointDataMixin, QueryPlanMixin, APITestCase):
+    """
+    The list endpoints and the filters of the documents read a company's rows
+    through the tenant indexes, in the order they are listed.
+    """
+
+    ROWS = 5
+
+    def test_list_endpoints_use_the_tenant_indexes(self):
+        endpoints = [
+            # Warehouses are listed by name, only the company lookup is indexed,
+            # by whichever of its indexes the planner prefers
+            ('warehouse:warehouse_list', self._warehouses, Warehouse, True, None),
+            ('brand:list_brands', self._brands, Brand, False, 'brand_tenant_idx'),
+            ('supplier:supplier-list', self._suppliers, Supplier, False, 'supplier_tenant_idx'),
+            ('product:list_products', self._products, Product, False, 'product_tenant_idx'),
+            ('purchase_order:list', self._purchase_orders, PurchaseOrder, False, 'purchase_order_tenant_idx'),
+            ('inflows:list_inflows', self._inflows, Inflow, False, 'inflow_tenant_idx'),
+            ('outflows:list_outflows', self._outflows, Outflow, False, 'outflow_tenant_idx'),
+            ('transfer:list_transfers', self._transfers, Transfer, False, 'transfer_tenant_idx'),
+            ('load_order:list_load_orders', self._load_orders, LoadOrder, False, 'load_order_tenant_idx'),
+        ]
+        for name, add_rows, model, allow_sort, index in endpoints:
+            with self.subTest(endpoint=name):
+                add_rows(self.ROWS)
+                self.assertIndexedList(reverse(name), model, allow_sort=allow_sort, index=index)
+
+    def test_document_status_filters_use_the_status_indexes(self):
+        documents = [
+            (Inflow, self._inflows, 'inflow_status_idx'),
+            (Outflow, self._outflows, 'outflow_status_idx'),
+            (Transfer, self._transfers, 'transfer_status_idx'),
+            (PurchaseOrder, self._purchase_orders, 'purchase_order_status_idx'),
+            (Delivery, self._deliveries, 'delivery_status_idx'),
+        ]
+        for model, add_rows, index in documents:
+            with self.subTest(model=model.__name__):
+                add_rows(self.ROWS)
+                self.assertIndexedQuery(model.objects.filter(companie=self.company, status='pending'), index=index)
+
+    def test_checkpoints_and_time_trackings_use_their_indexes(self):
+        delivery = self._deliveries(1)[0]
+        DeliveryCheckpoint.objects.bulk_create([
+            DeliveryCheckpoint(delivery=delivery, location={'lat': 25.76, 'lng': -80.19}, status='in_transit', companie=self.company)
+            for _ in range(self.ROWS)
+        ])
+        now = timezone.now()
+        TimeTracking.objects.bulk_create([
+            TimeTracking(employee=self.employeer, clock_in=now - timedelta(days=index), companie=self.company)
+            for index in range(self.ROWS)
+        ])
+
+        self.assertIndexedQuery(
+            DeliveryCheckpoint.objects.filter(delivery=delivery).order_by('-timestamp'), index='checkpoint_delivery_idx'
+        )
+        self.assertIndexedQuery(
+            TimeTracking.objects.filter(employee=self.employeer, clock_in__gte=now - timedelta(days=2)).order_by('clock_in'),
+            index='time_tracking_employee_idx'
+        )
+
+    def _deliveries(self, count):
+        # Created without the signals, the notifications of a new delivery are not under test
+        return Delivery.objects.bulk_create([
+            Delivery(customer=self.customer, driver=self.employeer, vehicle=self.vehicle, companie=self.company)
+            for _ in range(count)
+        ])
+
+
+class BaseQuerySetTests(TestCase):
+    def test_with_audit_joins_the_audit_relations(self):
+        company = Companie.objects.create(name='Audit Company', type='Headquarters')
+        user = User.objects.create_user(
+            email='audit_user@example.com',
+            password='audit123',
+            first_name='Audit',
+            last_name='User',
+            user_type='Manager'
+        )
+        employeer = Employeer.objects.get(user=user)
+        brand = Brand.objects.create(name='Audit Brand', companie=company)
+        Brand.objects.filter(pk=brand.pk).update(created_by=employeer, updated_by=employeer)
+
+        brand = Brand.objects.with_audit().get(pk=brand.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(brand.created_by.user.get_full_name(), 'Audit User')
+            self.assertEqual(brand.updated_by.user.email, 'audit_user@example.com')
+            self.assertEqual(brand.companie.name, 'Audit Company')
+
+    def test_bulk_writes_stamp_the_audit_fields(self):
+        company = Companie.objects.create(name='Bulk Audit Company', type='Headquarters')
+        user = User.objects.create_user(
+            email='bulk_audit_user@example.com',
+            password='audit123',
+            first_name='Bulk',
+            last_name='Audit',
+            user_type='Manager'
+        )
+        Employeer.objects.filter(user=user).update(companie=company)
+        user = User.objects.get(pk=user.pk)
+        employeer = Employeer.objects.get(user=user)
+
+        brands = Brand.objects.bulk_create_audited([Brand(name=f'Bulk Brand {index}') for index in range(3)], user=user)
+        brands = list(Brand.objects.filter(pk__in=[brand.pk for brand in brands]))
+        self.assertTrue(all(
+            (brand.companie_id, brand.created_by_id, brand.updated_by_id) == (company.pk, employeer.pk, employeer.pk)
+            for brand in brands
+        ))
+
+        other_user = User.objects.create_user(
+            email='bulk_audit_other@example.com',
+            password='audit123',
+            first_name='Other',
+            last_name='Auditor',
+            user_type='Manager'
+        )
+        other = Employeer.objects.get(user=other_user)
+        for brand in brands:
+            brand.name = brand.name.upper()
+        with actor_scope(user=other_user):
+            Brand.objects.bulk_update_audited(brands, ['name'])
+        brand = Brand.objects.get(pk=brands[0].pk)
+        self.assertEqual((brand.name, brand.created_by_id, brand.updated_by_id), (brands[0].name, employeer.pk, other.pk))
+        self.assertTrue(brand.name.startswith('BULK BRAND'))
+
+
+class ActorContextTests(TestCase):
+    def setUp(self):
+        self.company = Companie.objects.create(name='Actor Company', type='Headquarters')
+        user = User.objects.create_user(
+            email='actor_user@example.com',
+            password='actor123',
+            first_name='Actor',
+            last_name='User',
+            user_type='Manager'
+        )
+        Employeer.objects.filter(user=user).update(companie=self.company)
+        self.user = User.objects.get(pk=user.pk)
+        self.employeer = Employeer.objects.get(user=self.user)
+
+    def _employeer_lookups(self, queries):
+        return [query['sql'] for query in queries if 'FROM "employeers_employeer"' in query['sql']]
+
+    def test_saves_resolve_the_employeer_once_per_scope(self):
+        with actor_scope(user=self.user):
+            with CaptureQueriesContext(connection) as queries:
+                brands = [Brand.objects.create(name=f'Actor Brand {index}', companie=self.company) for index in range(5)]
+            self.assertEqual(get_current_companie(), self.company)
+
+        self.assertEqual(len(self._employeer_lookups(queries.captured_queries)), 1)
+        self.assertTrue(all(brand.created_by_id == self.employeer.pk for brand in brands))
+
+    def test_saves_outside_a_scope_resolve_the_employeer_every_time(self):
+        with CaptureQueriesContext(connection) as queries:
+            for index in range(3):
+                Brand(name=f'Loose Brand {index}', companie=self.company).save(user=self.user)
+
+        self.assertEqual(len(self._employeer_lookups(queries.captured_queries)), 3)
+
+    def test_saving_an_employeer_drops_its_cached_entry(self):
+        other = Companie.objects.create(name='Other Actor Company', type='Headquarters')
+        with actor_scope(user=self.user):
+            self.assertEqual(get_current_companie(), self.company)
+            employeer = Employeer.objects.get(user=self.user)
+            employeer.companie = other
+            employeer.save()
+            self.user = User.objects.get(pk=self.user.pk)
+            self.assertEqual(get_employeer(self.user).companie, other)
+
+    def test_actor_context_runs_the_task_as_the_actor(self):
+        @actor_context
+        def create_brand(name):
+            return Brand.objects.create(name=name, companie=self.company)
+
+        brand = create_brand('Task Brand', actor_id=str(self.user.pk))
+
+        self.assertEqual(brand.created_by, self.employeer)
+        self.assertIsNone(get_current_employeer())
+
+
+class DocumentSequenceTests(TestCase):
+    def setUp(self):
+        self.company = Companie.objects.create(name='Sequence Company', type='Headquarters')
+        self.other_company = Companie.objects.create(name='Other Sequence Company', type='Headquarters')
+
+    def _load_order(self, companie, **kwargs):
+        return LoadOrder.objects.create(load_date=timezone.now().date(), companie=companie, **kwargs)
+
+    def test_numbers_are_allocated_per_company(self):
+        numbers = [self._load_order(self.company).order_number for _ in range(3)]
+        other = self._load_order(self.other_company).order_number
+
+        self.assertEqual(numbers, ['00001', '00002', '00003'])
+        self.assertEqual(other, '00001')
+
+    def test_allocation_is_a_single_update(self):
+        DocumentSequenceService.allocate(self.company, 'load_order')
+
+        with CaptureQueriesContext(connection) as queries:
+            DocumentSequenceService.allocate(self.company, 'load_order')
+
+        statements = [query['sql'] for query in queries.captured_queries if DocumentSequence._meta.db_table in query['sql']]
+        self.assertEqual(len(statements), 1)
+        self.assertIn('RETURNING', statements[0])
+
+    def test_new_sequence_starts_after_the_numbers_in_use(self):
+        self._load_order(self.company, order_number='00041')
+        self._load_order(self.company, order_number='legacy')
+        self._load_order(self.other_company, order_number='00090')
+
+        self.assertEqual(self._load_order(self.company).order_number, '00042')
+
+    def test_rolled_back_orders_give_their_number_back(self):
+        self._load_order(self.company)
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self._load_order(self.company)
+                raise RuntimeError('Abort the order')
+
+        self.assertEqual(self._load_order(self.company).order_number, '00002')
+
+    def test_number_documents_allocates_a_block_per_company(self):
+        self._load_order(self.company)
+        orders = [LoadOrder(companie=self.company) for _ in range(3)] + [LoadOrder(companie=self.other_company)]
+        orders.append(LoadOrder(companie=self.company, order_number='KEEP'))
+
+        DocumentSequenceService.number_documents(orders, 'load_order', existing=LoadOrder.objects.all())
+
+        self.assertEqual([order.order_number for order in orders], ['00002', '00003', '00004', '00001', 'KEEP'])
+        self.assertEqual(
+            DocumentSequence.objects.get(companie=self.company, document_type='load_order').last_value, 4
+        )
+        self.assertEqual(self._load_order(self.company).order_number, '00005')
+
+    def test_orders_without_company_share_one_sequence(self):
+        first = self._load_order(None)
+        second = self._load_order(None)
+
+        self.assertEqual((first.order_number, second.order_number), ('00001', '00002'))
+        self.assertEqual(DocumentSequence.objects.filter(companie__isnull=True).count(), 1)
+
+
+class FieldTrackerMixinTests(TestCase):
+    def setUp(self):
+        self.company = Companie.objects.create(name='Tracker Company', type='Headquarters')
+        self.warehouse = Warehouse.objects.create(name='Tracker Warehouse', limit=100, companie=self.company)
+
+    def test_new_rows_have_no_previous_values(self):
+        warehouse = Warehouse(name='Unsaved Warehouse', limit=10)
+
+        self.assertIsNone(warehouse.previous('limit'))
+        self.assertTrue(warehouse.has_changed('limit'))
+
+    def test_loaded_rows_are_diffed_without_queries(self):
+        warehouse = Warehouse.objects.get(pk=self.warehouse.pk)
+        warehouse.limit = 200
+
+        with self.assertNumQueries(0):
+            self.assertEqual(warehouse.previous('limit'), 100)
+            self.assertTrue(warehouse.has_changed('limit'))
+            self.assertFalse(warehouse.has_changed('quantity'))
+
+    def test_signals_see_the_values_before_the_save(self):
+        seen = []
+
+        def record(sender, instance, **kwargs):
+            seen.append((instance.previous('limit'), instance.has_changed('limit')))
+
+        pre_save.connect(record, sender=Warehouse)
+        post_save.connect(record, sender=Warehouse)
+        try:
+            self.warehouse.limit = 200
+            self.warehouse.save()
+        finally:
+            pre_save.disconnect(record, sender=Warehouse)
+            post_save.disconnect(record, sender=Warehouse)
+
+        self.assertEqual(seen, [(100, True), (100, True)])
+        self.assertEqual(self.warehouse.previous('limit'), 200)
+        self.assertFalse(self.warehouse.has_changed('limit'))
+
+    def test_deferred_fields_are_read_from_the_database(self):
+        warehouse = Warehouse.objects.defer('limit').get(pk=self.warehouse.pk)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(warehouse.previous('limit'), 100)
+
+    def test_refresh_and_partial_saves_update_only_their_fields(self):
+        self.warehouse.limit = 300
+        self.warehouse.name = 'Renamed Warehouse'
+        self.warehouse.save(update_fields=['name'])
+        self.assertTrue(self.warehouse.has_changed('limit'))
+
+        self.warehouse.refresh_from_db(fields=['limit'])
+        self.assertEqual(self.warehouse.limit, 100)
+        self.assertFalse(self.warehouse.has_changed('limit'))
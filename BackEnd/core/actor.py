@@ -0,0 +1,135 @@
+"""
+Request/task scoped actor context.
+
+Resolves the Employeer (with its Companie) of the user acting in the current
+HTTP request, WebSocket connection or Celery task once, and serves it to
+``BaseModel.save``, the services and the views for the rest of the scope.
+Outside of a scope (shell, management commands) every lookup hits the
+database, so long-lived processes never serve a stale employeer.
+"""
+import functools
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.contrib.auth.models import AnonymousUser
+
+logger = logging.getLogger(__name__)
+
+_actor_scope = ContextVar('actor_scope', default=None)
+
+
+@contextmanager
+def actor_scope(user=None):
+    """
+    Open an actor scope, lookups inside it are cached until it closes.
+
+    Args:
+        user: The acting user. Defaults to the user of the current request
+            (``crum``), which DRF only authenticates inside the view.
+    """
+    token = _actor_scope.set({'user': user, 'employeers': {}})
+    try:
+        yield
+    finally:
+        _actor_scope.reset(token)
+
+
+def get_current_user():
+    """Return the acting user of the scope, or of the current request"""
+    scope = _actor_scope.get()
+    if scope is not None and scope['user'] is not None:
+        return scope['user']
+    from crum import get_current_user as get_request_user
+    return get_request_user()
+
+
+def get_employeer(user):
+    """
+    Return the Employeer of a user, with its company joined.
+
+    Cached per user for the current scope, and stored on the user instance so
+    ``user.employeer`` does not query it again.
+
+    Raises:
+        Employeer.DoesNotExist: If the user is not linked to an employeer
+    """
+    from apps.companies.employeers.models import Employeer
+
+    scope = _actor_scope.get()
+    if scope is not None and user.pk in scope['employeers']:
+        return scope['employeers'][user.pk]
+
+    employeer = Employeer.objects.select_related('companie').get(user_id=user.pk)
+    descriptor = getattr(type(user), 'employeer', None)
+    if descriptor is not None:
+        descriptor.related.set_cached_value(user, employeer)
+
+    # Misses are not cached, the employeer may be created later in the scope
+    if scope is not None:
+        scope['employeers'][user.pk] = employeer
+    return employeer
+
+
+def forget_employeer(user_id):
+    """Drop the cached employeer of a user, e.g. after its company changed"""
+    scope = _actor_scope.get()
+    if scope is not None:
+        scope['employeers'].pop(user_id, None)
+
+
+def get_user_companie_id(user):
+    """Return the company id of a user's employeer, None if it has none"""
+    from apps.companies.employeers.models import Employeer
+
+    return Employeer.objects.filter(user_id=user.pk).values_list('companie_id', flat=True).first()
+
+
+def get_current_employeer():
+    """Return the Employeer of the acting user, None if there is none"""
+    from apps.companies.employeers.models import Employeer
+
+    user = get_current_user()
+    if not user or isinstance(user, AnonymousUser):
+        return None
+    try:
+        return get_employeer(user)
+    except Employeer.DoesNotExist:
+        return None
+
+
+def get_current_companie():
+    """Return the company of the acting user, None if there is none"""
+    employeer = get_current_employeer()
+    return employeer.companie if employeer else None
+
+
+class ActorContextMiddleware:
+    """Open an actor scope around every HTTP request"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with actor_scope():
+            return self.get_response(request)
+
+
+def actor_context(func):
+    """
+    Run a Celery task (or any function) inside an actor scope.
+
+    The task acts on behalf of a user when called with an ``actor_id``
+    keyword argument, e.g. ``task.delay(..., actor_id=str(request.user.id))``;
+    the argument is consumed by the decorator.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, actor_id=None, **kwargs):
+        user = None
+        if actor_id is not None:
+            from apps.accounts.models import User
+            user = User.objects.filter(pk=actor_id).first()
+            if user is None:
+                logger.warning(f"[ACTOR CONTEXT] Actor {actor_id} of {func.__name__} not found")
+        with actor_scope(user=user):
+            return func(*args, **kwargs)
+    return wrapper
@@ -3,14 +3,25 @@ Cache utilities for the DryWall WareHouse ERP system.
 Provides decorators and helper functions for caching operations.
 """
 
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from functools import wraps
 from django.core.cache import caches
 from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.request import Request
-from typing import Any, Callable, Optional, Union
+from typing import Any, Callable, Iterable, Optional, Union
+import asyncio
 import hashlib
 import json
+import logging
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
 
 def get_cache(alias: str = 'default'):
     """Get the cache instance for the given alias."""
@@ -233,3 +244,440 @@ def get_cache_key(key_type: str, **kwargs) -> str:
         )
     except Exception as e:
         raise ValueError(f"Error generating cache key: {str(e)}")
+
+
+################################
+#### TENANT RESPONSE CACHE #####
+################################
+#
+# Responses are cached per (companie, endpoint, normalized query) and stamped with
+# the generation of every namespace the endpoint depends on. Writes never delete
+# response keys: they bump the tenant's generation counter of the namespace (one
+# INCR), so every cached response built on the old generation stops being
+# addressed and simply expires.
+
+def _generation_key(companie_id: Any, namespace: str) -> str:
+    return f'generation:{companie_id}:{namespace}'
+
+
+def _new_generation() -> int:
+    # Counters are seeded from the clock so a counter evicted from the cache
+    # never restarts at a value that older responses were stamped with
+    return int(time.time() * 1000)
+
+
+def get_tenant_generations(companie_id: Any, namespaces: Iterable[str], cache_alias: str = 'default') -> dict:
+    """
+    Get the current generation of each namespace for a company.
+
+    Args:
+        companie_id: Company the generations belong to
+        namespaces: Namespaces to read
+        cache_alias: Cache backend to use
+
+    Returns:
+        dict: Generation per namespace
+    """
+    cache = get_cache(cache_alias)
+    keys = {_generation_key(companie_id, namespace): namespace for namespace in namespaces}
+    stored = cache.get_many(list(keys))
+
+    generations = {}
+    for key, namespace in keys.items():
+        generation = stored.get(key)
+        if generation is None:
+            cache.add(key, _new_generation(), None)
+            generation = cache.get(key)
+        generations[namespace] = generation
+    return generations
+
+
+def bump_tenant_generation(companie_id: Any, *namespaces: str, cache_alias: str = 'default'):
+    """
+    Invalidate every cached response of a company that depends on the namespaces.
+
+    The bump runs after the current transaction commits, so a concurrent request
+    can not cache data read before the commit under the new generation.
+    """
+    if companie_id is None:
+        return
+
+    def bump():
+        cache = get_cache(cache_alias)
+        for namespace in namespaces:
+            key = _generation_key(companie_id, namespace)
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, _new_generation(), None)
+        logger.debug(f"[CACHE] Generation bumped for companie {companie_id}: {', '.join(namespaces)}")
+
+    transaction.on_commit(bump)
+
+
+_TENANT_CACHE_MODELS = {}
+_TENANT_CACHE_COMPANIES = {}
+_TENANT_CACHE_FIELDS = {}
+
+
+def _bump_instance_generation(sender, instance, update_fields=None, **kwargs):
+    fields = _TENANT_CACHE_FIELDS.get(sender)
+    if fields and update_fields is not None and not fields.intersection(update_fields):
+        return
+    companie_of = _TENANT_CACHE_COMPANIES.get(sender)
+    companie_id = companie_of(instance) if companie_of else getattr(instance, 'companie_id', None)
+    bump_tenant_generation(companie_id, *_TENANT_CACHE_MODELS.get(sender, ()))
+
+
+def register_tenant_cache(model, *namespaces: str, companie_of: Callable = None, fields: Iterable[str] = None):
+    """
+    Bump the namespaces of the instance's company whenever the model is saved or deleted.
+
+    Args:
+        model: The model whose changes invalidate the namespaces
+        namespaces: Namespaces to bump
+        companie_of: Returns the company id of an instance, for models without
+            a ``companie`` field
+        fields: Only saves of these fields bump, when the save names its ``update_fields``
+
+    Example:
+        >>> register_tenant_cache(Warehouse, 'warehouse')
+    """
+    _TENANT_CACHE_MODELS.setdefault(model, set()).update(namespaces)
+    if companie_of is not None:
+        _TENANT_CACHE_COMPANIES[model] = companie_of
+    if fields is not None:
+        _TENANT_CACHE_FIELDS[model] = set(fields)
+    dispatch_uid = f'tenant_cache:{model._meta.label}'
+    post_save.connect(_bump_instance_generation, sender=model, weak=False, dispatch_uid=dispatch_uid)
+    post_delete.connect(_bump_instance_generation, sender=model, weak=False, dispatch_uid=dispatch_uid)
+
+
+def _request_companie_id(request: Request):
+    employeer = getattr(request.user, 'employeer', None) if request.user.is_authenticated else None
+    return getattr(employeer, 'companie_id', None)
+
+
+def _normalize_query(request: Request) -> str:
+    """Hash the query string independently of the parameter order"""
+    items = sorted((key, values) for key, values in request.query_params.lists())
+    return hashlib.sha256(json.dumps(items).encode()).hexdigest()
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(',')]
+    return '*' in candidates or etag in candidates or f'W/{etag}' in candidates
+
+
+def tenant_cache_response(
+    namespaces: Iterable[str],
+    timeout: int = None,
+    key_prefix: str = 'response',
+    cache_alias: str = 'default',
+    vary_on_user: bool = False
+):
+    """
+    Cache decorator for DRF view methods whose response only depends on the
+    user's company (and optionally on the user).
+
+    The cache key is (companie, method, path, normalized query) stamped with the
+    generations of ``namespaces``. Responses carry an ETag derived from that key,
+    so a request with a matching If-None-Match gets a 304 without running the
+    view or even reading the cached body.
+
+    Args:
+        namespaces: Namespaces whose changes invalidate the response
+        timeout: Cache timeout in seconds. If None, uses the cache's default
+        key_prefix: Prefix for the cache key
+        cache_alias: Cache backend to use
+        vary_on_user: Cache a separate response per user of the company
+    """
+    namespaces = tuple(namespaces)
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped_view(view_instance, request: Request, *args, **kwargs):
+            companie_id = _request_companie_id(request)
+            if request.method != 'GET' or companie_id is None:
+                return view_func(view_instance, request, *args, **kwargs)
+
+            generations = get_tenant_generations(companie_id, namespaces, cache_alias)
+            cache_key = make_key(
+                key_prefix,
+                companie_id,
+                request.method,
+                request.path,
+                _normalize_query(request),
+                request.user.id if vary_on_user else '*',
+                generations
+            )
+            etag = f'"{hashlib.sha256(cache_key.encode()).hexdigest()[:32]}"'
+
+            if _etag_matches(request, etag):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+            cache = get_cache(cache_alias)
+            response_data = cache.get(cache_key)
+            if response_data is not None:
+                return Response(response_data, headers={'ETag': etag})
+
+            response = view_func(view_instance, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                cache.set(cache_key, response.data, timeout)
+                response['ETag'] = etag
+            return response
+        return _wrapped_view
+    return decorator
+
+
+################################
+#### EXTERNAL SEARCH CACHE #####
+################################
+#
+# Raw responses of paid search APIs (SerpAPI engines) are cached per page under
+# the normalized request: engine, lower-cased and whitespace-collapsed query and
+# location, page offset and the other parameters, never the API key. A fresh
+# entry is served as is; a stale one is served at once while a single refresh
+# runs in the background; a miss is fetched once however many requests ask for
+# it at the same time (single-flight). Requests of the same process wait for
+# the fetch in flight, other processes wait for the entry to show up in the
+# cache while another process holds the fetch lock. Failed calls, and the error
+# payloads SerpAPI answers with (an ``error`` key), are never cached.
+
+_NORMALIZED_TEXT_PARAMS = ('q', 'location')
+_IGNORED_SEARCH_PARAMS = ('api_key',)
+
+_search_inflight = {}
+_search_inflight_lock = threading.Lock()
+_search_revalidations = set()
+# Fetches in flight per (event loop, key)
+_search_async_inflight = {}
+_search_revalidation_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='search-cache')
+
+
+def _search_cache_settings(engine: str) -> dict:
+    config = getattr(settings, 'SEARCH_CACHE', {})
+    return {
+        'FRESH_TTL': config.get('FRESH_TTL', 3600),
+        'STALE_TTL': config.get('STALE_TTL', 86400),
+        'LOCK_TIMEOUT': config.get('LOCK_TIMEOUT', 30),
+        'WAIT_TIMEOUT': config.get('WAIT_TIMEOUT', 10),
+        **config.get('ENGINES', {}).get(engine, {}),
+    }
+
+
+def normalize_search_params(params: dict) -> dict:
+    """
+    Normalize the parameters of a search request so equivalent requests share a cache entry.
+
+    Example:
+        >>> normalize_search_params({'engine': 'google_local', 'q': ' Drywall  Miami ', 'start': '0', 'api_key': 'x'})
+        {'engine': 'google_local', 'q': 'drywall miami', 'start': 0}
+    """
+    normalized = {}
+    for key, value in params.items():
+        if key in _IGNORED_SEARCH_PARAMS or value is None or value == '':
+            continue
+        if key in _NORMALIZED_TEXT_PARAMS:
+            value = re.sub(r'\s+', ' ', str(value)).strip().lower()
+        elif key == 'start':
+            value = int(value)
+        else:
+            value = str(value).strip()
+        normalized[key] = value
+    normalized.setdefault('start', 0)
+    return dict(sorted(normalized.items()))
+
+
+def search_cache_key(params: dict) -> str:
+    """Cache key of a search request, see normalize_search_params"""
+    normalized = normalize_search_params(params)
+    digest = hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+    return f"search:{normalized.get('engine', '')}:{digest}"
+
+
+def _entry_state(entry: Optional[dict], config: dict) -> Optional[str]:
+    if entry is None:
+        return None
+    return 'fresh' if time.time() - entry['fetched_at'] < config['FRESH_TTL'] else 'stale'
+
+
+def _is_cacheable_search(data: Any) -> bool:
+    """Failed calls return None, SerpAPI reports the other errors in the payload"""
+    return data is not None and not (isinstance(data, dict) and 'error' in data)
+
+
+def _store_search(cache, key: str, data: Any, config: dict):
+    cache.set(key, {'data': data, 'fetched_at': time.time()}, config['FRESH_TTL'] + config['STALE_TTL'])
+
+
+def _fetch_and_store(cache, key: str, fetch: Callable, config: dict) -> Any:
+    """Fetch a search under the cross-process lock, or wait for the process holding it"""
+    lock_key = f'{key}:lock'
+    if not cache.add(lock_key, 1, config['LOCK_TIMEOUT']):
+        deadline = time.monotonic() + config['WAIT_TIMEOUT']
+        while time.monotonic() < deadline:
+            time.sleep(0.2)
+            entry = cache.get(key)
+            if _entry_state(entry, config) == 'fresh':
+                return entry['data']
+        logger.warning(f"[SEARCH CACHE] Gave up waiting for {key}, fetching it too")
+    try:
+        data = fetch()
+        if _is_cacheable_search(data):
+            _store_search(cache, key, data, config)
+        else:
+            logger.warning(f"[SEARCH CACHE] Not caching the failed response of {key}")
+        return data
+    finally:
+        cache.delete(lock_key)
+
+
+def _revalidate_search(cache, key: str, fetch: Callable, config: dict):
+    try:
+        _fetch_and_store(cache, key, fetch, config)
+    except Exception as e:
+        logger.warning(f"[SEARCH CACHE] Revalidation of {key} failed: {str(e)}")
+    finally:
+        with _search_inflight_lock:
+            _search_revalidations.discard(key)
+
+
+def _schedule_revalidation(cache, key: str, fetch: Callable, config: dict):
+    """Refresh a stale entry in the background, once per process"""
+    with _search_inflight_lock:
+        if key in _search_revalidations:
+            return
+        _search_revalidations.add(key)
+    _search_revalidation_pool.submit(_revalidate_search, cache, key, fetch, config)
+
+
+def cached_search(params: dict, fetch: Callable[[], Any], cache_alias: str = 'default') -> Any:
+    """
+    Serve a search request from the cache, fetching it at most once at a time.
+
+    Args:
+        params: Parameters of the request, ``engine`` included
+        fetch: Function calling the API, returns None when the call failed
+        cache_alias: Cache backend to use
+
+    Returns:
+        The response of the API, None if it could not be fetched. Error
+        payloads are returned as is but not cached.
+    """
+    cache = get_cache(cache_alias)
+    config = _search_cache_settings(params.get('engine', ''))
+    key = search_cache_key(params)
+
+    entry = cache.get(key)
+    state = _entry_state(entry, config)
+    if state == 'fresh':
+        return entry['data']
+    if state == 'stale':
+        _schedule_revalidation(cache, key, fetch, config)
+        return entry['data']
+
+    with _search_inflight_lock:
+        future = _search_inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _search_inflight[key] = Future()
+    if not leader:
+        try:
+            return future.result(timeout=config['LOCK_TIMEOUT'])
+        except FutureTimeoutError:
+            # The fetch in flight is stuck, its lock has expired by now
+            logger.warning(f"[SEARCH CACHE] Gave up waiting for the fetch of {key} in flight, fetching it too")
+            return _fetch_and_store(cache, key, fetch, config)
+
+    try:
+        data = _fetch_and_store(cache, key, fetch, config)
+        future.set_result(data)
+        return data
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _search_inflight_lock:
+            _search_inflight.pop(key, None)
+
+
+async def acached_search(params: dict, fetch: Callable[[], Any], cache_alias: str = 'default') -> Any:
+    """
+    Async version of cached_search, ``fetch`` returns an awaitable.
+
+    Requests of the same event loop share the fetch in flight, the cache and
+    the cross-process lock are used from worker threads. ``fetch`` must be
+    callable from any event loop, stale entries are refreshed on another one.
+    Cancelling the request cancels the API call if it has not completed, the
+    requests waiting for it then fetch it themselves.
+    """
+    from asgiref.sync import sync_to_async
+
+    cache = get_cache(cache_alias)
+    config = _search_cache_settings(params.get('engine', ''))
+    key = search_cache_key(params)
+    loop = asyncio.get_running_loop()
+
+    async def call():
+        return await fetch()
+
+    cancelled = threading.Event()
+    calls = []
+
+    def fetch_sync():
+        if cancelled.is_set():
+            raise CancelledError()
+        call_future = asyncio.run_coroutine_threadsafe(call(), loop)
+        calls.append(call_future)
+        if cancelled.is_set():
+            call_future.cancel()
+        return call_future.result()
+
+    async def fetch_and_store():
+        # The lock and the cache writes run in a worker thread, the API call on this loop
+        return await sync_to_async(_fetch_and_store, thread_sensitive=False)(cache, key, fetch_sync, config)
+
+    entry = await cache.aget(key)
+    state = _entry_state(entry, config)
+    if state == 'fresh':
+        return entry['data']
+
+    if state == 'stale':
+        # The caller's loop may close before a refresh completes, it runs on its own loop
+        _schedule_revalidation(cache, key, lambda: asyncio.run(call()), config)
+        return entry['data']
+
+    inflight_key = (id(loop), key)
+    future = _search_async_inflight.get(inflight_key)
+    if future is not None:
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.cancelled() or asyncio.current_task().cancelling():
+                raise
+            # The request fetching it was cancelled
+            return await acached_search(params, fetch, cache_alias)
+
+    future = _search_async_inflight[inflight_key] = loop.create_future()
+    try:
+        data = await fetch_and_store()
+        future.set_result(data)
+        return data
+    except asyncio.CancelledError:
+        # The worker thread gives the lock back once the call is cancelled
+        cancelled.set()
+        for call_future in list(calls):
+            call_future.cancel()
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Nobody may be waiting on it
+        future.exception()
+        raise
+    finally:
+        _search_async_inflight.pop(inflight_key, None)
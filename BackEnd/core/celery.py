@@ -28,6 +28,31 @@ app.conf.beat_schedule = {
         'schedule': crontab(minute='*/59'),  # Runs every 1 minute
         'options': {'queue': 'warehouse'},
     },
+    'compact-stock-ledger': {
+        'task': 'compact_stock_ledger',
+        'schedule': crontab(minute=30, hour=0),  # Runs every day at 00:30
+        'options': {'queue': 'warehouse'},
+    },
+    'reconcile-warehouse-quantities': {
+        'task': 'reconcile_warehouse_quantities',
+        'schedule': crontab(minute=0, hour=1),  # Runs every day at 01:00
+        'options': {'queue': 'warehouse'},
+    },
+    'reconcile-pending-payrolls': {
+        'task': 'reconcile_pending_payrolls',
+        'schedule': crontab(minute=30, hour=1),  # Runs every day at 01:30
+        'options': {'queue': 'warehouse'},
+    },
+    'check-late-deliveries': {
+        'task': 'check_late_deliveries',
+        'schedule': crontab(minute='*/15'),  # Runs every 15 minutes
+        'options': {'queue': 'warehouse'},
+    },
+    'flush-delivery-locations': {
+        'task': 'flush_delivery_locations',
+        'schedule': settings.DELIVERY_TRACKING['FLUSH_INTERVAL'],  # Runs every FLUSH_INTERVAL seconds
+        'options': {'queue': 'warehouse'},
+    },
     # 'check-specific-product': {
         # 'task': 'check_specific_product',
         # 'schedule': crontab(minute='*/1'),  # Runs every 1 minute
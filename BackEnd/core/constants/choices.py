@@ -136,6 +136,14 @@ MOVEMENTS_STATUS_CHOICES = [
     ('completed', gettext('Completed')),
 ]
 
+STOCK_MOVEMENT_TYPE_CHOICES = [
+    ('inflow', gettext('Inflow')),
+    ('outflow', gettext('Outflow')),
+    ('transfer', gettext('Transfer')),
+    ('adjustment', gettext('Adjustment')),
+    ('opening', gettext('Opening Balance')),
+]
+
 PURCHASE_ORDER_STATUS_CHOICES = [
     ('draft', gettext('Draft')),
     ('pending', gettext('Pending')),
@@ -145,6 +153,13 @@ PURCHASE_ORDER_STATUS_CHOICES = [
     ('completed', gettext('Completed')),
 ]
 
+DOCUMENT_TYPE_CHOICES = [
+    ('load_order', gettext('Load Order')),
+    ('purchase_order', gettext('Purchase Order')),
+    ('delivery', gettext('Delivery')),
+    ('invoice', gettext('Invoice')),
+]
+
 LEAD_STATUS_CHOICES = [
     ('new', gettext('New')),
     ('contacted', gettext('Contacted')),
@@ -152,3 +167,44 @@ LEAD_STATUS_CHOICES = [
     ('converted', gettext('Converted')),
     ('rejected', gettext('Rejected')),
 ]
+
+EXPORT_TYPE_CHOICES = [
+    ('deliveries', gettext('Deliveries')),
+    ('delivery_checkpoints', gettext('Delivery Checkpoints')),
+    ('inflow_items', gettext('Inflow Items')),
+    ('outflow_items', gettext('Outflow Items')),
+    ('transfer_items', gettext('Transfer Items')),
+    ('stock_movements', gettext('Stock Movements')),
+    ('payroll', gettext('Payroll')),
+]
+
+EXPORT_FORMAT_CHOICES = [
+    ('csv', gettext('CSV')),
+    ('xlsx', gettext('Excel (XLSX)')),
+]
+
+EXPORT_STATUS_CHOICES = [
+    ('pending', gettext('Pending')),
+    ('running', gettext('Running')),
+    ('completed', gettext('Completed')),
+    ('failed', gettext('Failed')),
+]
+
+LEAD_GENERATION_STATUS_CHOICES = [
+    ('pending', gettext('Pending')),
+    ('running', gettext('Running')),
+    ('completed', gettext('Completed')),
+    ('failed', gettext('Failed')),
+]
+
+PRICE_REFRESH_STATUS_CHOICES = [
+    ('pending', gettext('Pending')),
+    ('running', gettext('Running')),
+    ('completed', gettext('Completed')),
+    ('failed', gettext('Failed')),
+]
+
+PRICE_SOURCE_CHOICES = [
+    ('home_depot', gettext('Home Depot')),
+    ('manual', gettext('Manual')),
+]
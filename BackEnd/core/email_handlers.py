@@ -134,6 +134,52 @@ class PurchaseOrderEmailHandler(BaseEmailHandler):
         )
         
         
+class DeliveryEmailHandler(BaseEmailHandler):
+    """Handler for delivery related emails"""
+    
+    def build_manager_digest(self, context: Dict[str, Any], to_emails: List[str]) -> List[EmailMessage]:
+        """
+        Build the delivery digest of a company, one message per manager.
+        
+        The template is rendered once for all the managers of the company.
+        
+        Args:
+            context: Context for the email template including:
+                - companie_name: Name of the company
+                - late_deliveries: Late deliveries not alerted yet
+                - status_changes: Status changes since the last digest
+                - generated_at: Time of the digest
+            to_emails: Manager email addresses
+        """
+        html_content, _ = EmailTemplate('delivery/manager_digest').render(context)
+        subject = (
+            f"Deliveries digest - {len(context['late_deliveries'])} late, "
+            f"{len(context['status_changes'])} status changes"
+        )
+        messages = []
+        for to_email in to_emails:
+            email = EmailMessage(
+                subject=subject,
+                body=html_content,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[to_email],
+                connection=self.get_connection()
+            )
+            email.content_subtype = "html"
+            messages.append(email)
+        return messages
+    
+    def send_messages(self, messages: List[EmailMessage]) -> int:
+        """
+        Send messages over a single connection.
+        
+        Returns the number of messages sent, raises on SMTP errors.
+        """
+        if not messages:
+            return 0
+        return self.get_connection().send_messages(messages) or 0
+
+
 class AuthEmailHandler(BaseEmailHandler):
     """Handler for authentication related emails"""
     
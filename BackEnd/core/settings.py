@@ -102,6 +102,9 @@ INSTALLED_APPS = [
     
     #Scheduller
     'apps.scheduller',
+
+    #Exports
+    'apps.exports',
     
 ]
 
@@ -119,6 +122,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'axes.middleware.AxesMiddleware',  # Deve vir após AuthenticationMiddleware
     'crum.CurrentRequestUserMiddleware',
+    'core.actor.ActorContextMiddleware',  # Resolves the acting employeer once per request
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     
@@ -502,6 +506,12 @@ LOGGING = {
             'propagate': True,
             'filters': ['ignore_repeated_errors'],
         },
+        'apps.exports': {
+            'handlers': ['console', 'info_file', 'warning_file', 'error_file'],
+            'level': 'INFO',
+            'propagate': True,
+            'filters': ['ignore_repeated_errors'],
+        },
         'apps.notifications': {
             'handlers': ['console', 'file'],
             'level': 'INFO',
@@ -695,6 +705,20 @@ CACHE_TIMEOUTS = {
     'supplier': 3600,       # 1 hour
     'user': 3600,          # 1 hour
     'company': 3600,       # 1 hour
+    'reports': 7776000,     # 90 days, only closed days are cached
+}
+
+# Paid external searches (SerpAPI) cached per page of the normalized request,
+# served stale for STALE_TTL more seconds while a single refresh runs
+SEARCH_CACHE = {
+    'FRESH_TTL': 3600,      # 1 hour
+    'STALE_TTL': 86400,     # 1 day
+    'LOCK_TIMEOUT': 30,     # seconds a process may hold the fetch of a request
+    'WAIT_TIMEOUT': 10,     # seconds other processes wait for that fetch
+    'ENGINES': {
+        # Prices move faster than business listings
+        'home_depot_product': {'FRESH_TTL': 900, 'STALE_TTL': 3600},
+    },
 }
 
 # Use the default cache for axes
@@ -715,6 +739,18 @@ CHANNEL_LAYERS = {
     },
 }
 
+################################
+##### DELIVERY TRACKING ########
+################################
+# GPS pings are buffered in Redis and written to the database by the
+# flush_delivery_locations task, so each delivery costs at most one location
+# UPDATE per flush and one track point per TRACK_INTERVAL seconds
+DELIVERY_TRACKING = {
+    'FLUSH_INTERVAL': 10,       # seconds between flushes
+    'TRACK_INTERVAL': 30,       # minimum seconds between two track points
+    'MAX_BUFFERED_PINGS': 500,  # pings kept per delivery between flushes
+}
+
 ################################
 ########## CELERY CONFIG #######
 ################################
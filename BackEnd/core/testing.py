@@ -0,0 +1,135 @@
+"""
+Test helpers shared by the apps' test suites.
+"""
+import re
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetMixin:
+    """
+    Assertions guarding endpoints against per-row queries.
+
+    Mix into a TestCase or APITestCase. ``assertQueryBudget`` fails when the
+    request exceeds a fixed number of queries, ``assertFlatQueries`` when the
+    number of queries grows with the number of rows listed.
+    """
+
+    def _count_queries(self, url, params=None):
+        # Responses can be cached, each count has to hit the database
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200, getattr(response, 'data', response))
+        return response, len(queries)
+
+    def assertQueryBudget(self, url, budget, params=None):
+        """Request ``url`` and assert it costs at most ``budget`` queries"""
+        response, count = self._count_queries(url, params)
+        self.assertLessEqual(count, budget, f"{url} ran {count} queries, the budget is {budget}")
+        return response
+
+    def assertFlatQueries(self, url, add_rows, budget, params=None, rows=10):
+        """
+        Assert listing ``url`` costs the same queries before and after
+        ``add_rows(rows)`` creates more rows, and no more than ``budget``.
+
+        Returns:
+            tuple: Number of queries before and after adding the rows
+        """
+        # Warm up the per-process state (content types, permissions...)
+        self._count_queries(url, params)
+        _, small = self._count_queries(url, params)
+        add_rows(rows)
+        response, large = self._count_queries(url, params)
+
+        self.assertEqual(small, large, f"{url} queries grow with the rows listed: {small} -> {large}")
+        self.assertLessEqual(large, budget, f"{url} ran {large} queries, the budget is {budget}")
+        return small, large
+
+
+class QueryPlanMixin:
+    """
+    Assertions guarding list queries against sequential scans.
+
+    Mix into a TestCase or APITestCase. The queries reading ``model``'s table
+    are run again under EXPLAIN, a plan reading the whole table fails, and so
+    does one sorting the rows instead of reading them in index order unless
+    ``allow_sort`` is set. With ``index``, at least one of the plans has to
+    use that index, another index of the table such as a foreign key's does
+    not count. SQLite and PostgreSQL plans are understood.
+    """
+
+    def _explain(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # The seeded tables are tiny, the planner would scan them whatever the indexes
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                try:
+                    cursor.execute(f'EXPLAIN {sql}')
+                    return [str(row[-1]) for row in cursor.fetchall()]
+                finally:
+                    # The test's transaction goes on with the planner's defaults
+                    cursor.execute('RESET enable_seqscan')
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [str(row[-1]) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _plan_uses_index(plan, index):
+        # "SEARCH t USING INDEX name (...)" on SQLite, "Index Scan using name on t"
+        # or "Bitmap Index Scan on name" on PostgreSQL
+        pattern = re.compile(rf'\b(USING INDEX|USING COVERING INDEX|using|Bitmap Index Scan on) {re.escape(index)}\b')
+        return any(pattern.search(line) for line in plan)
+
+    def _plan_problems(self, plan, table, allow_sort):
+        problems = []
+        for line in plan:
+            detail = line.strip().removeprefix('->').strip()
+            if detail == f'SCAN {table}' or detail.startswith((f'SCAN {table} ', f'Seq Scan on {table} ')):
+                problems.append(f'sequential scan of {table}')
+            elif not allow_sort and (
+                detail == 'USE TEMP B-TREE FOR ORDER BY' or detail.startswith(('Sort ', 'Incremental Sort '))
+            ):
+                problems.append('sort of the rows')
+        return problems
+
+    def assertIndexedQueries(self, queries, model, allow_sort=False, index=None):
+        """
+        Assert the captured queries reading ``model``'s table use its indexes,
+        ``index`` among them when given.
+
+        Returns:
+            int: Number of queries explained
+        """
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            self.skipTest(f'No query plan assertions for {connection.vendor}')
+        table = model._meta.db_table
+        explained, plans, uses_index = 0, [], index is None
+        for query in queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or f'FROM "{table}"' not in sql:
+                continue
+            plan = self._explain(sql)
+            problems = self._plan_problems(plan, table, allow_sort)
+            self.assertFalse(problems, f"{', '.join(problems)} in:\n{sql}\n" + '\n'.join(plan))
+            plans.append(f'{sql}\n' + '\n'.join(plan))
+            explained += 1
+            uses_index = uses_index or self._plan_uses_index(plan, index)
+        self.assertTrue(explained, f'No query read {table}')
+        self.assertTrue(uses_index, f'No query read {table} through {index}:\n' + '\n\n'.join(plans))
+        return explained
+
+    def assertIndexedQuery(self, queryset, allow_sort=False, index=None):
+        """Evaluate ``queryset`` and assert it reads its table through an index, ``index`` when given"""
+        with CaptureQueriesContext(connection) as queries:
+            list(queryset)
+        return self.assertIndexedQueries(queries.captured_queries, queryset.model, allow_sort, index)
+
+    def assertIndexedList(self, url, model, allow_sort=False, params=None, index=None):
+        """Request the list endpoint ``url`` and assert it reads ``model``'s table through an index, ``index`` when given"""
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params or {})
+        self.assertEqual(response.status_code, 200, getattr(response, 'data', response))
+        return self.assertIndexedQueries(queries.captured_queries, model, allow_sort, index)
@@ -6,6 +6,7 @@ from apps.accounts.models import User
 from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from jwt.exceptions import InvalidTokenError
+from core.actor import actor_scope
 
 logger = logging.getLogger(__name__)
 
@@ -115,7 +116,9 @@ class UnifiedAuthMiddleware(BaseMiddleware):
             logger.error(f"Authentication middleware error: {str(e)}")
             scope['user'] = AnonymousUser()
 
-        return await super().__call__(scope, receive, send)
+        # The connection acts as its user, whose employeer is resolved once
+        with actor_scope(user=scope['user']):
+            return await super().__call__(scope, receive, send)
 
 def UnifiedAuthMiddlewareStack(inner):
     """Helper function to wrap UnifiedAuthMiddleware around the ASGI application."""